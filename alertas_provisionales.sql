@@ -0,0 +1,32 @@
+-- ============================================================================
+-- TABLA alertas_provisionales PARA COLDTRACK
+-- ============================================================================
+-- Alertas que levanta el detector de anomalías del backend
+-- (apps/sync/anomalias.py) a partir de las lecturas, antes de que el
+-- dispositivo registre un evento de FALLA.
+--
+-- tipo:   EXCURSION, ANOMALIA, SUBIDA_RAPIDA
+-- valor:  temperatura (EXCURSION), z-score (ANOMALIA) o °C/min (SUBIDA_RAPIDA)
+-- estado: ABIERTA, CERRADA
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS alertas_provisionales (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    camara_id BIGINT NOT NULL REFERENCES camaras_frio(id) ON DELETE CASCADE,
+    fecha_inicio TIMESTAMP NOT NULL,
+    fecha_fin TIMESTAMP,
+    tipo TEXT NOT NULL,
+    temperatura_c NUMERIC(5, 2) NOT NULL,
+    valor NUMERIC(10, 3),
+    estado TEXT NOT NULL DEFAULT 'ABIERTA'
+);
+
+CREATE INDEX IF NOT EXISTS idx_alertas_provisionales_camara_fecha
+    ON alertas_provisionales (camara_id, fecha_inicio DESC);
+
+CREATE INDEX IF NOT EXISTS idx_alertas_provisionales_abiertas
+    ON alertas_provisionales (camara_id)
+    WHERE estado = 'ABIERTA';
@@ -14,8 +14,7 @@ Flujo:
 
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
-from firebase_admin import auth as firebase_auth
-from services.firebase_service import initialize_firebase
+from services.firebase_service import firebase_auth, initialize_firebase
 from services.supabase_service import get_supabase_client
 import logging
 
@@ -7,8 +7,7 @@ Endpoints para validar tokens de Firebase y obtener información del usuario.
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
-from firebase_admin import auth as firebase_auth
-from services.firebase_service import initialize_firebase
+from services.firebase_service import firebase_auth, initialize_firebase
 from services.supabase_service import get_supabase_client
 import logging
 
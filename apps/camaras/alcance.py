@@ -0,0 +1,89 @@
+"""
+Alcance de cámaras por sucursal
+
+Un usuario no ADMIN solo ve los datos de las cámaras de su sucursal. En vez
+de resolverlo en cada consulta con un join a camaras_frio
+(camaras_frio!inner(sucursal_id) o camara__sucursal_id), las vistas piden
+aquí los ids de cámara de la sucursal y filtran las tablas de hechos con
+camara_id IN (...), que usa directamente los índices por camara_id.
+
+El mapa sucursal → cámaras se carga con una sola consulta y queda en memoria
+del proceso. Se invalida en el CRUD de cámaras (apps/camaras/views.py) y
+además caduca a los ALCANCE_CAMARAS_TTL segundos, para que los demás workers
+también vean los cambios.
+
+Se incluyen las cámaras desactivadas: la baja es lógica (activa=False) y su
+historial sigue perteneciendo a la sucursal.
+"""
+
+from threading import Lock
+from django.conf import settings
+from services.supabase_service import get_supabase_client
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_lock = Lock()
+_por_sucursal = None
+_cargado_en = 0.0
+
+
+def _cargar(client=None):
+    """Lee (id, sucursal_id) de todas las cámaras y las agrupa por sucursal"""
+    client = client or get_supabase_client(use_service_key=True)
+    response = client.table('camaras_frio')\
+        .select('id, sucursal_id')\
+        .order('id')\
+        .execute()
+    
+    por_sucursal = {}
+    for camara in response.data or []:
+        por_sucursal.setdefault(camara['sucursal_id'], []).append(camara['id'])
+    
+    logger.info(f"Alcance de cámaras cargado: {len(response.data or [])} cámaras en {len(por_sucursal)} sucursales")
+    return {sucursal: tuple(ids) for sucursal, ids in por_sucursal.items()}
+
+
+def camaras_de_sucursal(sucursal_id, client=None):
+    """
+    Ids de las cámaras de una sucursal (tupla ordenada, vacía si no tiene).
+    
+    Args:
+        sucursal_id: ID de la sucursal
+        client: Cliente de Supabase (opcional, solo se usa al recargar)
+    """
+    global _por_sucursal, _cargado_en
+    
+    with _lock:
+        if _por_sucursal is None or time.monotonic() - _cargado_en > settings.ALCANCE_CAMARAS_TTL:
+            _por_sucursal = _cargar(client)
+            _cargado_en = time.monotonic()
+        return _por_sucursal.get(int(sucursal_id), ())
+
+
+def camaras_de_usuario(user, client=None):
+    """
+    Cámaras visibles para el usuario.
+    
+    Returns:
+        None si no hay que filtrar (ADMIN); si no, la tupla de ids de cámara
+        de su sucursal, vacía si no tiene sucursal asignada (igual que
+        filter_by_sucursal)
+    """
+    if not user or user.get('rol') == 'ADMIN':
+        return None
+    
+    sucursal_id = user.get('sucursal_id')
+    if not sucursal_id:
+        return ()
+    
+    return camaras_de_sucursal(sucursal_id, client)
+
+
+def invalidar():
+    """Descarta el mapa en memoria; la próxima consulta lo recarga"""
+    global _por_sucursal
+    
+    with _lock:
+        _por_sucursal = None
@@ -15,6 +15,8 @@ class CamaraFrio(models.Model):
     firebase_path = models.TextField()  # device_id en Firebase
     tipo = models.TextField(default='CAMARA')  # CAMARA, CAMION, BODEGA
     activa = models.BooleanField(default=True)
+    umbral_min_c = models.DecimalField(max_digits=5, decimal_places=2, default=-30.0)  # Rango de cumplimiento
+    umbral_max_c = models.DecimalField(max_digits=5, decimal_places=2, default=4.0)
     
     class Meta:
         db_table = 'camaras_frio'
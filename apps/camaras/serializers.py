@@ -13,5 +13,5 @@ class CamaraFrioSerializer(serializers.ModelSerializer):
     class Meta:
         model = CamaraFrio
         fields = ['id', 'created_at', 'sucursal', 'sucursal_data', 'nombre', 
-                  'codigo', 'firebase_path', 'tipo', 'activa']
+                  'codigo', 'firebase_path', 'tipo', 'activa', 'umbral_min_c', 'umbral_max_c']
         read_only_fields = ['id', 'created_at']
@@ -6,6 +6,7 @@ from rest_framework.response import Response
 from apps.auth.permissions import IsAdmin
 from services.firebase_service import get_live_status
 from services.supabase_service import get_supabase_client
+from . import alcance
 import logging
 
 logger = logging.getLogger(__name__)
@@ -86,6 +87,8 @@ class CamaraFrioViewSet(viewsets.ViewSet):
             
             response = client.table('camaras_frio').insert(request.data).execute()
             
+            alcance.invalidar()
+            
             if response.data and len(response.data) > 0:
                 logger.info(f"Cámara creada: {response.data[0]['nombre']}")
                 return Response(response.data[0], status=status.HTTP_201_CREATED)
@@ -111,6 +114,7 @@ class CamaraFrioViewSet(viewsets.ViewSet):
                 .update(request.data)\
                 .eq('id', pk)\
                 .execute()
+            alcance.invalidar()
             
             if response.data and len(response.data) > 0:
                 logger.info(f"Cámara actualizada: {pk}")
@@ -138,6 +142,7 @@ class CamaraFrioViewSet(viewsets.ViewSet):
                 .update({'activa': False})\
                 .eq('id', pk)\
                 .execute()
+            alcance.invalidar()
             
             if response.data and len(response.data) > 0:
                 logger.info(f"Cámara desactivada: {pk}")
@@ -0,0 +1,595 @@
+"""
+Analytics del Dashboard
+
+Núcleo vectorizado (NumPy) para la vista ejecutiva.
+
+Un período se carga una sola vez en arreglos (epoch en segundos, temperaturas,
+cámaras y códigos de tipo de evento) y luego se agrupa por día, semana, mes o
+cámara con reducciones vectorizadas (bincount / reduceat), sin volver a
+parsear fechas fila por fila.
+
+Las lecturas llegan ya agregadas por día y cámara: cada fila lleva suma,
+cantidad y máximo de temperatura, y los promedios se ponderan por cantidad.
+Vienen de Postgres (apps/dashboard/repositorio.py), de la función
+lecturas_por_dia_camara (lecturas_por_dia.sql) o de resumen_diario_camara;
+solo los días que todavía reciben lecturas se leen una por fila.
+
+Los resultados mantienen exactamente el formato que generaban los helpers
+de apps/dashboard/views.py.
+
+Funciones principales:
+- cargar_periodo(): Carga lecturas y eventos de un rango en un DatosPeriodo
+- comparacion_diaria() / comparacion_semanal() / comparacion_mensual()
+- tendencia_diaria() / tendencia_semanal() / tendencia_mensual()
+- temperaturas_diarias(): Promedio y máximo por día
+- ranking_camaras(): Cámaras con más eventos y más horas de falla
+"""
+
+from datetime import date, datetime, timedelta
+from services.supabase_service import iterar_keyset
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEGUNDOS_DIA = 86400
+
+# Códigos de tipo de evento
+TIPOS_EVENTO = ('DESHIELO_N', 'DESHIELO_P', 'FALLA', 'FALLA_EN_CURSO')
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_EVENTO)}
+CODIGO_OTRO = len(TIPOS_EVENTO)
+CODIGOS_DESHIELO = (CODIGO_TIPO['DESHIELO_N'], CODIGO_TIPO['DESHIELO_P'])
+CODIGOS_FALLA = (CODIGO_TIPO['FALLA'], CODIGO_TIPO['FALLA_EN_CURSO'])
+CODIGOS_CRITICOS = CODIGOS_DESHIELO + CODIGOS_FALLA
+
+
+def a_epoch(timestamps):
+    """
+    Convierte timestamps ISO en segundos epoch (int64).
+    
+    Se usan los primeros 19 caracteres (YYYY-MM-DDTHH:MM:SS), es decir la
+    hora tal como viene en el string, igual que datetime.fromisoformat().strftime().
+    """
+    if not timestamps:
+        return np.empty(0, dtype=np.int64)
+    return np.array(timestamps, dtype='U19').astype('datetime64[s]').astype(np.int64)
+
+
+def _epoch_fecha(fecha):
+    """Epoch en segundos de una fecha ISO (medianoche si no trae hora)"""
+    return int(np.datetime64(fecha[:19], 's').astype(np.int64))
+
+
+class DatosPeriodo:
+    """
+    Lecturas y eventos de un rango [fecha_inicio, fecha_fin T23:59:59] en arreglos.
+    
+    Atributos:
+        lectura_ts, lectura_camara: Columnas de lecturas (o de grupos de lecturas)
+        lectura_suma, lectura_n, lectura_max: Suma, cantidad y máximo de temperatura
+            (para lecturas individuales: temperatura, 1 y temperatura)
+        evento_ts, evento_camara, evento_tipo, evento_duracion: Columnas de eventos
+        eventos: Filas originales de eventos (son pocas; se usan para detalles)
+    """
+    
+    def __init__(self, fecha_inicio, fecha_fin, lecturas, eventos):
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        
+        timestamps, temperaturas, camaras = lecturas
+        self.lectura_ts = a_epoch(timestamps)
+        self.lectura_suma = np.array(temperaturas, dtype=np.float64)
+        self.lectura_n = np.ones(self.lectura_suma.size, dtype=np.int64)
+        self.lectura_max = self.lectura_suma
+        self.lectura_camara = np.array(camaras, dtype=np.int64)
+        
+        self._cargar_eventos(eventos)
+    
+    @classmethod
+    def agregado(cls, fecha_inicio, fecha_fin, lectura_ts, lectura_camara, lectura_suma, lectura_n, lectura_max, eventos):
+        """Período con lecturas ya agrupadas (arreglos de epoch, cámara, suma, cantidad y máximo)"""
+        datos = cls.__new__(cls)
+        datos.fecha_inicio = fecha_inicio
+        datos.fecha_fin = fecha_fin
+        datos.lectura_ts = np.asarray(lectura_ts, dtype=np.int64)
+        datos.lectura_camara = np.asarray(lectura_camara, dtype=np.int64)
+        datos.lectura_suma = np.asarray(lectura_suma, dtype=np.float64)
+        datos.lectura_n = np.asarray(lectura_n, dtype=np.int64)
+        datos.lectura_max = np.asarray(lectura_max, dtype=np.float64)
+        datos._cargar_eventos(eventos)
+        return datos
+    
+    def _cargar_eventos(self, eventos):
+        self.eventos = eventos
+        self.evento_ts = a_epoch([e['fecha_inicio'] for e in eventos])
+        self.evento_camara = np.array([e['camara_id'] for e in eventos], dtype=np.int64)
+        self.evento_tipo = np.array(
+            [CODIGO_TIPO.get(e['tipo'], CODIGO_OTRO) for e in eventos], dtype=np.int8
+        )
+        self.evento_duracion = np.array(
+            [e.get('duracion_minutos', 0) or 0 for e in eventos], dtype=np.float64
+        )
+    
+    @property
+    def temp_promedio(self):
+        """Temperatura promedio de todas las lecturas (0 si no hay)"""
+        total = int(self.lectura_n.sum())
+        return float(self.lectura_suma.sum()) / total if total else 0
+    
+    @property
+    def dias_periodo(self):
+        inicio = datetime.fromisoformat(self.fecha_inicio)
+        fin = datetime.fromisoformat(self.fecha_fin)
+        return (fin - inicio).days + 1
+    
+    def filtrar_camara(self, camara_id):
+        """Retorna un DatosPeriodo solo con la cámara indicada"""
+        camara_id = int(camara_id)
+        filtrado = DatosPeriodo.__new__(DatosPeriodo)
+        filtrado.fecha_inicio = self.fecha_inicio
+        filtrado.fecha_fin = self.fecha_fin
+        
+        mascara = self.lectura_camara == camara_id
+        filtrado.lectura_ts = self.lectura_ts[mascara]
+        filtrado.lectura_suma = self.lectura_suma[mascara]
+        filtrado.lectura_n = self.lectura_n[mascara]
+        filtrado.lectura_max = self.lectura_max[mascara]
+        filtrado.lectura_camara = self.lectura_camara[mascara]
+        
+        mascara = self.evento_camara == camara_id
+        filtrado.eventos = [e for e in self.eventos if e['camara_id'] == camara_id]
+        filtrado.evento_ts = self.evento_ts[mascara]
+        filtrado.evento_camara = self.evento_camara[mascara]
+        filtrado.evento_tipo = self.evento_tipo[mascara]
+        filtrado.evento_duracion = self.evento_duracion[mascara]
+        return filtrado
+
+
+def cargar_periodo(client, fecha_inicio, fecha_fin, chunk_size=1000, camara_ids=None):
+    """
+    Carga lecturas y eventos del período (incluye todo el día final) por PostgREST.
+    
+    Las lecturas se agrupan por día y cámara con la función
+    lecturas_por_dia_camara en una sola llamada. Si no está disponible se
+    usa resumen_diario_camara (ver _lecturas_resumen). Los eventos, que son
+    pocos, se recorren por bloques (keyset).
+    
+    Args:
+        client: Cliente de Supabase
+        fecha_inicio: Fecha inicial (YYYY-MM-DD)
+        fecha_fin: Fecha final (YYYY-MM-DD)
+        chunk_size: Filas por bloque
+        camara_ids: Limitar a estas cámaras (None = todas)
+    
+    Returns:
+        DatosPeriodo
+    """
+    fecha_fin_completa = f"{fecha_fin}T23:59:59"
+    
+    def por_camara(query):
+        return query if camara_ids is None else query.in_('camara_id', camara_ids)
+    
+    try:
+        grupos = client.rpc('lecturas_por_dia_camara', {
+            'p_desde': f'{fecha_inicio}T00:00:00',
+            'p_hasta': fecha_fin_completa,
+            'p_corte': f'{fecha_fin}T00:00:00',
+            'p_camara_ids': None if camara_ids is None else list(camara_ids)
+        }).execute().data or []
+        origen = 'RPC'
+    except Exception as e:
+        logger.warning(f"RPC lecturas_por_dia_camara no disponible, usando resúmenes diarios: {str(e)}")
+        grupos = _lecturas_resumen(client, fecha_inicio, fecha_fin, por_camara, chunk_size)
+        origen = 'resúmenes'
+    
+    eventos = list(iterar_keyset(
+        'eventos_temperatura',
+        'id, camara_id, fecha_inicio, tipo, duracion_minutos, temp_max_c, estado',
+        lambda q: por_camara(q.gte('fecha_inicio', fecha_inicio).lte('fecha_inicio', fecha_fin_completa)),
+        chunk_size,
+        client=client
+    ))
+    
+    columnas = list(zip(*grupos)) if grupos else [()] * 5
+    logger.info(
+        f"Período {fecha_inicio} - {fecha_fin} cargado ({origen}): "
+        f"{int(sum(columnas[3]))} lecturas en {len(grupos)} grupos, {len(eventos)} eventos"
+    )
+    return DatosPeriodo.agregado(
+        fecha_inicio, fecha_fin,
+        lectura_ts=columnas[0],
+        lectura_camara=columnas[1],
+        lectura_suma=[float(suma) for suma in columnas[2]],
+        lectura_n=columnas[3],
+        lectura_max=[float(maximo) for maximo in columnas[4]],
+        eventos=eventos
+    )
+
+
+def _lecturas_resumen(client, fecha_inicio, fecha_fin, por_camara, chunk_size=1000):
+    """
+    Grupos [epoch, cámara, suma, cantidad, máximo] desde resumen_diario_camara.
+    
+    Los días desde ayer todavía reciben lecturas y su resumen puede estar
+    incompleto: esos se agrupan desde las lecturas crudas, igual que los
+    días anteriores sin ninguna fila de resumen (p. ej. si el job no corrió).
+    Cada resumen se fecha al mediodía, así temperaturas_diarias (que solo
+    mira hasta fecha_fin 00:00:00) no lo cuenta en el último día.
+    """
+    desde_crudas = max(fecha_inicio, (datetime.now().date() - timedelta(days=1)).isoformat())
+    grupos = []
+    
+    if fecha_inicio < desde_crudas:
+        def rango_resumen(q):
+            q = q.gte('fecha', fecha_inicio)
+            return por_camara(q.lt('fecha', desde_crudas) if desde_crudas <= fecha_fin else q.lte('fecha', fecha_fin))
+        
+        resumenes = iterar_keyset(
+            'resumen_diario_camara',
+            'id, fecha, camara_id, temp_promedio, temp_max, total_lecturas',
+            rango_resumen,
+            chunk_size,
+            client=client,
+            orden='fecha'
+        )
+        dias_con_resumen = set()
+        for resumen in resumenes:
+            dias_con_resumen.add(resumen['fecha'][:10])
+            n = resumen.get('total_lecturas') or 0
+            if not n or resumen.get('temp_promedio') is None:
+                continue
+            grupos.append([
+                _epoch_fecha(resumen['fecha']) + SEGUNDOS_DIA // 2, resumen['camara_id'],
+                float(resumen['temp_promedio']) * n, n, float(resumen['temp_max'])
+            ])
+        
+        ultimo_resumen = min(date.fromisoformat(desde_crudas[:10]) - timedelta(days=1), date.fromisoformat(fecha_fin[:10]))
+        for desde, hasta in _tramos_sin_resumen(date.fromisoformat(fecha_inicio[:10]), ultimo_resumen, dias_con_resumen):
+            grupos.extend(_grupos_crudas(
+                client, desde.isoformat(), f"{hasta.isoformat()}T23:59:59", fecha_fin, por_camara, chunk_size
+            ))
+    
+    if desde_crudas <= fecha_fin:
+        grupos.extend(_grupos_crudas(client, desde_crudas, f"{fecha_fin}T23:59:59", fecha_fin, por_camara, chunk_size))
+    
+    return grupos
+
+
+def _tramos_sin_resumen(desde, hasta, dias_con_resumen):
+    """Tramos (primer día, último día) de días seguidos entre desde y hasta sin fila de resumen"""
+    tramos = []
+    dia = desde
+    while dia <= hasta:
+        if dia.isoformat() not in dias_con_resumen:
+            if tramos and tramos[-1][1] == dia - timedelta(days=1):
+                tramos[-1] = (tramos[-1][0], dia)
+            else:
+                tramos.append((dia, dia))
+        dia += timedelta(days=1)
+    return tramos
+
+
+def _grupos_crudas(client, desde, hasta, fecha_fin, por_camara, chunk_size):
+    """
+    Grupos [epoch mínimo, cámara, suma, cantidad, máximo] por día y cámara de
+    las lecturas crudas entre desde y hasta (inclusive). Las de fecha_fin
+    00:00:00 van en un grupo aparte, como en la agregación SQL.
+    """
+    timestamps = []
+    temperaturas = []
+    camaras = []
+    lecturas = iterar_keyset(
+        'lecturas_temperatura',
+        'id, timestamp, temperatura_c, camara_id',
+        lambda q: por_camara(q.gte('timestamp', desde).lte('timestamp', hasta)),
+        chunk_size,
+        client=client,
+        orden='timestamp'
+    )
+    for lectura in lecturas:
+        timestamps.append(lectura['timestamp'])
+        temperaturas.append(float(lectura['temperatura_c']))
+        camaras.append(lectura['camara_id'])
+    
+    if not timestamps:
+        return []
+    
+    ts = a_epoch(timestamps)
+    temperaturas = np.array(temperaturas, dtype=np.float64)
+    claves = np.column_stack((_dias(ts), np.array(camaras, dtype=np.int64), ts == _epoch_fecha(fecha_fin)))
+    claves, idx = np.unique(claves, axis=0, return_inverse=True)
+    idx = idx.ravel()
+    minimos = np.full(len(claves), np.iinfo(np.int64).max)
+    np.minimum.at(minimos, idx, ts)
+    maximos = np.full(len(claves), -np.inf)
+    np.maximum.at(maximos, idx, temperaturas)
+    sumas = np.bincount(idx, weights=temperaturas, minlength=len(claves))
+    cantidades = np.bincount(idx, minlength=len(claves))
+    return [
+        list(grupo) for grupo in zip(
+            minimos.tolist(), claves[:, 1].tolist(), sumas.tolist(), cantidades.tolist(), maximos.tolist()
+        )
+    ]
+
+
+# ============================================================================
+# Reducciones por bucket
+# ============================================================================
+
+def sumar_por_bucket(indices, n, pesos=None):
+    """Cuenta (o suma `pesos`) por bucket 0..n-1 ignorando índices fuera de rango"""
+    valido = (indices >= 0) & (indices < n)
+    if pesos is not None:
+        pesos = pesos[valido]
+    return np.bincount(indices[valido], weights=pesos, minlength=n)[:n]
+
+
+def promedio_por_bucket(indices, n, valores, cantidades=None):
+    """
+    Promedio por bucket (0 si el bucket no tiene valores).
+    
+    Si se pasan `cantidades`, `valores` son sumas de grupos de esa cantidad.
+    """
+    suma = sumar_por_bucket(indices, n, valores)
+    cuenta = sumar_por_bucket(indices, n, None if cantidades is None else cantidades.astype(np.float64))
+    promedio = np.zeros(n)
+    np.divide(suma, cuenta, out=promedio, where=cuenta > 0)
+    return promedio
+
+
+def maximo_por_grupo(claves, valores):
+    """
+    Máximo de `valores` por cada clave distinta.
+    
+    Returns:
+        (claves_unicas, maximos) ordenados por clave
+    """
+    if claves.size == 0:
+        return claves, valores
+    orden = np.argsort(claves, kind='stable')
+    claves = claves[orden]
+    inicios = np.flatnonzero(np.r_[True, claves[1:] != claves[:-1]])
+    return claves[inicios], np.maximum.reduceat(valores[orden], inicios)
+
+
+def _dias(ts):
+    """Día epoch (días desde 1970-01-01) de cada timestamp"""
+    return ts // SEGUNDOS_DIA
+
+
+def _lunes(dias):
+    """Día epoch del lunes de la semana (1970-01-01 fue jueves)"""
+    return dias - (dias + 3) % 7
+
+
+def _meses(ts):
+    """Mes epoch (meses desde 1970-01) de cada timestamp"""
+    return ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+
+def _fecha_de_dia(dia):
+    return datetime(1970, 1, 1) + timedelta(days=int(dia))
+
+
+def _fecha_de_mes(mes):
+    return datetime(1970 + int(mes) // 12, int(mes) % 12 + 1, 1)
+
+
+def _horas(datos, codigos, indices, n):
+    """Horas de eventos de los tipos `codigos` por bucket"""
+    mascara = np.isin(datos.evento_tipo, codigos)
+    return sumar_por_bucket(indices[mascara], n, datos.evento_duracion[mascara] / 60.0)
+
+
+# ============================================================================
+# Agrupaciones de la vista ejecutiva
+# ============================================================================
+
+def _buckets_diarios(datos):
+    """(índice de día de cada lectura, de cada evento, cantidad de días, primer día)"""
+    dia_inicial = _dias(_epoch_fecha(datos.fecha_inicio))
+    n = datos.dias_periodo
+    return _dias(datos.lectura_ts) - dia_inicial, _dias(datos.evento_ts) - dia_inicial, n, dia_inicial
+
+
+def comparacion_diaria(datos):
+    """Eventos, horas de falla y temperatura promedio por día"""
+    idx_lecturas, idx_eventos, n, dia_inicial = _buckets_diarios(datos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_falla = _horas(datos, CODIGOS_FALLA, idx_eventos, n)
+    temp_promedio = promedio_por_bucket(idx_lecturas, n, datos.lectura_suma, datos.lectura_n)
+    
+    resultado = [{
+        'periodo': _fecha_de_dia(dia_inicial + i).strftime('%d/%m'),
+        'eventos': int(eventos[i]),
+        'horasFalla': round(float(horas_falla[i]), 1),
+        'tempPromedio': round(float(temp_promedio[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    return resultado
+
+
+def tendencia_diaria(datos):
+    """Eventos y horas críticas (deshielo + falla) por día"""
+    _, idx_eventos, n, dia_inicial = _buckets_diarios(datos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_criticas = _horas(datos, CODIGOS_CRITICOS, idx_eventos, n)
+    
+    resultado = [{
+        'periodo': _fecha_de_dia(dia_inicial + i).strftime('%d/%m'),
+        'eventos': int(eventos[i]),
+        'horasCriticas': round(float(horas_criticas[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    return resultado
+
+
+def _buckets_semanales(datos):
+    """
+    Semanas (lunes) de fecha_inicio + 7k mientras no pase fecha_fin.
+    
+    Returns:
+        (índice de semana de cada lectura, de cada evento, cantidad, primer lunes)
+    """
+    lunes_inicial = _lunes(_dias(_epoch_fecha(datos.fecha_inicio)))
+    n = (datos.dias_periodo - 1) // 7 + 1
+    idx_lecturas = (_lunes(_dias(datos.lectura_ts)) - lunes_inicial) // 7
+    idx_eventos = (_lunes(_dias(datos.evento_ts)) - lunes_inicial) // 7
+    return idx_lecturas, idx_eventos, n, lunes_inicial
+
+
+def comparacion_semanal(datos):
+    """Eventos, horas de falla y temperatura promedio por semana"""
+    idx_lecturas, idx_eventos, n, lunes_inicial = _buckets_semanales(datos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_falla = _horas(datos, CODIGOS_FALLA, idx_eventos, n)
+    temp_promedio = promedio_por_bucket(idx_lecturas, n, datos.lectura_suma, datos.lectura_n)
+    
+    resultado = [{
+        'periodo': f"Sem {_fecha_de_dia(lunes_inicial + 7 * i).strftime('%d/%m')}",
+        'eventos': int(eventos[i]),
+        'horasFalla': round(float(horas_falla[i]), 1),
+        'tempPromedio': round(float(temp_promedio[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    return resultado
+
+
+def tendencia_semanal(datos):
+    """Eventos y horas críticas por semana (omite semanas vacías si hay suficientes datos)"""
+    _, idx_eventos, n, lunes_inicial = _buckets_semanales(datos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_criticas = _horas(datos, CODIGOS_CRITICOS, idx_eventos, n)
+    
+    resultado = [{
+        'periodo': f"Sem {_fecha_de_dia(lunes_inicial + 7 * i).strftime('%d/%m')}",
+        'eventos': int(eventos[i]),
+        'horasCriticas': round(float(horas_criticas[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    
+    # Con pocos períodos con datos se mantienen los vacíos para dar contexto
+    datos_con_eventos = [r for r in resultado if r['eventos'] > 0]
+    if len(datos_con_eventos) <= 2 and len(resultado) > len(datos_con_eventos):
+        return resultado
+    return datos_con_eventos
+
+
+def comparacion_mensual(datos):
+    """Eventos, horas de falla y temperatura promedio por mes (solo meses con datos)"""
+    meses_lecturas = _meses(datos.lectura_ts)
+    meses_eventos = _meses(datos.evento_ts)
+    meses = np.unique(np.concatenate([meses_eventos, meses_lecturas]))
+    if meses.size == 0:
+        return []
+    
+    n = meses.size
+    idx_lecturas = np.searchsorted(meses, meses_lecturas)
+    idx_eventos = np.searchsorted(meses, meses_eventos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_falla = _horas(datos, CODIGOS_FALLA, idx_eventos, n)
+    temp_promedio = promedio_por_bucket(idx_lecturas, n, datos.lectura_suma, datos.lectura_n)
+    
+    resultado = [{
+        'periodo': _fecha_de_mes(meses[i]).strftime('%b %Y'),
+        'eventos': int(eventos[i]),
+        'horasFalla': round(float(horas_falla[i]), 1),
+        'tempPromedio': round(float(temp_promedio[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    return resultado
+
+
+def tendencia_mensual(datos):
+    """Eventos y horas críticas por mes (solo meses con eventos)"""
+    meses_eventos = _meses(datos.evento_ts)
+    meses = np.unique(meses_eventos)
+    if meses.size == 0:
+        return []
+    
+    n = meses.size
+    idx_eventos = np.searchsorted(meses, meses_eventos)
+    
+    eventos = sumar_por_bucket(idx_eventos, n)
+    horas_criticas = _horas(datos, CODIGOS_CRITICOS, idx_eventos, n)
+    
+    resultado = [{
+        'periodo': _fecha_de_mes(meses[i]).strftime('%b %Y'),
+        'eventos': int(eventos[i]),
+        'horasCriticas': round(float(horas_criticas[i]), 1)
+    } for i in range(n)]
+    
+    resultado.sort(key=lambda x: x['periodo'])
+    return resultado
+
+
+def temperaturas_diarias(datos):
+    """
+    Temperatura promedio y máxima por día.
+    
+    Como la consulta original (`lte fecha_fin` sin hora), solo considera
+    lecturas hasta fecha_fin a las 00:00:00.
+    """
+    mascara = datos.lectura_ts <= _epoch_fecha(datos.fecha_fin)
+    dias = _dias(datos.lectura_ts[mascara])
+    if dias.size == 0:
+        return []
+    
+    dias_unicos, maximos = maximo_por_grupo(dias, datos.lectura_max[mascara])
+    idx = np.searchsorted(dias_unicos, dias)
+    promedios = promedio_por_bucket(idx, dias_unicos.size, datos.lectura_suma[mascara], datos.lectura_n[mascara])
+    
+    return [{
+        'fecha': _fecha_de_dia(dia).strftime('%Y-%m-%d'),
+        'tempPromedio': round(float(promedio), 1),
+        'tempMaxima': round(float(maximo), 1),
+        'umbralCritico': 4.0  # Línea de referencia
+    } for dia, promedio, maximo in zip(dias_unicos, promedios, maximos)]
+
+
+def ranking_camaras(datos):
+    """
+    Top 5 de cámaras por cantidad de eventos y por horas de falla.
+    
+    Como la consulta original (`lte fecha_fin` sin hora), solo considera
+    eventos hasta fecha_fin a las 00:00:00.
+    """
+    mascara = datos.evento_ts <= _epoch_fecha(datos.fecha_fin)
+    camaras_evento = datos.evento_camara[mascara]
+    tipos = datos.evento_tipo[mascara]
+    duraciones = datos.evento_duracion[mascara]
+    
+    # Cámaras en orden de primera aparición (desempate igual que antes)
+    camaras, primera_aparicion, idx = np.unique(
+        camaras_evento, return_index=True, return_inverse=True
+    )
+    n = camaras.size
+    eventos = sumar_por_bucket(idx, n)
+    es_falla = np.isin(tipos, CODIGOS_FALLA)
+    horas_falla = sumar_por_bucket(idx[es_falla], n, duraciones[es_falla] / 60.0)
+    
+    lista_camaras = [{
+        'id': int(camaras[i]),
+        'nombre': f'Cámara {int(camaras[i])}',
+        'eventos': int(eventos[i]),
+        # Redondeadas una vez para todas las entradas (los dicts se comparten entre ambas listas)
+        'horasFalla': round(float(horas_falla[i]), 1)
+    } for i in np.argsort(primera_aparicion, kind='stable')]
+    
+    mas_eventos = sorted(lista_camaras, key=lambda x: x['eventos'], reverse=True)[:5]
+    mas_fallas = sorted(lista_camaras, key=lambda x: x['horasFalla'], reverse=True)[:5]
+    
+    return {
+        'masEventos': mas_eventos,
+        'masFallas': mas_fallas
+    }
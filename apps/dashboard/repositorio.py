@@ -0,0 +1,347 @@
+"""
+Repositorio de Analytics
+
+Consultas pesadas del dashboard con dos implementaciones:
+
+- Postgres directo (settings.SUPABASE_DIRECT_DB): agregados SQL con el ORM
+  sobre los modelos no gestionados (date_trunc, AVG, COUNT ... FILTER), así
+  solo viajan filas ya agrupadas. Usa la conexión persistente de Django
+  (DB_CONN_MAX_AGE en settings.py).
+- PostgREST (sin DATABASE_URL): las filas se traen por Supabase y se agregan
+  en Python. El período de la vista ejecutiva no recorre las lecturas
+  crudas: usa la función lecturas_por_dia_camara o resumen_diario_camara
+  (ver analytics.cargar_periodo).
+
+Si la consulta SQL falla (p. ej. la base no está disponible) se registra el
+error y se usa PostgREST.
+
+Funciones principales:
+- cargar_periodo(): DatosPeriodo de la vista ejecutiva
+- totales_periodo(): Temperatura promedio y horas de evento de un rango
+- resumen_diario(): Mín/máx/promedio de temperatura y eventos por día
+"""
+
+from datetime import datetime, timezone
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Avg, BooleanField, Count, ExpressionWrapper, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncDay
+from apps.lecturas.models import LecturaTemperatura
+from apps.eventos.models import EventoTemperatura
+from services.supabase_service import iterar_keyset
+from . import analytics
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIPOS_DESHIELO = ['DESHIELO_N', 'DESHIELO_P']
+TIPOS_FALLA = ['FALLA', 'FALLA_EN_CURSO']
+
+COLUMNAS_EVENTO = ('id', 'camara_id', 'fecha_inicio', 'tipo', 'duracion_minutos', 'temp_max_c', 'estado')
+
+
+def usa_sql():
+    """True si las tablas de ColdTrack son accesibles por la conexión de Django"""
+    return settings.SUPABASE_DIRECT_DB
+
+
+def _fecha_utc(fecha):
+    """'YYYY-MM-DD' o 'YYYY-MM-DDTHH:MM:SS' → datetime aware en UTC (la zona de la base)"""
+    return datetime.fromisoformat(fecha[:19]).replace(tzinfo=timezone.utc)
+
+
+def _con_fallback(nombre, sql, postgrest):
+    if usa_sql():
+        try:
+            return sql()
+        except DatabaseError as e:
+            logger.error(f"Error SQL en {nombre}, usando PostgREST: {str(e)}")
+    return postgrest()
+
+
+# ============================================================================
+# Período de la vista ejecutiva
+# ============================================================================
+
+def cargar_periodo(client, fecha_inicio, fecha_fin, camara_ids=None):
+    """
+    Lecturas y eventos del período (incluye todo el día final).
+    
+    camara_ids limita el período a esas cámaras (ver apps/camaras/alcance.py);
+    None = todas.
+    
+    Returns:
+        analytics.DatosPeriodo
+    """
+    return _con_fallback(
+        'cargar_periodo',
+        lambda: cargar_periodo_sql(fecha_inicio, fecha_fin, camara_ids),
+        lambda: analytics.cargar_periodo(client, fecha_inicio, fecha_fin, camara_ids=camara_ids)
+    )
+
+
+def cargar_periodo_sql(fecha_inicio, fecha_fin, camara_ids=None):
+    """
+    Lecturas agrupadas por (día, cámara) con suma, cantidad y máximo.
+    
+    Las lecturas de exactamente fecha_fin 00:00:00 van en un grupo aparte
+    (su timestamp representativo es el mínimo del grupo), porque
+    temperaturas_diarias solo considera esas del último día.
+    """
+    inicio = _fecha_utc(fecha_inicio)
+    fin = _fecha_utc(f"{fecha_fin}T23:59:59")
+    corte = _fecha_utc(fecha_fin)
+    
+    lecturas = LecturaTemperatura.objects.filter(timestamp__gte=inicio, timestamp__lte=fin)
+    eventos_periodo = EventoTemperatura.objects.filter(fecha_inicio__gte=inicio, fecha_inicio__lte=fin)
+    if camara_ids is not None:
+        lecturas = lecturas.filter(camara_id__in=camara_ids)
+        eventos_periodo = eventos_periodo.filter(camara_id__in=camara_ids)
+    
+    grupos = lecturas\
+        .annotate(
+            dia=TruncDay('timestamp'),
+            en_corte=ExpressionWrapper(Q(timestamp=corte), output_field=BooleanField())
+        )\
+        .values('dia', 'camara_id', 'en_corte')\
+        .annotate(
+            ts=Min('timestamp'),
+            suma=Sum('temperatura_c'),
+            n=Count('id'),
+            maximo=Max('temperatura_c')
+        )\
+        .order_by('dia', 'camara_id')
+    grupos = list(grupos)
+    
+    eventos = []
+    for evento in eventos_periodo\
+            .order_by('id')\
+            .values(*COLUMNAS_EVENTO)\
+            .iterator(chunk_size=2000):
+        evento['fecha_inicio'] = evento['fecha_inicio'].isoformat()
+        evento['temp_max_c'] = float(evento['temp_max_c']) if evento['temp_max_c'] is not None else None
+        eventos.append(evento)
+    
+    logger.info(
+        f"Período {fecha_inicio} - {fecha_fin} cargado (SQL): "
+        f"{sum(g['n'] for g in grupos)} lecturas en {len(grupos)} grupos, {len(eventos)} eventos"
+    )
+    return analytics.DatosPeriodo.agregado(
+        fecha_inicio, fecha_fin,
+        lectura_ts=[int(g['ts'].timestamp()) for g in grupos],
+        lectura_camara=[g['camara_id'] for g in grupos],
+        lectura_suma=[float(g['suma']) for g in grupos],
+        lectura_n=[g['n'] for g in grupos],
+        lectura_max=[float(g['maximo']) for g in grupos],
+        eventos=eventos
+    )
+
+
+# ============================================================================
+# Totales de un rango (período anterior de los KPIs ejecutivos)
+# ============================================================================
+
+def totales_periodo(client, desde, hasta, camara_id=None, camara_ids=None):
+    """
+    Totales de lecturas y eventos en [desde, hasta), de una cámara
+    (camara_id) o de un conjunto de cámaras (camara_ids; None = todas).
+    
+    Returns:
+        {'temp_promedio': float o None si no hay lecturas, 'total_eventos',
+         'horas_deshielo', 'horas_falla'}
+    """
+    return _con_fallback(
+        'totales_periodo',
+        lambda: _totales_sql(desde, hasta, camara_id, camara_ids),
+        lambda: _totales_postgrest(client, desde, hasta, camara_id, camara_ids)
+    )
+
+
+def _totales_sql(desde, hasta, camara_id, camara_ids):
+    lecturas = LecturaTemperatura.objects.filter(timestamp__gte=_fecha_utc(desde), timestamp__lt=_fecha_utc(hasta))
+    eventos = EventoTemperatura.objects.filter(fecha_inicio__gte=_fecha_utc(desde), fecha_inicio__lt=_fecha_utc(hasta))
+    if camara_id:
+        lecturas = lecturas.filter(camara_id=camara_id)
+        eventos = eventos.filter(camara_id=camara_id)
+    if camara_ids is not None:
+        lecturas = lecturas.filter(camara_id__in=camara_ids)
+        eventos = eventos.filter(camara_id__in=camara_ids)
+    
+    temp = lecturas.aggregate(promedio=Avg('temperatura_c'))['promedio']
+    totales = eventos.aggregate(
+        total=Count('id'),
+        minutos_deshielo=Sum('duracion_minutos', filter=Q(tipo__in=TIPOS_DESHIELO)),
+        minutos_falla=Sum('duracion_minutos', filter=Q(tipo__in=TIPOS_FALLA))
+    )
+    return {
+        'temp_promedio': float(temp) if temp is not None else None,
+        'total_eventos': totales['total'],
+        'horas_deshielo': (totales['minutos_deshielo'] or 0) / 60.0,
+        'horas_falla': (totales['minutos_falla'] or 0) / 60.0,
+    }
+
+
+def _totales_postgrest(client, desde, hasta, camara_id, camara_ids):
+    # Por bloques keyset: un solo execute() quedaría cortado en 1000 filas
+    def rango(columna):
+        def aplicar(query):
+            query = query.gte(columna, desde).lt(columna, hasta)
+            if camara_id:
+                query = query.eq('camara_id', camara_id)
+            if camara_ids is not None:
+                query = query.in_('camara_id', camara_ids)
+            return query
+        return aplicar
+    
+    lecturas = iterar_keyset(
+        'lecturas_temperatura', 'id, timestamp, temperatura_c', rango('timestamp'),
+        client=client, orden='timestamp'
+    )
+    suma = 0.0
+    n = 0
+    for lectura in lecturas:
+        suma += float(lectura['temperatura_c'])
+        n += 1
+    temp_promedio = suma / n if n else None
+    
+    eventos = list(iterar_keyset(
+        'eventos_temperatura', 'id, fecha_inicio, tipo, duracion_minutos', rango('fecha_inicio'),
+        client=client, orden='fecha_inicio'
+    ))
+    horas_deshielo = 0
+    horas_falla = 0
+    for evento in eventos:
+        duracion_horas = (evento.get('duracion_minutos', 0) or 0) / 60.0
+        if evento['tipo'] in TIPOS_DESHIELO:
+            horas_deshielo += duracion_horas
+        elif evento['tipo'] in TIPOS_FALLA:
+            horas_falla += duracion_horas
+    
+    return {
+        'temp_promedio': temp_promedio,
+        'total_eventos': len(eventos),
+        'horas_deshielo': horas_deshielo,
+        'horas_falla': horas_falla,
+    }
+
+
+# ============================================================================
+# Resumen diario (resumen semanal del dashboard)
+# ============================================================================
+
+def resumen_diario(client, desde, camara_ids=None):
+    """
+    Temperatura mín/máx/promedio y cantidad de deshielos y fallas por día,
+    para los días con lecturas desde `desde` (YYYY-MM-DD), de las cámaras
+    camara_ids (None = todas).
+    
+    Returns:
+        Lista ordenada por fecha de {'fecha', 'temp_min', 'temp_max',
+        'temp_promedio', 'alertas', 'fallas'}
+    """
+    return _con_fallback(
+        'resumen_diario',
+        lambda: _resumen_diario_sql(desde, camara_ids),
+        lambda: _resumen_diario_postgrest(client, desde, camara_ids)
+    )
+
+
+def _resumen_diario_sql(desde, camara_ids):
+    lecturas = LecturaTemperatura.objects.filter(timestamp__gte=_fecha_utc(desde))
+    eventos = EventoTemperatura.objects.filter(fecha_inicio__gte=_fecha_utc(desde))
+    if camara_ids is not None:
+        lecturas = lecturas.filter(camara_id__in=camara_ids)
+        eventos = eventos.filter(camara_id__in=camara_ids)
+    
+    por_fecha = lecturas\
+        .annotate(fecha=TruncDate('timestamp'))\
+        .values('fecha')\
+        .annotate(
+            temp_min=Min('temperatura_c'),
+            temp_max=Max('temperatura_c'),
+            temp_promedio=Avg('temperatura_c')
+        )\
+        .order_by('fecha')
+    
+    eventos_por_fecha = eventos\
+        .annotate(fecha=TruncDate('fecha_inicio'))\
+        .values('fecha')\
+        .annotate(
+            alertas=Count('id', filter=Q(tipo__in=TIPOS_DESHIELO)),
+            fallas=Count('id', filter=Q(tipo__in=TIPOS_FALLA))
+        )\
+        .order_by()
+    conteos = {fila['fecha']: fila for fila in eventos_por_fecha}
+    
+    resultado = []
+    for fila in por_fecha:
+        eventos_dia = conteos.get(fila['fecha'], {})
+        resultado.append({
+            'fecha': fila['fecha'].isoformat(),
+            'temp_min': round(float(fila['temp_min']), 2),
+            'temp_max': round(float(fila['temp_max']), 2),
+            'temp_promedio': round(float(fila['temp_promedio']), 2),
+            'alertas': eventos_dia.get('alertas', 0),
+            'fallas': eventos_dia.get('fallas', 0),
+        })
+    return resultado
+
+
+def _resumen_diario_postgrest(client, desde, camara_ids):
+    def rango_lecturas(query):
+        query = query.gte('timestamp', desde)
+        return query if camara_ids is None else query.in_('camara_id', camara_ids)
+    
+    lecturas = iterar_keyset(
+        'lecturas_temperatura', 'id, timestamp, temperatura_c', rango_lecturas,
+        client=client, orden='timestamp'
+    )
+    
+    # Agrupar por fecha
+    por_fecha = {}
+    for lectura in lecturas:
+        fecha_str = lectura['timestamp'][:10]  # YYYY-MM-DD
+        temp = float(lectura['temperatura_c'])
+        
+        if fecha_str not in por_fecha:
+            por_fecha[fecha_str] = {
+                'fecha': fecha_str,
+                'temp_min': temp,
+                'temp_max': temp,
+                'temps': [temp],
+            }
+        else:
+            por_fecha[fecha_str]['temp_min'] = min(por_fecha[fecha_str]['temp_min'], temp)
+            por_fecha[fecha_str]['temp_max'] = max(por_fecha[fecha_str]['temp_max'], temp)
+            por_fecha[fecha_str]['temps'].append(temp)
+    
+    # Eventos de todo el rango en una sola consulta, contados por día
+    conteos = {}
+    if por_fecha:
+        def rango_eventos(query):
+            query = query.gte('fecha_inicio', f'{min(por_fecha)}T00:00:00')
+            return query if camara_ids is None else query.in_('camara_id', camara_ids)
+        
+        eventos = iterar_keyset('eventos_temperatura', 'id, fecha_inicio, tipo', rango_eventos, client=client)
+        for evento in eventos:
+            conteo = conteos.setdefault(evento['fecha_inicio'][:10], {'alertas': 0, 'fallas': 0})
+            if evento['tipo'] in TIPOS_DESHIELO:
+                conteo['alertas'] += 1
+            elif evento['tipo'] in TIPOS_FALLA:
+                conteo['fallas'] += 1
+    
+    resultado = []
+    for fecha_str, data in por_fecha.items():
+        temp_promedio = sum(data['temps']) / len(data['temps'])
+        eventos_dia = conteos.get(fecha_str, {})
+        resultado.append({
+            'fecha': fecha_str,
+            'temp_min': round(data['temp_min'], 2),
+            'temp_max': round(data['temp_max'], 2),
+            'temp_promedio': round(temp_promedio, 2),
+            'alertas': eventos_dia.get('alertas', 0),
+            'fallas': eventos_dia.get('fallas', 0),
+        })
+    
+    resultado.sort(key=lambda x: x['fecha'])
+    return resultado
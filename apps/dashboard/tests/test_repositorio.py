@@ -0,0 +1,128 @@
+"""
+Tests del repositorio de analytics (apps/dashboard/repositorio.py)
+
+Comparan las consultas SQL (ORM sobre SQLite, con las tablas no gestionadas
+creadas por el test) con el camino PostgREST sobre el cliente en memoria de
+services/supabase_local.py, con el mismo dataset sintético:
+    python manage.py test apps.dashboard
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import math
+
+from django.db import connection
+from django.test import TestCase
+
+from apps.camaras.models import CamaraFrio
+from apps.dashboard import analytics, repositorio
+from apps.eventos.models import EventoTemperatura
+from apps.lecturas.models import LecturaTemperatura
+from apps.sucursales.models import Sucursal
+from services.supabase_local import ClienteLocal
+from services.synthetic_data import generar_dataset
+
+MODELOS = (Sucursal, CamaraFrio, LecturaTemperatura, EventoTemperatura)
+HELPERS = (
+    'comparacion_diaria', 'tendencia_diaria', 'comparacion_semanal', 'tendencia_semanal',
+    'comparacion_mensual', 'tendencia_mensual', 'temperaturas_diarias', 'ranking_camaras',
+)
+
+
+def _fila_modelo(modelo, fila):
+    """Fila del dataset con solo las columnas del modelo, fechas aware y decimales"""
+    campos = {campo.attname: campo for campo in modelo._meta.concrete_fields}
+    valores = {}
+    for columna, valor in fila.items():
+        campo = campos.get(columna)
+        if campo is None:
+            continue
+        if valor is not None and campo.get_internal_type() == 'DateTimeField':
+            valor = datetime.fromisoformat(valor).replace(tzinfo=timezone.utc)
+        elif valor is not None and campo.get_internal_type() == 'DecimalField':
+            valor = Decimal(str(valor))
+        valores[columna] = valor
+    return modelo(**valores)
+
+
+class RepositorioSqlPostgrestTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Las tablas de Supabase no son gestionadas por Django: se crean aquí
+        with connection.schema_editor() as editor:
+            for modelo in MODELOS:
+                editor.create_model(modelo)
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for modelo in reversed(MODELOS):
+                editor.delete_model(modelo)
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoy = date.today()
+        cls.dataset = generar_dataset(camaras=3, sucursales=1, dias=10, fin=cls.hoy, seed=7)
+        tablas = cls.dataset.tablas
+        for modelo, tabla in zip(MODELOS, ('sucursales', 'camaras_frio', 'lecturas_temperatura', 'eventos_temperatura')):
+            modelo.objects.bulk_create([_fila_modelo(modelo, fila) for fila in tablas[tabla]], batch_size=2000)
+    
+    def cliente(self, **kwargs):
+        return ClienteLocal(self.dataset.tablas, **kwargs)
+    
+    def assertMismoPeriodo(self, camara_ids=None, cliente=None):
+        fecha_inicio = (self.hoy - timedelta(days=8)).isoformat()
+        fecha_fin = self.hoy.isoformat()
+        
+        sql = repositorio.cargar_periodo_sql(fecha_inicio, fecha_fin, camara_ids)
+        postgrest = analytics.cargar_periodo(cliente or self.cliente(), fecha_inicio, fecha_fin, camara_ids=camara_ids)
+        
+        self.assertEqual(int(sql.lectura_n.sum()), int(postgrest.lectura_n.sum()))
+        self.assertAlmostEqual(sql.temp_promedio, postgrest.temp_promedio, places=2)
+        for helper in HELPERS:
+            with self.subTest(helper=helper):
+                self.assertEqual(getattr(analytics, helper)(sql), getattr(analytics, helper)(postgrest))
+    
+    def test_periodo_igual_en_sql_y_postgrest(self):
+        self.assertMismoPeriodo()
+    
+    def test_periodo_igual_por_alcance_de_camaras(self):
+        self.assertMismoPeriodo(camara_ids=[1, 3])
+    
+    def test_dias_sin_resumen_desde_lecturas_crudas(self):
+        sin_resumen = {(self.hoy - timedelta(days=d)).isoformat() for d in (4, 5, 7)}
+        tablas = dict(self.dataset.tablas)
+        tablas['resumen_diario_camara'] = [
+            resumen for resumen in tablas['resumen_diario_camara'] if resumen['fecha'] not in sin_resumen
+        ]
+        
+        self.assertMismoPeriodo(cliente=ClienteLocal(tablas))
+    
+    def test_resumen_diario_igual_y_eventos_en_una_consulta(self):
+        desde = (self.hoy - timedelta(days=6)).isoformat()
+        # Con el tope de 1000 filas de PostgREST: las lecturas van por bloques
+        cliente = self.cliente()
+        
+        postgrest = repositorio._resumen_diario_postgrest(cliente, desde, None)
+        
+        self.assertEqual(postgrest, repositorio._resumen_diario_sql(desde, None))
+        self.assertEqual(len(postgrest), 7)
+        # Bloques de lecturas y eventos de todo el rango (más el bloque vacío
+        # que cierra cada keyset), no una consulta de eventos por día
+        lecturas = LecturaTemperatura.objects.filter(timestamp__gte=repositorio._fecha_utc(desde)).count()
+        eventos = EventoTemperatura.objects.filter(fecha_inicio__gte=repositorio._fecha_utc(desde)).count()
+        self.assertGreater(lecturas, 1000)
+        self.assertEqual(cliente.consultas, math.ceil(lecturas / 1000) + 1 + math.ceil(eventos / 1000) + 1)
+    
+    def test_totales_iguales_en_sql_y_postgrest(self):
+        desde = (self.hoy - timedelta(days=8)).isoformat()
+        hasta = self.hoy.isoformat()
+        
+        sql = repositorio._totales_sql(desde, hasta, None, None)
+        postgrest = repositorio._totales_postgrest(self.cliente(), desde, hasta, None, None)
+        
+        self.assertAlmostEqual(sql.pop('temp_promedio'), postgrest.pop('temp_promedio'), places=6)
+        self.assertEqual(sql, postgrest)
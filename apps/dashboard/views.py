@@ -9,10 +9,124 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from datetime import datetime, timedelta, date
 from services.supabase_service import get_supabase_client
+from services.paralelo import ejecutar_en_paralelo
+from services.vuelo_unico import vuelo_unico
+from services.cache_analitica import cache_analitica
+from . import analytics, repositorio
+from apps.lecturas.cumplimiento import calcular_cumplimiento
+from apps.camaras import alcance
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Valores de cada sección del análisis ejecutivo cuando no se puede calcular
+KPIS_VACIOS = {
+    'temperaturaPromedio': 0,
+    'totalEventos': 0,
+    'horasDeshielo': 0,
+    'horasFalla': 0,
+    'porcentajeNormal': 100,
+    'variacionTemperatura': 0,
+    'variacionEventos': 0,
+    'variacionDeshielo': 0,
+    'variacionFalla': 0,
+    'variacionNormal': 0
+}
+ADAPTATIVA_VACIA = {'tipo': 'error', 'titulo': 'Error', 'datos': []}
+ANALISIS_EVENTOS_VACIO = {'distribucion': [], 'eventosCriticos': []}
+RANKING_VACIO = {'masEventos': [], 'masFallas': []}
+CUMPLIMIENTO_VACIO = {'global': {}, 'camaras': []}
+
+
+def contar_kpis_dashboard(client, hoy, hace_24h, sucursal_id=None):
+    """
+    Calcula los KPIs con consultas de solo conteo (count=exact, head=True).
+    
+    Alternativa a la función SQL kpis_dashboard: ninguna consulta trae filas,
+    así que el costo no crece con la cantidad de eventos.
+    
+    Args:
+        client: Cliente de Supabase
+        hoy: Fecha del día para "eventos de hoy"
+        hace_24h: Inicio de la ventana de 24 horas
+        sucursal_id: Sucursal a filtrar (None = todas)
+    
+    Returns:
+        Dict con camaras_activas, sucursales_activas, eventos_hoy y
+        camaras_con_eventos_24h
+    """
+    # 1. Cámaras activas
+    camaras_query = client.table('camaras_frio')\
+        .select('id', count='exact', head=True)\
+        .eq('activa', True)
+    if sucursal_id:
+        camaras_query = camaras_query.eq('sucursal_id', sucursal_id)
+    
+    # 2. Sucursales activas
+    sucursales_query = client.table('sucursales')\
+        .select('id', count='exact', head=True)\
+        .eq('activa', True)
+    
+    # 3. Eventos de hoy
+    eventos_hoy_query = client.table('eventos_temperatura')\
+        .select('id', count='exact', head=True)\
+        .gte('fecha_inicio', f'{hoy}T00:00:00')\
+        .lt('fecha_inicio', f'{hoy}T23:59:59')
+    if sucursal_id:
+        eventos_hoy_query = eventos_hoy_query.in_('camara_id', alcance.camaras_de_sucursal(sucursal_id, client))
+    
+    # 4. Cámaras con eventos en las últimas 24h: se cuentan las cámaras
+    # que tienen al menos un evento en la ventana (equivale a DISTINCT camara_id)
+    camaras_eventos_query = client.table('camaras_frio')\
+        .select('id, eventos_temperatura!inner(id)', count='exact', head=True)\
+        .gte('eventos_temperatura.fecha_inicio', hace_24h.isoformat())
+    if sucursal_id:
+        camaras_eventos_query = camaras_eventos_query.eq('sucursal_id', sucursal_id)
+    
+    # Los cuatro conteos son independientes: se ejecutan en paralelo y un
+    # conteo que falla queda en 0 sin descartar los demás
+    conteos = ejecutar_en_paralelo({
+        'camaras_activas': camaras_query.execute,
+        'sucursales_activas': sucursales_query.execute,
+        'eventos_hoy': eventos_hoy_query.execute,
+        'camaras_con_eventos_24h': camaras_eventos_query.execute,
+    })
+    return {
+        nombre: (conteos.valores[nombre].count or 0) if nombre in conteos.valores else 0
+        for nombre in ('camaras_activas', 'sucursales_activas', 'eventos_hoy', 'camaras_con_eventos_24h')
+    }
+
+
+def calcular_kpis(client, hoy, sucursal_id=None, es_admin=False):
+    """
+    KPIs del dashboard para una sucursal (None = todas).
+    
+    Usa la función SQL kpis_dashboard y, si no está disponible, los conteos
+    de contar_kpis_dashboard.
+    """
+    hace_24h = datetime.now() - timedelta(hours=24)
+    
+    try:
+        # Todos los KPIs en una sola llamada (ver kpis_dashboard.sql)
+        kpis = client.rpc('kpis_dashboard', {
+            'p_hoy_inicio': f'{hoy}T00:00:00',
+            'p_hoy_fin': f'{hoy}T23:59:59',
+            'p_hace_24h': hace_24h.isoformat(),
+            'p_sucursal_id': sucursal_id
+        }).execute().data
+    except Exception as e:
+        logger.warning(f"RPC kpis_dashboard no disponible, usando conteos: {str(e)}")
+        kpis = contar_kpis_dashboard(client, hoy, hace_24h, sucursal_id)
+    
+    return {
+        'camaras_activas': kpis['camaras_activas'],
+        # Sucursales activas: un usuario no ADMIN solo ve la suya
+        'sucursales_activas': kpis['sucursales_activas'] if es_admin else 1,
+        'eventos_hoy': kpis['eventos_hoy'],
+        'camaras_con_eventos_24h': kpis['camaras_con_eventos_24h']
+    }
+
 
 def get_kpis(request):
     """
@@ -28,77 +142,28 @@ def get_kpis(request):
             "camaras_con_eventos_24h": 3
         }
     """
-    from django.http import JsonResponse
+    from coldtrack.renderers import JsonResponse
     
     try:
         user = getattr(request, 'firebase_user', None)
         client = get_supabase_client(use_service_key=True)
         
-        # Construir filtros según rol del usuario
-        sucursal_filter = {}
-        if user and user.get('rol') != 'ADMIN':
+        # Construir filtro según rol del usuario
+        es_admin = bool(user and user.get('rol') == 'ADMIN')
+        sucursal_id = None
+        if user and not es_admin:
             sucursal_id = user.get('sucursal_id')
-            if sucursal_id:
-                sucursal_filter = {'sucursal_id': sucursal_id}
-        
-        # 1. Cámaras activas
-        camaras_query = client.table('camaras_frio').select('id').eq('activa', True)
-        if sucursal_filter:
-            camaras_query = camaras_query.eq('sucursal_id', sucursal_filter['sucursal_id'])
-        camaras_response = camaras_query.execute()
-        camaras_activas = len(camaras_response.data) if camaras_response.data else 0
-        
-        # 2. Sucursales activas
-        if user and user.get('rol') == 'ADMIN':
-            sucursales_response = client.table('sucursales').select('id').eq('activa', True).execute()
-            sucursales_activas = len(sucursales_response.data) if sucursales_response.data else 0
-        else:
-            sucursales_activas = 1
         
-        # 3. Eventos de hoy
         hoy = date.today()
-        eventos_hoy_query = client.table('eventos_temperatura')\
-            .select('id')\
-            .gte('fecha_inicio', f'{hoy}T00:00:00')\
-            .lt('fecha_inicio', f'{hoy}T23:59:59')
-        
-        if sucursal_filter:
-            # Necesitamos hacer JOIN con cámaras para filtrar por sucursal
-            eventos_hoy_query = client.table('eventos_temperatura')\
-                .select('id, camara_id, camaras_frio!inner(sucursal_id)')\
-                .gte('fecha_inicio', f'{hoy}T00:00:00')\
-                .lt('fecha_inicio', f'{hoy}T23:59:59')\
-                .eq('camaras_frio.sucursal_id', sucursal_filter['sucursal_id'])
-        
-        eventos_hoy_response = eventos_hoy_query.execute()
-        eventos_hoy = len(eventos_hoy_response.data) if eventos_hoy_response.data else 0
-        
-        # 4. Cámaras con eventos en las últimas 24h
-        hace_24h = datetime.now() - timedelta(hours=24)
-        eventos_24h_query = client.table('eventos_temperatura')\
-            .select('camara_id')\
-            .gte('fecha_inicio', hace_24h.isoformat())
-        
-        if sucursal_filter:
-            eventos_24h_query = client.table('eventos_temperatura')\
-                .select('camara_id, camaras_frio!inner(sucursal_id)')\
-                .gte('fecha_inicio', hace_24h.isoformat())\
-                .eq('camaras_frio.sucursal_id', sucursal_filter['sucursal_id'])
         
-        eventos_24h_response = eventos_24h_query.execute()
+        # Requests idénticos concurrentes (mismo día y alcance) comparten
+        # un solo cálculo (ver services/vuelo_unico.py)
+        kpis = vuelo_unico.ejecutar(
+            ('kpis', hoy, sucursal_id, es_admin),
+            lambda: calcular_kpis(client, hoy, sucursal_id, es_admin)
+        )
         
-        # Contar cámaras únicas
-        camaras_con_eventos = set()
-        if eventos_24h_response.data:
-            for evento in eventos_24h_response.data:
-                camaras_con_eventos.add(evento['camara_id'])
-        
-        return JsonResponse({
-            'camaras_activas': camaras_activas,
-            'sucursales_activas': sucursales_activas,
-            'eventos_hoy': eventos_hoy,
-            'camaras_con_eventos_24h': len(camaras_con_eventos)
-        })
+        return JsonResponse(kpis)
         
     except Exception as e:
         logger.error(f"Error al obtener KPIs: {str(e)}")
@@ -137,14 +202,10 @@ def get_eventos_por_dia(request):
             .select('fecha_inicio, camara_id')\
             .gte('fecha_inicio', hace_7_dias.isoformat())
         
-        # Filtrar por sucursal si no es ADMIN
-        if user and user.get('rol') != 'ADMIN':
-            sucursal_id = user.get('sucursal_id')
-            if sucursal_id:
-                eventos_query = client.table('eventos_temperatura')\
-                    .select('fecha_inicio, camara_id, camaras_frio!inner(sucursal_id)')\
-                    .gte('fecha_inicio', hace_7_dias.isoformat())\
-                    .eq('camaras_frio.sucursal_id', sucursal_id)
+        # Filtrar por las cámaras de la sucursal si no es ADMIN
+        camara_ids = alcance.camaras_de_usuario(user, client)
+        if camara_ids is not None:
+            eventos_query = eventos_query.in_('camara_id', camara_ids)
         
         eventos_response = eventos_query.execute()
         
@@ -195,11 +256,10 @@ def get_eventos_recientes(request):
             .order('fecha_inicio', desc=True)\
             .limit(10)
         
-        # Filtrar por sucursal si no es ADMIN
-        if user and user.get('rol') != 'ADMIN':
-            sucursal_id = user.get('sucursal_id')
-            if sucursal_id:
-                eventos_query = eventos_query.eq('camaras_frio.sucursal_id', sucursal_id)
+        # Filtrar por las cámaras de la sucursal si no es ADMIN
+        camara_ids = alcance.camaras_de_usuario(user, client)
+        if camara_ids is not None:
+            eventos_query = eventos_query.in_('camara_id', camara_ids)
         
         eventos_response = eventos_query.execute()
         
@@ -265,95 +325,137 @@ def get_analisis_ejecutivo(request):
         if not fecha_fin:
             fecha_fin = date.today().isoformat()
         
-        # Filtros de sucursal
-        sucursal_filter = {}
-        if user and user.get('rol') != 'ADMIN':
-            sucursal_id = user.get('sucursal_id')
-            if sucursal_id:
-                sucursal_filter = {'sucursal_id': sucursal_id}
+        # Cámaras visibles para el usuario (None = todas)
+        camara_ids = alcance.camaras_de_usuario(user, client)
+        camara_unica = camara_id if camara_id and camara_id != 'todas' else None
+        
+        # Caché stale-while-revalidate por rango, cámara y alcance; los
+        # requests idénticos concurrentes comparten un solo cálculo (ver
+        # services/cache_analitica.py y services/vuelo_unico.py). La función
+        # pide su propio cliente porque puede ejecutarse en otro hilo.
+        data, estado = cache_analitica.obtener(
+            ('analisis_ejecutivo', fecha_inicio, fecha_fin, camara_unica, camara_ids),
+            lambda: calcular_analisis_ejecutivo(
+                get_supabase_client(use_service_key=True), fecha_inicio, fecha_fin, camara_unica, camara_ids
+            ),
+            # Una respuesta parcial no se guarda
+            valido=lambda data: not data['seccionesConError']
+        )
+        response = Response(data)
+        response['X-Cache'] = estado
+        return response
         
-        # 1️⃣ CALCULAR KPIs PRINCIPALES
-        kpis = calcular_kpis_ejecutivos(client, fecha_inicio, fecha_fin, sucursal_filter, camara_id)
+    except Exception as e:
+        logger.error(f"Error en análisis ejecutivo: {str(e)}")
+        return Response({
+            'error': 'Error al generar análisis ejecutivo'
+        }, status=500)
+
+
+def calcular_analisis_ejecutivo(client, fecha_inicio, fecha_fin, camara_unica=None, camara_ids=None):
+    """
+    Secciones del análisis ejecutivo de un rango.
+    
+    Args:
+        client: Cliente de Supabase
+        fecha_inicio, fecha_fin: Rango del análisis
+        camara_unica: ID de cámara específica (None = todas)
+        camara_ids: Cámaras visibles para el usuario (None = todas)
+    
+    Returns:
+        Dict de la respuesta de get_analisis_ejecutivo
+    """
+    sucursal_filter = {}
+    if camara_ids is not None:
+        sucursal_filter = {'camara_ids': camara_ids}
+    
+    # Las tres consultas son independientes y van en paralelo: lecturas y
+    # eventos del período (arreglos NumPy; con conexión directa las
+    # lecturas llegan agregadas por día y cámara), totales del período
+    # anterior y cumplimiento. Las secciones 1-6 se calculan en memoria.
+    inicio_anterior, fin_anterior = periodo_anterior(fecha_inicio, fecha_fin)
+    consultas = ejecutar_en_paralelo({
+        'datos': lambda: repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, camara_ids),
+        'anterior': lambda: repositorio.totales_periodo(
+            client, inicio_anterior, fin_anterior, camara_unica, camara_ids
+        ),
+        'cumplimiento': lambda: obtener_cumplimiento(client, fecha_inicio, fecha_fin, sucursal_filter, camara_unica),
+    })
+    datos = consultas.valores.get('datos')
+    
+    if datos is not None:
+        # 1️⃣ CALCULAR KPIs PRINCIPALES (sin período anterior, variaciones en 0)
+        kpis = calcular_kpis_ejecutivos(
+            client, fecha_inicio, fecha_fin, sucursal_filter, camara_unica, datos,
+            anterior=consultas.valores.get('anterior', {})
+        )
         
         # 2️⃣ COMPARACIÓN ADAPTATIVA (diaria, semanal o mensual)
-        comparacion_adaptativa = obtener_comparacion_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter)
+        comparacion_adaptativa = obtener_comparacion_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
         # 3️⃣ TENDENCIA ADAPTATIVA (usa la misma lógica que comparación)
-        tendencia_adaptativa = obtener_tendencia_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter)
+        tendencia_adaptativa = obtener_tendencia_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
         # 4️⃣ ANÁLISIS DE EVENTOS
-        analisis_eventos = obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter)
+        analisis_eventos = obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
         # 5️⃣ TEMPERATURAS DIARIAS
-        temperaturas = obtener_temperaturas_diarias(client, fecha_inicio, fecha_fin, sucursal_filter)
+        temperaturas = obtener_temperaturas_diarias(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
         # 6️⃣ RANKING DE CÁMARAS
-        ranking_camaras = obtener_ranking_camaras(client, fecha_inicio, fecha_fin, sucursal_filter)
-        
-        return Response({
-            'kpis': kpis,
-            'comparacionAdaptativa': comparacion_adaptativa,
-            'tendenciaAdaptativa': tendencia_adaptativa,
-            'analisisEventos': analisis_eventos,
-            'temperaturas': temperaturas,
-            'rankingCamaras': ranking_camaras
-        })
-        
-    except Exception as e:
-        logger.error(f"Error en análisis ejecutivo: {str(e)}")
-        return Response({
-            'error': 'Error al generar análisis ejecutivo'
-        }, status=500)
+        ranking_camaras = obtener_ranking_camaras(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
+    else:
+        # Sin el período no hay secciones que calcular: respuesta parcial
+        kpis = KPIS_VACIOS
+        comparacion_adaptativa = tendencia_adaptativa = ADAPTATIVA_VACIA
+        analisis_eventos = ANALISIS_EVENTOS_VACIO
+        temperaturas = []
+        ranking_camaras = RANKING_VACIO
+    
+    # 7️⃣ CUMPLIMIENTO (tiempo en rango, percentiles, excursiones)
+    cumplimiento = consultas.valores.get('cumplimiento', CUMPLIMIENTO_VACIO)
+    
+    return {
+        'kpis': kpis,
+        'comparacionAdaptativa': comparacion_adaptativa,
+        'tendenciaAdaptativa': tendencia_adaptativa,
+        'analisisEventos': analisis_eventos,
+        'temperaturas': temperaturas,
+        'rankingCamaras': ranking_camaras,
+        'cumplimiento': cumplimiento,
+        'seccionesConError': sorted(consultas.errores)
+    }
+
+
+def periodo_anterior(fecha_inicio, fecha_fin):
+    """Rango [inicio, fin) de igual duración inmediatamente antes del período"""
+    dias_periodo = (datetime.fromisoformat(fecha_fin) - datetime.fromisoformat(fecha_inicio)).days + 1
+    return (datetime.fromisoformat(fecha_inicio) - timedelta(days=dias_periodo)).isoformat(), fecha_inicio
 
 
-def calcular_kpis_ejecutivos(client, fecha_inicio, fecha_fin, sucursal_filter, camara_id=None):
-    """Calcula los KPIs principales para la vista ejecutiva usando datos reales"""
+def calcular_kpis_ejecutivos(client, fecha_inicio, fecha_fin, sucursal_filter, camara_id=None, datos=None, anterior=None):
+    """
+    Calcula los KPIs principales para la vista ejecutiva usando datos reales.
+    
+    `anterior` son los totales_periodo() del período anterior si ya se
+    consultaron (None = consultarlos aquí; {} = no disponibles, variaciones en 0).
+    """
     try:
-        # 1. OBTENER LECTURAS DE TEMPERATURA (incluir todo el día final)
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        lecturas_query = client.table('lecturas_temperatura')\
-            .select('temperatura_c, timestamp, camara_id')\
-            .gte('timestamp', fecha_inicio)\
-            .lte('timestamp', fecha_fin_completa)
+        # 1. LECTURAS Y EVENTOS DEL PERÍODO (incluye todo el día final)
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
         if camara_id and camara_id != 'todas':
-            lecturas_query = lecturas_query.eq('camara_id', camara_id)
-        
-        lecturas_response = lecturas_query.execute()
+            datos = datos.filtrar_camara(camara_id)
         
         # Calcular temperatura promedio
-        if lecturas_response.data:
-            temperaturas = [float(l['temperatura_c']) for l in lecturas_response.data]
-            temp_promedio = sum(temperaturas) / len(temperaturas)
-        else:
-            temp_promedio = 0
+        temp_promedio = datos.temp_promedio
         
-        # 2. OBTENER EVENTOS (incluir todo el día final)
-        eventos_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos, camara_id')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        if camara_id and camara_id != 'todas':
-            eventos_query = eventos_query.eq('camara_id', camara_id)
-        
-        eventos_response = eventos_query.execute()
-        
-        # Calcular métricas de eventos
-        total_eventos = len(eventos_response.data) if eventos_response.data else 0
-        horas_deshielo = 0
-        horas_falla = 0
-        
-        if eventos_response.data:
-            for evento in eventos_response.data:
-                duracion_min = evento.get('duracion_minutos', 0) or 0
-                duracion_horas = duracion_min / 60.0
-                
-                tipo = evento['tipo']
-                if tipo in ['DESHIELO_N', 'DESHIELO_P']:
-                    horas_deshielo += duracion_horas
-                elif tipo in ['FALLA', 'FALLA_EN_CURSO']:
-                    horas_falla += duracion_horas
+        # 2. Calcular métricas de eventos
+        total_eventos = datos.evento_tipo.size
+        duracion_horas = datos.evento_duracion / 60.0
+        horas_deshielo = float(duracion_horas[np.isin(datos.evento_tipo, analytics.CODIGOS_DESHIELO)].sum())
+        horas_falla = float(duracion_horas[np.isin(datos.evento_tipo, analytics.CODIGOS_FALLA)].sum())
         
         # Calcular porcentaje de tiempo normal
         dias_periodo = (datetime.fromisoformat(fecha_fin) - datetime.fromisoformat(fecha_inicio)).days + 1
@@ -361,52 +463,26 @@ def calcular_kpis_ejecutivos(client, fecha_inicio, fecha_fin, sucursal_filter, c
         horas_problemas = horas_deshielo + horas_falla
         porcentaje_normal = ((horas_total - horas_problemas) / horas_total * 100) if horas_total > 0 else 100
         
-        # 3. CALCULAR PERÍODO ANTERIOR PARA COMPARACIÓN
-        fecha_inicio_anterior = (datetime.fromisoformat(fecha_inicio) - timedelta(days=dias_periodo)).isoformat()
-        fecha_fin_anterior = fecha_inicio
-        
-        # Lecturas período anterior
-        lecturas_anterior_query = client.table('lecturas_temperatura')\
-            .select('temperatura_c')\
-            .gte('timestamp', fecha_inicio_anterior)\
-            .lt('timestamp', fecha_fin_anterior)
-        
-        if camara_id and camara_id != 'todas':
-            lecturas_anterior_query = lecturas_anterior_query.eq('camara_id', camara_id)
-        
-        lecturas_anterior_response = lecturas_anterior_query.execute()
-        
-        if lecturas_anterior_response.data:
-            temps_anteriores = [float(l['temperatura_c']) for l in lecturas_anterior_response.data]
-            temp_promedio_anterior = sum(temps_anteriores) / len(temps_anteriores)
-        else:
-            temp_promedio_anterior = temp_promedio
-        
-        # Eventos período anterior
-        eventos_anterior_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos')\
-            .gte('fecha_inicio', fecha_inicio_anterior)\
-            .lt('fecha_inicio', fecha_fin_anterior)
-        
-        if camara_id and camara_id != 'todas':
-            eventos_anterior_query = eventos_anterior_query.eq('camara_id', camara_id)
-        
-        eventos_anterior_response = eventos_anterior_query.execute()
-        
-        total_eventos_anterior = len(eventos_anterior_response.data) if eventos_anterior_response.data else 0
-        horas_deshielo_anterior = 0
-        horas_falla_anterior = 0
-        
-        if eventos_anterior_response.data:
-            for evento in eventos_anterior_response.data:
-                duracion_min = evento.get('duracion_minutos', 0) or 0
-                duracion_horas = duracion_min / 60.0
-                
-                tipo = evento['tipo']
-                if tipo in ['DESHIELO_N', 'DESHIELO_P']:
-                    horas_deshielo_anterior += duracion_horas
-                elif tipo in ['FALLA', 'FALLA_EN_CURSO']:
-                    horas_falla_anterior += duracion_horas
+        # 3. PERÍODO ANTERIOR PARA COMPARACIÓN
+        if anterior is None:
+            # Totales del período anterior (agregados en la base si hay conexión directa)
+            fecha_inicio_anterior, fecha_fin_anterior = periodo_anterior(fecha_inicio, fecha_fin)
+            anterior = repositorio.totales_periodo(
+                client, fecha_inicio_anterior, fecha_fin_anterior,
+                camara_id if camara_id and camara_id != 'todas' else None,
+                sucursal_filter.get('camara_ids')
+            )
+        if not anterior:
+            anterior = {
+                'temp_promedio': temp_promedio,
+                'total_eventos': total_eventos,
+                'horas_deshielo': horas_deshielo,
+                'horas_falla': horas_falla
+            }
+        temp_promedio_anterior = anterior['temp_promedio'] if anterior['temp_promedio'] is not None else temp_promedio
+        total_eventos_anterior = anterior['total_eventos']
+        horas_deshielo_anterior = anterior['horas_deshielo']
+        horas_falla_anterior = anterior['horas_falla']
         
         horas_problemas_anterior = horas_deshielo_anterior + horas_falla_anterior
         porcentaje_normal_anterior = ((horas_total - horas_problemas_anterior) / horas_total * 100) if horas_total > 0 else 100
@@ -432,21 +508,10 @@ def calcular_kpis_ejecutivos(client, fecha_inicio, fecha_fin, sucursal_filter, c
         
     except Exception as e:
         logger.error(f"Error calculando KPIs ejecutivos: {str(e)}")
-        return {
-            'temperaturaPromedio': 0,
-            'totalEventos': 0,
-            'horasDeshielo': 0,
-            'horasFalla': 0,
-            'porcentajeNormal': 100,
-            'variacionTemperatura': 0,
-            'variacionEventos': 0,
-            'variacionDeshielo': 0,
-            'variacionFalla': 0,
-            'variacionNormal': 0
-        }
+        return KPIS_VACIOS
 
 
-def obtener_comparacion_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_comparacion_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Obtiene comparación adaptativa según el período seleccionado"""
     try:
         # Calcular días del período
@@ -459,103 +524,29 @@ def obtener_comparacion_adaptativa(client, fecha_inicio, fecha_fin, sucursal_fil
         # Determinar tipo de comparación
         if dias_periodo <= 7:
             # COMPARACIÓN DIARIA (1-7 días)
-            return obtener_comparacion_diaria(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_comparacion_diaria(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         elif dias_periodo <= 30:
             # COMPARACIÓN SEMANAL (8-30 días)
-            return obtener_comparacion_semanal_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_comparacion_semanal_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         else:
             # COMPARACIÓN MENSUAL (31+ días)
-            return obtener_comparacion_mensual_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_comparacion_mensual_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
     except Exception as e:
         logger.error(f"Error en comparación adaptativa: {str(e)}")
-        return {
-            'tipo': 'error',
-            'titulo': 'Error',
-            'datos': []
-        }
+        return ADAPTATIVA_VACIA
 
 
-def obtener_comparacion_diaria(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_comparacion_diaria(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Comparación día por día"""
     try:
-        from datetime import timedelta
-        
-        # Obtener eventos del período (incluir todo el día final)
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos, fecha_inicio')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        eventos_data = eventos_query.execute()
-        
-        # Obtener lecturas del período
-        lecturas_query = client.table('lecturas_temperatura')\
-            .select('temperatura_c, timestamp')\
-            .gte('timestamp', fecha_inicio)\
-            .lte('timestamp', fecha_fin_completa)
-        
-        lecturas_data = lecturas_query.execute()
-        
-        # Inicializar todos los días del rango con 0 eventos
-        dias = {}
-        fecha_actual = datetime.fromisoformat(fecha_inicio)
-        fecha_final = datetime.fromisoformat(fecha_fin)
-        
-        while fecha_actual <= fecha_final:
-            dia_key = fecha_actual.strftime('%Y-%m-%d')
-            dia_nombre = fecha_actual.strftime('%d/%m')
-            
-            dias[dia_key] = {
-                'periodo': dia_nombre,
-                'eventos': 0,
-                'horasFalla': 0,
-                'tempPromedio': []
-            }
-            
-            fecha_actual += timedelta(days=1)
-        
-        # Procesar eventos
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                fecha_obj = datetime.fromisoformat(evento['fecha_inicio'])
-                dia_key = fecha_obj.strftime('%Y-%m-%d')
-                
-                if dia_key in dias:  # Solo si está en nuestro rango
-                    dias[dia_key]['eventos'] += 1
-                    
-                    # Calcular horas de falla
-                    if evento['tipo'] in ['FALLA', 'FALLA_EN_CURSO']:
-                        duracion_min = evento.get('duracion_minutos', 0) or 0
-                        dias[dia_key]['horasFalla'] += duracion_min / 60.0
-        
-        # Procesar lecturas
-        if lecturas_data.data:
-            for lectura in lecturas_data.data:
-                fecha_obj = datetime.fromisoformat(lectura['timestamp'])
-                dia_key = fecha_obj.strftime('%Y-%m-%d')
-                
-                if dia_key in dias:  # Solo si está en nuestro rango
-                    dias[dia_key]['tempPromedio'].append(float(lectura['temperatura_c']))
-        
-        # Convertir a lista
-        resultado = []
-        for dia_data in dias.values():
-            temp_prom = sum(dia_data['tempPromedio']) / len(dia_data['tempPromedio']) if dia_data['tempPromedio'] else 0
-            resultado.append({
-                'periodo': dia_data['periodo'],
-                'eventos': dia_data['eventos'],
-                'horasFalla': round(dia_data['horasFalla'], 1),
-                'tempPromedio': round(temp_prom, 1)
-            })
-        
-        resultado.sort(key=lambda x: x['periodo'])
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
         return {
             'tipo': 'diaria',
             'titulo': 'Comparación Diaria',
-            'datos': resultado
+            'datos': analytics.comparacion_diaria(datos)
         }
         
     except Exception as e:
@@ -563,96 +554,27 @@ def obtener_comparacion_diaria(client, fecha_inicio, fecha_fin, sucursal_filter)
         return {'tipo': 'diaria', 'titulo': 'Comparación Diaria', 'datos': []}
 
 
-def obtener_comparacion_semanal_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_comparacion_semanal_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Comparación semana por semana"""
     try:
         # Usar la función común para calcular semanas
-        return calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, 'comparacion')
+        return calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, 'comparacion', datos)
         
     except Exception as e:
         logger.error(f"Error en comparación semanal: {str(e)}")
         return {'tipo': 'semanal', 'titulo': 'Comparación Semanal', 'datos': []}
 
 
-def obtener_comparacion_mensual_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_comparacion_mensual_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Comparación mes por mes"""
     try:
-        # Obtener eventos del período (incluir todo el día final)
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos, fecha_inicio')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        eventos_data = eventos_query.execute()
-        
-        # Obtener lecturas del período
-        lecturas_query = client.table('lecturas_temperatura')\
-            .select('temperatura_c, timestamp')\
-            .gte('timestamp', fecha_inicio)\
-            .lte('timestamp', fecha_fin_completa)
-        
-        lecturas_data = lecturas_query.execute()
-        
-        # Agrupar por mes
-        meses = {}
-        
-        # Procesar eventos
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                fecha_obj = datetime.fromisoformat(evento['fecha_inicio'])
-                mes_key = fecha_obj.strftime('%Y-%m')
-                mes_nombre = fecha_obj.strftime('%b %Y')
-                
-                if mes_key not in meses:
-                    meses[mes_key] = {
-                        'periodo': mes_nombre,
-                        'eventos': 0,
-                        'horasFalla': 0,
-                        'tempPromedio': []
-                    }
-                
-                meses[mes_key]['eventos'] += 1
-                
-                # Calcular horas de falla
-                if evento['tipo'] in ['FALLA', 'FALLA_EN_CURSO']:
-                    duracion_min = evento.get('duracion_minutos', 0) or 0
-                    meses[mes_key]['horasFalla'] += duracion_min / 60.0
-        
-        # Procesar lecturas
-        if lecturas_data.data:
-            for lectura in lecturas_data.data:
-                fecha_obj = datetime.fromisoformat(lectura['timestamp'])
-                mes_key = fecha_obj.strftime('%Y-%m')
-                mes_nombre = fecha_obj.strftime('%b %Y')
-                
-                if mes_key not in meses:
-                    meses[mes_key] = {
-                        'periodo': mes_nombre,
-                        'eventos': 0,
-                        'horasFalla': 0,
-                        'tempPromedio': []
-                    }
-                
-                meses[mes_key]['tempPromedio'].append(float(lectura['temperatura_c']))
-        
-        # Convertir a lista
-        resultado = []
-        for mes_data in meses.values():
-            temp_prom = sum(mes_data['tempPromedio']) / len(mes_data['tempPromedio']) if mes_data['tempPromedio'] else 0
-            resultado.append({
-                'periodo': mes_data['periodo'],
-                'eventos': mes_data['eventos'],
-                'horasFalla': round(mes_data['horasFalla'], 1),
-                'tempPromedio': round(temp_prom, 1)
-            })
-        
-        resultado.sort(key=lambda x: x['periodo'])
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
         return {
             'tipo': 'mensual',
             'titulo': 'Comparación Mensual',
-            'datos': resultado
+            'datos': analytics.comparacion_mensual(datos)
         }
         
     except Exception as e:
@@ -660,7 +582,7 @@ def obtener_comparacion_mensual_adaptativa(client, fecha_inicio, fecha_fin, sucu
         return {'tipo': 'mensual', 'titulo': 'Comparación Mensual', 'datos': []}
 
 
-def obtener_tendencia_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_tendencia_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Obtiene tendencia adaptativa según el período seleccionado"""
     try:
         # Calcular días del período
@@ -673,86 +595,29 @@ def obtener_tendencia_adaptativa(client, fecha_inicio, fecha_fin, sucursal_filte
         # Determinar tipo de tendencia (misma lógica que comparación)
         if dias_periodo <= 7:
             # TENDENCIA DIARIA (1-7 días)
-            return obtener_tendencia_diaria(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_tendencia_diaria(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         elif dias_periodo <= 30:
             # TENDENCIA SEMANAL (8-30 días)
-            return obtener_tendencia_semanal_real(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_tendencia_semanal_real(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         else:
             # TENDENCIA MENSUAL (31+ días)
-            return obtener_tendencia_mensual(client, fecha_inicio, fecha_fin, sucursal_filter)
+            return obtener_tendencia_mensual(client, fecha_inicio, fecha_fin, sucursal_filter, datos)
         
     except Exception as e:
         logger.error(f"Error en tendencia adaptativa: {str(e)}")
-        return {
-            'tipo': 'error',
-            'titulo': 'Error',
-            'datos': []
-        }
+        return ADAPTATIVA_VACIA
 
 
-def obtener_tendencia_diaria(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_tendencia_diaria(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Tendencia día por día"""
     try:
-        from datetime import timedelta
-        
-        # Obtener eventos del período
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos, fecha_inicio')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        eventos_data = eventos_query.execute()
-        
-        # Inicializar todos los días del rango
-        dias = {}
-        fecha_actual = datetime.fromisoformat(fecha_inicio)
-        fecha_final = datetime.fromisoformat(fecha_fin)
-        
-        while fecha_actual <= fecha_final:
-            dia_key = fecha_actual.strftime('%Y-%m-%d')
-            dia_nombre = fecha_actual.strftime('%d/%m')
-            
-            dias[dia_key] = {
-                'periodo': dia_nombre,
-                'eventos': 0,
-                'horasCriticas': 0
-            }
-            
-            fecha_actual += timedelta(days=1)
-        
-        # Procesar eventos
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                fecha_obj = datetime.fromisoformat(evento['fecha_inicio'])
-                dia_key = fecha_obj.strftime('%Y-%m-%d')
-                
-                if dia_key in dias:
-                    dias[dia_key]['eventos'] += 1
-                    
-                    # Calcular horas críticas (deshielo + falla)
-                    duracion_min = evento.get('duracion_minutos', 0) or 0
-                    duracion_horas = duracion_min / 60.0
-                    
-                    tipo = evento['tipo']
-                    if tipo in ['DESHIELO_N', 'DESHIELO_P', 'FALLA', 'FALLA_EN_CURSO']:
-                        dias[dia_key]['horasCriticas'] += duracion_horas
-        
-        # Convertir a lista
-        resultado = []
-        for dia_data in dias.values():
-            resultado.append({
-                'periodo': dia_data['periodo'],
-                'eventos': dia_data['eventos'],
-                'horasCriticas': round(dia_data['horasCriticas'], 1)
-            })
-        
-        resultado.sort(key=lambda x: x['periodo'])
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
         return {
             'tipo': 'diaria',
             'titulo': 'Tendencia Diaria',
-            'datos': resultado
+            'datos': analytics.tendencia_diaria(datos)
         }
         
     except Exception as e:
@@ -760,69 +625,27 @@ def obtener_tendencia_diaria(client, fecha_inicio, fecha_fin, sucursal_filter):
         return {'tipo': 'diaria', 'titulo': 'Tendencia Diaria', 'datos': []}
 
 
-def obtener_tendencia_semanal_real(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_tendencia_semanal_real(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Tendencia semana por semana"""
     try:
         # Usar la función común para calcular semanas
-        return calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, 'tendencia')
+        return calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, 'tendencia', datos)
         
     except Exception as e:
         logger.error(f"Error en tendencia semanal: {str(e)}")
         return {'tipo': 'semanal', 'titulo': 'Tendencia Semanal', 'datos': []}
 
 
-def obtener_tendencia_mensual(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_tendencia_mensual(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Tendencia mes por mes"""
     try:
-        # Obtener eventos del período
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('fecha_inicio, tipo, duracion_minutos')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        eventos_data = eventos_query.execute()
-        
-        # Agrupar por mes
-        meses = {}
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                fecha_obj = datetime.fromisoformat(evento['fecha_inicio'])
-                mes_key = fecha_obj.strftime('%Y-%m')
-                mes_nombre = fecha_obj.strftime('%b %Y')
-                
-                if mes_key not in meses:
-                    meses[mes_key] = {
-                        'periodo': mes_nombre,
-                        'eventos': 0,
-                        'horasCriticas': 0
-                    }
-                
-                meses[mes_key]['eventos'] += 1
-                
-                # Calcular horas críticas (deshielo + falla)
-                duracion_min = evento.get('duracion_minutos', 0) or 0
-                duracion_horas = duracion_min / 60.0
-                
-                tipo = evento['tipo']
-                if tipo in ['DESHIELO_N', 'DESHIELO_P', 'FALLA', 'FALLA_EN_CURSO']:
-                    meses[mes_key]['horasCriticas'] += duracion_horas
-        
-        # Convertir a lista ordenada
-        resultado = []
-        for mes_data in meses.values():
-            resultado.append({
-                'periodo': mes_data['periodo'],
-                'eventos': mes_data['eventos'],
-                'horasCriticas': round(mes_data['horasCriticas'], 1)
-            })
-        
-        resultado.sort(key=lambda x: x['periodo'])
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
         return {
             'tipo': 'mensual',
             'titulo': 'Tendencia Mensual',
-            'datos': resultado
+            'datos': analytics.tendencia_mensual(datos)
         }
         
     except Exception as e:
@@ -830,118 +653,17 @@ def obtener_tendencia_mensual(client, fecha_inicio, fecha_fin, sucursal_filter):
         return {'tipo': 'mensual', 'titulo': 'Tendencia Mensual', 'datos': []}
 
 
-def calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, tipo_calculo):
+def calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, tipo_calculo, datos=None):
     """Función común para calcular datos semanales de manera consistente"""
+    titulo = 'Comparación Semanal' if tipo_calculo == 'comparacion' else 'Tendencia Semanal'
     try:
-        from datetime import timedelta
-        
-        # Obtener eventos del período (incluir todo el día final)
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('tipo, duracion_minutos, fecha_inicio')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
-        eventos_data = eventos_query.execute()
-        
-        # Obtener lecturas solo si es para comparación
-        lecturas_data = None
         if tipo_calculo == 'comparacion':
-            lecturas_query = client.table('lecturas_temperatura')\
-                .select('temperatura_c, timestamp')\
-                .gte('timestamp', fecha_inicio)\
-                .lte('timestamp', fecha_fin_completa)
-            
-            lecturas_data = lecturas_query.execute()
-        
-        # Inicializar semanas dentro del rango
-        semanas = {}
-        fecha_actual = datetime.fromisoformat(fecha_inicio)
-        fecha_final = datetime.fromisoformat(fecha_fin)
-        
-        # Crear todas las semanas del período
-        while fecha_actual <= fecha_final:
-            # Obtener el lunes de la semana
-            inicio_semana = fecha_actual - timedelta(days=fecha_actual.weekday())
-            semana_key = inicio_semana.strftime('%Y-%m-%d')
-            semana_nombre = f"Sem {inicio_semana.strftime('%d/%m')}"
-            
-            if semana_key not in semanas:
-                semanas[semana_key] = {
-                    'periodo': semana_nombre,
-                    'eventos': 0,
-                    'horasFalla': 0,
-                    'horasCriticas': 0,
-                    'tempPromedio': []
-                }
-            
-            fecha_actual += timedelta(days=7)  # Avanzar una semana
-        
-        # Procesar eventos
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                fecha_obj = datetime.fromisoformat(evento['fecha_inicio'])
-                # Obtener el lunes de la semana
-                inicio_semana = fecha_obj - timedelta(days=fecha_obj.weekday())
-                semana_key = inicio_semana.strftime('%Y-%m-%d')
-                
-                if semana_key in semanas:  # Solo si está en nuestro rango
-                    semanas[semana_key]['eventos'] += 1
-                    
-                    duracion_min = evento.get('duracion_minutos', 0) or 0
-                    duracion_horas = duracion_min / 60.0
-                    tipo = evento['tipo']
-                    
-                    # Para comparación: solo horas de falla
-                    if tipo in ['FALLA', 'FALLA_EN_CURSO']:
-                        semanas[semana_key]['horasFalla'] += duracion_horas
-                    
-                    # Para tendencia: horas críticas (deshielo + falla)
-                    if tipo in ['DESHIELO_N', 'DESHIELO_P', 'FALLA', 'FALLA_EN_CURSO']:
-                        semanas[semana_key]['horasCriticas'] += duracion_horas
-        
-        # Procesar lecturas (solo para comparación)
-        if lecturas_data and lecturas_data.data:
-            for lectura in lecturas_data.data:
-                fecha_obj = datetime.fromisoformat(lectura['timestamp'])
-                inicio_semana = fecha_obj - timedelta(days=fecha_obj.weekday())
-                semana_key = inicio_semana.strftime('%Y-%m-%d')
-                
-                if semana_key in semanas:
-                    semanas[semana_key]['tempPromedio'].append(float(lectura['temperatura_c']))
-        
-        # Convertir a lista
-        resultado = []
-        for semana_data in semanas.values():
-            if tipo_calculo == 'comparacion':
-                temp_prom = sum(semana_data['tempPromedio']) / len(semana_data['tempPromedio']) if semana_data['tempPromedio'] else 0
-                resultado.append({
-                    'periodo': semana_data['periodo'],
-                    'eventos': semana_data['eventos'],
-                    'horasFalla': round(semana_data['horasFalla'], 1),
-                    'tempPromedio': round(temp_prom, 1)
-                })
-            else:  # tendencia
-                resultado.append({
-                    'periodo': semana_data['periodo'],
-                    'eventos': semana_data['eventos'],
-                    'horasCriticas': round(semana_data['horasCriticas'], 1)
-                })
-        
-        resultado.sort(key=lambda x: x['periodo'])
-        
-        # Para tendencia, si hay muy pocos datos, incluir períodos vacíos para mejor contexto
-        if tipo_calculo == 'tendencia':
-            datos_con_eventos = [r for r in resultado if r['eventos'] > 0]
-            # Si hay muy pocos períodos con datos, mantener algunos vacíos para contexto
-            if len(datos_con_eventos) <= 2 and len(resultado) > len(datos_con_eventos):
-                # Mantener todos los datos para mostrar mejor contexto
-                pass  # No filtrar
-            else:
-                # Filtrar solo si hay suficientes datos
-                resultado = datos_con_eventos
-        
-        titulo = 'Comparación Semanal' if tipo_calculo == 'comparacion' else 'Tendencia Semanal'
+            resultado = analytics.comparacion_semanal(datos)
+        else:
+            resultado = analytics.tendencia_semanal(datos)
         
         return {
             'tipo': 'semanal',
@@ -951,7 +673,6 @@ def calcular_datos_semanales(client, fecha_inicio, fecha_fin, sucursal_filter, t
         
     except Exception as e:
         logger.error(f"Error en cálculo semanal: {str(e)}")
-        titulo = 'Comparación Semanal' if tipo_calculo == 'comparacion' else 'Tendencia Semanal'
         return {'tipo': 'semanal', 'titulo': titulo, 'datos': []}
 
 
@@ -1010,17 +731,20 @@ def obtener_tendencia_semanal(client, fecha_inicio, fecha_fin, sucursal_filter):
         return []
 
 
-def obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Obtiene análisis detallado de eventos usando datos reales - distribución por TIEMPO, no por cantidad"""
     try:
-        # Obtener eventos del período (incluir todo el día final)
-        fecha_fin_completa = f"{fecha_fin}T23:59:59"
-        eventos_query = client.table('eventos_temperatura')\
-            .select('*')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin_completa)
-        
-        eventos_data = eventos_query.execute()
+        if datos is not None:
+            eventos = datos.eventos
+        else:
+            # Obtener eventos del período (incluir todo el día final)
+            fecha_fin_completa = f"{fecha_fin}T23:59:59"
+            eventos_query = client.table('eventos_temperatura')\
+                .select('*')\
+                .gte('fecha_inicio', fecha_inicio)\
+                .lte('fecha_inicio', fecha_fin_completa)
+            
+            eventos = eventos_query.execute().data
         
         # Calcular tiempo total del período en minutos
         fecha_inicio_obj = datetime.fromisoformat(fecha_inicio)
@@ -1033,8 +757,8 @@ def obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter):
         tiempo_falla = 0
         eventos_criticos = []
         
-        if eventos_data.data:
-            for evento in eventos_data.data:
+        if eventos:
+            for evento in eventos:
                 tipo = evento['tipo']
                 duracion_min = evento.get('duracion_minutos', 0) or 0
                 
@@ -1100,114 +824,56 @@ def obtener_analisis_eventos(client, fecha_inicio, fecha_fin, sucursal_filter):
         
     except Exception as e:
         logger.error(f"Error en análisis de eventos: {str(e)}")
-        return {
-            'distribucion': [],
-            'eventosCriticos': []
-        }
+        return ANALISIS_EVENTOS_VACIO
 
 
-def obtener_temperaturas_diarias(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_temperaturas_diarias(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Obtiene evolución de temperaturas diarias usando datos reales"""
     try:
-        # Obtener lecturas del período
-        lecturas_query = client.table('lecturas_temperatura')\
-            .select('temperatura_c, timestamp')\
-            .gte('timestamp', fecha_inicio)\
-            .lte('timestamp', fecha_fin)
-        
-        lecturas_data = lecturas_query.execute()
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
-        # Agrupar por fecha
-        fechas = {}
-        if lecturas_data.data:
-            for lectura in lecturas_data.data:
-                fecha_str = lectura['timestamp'][:10]  # YYYY-MM-DD
-                temp = float(lectura['temperatura_c'])
-                
-                if fecha_str not in fechas:
-                    fechas[fecha_str] = {
-                        'fecha': fecha_str,
-                        'temperaturas': []
-                    }
-                
-                fechas[fecha_str]['temperaturas'].append(temp)
-        
-        # Calcular promedios y máximos por día
-        resultado = []
-        for fecha_data in fechas.values():
-            temps = fecha_data['temperaturas']
-            if temps:
-                temp_prom = sum(temps) / len(temps)
-                temp_max = max(temps)
-                
-                resultado.append({
-                    'fecha': fecha_data['fecha'],
-                    'tempPromedio': round(temp_prom, 1),
-                    'tempMaxima': round(temp_max, 1),
-                    'umbralCritico': 4.0  # Línea de referencia
-                })
-        
-        resultado.sort(key=lambda x: x['fecha'])
-        return resultado
+        return analytics.temperaturas_diarias(datos)
         
     except Exception as e:
         logger.error(f"Error en temperaturas diarias: {str(e)}")
         return []
 
 
-def obtener_ranking_camaras(client, fecha_inicio, fecha_fin, sucursal_filter):
+def obtener_ranking_camaras(client, fecha_inicio, fecha_fin, sucursal_filter, datos=None):
     """Obtiene ranking de cámaras por eventos y fallas usando datos reales"""
     try:
-        # Obtener eventos del período
-        eventos_query = client.table('eventos_temperatura')\
-            .select('camara_id, tipo, duracion_minutos')\
-            .gte('fecha_inicio', fecha_inicio)\
-            .lte('fecha_inicio', fecha_fin)
+        if datos is None:
+            datos = repositorio.cargar_periodo(client, fecha_inicio, fecha_fin, sucursal_filter.get('camara_ids'))
         
-        eventos_data = eventos_query.execute()
+        return analytics.ranking_camaras(datos)
         
-        # Agrupar por cámara
-        camaras = {}
-        if eventos_data.data:
-            for evento in eventos_data.data:
-                camara_id = evento['camara_id']
-                
-                if camara_id not in camaras:
-                    camaras[camara_id] = {
-                        'id': camara_id,
-                        'nombre': f'Cámara {camara_id}',
-                        'eventos': 0,
-                        'horasFalla': 0
-                    }
-                
-                camaras[camara_id]['eventos'] += 1
-                
-                # Calcular horas de falla
-                if evento['tipo'] in ['FALLA', 'FALLA_EN_CURSO']:
-                    duracion_min = evento.get('duracion_minutos', 0) or 0
-                    camaras[camara_id]['horasFalla'] += duracion_min / 60.0
-        
-        # Convertir a listas y ordenar
-        lista_camaras = list(camaras.values())
-        
-        mas_eventos = sorted(lista_camaras, key=lambda x: x['eventos'], reverse=True)[:5]
-        mas_fallas = sorted(lista_camaras, key=lambda x: x['horasFalla'], reverse=True)[:5]
+    except Exception as e:
+        logger.error(f"Error en ranking de cámaras: {str(e)}")
+        return RANKING_VACIO
+
+
+def obtener_cumplimiento(client, fecha_inicio, fecha_fin, sucursal_filter, camara_id=None):
+    """
+    Métricas de cumplimiento por cámara combinando los resúmenes diarios:
+    % de tiempo en rango, p50/p95/p99 y excursión más larga.
+    """
+    try:
+        camaras_query = client.table('camaras_frio')\
+            .select('id, nombre, umbral_min_c, umbral_max_c')
         
-        # Redondear horas de falla
-        for camara in mas_fallas:
-            camara['horasFalla'] = round(camara['horasFalla'], 1)
+        if sucursal_filter:
+            camaras_query = camaras_query.in_('id', sucursal_filter['camara_ids'])
+        if camara_id and camara_id != 'todas':
+            camaras_query = camaras_query.eq('id', camara_id)
         
-        return {
-            'masEventos': mas_eventos,
-            'masFallas': mas_fallas
-        }
+        camaras = camaras_query.order('id').execute().data or []
         
+        return calcular_cumplimiento(client, fecha_inicio, fecha_fin, camaras)
+    
     except Exception as e:
-        logger.error(f"Error en ranking de cámaras: {str(e)}")
-        return {
-            'masEventos': [],
-            'masFallas': []
-        }
+        logger.error(f"Error en cumplimiento: {str(e)}")
+        return CUMPLIMIENTO_VACIO
 
 
 @api_view(['POST'])
@@ -1365,87 +1031,11 @@ def get_resumen_semanal(request):
         # Últimos 7 días
         hace_7_dias = date.today() - timedelta(days=7)
         
-        # Obtener lecturas de la última semana
-        lecturas_query = client.table('lecturas_temperatura')\
-            .select('timestamp, temperatura_c, camara_id')\
-            .gte('timestamp', hace_7_dias.isoformat())
-        
-        # Filtrar por sucursal si no es ADMIN
-        if user and user.get('rol') != 'ADMIN':
-            sucursal_id = user.get('sucursal_id')
-            if sucursal_id:
-                lecturas_query = client.table('lecturas_temperatura')\
-                    .select('timestamp, temperatura_c, camara_id, camaras_frio!inner(sucursal_id)')\
-                    .gte('timestamp', hace_7_dias.isoformat())\
-                    .eq('camaras_frio.sucursal_id', sucursal_id)
-        
-        lecturas_response = lecturas_query.execute()
-        
-        # Agrupar por fecha
-        por_fecha = {}
-        if lecturas_response.data:
-            for lectura in lecturas_response.data:
-                fecha_str = lectura['timestamp'][:10]  # YYYY-MM-DD
-                temp = float(lectura['temperatura_c'])
-                
-                if fecha_str not in por_fecha:
-                    por_fecha[fecha_str] = {
-                        'fecha': fecha_str,
-                        'temp_min': temp,
-                        'temp_max': temp,
-                        'temps': [temp],
-                        'alertas': 0,
-                        'fallas': 0,
-                    }
-                else:
-                    por_fecha[fecha_str]['temp_min'] = min(por_fecha[fecha_str]['temp_min'], temp)
-                    por_fecha[fecha_str]['temp_max'] = max(por_fecha[fecha_str]['temp_max'], temp)
-                    por_fecha[fecha_str]['temps'].append(temp)
-        
-        # Calcular promedios y obtener eventos
-        resultado = []
-        for fecha_str, data in por_fecha.items():
-            # Calcular promedio
-            temp_promedio = sum(data['temps']) / len(data['temps'])
-            
-            # Contar eventos del día
-            eventos_query = client.table('eventos_temperatura')\
-                .select('tipo')\
-                .gte('fecha_inicio', f'{fecha_str}T00:00:00')\
-                .lt('fecha_inicio', f'{fecha_str}T23:59:59')
-            
-            if user and user.get('rol') != 'ADMIN':
-                sucursal_id = user.get('sucursal_id')
-                if sucursal_id:
-                    eventos_query = client.table('eventos_temperatura')\
-                        .select('tipo, camaras_frio!inner(sucursal_id)')\
-                        .gte('fecha_inicio', f'{fecha_str}T00:00:00')\
-                        .lt('fecha_inicio', f'{fecha_str}T23:59:59')\
-                        .eq('camaras_frio.sucursal_id', sucursal_id)
-            
-            eventos_response = eventos_query.execute()
-            
-            alertas = 0
-            fallas = 0
-            if eventos_response.data:
-                for evento in eventos_response.data:
-                    tipo = evento['tipo']
-                    if tipo in ['DESHIELO_N', 'DESHIELO_P']:
-                        alertas += 1
-                    elif tipo in ['FALLA', 'FALLA_EN_CURSO']:
-                        fallas += 1
-            
-            resultado.append({
-                'fecha': fecha_str,
-                'temp_min': round(data['temp_min'], 2),
-                'temp_max': round(data['temp_max'], 2),
-                'temp_promedio': round(temp_promedio, 2),
-                'alertas': alertas,
-                'fallas': fallas,
-            })
+        # Filtrar por las cámaras de la sucursal si no es ADMIN
+        camara_ids = alcance.camaras_de_usuario(user, client)
         
-        # Ordenar por fecha
-        resultado.sort(key=lambda x: x['fecha'])
+        # Agregado por día (en la base si hay conexión directa)
+        resultado = repositorio.resumen_diario(client, hace_7_dias.isoformat(), camara_ids)
         
         return Response(resultado)
         
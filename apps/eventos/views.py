@@ -3,11 +3,23 @@
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from django.conf import settings
 from django.db.models import Count, Q
 from datetime import datetime, timedelta
 from .models import EventoTemperatura
 from .serializers import EventoTemperaturaSerializer
 from apps.auth.permissions import filter_by_sucursal, CanEditSucursal
+from apps.camaras import alcance
+from services.export_service import build_export_response
+from services.supabase_service import iterar_keyset, iterar_keyset_orm
+
+
+COLUMNAS_EXPORTACION = [
+    'id', 'camara_id', 'fecha_inicio', 'fecha_fin', 'duracion_minutos',
+    'temp_max_c', 'tipo', 'estado', 'observaciones'
+]
 
 
 class EventoTemperaturaViewSet(viewsets.ModelViewSet):
@@ -74,3 +86,63 @@ class EventoTemperaturaViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset().filter(fecha_fin__isnull=True)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def exportar_eventos(request):
+    """
+    Exporta eventos en streaming (CSV o NDJSON, opcionalmente gzip).
+    
+    GET /api/eventos/export/
+    
+    Query params:
+        - formato: csv (default) o ndjson
+        - gzip: 1 para comprimir
+        - camara_id, tipo, estado: Filtros opcionales
+        - fecha_desde / fecha_hasta: Rango de fecha_inicio (ISO)
+    """
+    user = getattr(request, 'firebase_user', None)
+    if not user:
+        return Response({'error': 'Autenticación requerida'}, status=401)
+    
+    formato = request.GET.get('formato', 'csv')
+    comprimir = request.GET.get('gzip') in ('1', 'true')
+    filtros = {
+        'camara_id': request.GET.get('camara_id'),
+        'tipo': request.GET.get('tipo'),
+        'estado': request.GET.get('estado'),
+    }
+    fecha_desde = request.GET.get('fecha_desde')
+    fecha_hasta = request.GET.get('fecha_hasta')
+    camara_ids = alcance.camaras_de_usuario(user)
+    
+    if settings.SUPABASE_DIRECT_DB:
+        queryset = EventoTemperatura.objects.all()
+        if camara_ids is not None:
+            queryset = queryset.filter(camara_id__in=camara_ids)
+        queryset = queryset.filter(**{campo: valor for campo, valor in filtros.items() if valor})
+        if fecha_desde:
+            queryset = queryset.filter(fecha_inicio__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(fecha_inicio__lte=fecha_hasta)
+        
+        filas = iterar_keyset_orm(queryset, COLUMNAS_EXPORTACION, orden='fecha_inicio')
+    else:
+        columnas = ', '.join(COLUMNAS_EXPORTACION)
+        
+        def aplicar_filtros(query):
+            if camara_ids is not None:
+                query = query.in_('camara_id', camara_ids)
+            for campo, valor in filtros.items():
+                if valor:
+                    query = query.eq(campo, valor)
+            if fecha_desde:
+                query = query.gte('fecha_inicio', fecha_desde)
+            if fecha_hasta:
+                query = query.lte('fecha_inicio', fecha_hasta)
+            return query
+        
+        filas = iterar_keyset('eventos_temperatura', columnas, aplicar_filtros)
+    
+    return build_export_response(filas, COLUMNAS_EXPORTACION, formato, 'eventos', comprimir)
@@ -0,0 +1,460 @@
+"""
+Métricas de Cumplimiento (cadena de frío)
+
+Calcula tiempo en rango, percentiles de temperatura y la excursión más larga
+por cámara usando resúmenes diarios combinables ("sketches").
+
+Cada día de cada cámara guarda un SketchDiario en resumen_diario_camara:
+- Histograma de bins fijos de 0.1°C (percentiles p50/p95/p99)
+- Lecturas totales y lecturas dentro del rango de la cámara
+- Resumen de excursiones: duración inicial, máxima y final (corrida abierta)
+
+Cualquier rango de fechas se responde combinando los sketches diarios,
+sin volver a leer las lecturas crudas.
+
+El tiempo en rango se calcula por cantidad de lecturas (los sensores
+reportan a intervalo fijo).
+
+Uso:
+    >>> from apps.lecturas.cumplimiento import acumulador
+    >>> acumulador.agregar(camera, timestamp, -18.5)  # por cada lectura
+    >>> acumulador.volcar()  # al final de cada ciclo de sincronización
+"""
+
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable, List, Optional
+import logging
+import threading
+
+from services.supabase_service import get_supabase_client, iterar_keyset
+
+logger = logging.getLogger(__name__)
+
+# Umbrales por defecto si la cámara no tiene umbral_min_c / umbral_max_c
+UMBRAL_MIN_DEFECTO = -30.0
+UMBRAL_MAX_DEFECTO = 4.0
+
+# Histograma de bins fijos: [-40, 30) °C en pasos de 0.1°C.
+# El bin 0 acumula todo lo menor a -40 y el último todo lo >= 30.
+HIST_MIN = -40.0
+HIST_ANCHO = 0.1
+HIST_BINS = 700
+
+PERCENTILES = (50, 95, 99)
+
+
+def bin_temperatura(temp: float) -> int:
+    """Índice del bin de una temperatura"""
+    if temp < HIST_MIN:
+        return 0
+    idx = int((temp - HIST_MIN) / HIST_ANCHO + 1e-9)
+    return min(idx, HIST_BINS) + 1
+
+
+def valor_bin(idx: int) -> float:
+    """Temperatura representativa (centro) de un bin"""
+    if idx <= 0:
+        return HIST_MIN
+    if idx > HIST_BINS:
+        return HIST_MIN + HIST_BINS * HIST_ANCHO
+    return round(HIST_MIN + (idx - 1 + 0.5) * HIST_ANCHO, 2)
+
+
+def umbrales_camara(camera: Dict):
+    """(umbral_min, umbral_max) de una cámara (dict de Supabase)"""
+    umbral_min = camera.get('umbral_min_c')
+    umbral_max = camera.get('umbral_max_c')
+    return (
+        float(umbral_min) if umbral_min is not None else UMBRAL_MIN_DEFECTO,
+        float(umbral_max) if umbral_max is not None else UMBRAL_MAX_DEFECTO
+    )
+
+
+class SketchDiario:
+    """
+    Resumen combinable de las lecturas de una cámara en un día.
+    
+    Las excursiones (lecturas fuera de rango consecutivas) se miden desde la
+    primera lectura fuera de rango hasta la siguiente lectura en rango.
+    Para poder unir excursiones que cruzan la medianoche se guardan:
+        - excursion_inicial: desde la primera lectura del día hasta la primera en rango
+        - excursion_max: la corrida cerrada más larga dentro del día
+        - corrida_desde: inicio de la corrida abierta al final del día
+    """
+    
+    def __init__(self, umbral_min: float = UMBRAL_MIN_DEFECTO, umbral_max: float = UMBRAL_MAX_DEFECTO):
+        self.umbral_min = umbral_min
+        self.umbral_max = umbral_max
+        self.histograma: Dict[int, int] = {}
+        self.total = 0
+        self.en_rango = 0
+        self.suma = 0.0
+        self.temp_min: Optional[float] = None
+        self.temp_max: Optional[float] = None
+        self.primera_ts: Optional[int] = None
+        self.ultima_ts: Optional[int] = None
+        self.hubo_en_rango = False
+        self.excursion_inicial = 0
+        self.excursion_max = 0
+        self.corrida_desde: Optional[int] = None
+    
+    def agregar(self, ts: int, temp: float):
+        """
+        Agrega una lectura (ts en segundos epoch).
+        
+        Las lecturas fuera de orden solo actualizan histograma y conteos.
+        """
+        idx = bin_temperatura(temp)
+        self.histograma[idx] = self.histograma.get(idx, 0) + 1
+        self.total += 1
+        self.suma += temp
+        self.temp_min = temp if self.temp_min is None else min(self.temp_min, temp)
+        self.temp_max = temp if self.temp_max is None else max(self.temp_max, temp)
+        
+        en_rango = self.umbral_min <= temp <= self.umbral_max
+        if en_rango:
+            self.en_rango += 1
+        
+        if self.ultima_ts is not None and ts < self.ultima_ts:
+            return
+        if self.primera_ts is None:
+            self.primera_ts = ts
+        self.ultima_ts = ts
+        
+        if en_rango:
+            if not self.hubo_en_rango:
+                self.excursion_inicial = ts - self.primera_ts
+                self.hubo_en_rango = True
+            if self.corrida_desde is not None:
+                self.excursion_max = max(self.excursion_max, ts - self.corrida_desde)
+                self.corrida_desde = None
+        elif self.corrida_desde is None:
+            self.corrida_desde = ts
+    
+    @property
+    def excursion_final(self) -> int:
+        """Duración de la corrida abierta al final del día (0 si terminó en rango)"""
+        if self.corrida_desde is None:
+            return 0
+        return self.ultima_ts - self.corrida_desde
+    
+    @property
+    def duracion(self) -> int:
+        """Segundos entre la primera y la última lectura"""
+        if self.primera_ts is None:
+            return 0
+        return self.ultima_ts - self.primera_ts
+    
+    def excursion_mas_larga(self) -> int:
+        """Excursión más larga considerando solo este día (segundos)"""
+        if not self.hubo_en_rango:
+            return self.duracion if self.total else 0
+        return max(self.excursion_max, self.excursion_final)
+    
+    def to_dict(self) -> Dict:
+        """Formato jsonb guardado en resumen_diario_camara.sketch_cumplimiento"""
+        return {
+            'umbral_min': self.umbral_min,
+            'umbral_max': self.umbral_max,
+            'histograma': {str(idx): cuenta for idx, cuenta in self.histograma.items()},
+            'total': self.total,
+            'en_rango': self.en_rango,
+            'suma': self.suma,
+            'temp_min': self.temp_min,
+            'temp_max': self.temp_max,
+            'primera_ts': self.primera_ts,
+            'ultima_ts': self.ultima_ts,
+            'hubo_en_rango': self.hubo_en_rango,
+            'excursion_inicial': self.excursion_inicial,
+            'excursion_max': self.excursion_max,
+            'corrida_desde': self.corrida_desde,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SketchDiario':
+        sketch = cls(data.get('umbral_min', UMBRAL_MIN_DEFECTO), data.get('umbral_max', UMBRAL_MAX_DEFECTO))
+        sketch.histograma = {int(idx): cuenta for idx, cuenta in (data.get('histograma') or {}).items()}
+        sketch.total = data.get('total', 0)
+        sketch.en_rango = data.get('en_rango', 0)
+        sketch.suma = data.get('suma', 0.0)
+        sketch.temp_min = data.get('temp_min')
+        sketch.temp_max = data.get('temp_max')
+        sketch.primera_ts = data.get('primera_ts')
+        sketch.ultima_ts = data.get('ultima_ts')
+        sketch.hubo_en_rango = data.get('hubo_en_rango', False)
+        sketch.excursion_inicial = data.get('excursion_inicial', 0)
+        sketch.excursion_max = data.get('excursion_max', 0)
+        sketch.corrida_desde = data.get('corrida_desde')
+        return sketch
+
+
+def percentil(histograma: Dict[int, int], q: float) -> Optional[float]:
+    """Percentil q (0-100) de un histograma de bins fijos (resolución 0.1°C)"""
+    total = sum(histograma.values())
+    if total == 0:
+        return None
+    objetivo = q / 100.0 * total
+    acumulado = 0
+    for idx in sorted(histograma):
+        acumulado += histograma[idx]
+        if acumulado >= objetivo:
+            return valor_bin(idx)
+    return valor_bin(max(histograma))
+
+
+def combinar(sketches: Iterable[tuple]) -> Dict:
+    """
+    Combina sketches diarios de una misma cámara.
+    
+    Args:
+        sketches: Pares (fecha, SketchDiario) en cualquier orden
+    
+    Returns:
+        Dict con totalLecturas, pctEnRango, p50/p95/p99 y excursionMaxMinutos
+    """
+    histograma: Dict[int, int] = {}
+    total = 0
+    en_rango = 0
+    excursion_max = 0
+    corriente = 0  # Excursión que viene abierta del día anterior
+    fecha_anterior = None
+    ultima_anterior = None
+    
+    for fecha, sketch in sorted(sketches, key=lambda par: par[0]):
+        if not sketch.total:
+            continue
+        for idx, cuenta in sketch.histograma.items():
+            histograma[idx] = histograma.get(idx, 0) + cuenta
+        total += sketch.total
+        en_rango += sketch.en_rango
+        
+        # Solo se unen excursiones de días consecutivos (sumando el tiempo
+        # entre la última lectura del día anterior y la primera de este)
+        if fecha_anterior is None or fecha - fecha_anterior != timedelta(days=1):
+            corriente = 0
+        elif corriente:
+            corriente += sketch.primera_ts - ultima_anterior
+        fecha_anterior = fecha
+        ultima_anterior = sketch.ultima_ts
+        
+        if not sketch.hubo_en_rango:
+            # Todo el día fuera de rango: la excursión continúa
+            corriente += sketch.duracion
+            excursion_max = max(excursion_max, corriente)
+            continue
+        
+        if corriente:
+            excursion_max = max(excursion_max, corriente + sketch.excursion_inicial)
+        excursion_max = max(excursion_max, sketch.excursion_max)
+        corriente = sketch.excursion_final
+    
+    excursion_max = max(excursion_max, corriente)
+    
+    resultado = {
+        'totalLecturas': total,
+        'pctEnRango': round(en_rango / total * 100, 2) if total else None,
+        'excursionMaxMinutos': round(excursion_max / 60.0, 1),
+    }
+    for q in PERCENTILES:
+        resultado[f'p{q}'] = percentil(histograma, q)
+    resultado['_histograma'] = histograma
+    resultado['_en_rango'] = en_rango
+    return resultado
+
+
+def columnas_resumen(sketch: SketchDiario) -> Dict:
+    """Columnas de resumen_diario_camara derivadas de un sketch"""
+    return {
+        'sketch_cumplimiento': sketch.to_dict(),
+        'pct_en_rango': round(sketch.en_rango / sketch.total * 100, 2) if sketch.total else None,
+        'temp_p50': percentil(sketch.histograma, 50),
+        'temp_p95': percentil(sketch.histograma, 95),
+        'temp_p99': percentil(sketch.histograma, 99),
+        'excursion_max_min': int(round(sketch.excursion_mas_larga() / 60.0)),
+    }
+
+
+class AcumuladorCumplimiento:
+    """
+    Mantiene en memoria los sketches del día de cada cámara.
+    
+    La sincronización llama a agregar() por cada lectura nueva y a volcar()
+    al final del ciclo, que guarda los sketches modificados en Supabase.
+    Si el proceso se reinicia, el sketch se retoma desde la base de datos.
+    """
+    
+    def __init__(self):
+        self._sketches: Dict[tuple, SketchDiario] = {}
+        self._pendientes = set()
+        self._lock = threading.Lock()
+    
+    def agregar(self, camera: Dict, timestamp: datetime, temperatura: float):
+        """Agrega una lectura nueva de una cámara"""
+        clave = (camera['id'], timestamp.date())
+        with self._lock:
+            sketch = self._sketches.get(clave)
+        
+        if sketch is None:
+            # La consulta a Supabase va fuera del lock para no frenar a las demás cámaras
+            sketch = self._cargar(clave, camera)
+        
+        with self._lock:
+            # Si otro hilo lo cargó mientras tanto, se usa el suyo
+            sketch = self._sketches.setdefault(clave, sketch)
+            sketch.agregar(int(timestamp.timestamp()), float(temperatura))
+            self._pendientes.add(clave)
+    
+    def _cargar(self, clave: tuple, camera: Dict) -> SketchDiario:
+        """Retoma el sketch guardado o crea uno nuevo con los umbrales de la cámara"""
+        camara_id, fecha = clave
+        try:
+            client = get_supabase_client(use_service_key=True)
+            response = client.table('resumen_diario_camara')\
+                .select('sketch_cumplimiento')\
+                .eq('camara_id', camara_id)\
+                .eq('fecha', fecha.isoformat())\
+                .execute()
+            if response.data and response.data[0].get('sketch_cumplimiento'):
+                return SketchDiario.from_dict(response.data[0]['sketch_cumplimiento'])
+        except Exception as e:
+            logger.warning(f"No se pudo cargar sketch de cámara {camara_id} ({fecha}): {str(e)}")
+        return SketchDiario(*umbrales_camara(camera))
+    
+    def volcar(self) -> int:
+        """
+        Guarda en resumen_diario_camara los sketches modificados.
+        
+        Returns:
+            Cantidad de resúmenes guardados
+        """
+        with self._lock:
+            pendientes = [(clave, self._sketches[clave]) for clave in self._pendientes]
+            self._pendientes = set()
+            # Liberar días anteriores a ayer (ya no reciben lecturas)
+            limite = date.today() - timedelta(days=1)
+            for clave in [c for c in self._sketches if c[1] < limite]:
+                del self._sketches[clave]
+        
+        guardados = 0
+        for (camara_id, fecha), sketch in pendientes:
+            if guardar_sketch(camara_id, fecha, sketch):
+                guardados += 1
+        
+        if guardados:
+            logger.info(f"📈 Cumplimiento: {guardados} resúmenes diarios actualizados")
+        return guardados
+
+
+def guardar_sketch(camara_id: int, fecha: date, sketch: SketchDiario) -> bool:
+    """
+    Guarda el sketch de un día en resumen_diario_camara.
+    
+    Si el resumen no existe se crea con las estadísticas básicas del sketch.
+    """
+    try:
+        client = get_supabase_client(use_service_key=True)
+        data = columnas_resumen(sketch)
+        
+        existing = client.table('resumen_diario_camara')\
+            .select('id')\
+            .eq('camara_id', camara_id)\
+            .eq('fecha', fecha.isoformat())\
+            .execute()
+        
+        if existing.data:
+            client.table('resumen_diario_camara')\
+                .update(data)\
+                .eq('id', existing.data[0]['id'])\
+                .execute()
+        else:
+            data.update({
+                'fecha': fecha.isoformat(),
+                'camara_id': camara_id,
+                'temp_min': sketch.temp_min,
+                'temp_max': sketch.temp_max,
+                'temp_promedio': round(sketch.suma / sketch.total, 2),
+                'total_lecturas': sketch.total,
+            })
+            client.table('resumen_diario_camara')\
+                .insert(data)\
+                .execute()
+        return True
+    
+    except Exception as e:
+        logger.error(f"Error al guardar cumplimiento de cámara {camara_id} ({fecha}): {str(e)}")
+        return False
+
+
+def calcular_cumplimiento(client, fecha_inicio: str, fecha_fin: str, camaras: List[Dict]) -> Dict:
+    """
+    Métricas de cumplimiento de un rango combinando los sketches diarios.
+    
+    Args:
+        client: Cliente de Supabase
+        fecha_inicio / fecha_fin: Rango (YYYY-MM-DD, inclusivo)
+        camaras: Cámaras a incluir (dicts con id y nombre)
+    
+    Returns:
+        {
+            "global": {"pctEnRango": 97.4, "p50": -18.05, ..., "excursionMaxMinutos": 95.0},
+            "camaras": [{"id": 1, "nombre": "...", "umbralMin": -30.0, ...}]
+        }
+    """
+    filas = []
+    if camaras:
+        filas = iterar_keyset(
+            'resumen_diario_camara',
+            'id, camara_id, fecha, sketch_cumplimiento',
+            lambda q: q.in_('camara_id', [c['id'] for c in camaras])
+                       .gte('fecha', fecha_inicio)
+                       .lte('fecha', fecha_fin),
+            client=client
+        )
+    
+    por_camara: Dict[int, List[tuple]] = {}
+    for fila in filas:
+        if not fila.get('sketch_cumplimiento'):
+            continue
+        por_camara.setdefault(fila['camara_id'], []).append(
+            (date.fromisoformat(fila['fecha'][:10]), SketchDiario.from_dict(fila['sketch_cumplimiento']))
+        )
+    
+    resultado_camaras = []
+    histograma_global: Dict[int, int] = {}
+    total_global = 0
+    en_rango_global = 0
+    excursion_global = 0
+    
+    for camara in camaras:
+        metricas = combinar(por_camara.get(camara['id'], []))
+        for idx, cuenta in metricas.pop('_histograma').items():
+            histograma_global[idx] = histograma_global.get(idx, 0) + cuenta
+        total_global += metricas['totalLecturas']
+        en_rango_global += metricas.pop('_en_rango')
+        excursion_global = max(excursion_global, metricas['excursionMaxMinutos'])
+        
+        umbral_min, umbral_max = umbrales_camara(camara)
+        resultado_camaras.append({
+            'id': camara['id'],
+            'nombre': camara.get('nombre', f"Cámara {camara['id']}"),
+            'umbralMin': umbral_min,
+            'umbralMax': umbral_max,
+            **metricas
+        })
+    
+    resumen_global = {
+        'totalLecturas': total_global,
+        'pctEnRango': round(en_rango_global / total_global * 100, 2) if total_global else None,
+        'excursionMaxMinutos': excursion_global,
+    }
+    for q in PERCENTILES:
+        resumen_global[f'p{q}'] = percentil(histograma_global, q)
+    
+    return {
+        'global': resumen_global,
+        'camaras': resultado_camaras
+    }
+
+
+# Instancia compartida por el servicio de sincronización
+acumulador = AcumuladorCumplimiento()
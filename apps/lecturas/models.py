@@ -34,6 +34,14 @@ class ResumenDiarioCamara(models.Model):
     alertas_descongelamiento = models.BigIntegerField(default=0)
     fallas_detectadas = models.BigIntegerField(default=0)
     
+    # Cumplimiento (ver apps/lecturas/cumplimiento.py)
+    pct_en_rango = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    temp_p50 = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    temp_p95 = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    temp_p99 = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    excursion_max_min = models.BigIntegerField(null=True, blank=True)
+    sketch_cumplimiento = models.JSONField(null=True, blank=True)
+    
     class Meta:
         db_table = 'resumen_diario_camara'
         managed = False
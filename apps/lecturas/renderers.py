@@ -0,0 +1,50 @@
+"""
+Renderers de Lecturas
+
+Formatos compactos para consultas masivas de lecturas (gráficos y exportaciones).
+Se seleccionan con el parámetro `?format=` o con el header `Accept`.
+
+- columnar: JSON con arreglos paralelos (ver serializar_columnar)
+- msgpack: mismo payload columnar codificado en binario (requiere `msgpack`)
+"""
+
+from rest_framework.renderers import BaseRenderer
+from coldtrack.renderers import OrjsonRenderer
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional
+    msgpack = None
+
+
+class ColumnarJSONRenderer(OrjsonRenderer):
+    """JSON compacto (sin espacios) para el formato columnar"""
+    
+    format = 'columnar'
+    compact = True
+
+
+class MsgpackRenderer(BaseRenderer):
+    """Codifica la respuesta con MessagePack"""
+    
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
+
+
+# Formatos que usan el payload columnar en lugar del serializer
+FORMATOS_COLUMNARES = {ColumnarJSONRenderer.format, MsgpackRenderer.format}
+
+
+def get_renderers_lecturas():
+    """Renderers disponibles para las lecturas (msgpack solo si está instalado)"""
+    renderers = [OrjsonRenderer, ColumnarJSONRenderer]
+    if msgpack is not None:
+        renderers.append(MsgpackRenderer)
+    return renderers
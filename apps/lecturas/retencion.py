@@ -0,0 +1,519 @@
+"""
+Retención de Lecturas
+
+lecturas_temperatura conserva solo RETENCION_LECTURAS_DIAS días de lecturas
+por minuto. Cada mes completo anterior a ese corte se compacta:
+
+1. Resúmenes por hora en resumen_horario_camara, y los días que falten en
+   resumen_diario_camara (ver retencion_lecturas.sql)
+2. Las lecturas crudas del mes se escriben en un archivo columnar
+   comprimido (lecturas_YYYY_MM.npz: un arreglo numpy por columna, ordenado
+   por cámara y timestamp) en disco o en un bucket de Supabase Storage, y
+   se registra en archivo_lecturas
+3. El archivo se relee y se compara antes de borrar las filas, por bloques
+   de ids (o soltando la partición del mes si coincide completa)
+
+leer_archivo() devuelve las lecturas archivadas de un rango cargando solo
+los meses involucrados, para auditorías con resolución completa.
+
+Uso:
+    >>> from apps.lecturas.retencion import compactar_mes, leer_archivo
+    >>> compactar_mes(date(2025, 1, 1))
+    >>> filas = leer_archivo(datetime(2025, 1, 10), datetime(2025, 1, 11), camara_ids=[3])
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+import io
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+
+from services.supabase_service import get_supabase_client, iterar_keyset, iterar_keyset_orm
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_LECTURA = ['id', 'camara_id', 'timestamp', 'temperatura_c', 'origen', 'created_at']
+
+# Filas convertidas a arreglos de una vez al leer un mes
+FILAS_POR_TRAMO = 100_000
+
+# Ids borrados por sentencia DELETE
+IDS_POR_BORRADO = 10_000
+
+# Filas por upsert de resúmenes (límite de PostgREST)
+FILAS_POR_LOTE = 1000
+
+
+def corte_retencion(dias: Optional[int] = None, ahora: Optional[datetime] = None) -> date:
+    """Primer mes que se conserva completo en lecturas_temperatura"""
+    dias = settings.RETENCION_LECTURAS_DIAS if dias is None else dias
+    ahora = ahora or datetime.now(timezone.utc)
+    return (ahora - timedelta(days=dias)).date().replace(day=1)
+
+
+def siguiente_mes(mes: date) -> date:
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def nombre_archivo(mes: date) -> str:
+    return f'lecturas_{mes:%Y_%m}.npz'
+
+
+def _epoch(valores: List) -> np.ndarray:
+    """Segundos UTC de timestamps ISO (PostgREST) o datetime (ORM, ya en UTC)"""
+    texto = [(v if isinstance(v, str) else v.isoformat())[:19] for v in valores]
+    return np.array(texto, dtype='datetime64[s]').astype(np.int64)
+
+
+def _iso(epoch: np.ndarray) -> List[str]:
+    return [f'{t}+00:00' for t in np.datetime_as_string(epoch.astype('datetime64[s]'), unit='s')]
+
+
+class MesLecturas:
+    """
+    Lecturas crudas de un mes en arreglos paralelos, ordenadas por
+    (camara_id, timestamp). Las temperaturas se guardan en centésimas
+    (NUMERIC(5,2) sin pérdida) y los timestamps en segundos UTC.
+    """
+    
+    def __init__(self, mes: date, columnas: Dict[str, np.ndarray]):
+        orden = np.lexsort((columnas['timestamp'], columnas['camara_id']))
+        self.mes = mes
+        self.columnas = {nombre: valores[orden] for nombre, valores in columnas.items()}
+    
+    def __len__(self):
+        return len(self.columnas['id'])
+    
+    @classmethod
+    def desde_filas(cls, mes: date, filas: Iterable[Dict]) -> 'MesLecturas':
+        """Convierte filas de lecturas_temperatura por tramos (sin listas de todo el mes)"""
+        filas = iter(filas)
+        tramos = []
+        while True:
+            tramo = list(islice(filas, FILAS_POR_TRAMO))
+            if not tramo:
+                break
+            timestamps = _epoch([fila['timestamp'] for fila in tramo])
+            creados = [fila.get('created_at') for fila in tramo]
+            tramos.append({
+                'id': np.array([fila['id'] for fila in tramo], dtype=np.int64),
+                'camara_id': np.array([fila['camara_id'] for fila in tramo], dtype=np.int64),
+                'timestamp': timestamps,
+                'temperatura': np.rint(
+                    np.array([fila['temperatura_c'] for fila in tramo], dtype=float) * 100
+                ).astype(np.int32),
+                'origen': np.array([fila.get('origen') or '' for fila in tramo], dtype=str),
+                'created_at': timestamps if None in creados else _epoch(creados),
+            })
+        return cls.concatenar(mes, tramos)
+    
+    @classmethod
+    def concatenar(cls, mes: date, tramos: List[Dict[str, np.ndarray]]) -> 'MesLecturas':
+        """Une tramos de columnas; si un id se repite queda la primera aparición"""
+        if not tramos:
+            return cls(mes, {
+                'id': np.empty(0, np.int64), 'camara_id': np.empty(0, np.int64),
+                'timestamp': np.empty(0, np.int64), 'temperatura': np.empty(0, np.int32),
+                'origen': np.empty(0, str), 'created_at': np.empty(0, np.int64),
+            })
+        columnas = {nombre: np.concatenate([tramo[nombre] for tramo in tramos]) for nombre in tramos[0]}
+        _, primeras = np.unique(columnas['id'], return_index=True)
+        if len(primeras) < len(columnas['id']):
+            columnas = {nombre: valores[primeras] for nombre, valores in columnas.items()}
+        return cls(mes, columnas)
+    
+    def unir(self, otro: 'MesLecturas') -> 'MesLecturas':
+        return MesLecturas.concatenar(self.mes, [self.columnas, otro.columnas])
+    
+    # Serialización: el origen se guarda como códigos + valores únicos
+    def a_bytes(self) -> bytes:
+        origenes, codigos = np.unique(self.columnas['origen'], return_inverse=True)
+        columnas = {nombre: valores for nombre, valores in self.columnas.items() if nombre != 'origen'}
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, origen=codigos.astype(np.int16), origenes=origenes, **columnas)
+        return buffer.getvalue()
+    
+    @classmethod
+    def desde_bytes(cls, mes: date, contenido: bytes) -> 'MesLecturas':
+        with np.load(io.BytesIO(contenido), allow_pickle=False) as archivo:
+            columnas = {nombre: archivo[nombre] for nombre in archivo.files}
+        columnas['origen'] = columnas.pop('origenes')[columnas['origen']]
+        return cls(mes, columnas)
+    
+    def filtrar(self, desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                camara_ids: Optional[Iterable[int]] = None) -> Dict[str, np.ndarray]:
+        """Columnas de las lecturas en [desde, hasta] de las cámaras indicadas"""
+        mascara = np.ones(len(self), dtype=bool)
+        if desde is not None:
+            mascara &= self.columnas['timestamp'] >= _epoch([desde])[0]
+        if hasta is not None:
+            mascara &= self.columnas['timestamp'] <= _epoch([hasta])[0]
+        if camara_ids is not None:
+            mascara &= np.isin(self.columnas['camara_id'], list(camara_ids))
+        return {nombre: valores[mascara] for nombre, valores in self.columnas.items()}
+    
+    def agrupar(self, segundos: int) -> Dict[str, np.ndarray]:
+        """
+        Min / max / promedio / cantidad por cámara y período de `segundos`.
+        Como las filas están ordenadas por (cámara, timestamp) cada grupo es
+        un tramo contiguo y basta con reduceat.
+        """
+        camaras = self.columnas['camara_id']
+        periodos = self.columnas['timestamp'] // segundos * segundos
+        temperaturas = self.columnas['temperatura']
+        if not len(camaras):
+            return {'camara_id': camaras, 'periodo': periodos, 'min': temperaturas,
+                    'max': temperaturas, 'promedio': np.empty(0), 'total': np.empty(0, np.int64)}
+        
+        cortes = np.flatnonzero((np.diff(camaras) != 0) | (np.diff(periodos) != 0)) + 1
+        inicios = np.concatenate(([0], cortes))
+        totales = np.diff(np.concatenate((inicios, [len(camaras)])))
+        sumas = np.add.reduceat(temperaturas.astype(np.int64), inicios)
+        return {
+            'camara_id': camaras[inicios],
+            'periodo': periodos[inicios],
+            'min': np.minimum.reduceat(temperaturas, inicios),
+            'max': np.maximum.reduceat(temperaturas, inicios),
+            'promedio': sumas / totales,
+            'total': totales,
+        }
+    
+    def resumen_horario(self) -> List[Dict]:
+        """Filas de resumen_horario_camara"""
+        grupos = self.agrupar(3600)
+        return [
+            {
+                'camara_id': camara_id,
+                'hora': hora,
+                'temp_min': temp_min / 100,
+                'temp_max': temp_max / 100,
+                'temp_promedio': round(promedio / 100, 2),
+                'total_lecturas': total,
+            }
+            for camara_id, hora, temp_min, temp_max, promedio, total in zip(
+                grupos['camara_id'].tolist(), _iso(grupos['periodo']), grupos['min'].tolist(),
+                grupos['max'].tolist(), grupos['promedio'].tolist(), grupos['total'].tolist()
+            )
+        ]
+    
+    def resumen_diario(self) -> List[Dict]:
+        """Filas básicas de resumen_diario_camara (sin eventos ni cumplimiento)"""
+        grupos = self.agrupar(86400)
+        fechas = np.datetime_as_string(grupos['periodo'].astype('datetime64[s]'), unit='D').tolist()
+        return [
+            {
+                'fecha': fecha,
+                'camara_id': camara_id,
+                'temp_min': temp_min / 100,
+                'temp_max': temp_max / 100,
+                'temp_promedio': round(promedio / 100, 2),
+                'total_lecturas': total,
+            }
+            for fecha, camara_id, temp_min, temp_max, promedio, total in zip(
+                fechas, grupos['camara_id'].tolist(), grupos['min'].tolist(),
+                grupos['max'].tolist(), grupos['promedio'].tolist(), grupos['total'].tolist()
+            )
+        ]
+
+
+def filas_lecturas(columnas: Dict[str, np.ndarray]) -> Iterator[Dict]:
+    """Filas con el mismo formato que lecturas_temperatura en PostgREST"""
+    for inicio in range(0, len(columnas['id']), FILAS_POR_TRAMO):
+        tramo = {nombre: valores[inicio:inicio + FILAS_POR_TRAMO] for nombre, valores in columnas.items()}
+        yield from (
+            {
+                'id': id_,
+                'camara_id': camara_id,
+                'timestamp': timestamp,
+                'temperatura_c': temperatura / 100,
+                'origen': origen,
+                'created_at': creado,
+            }
+            for id_, camara_id, timestamp, temperatura, origen, creado in zip(
+                tramo['id'].tolist(), tramo['camara_id'].tolist(), _iso(tramo['timestamp']),
+                tramo['temperatura'].tolist(), tramo['origen'].tolist(), _iso(tramo['created_at'])
+            )
+        )
+
+
+# ============================================================================
+# Almacenamiento de archivos
+# ============================================================================
+
+class ArchivoLocal:
+    """Archivos en un directorio (ARCHIVO_LECTURAS_DIR)"""
+    
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+    
+    def guardar(self, nombre: str, contenido: bytes):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        temporal = self.directorio / f'{nombre}.tmp'
+        temporal.write_bytes(contenido)
+        temporal.replace(self.directorio / nombre)
+    
+    def leer(self, nombre: str) -> Optional[bytes]:
+        ruta = self.directorio / nombre
+        return ruta.read_bytes() if ruta.exists() else None
+
+
+class ArchivoStorage:
+    """Archivos en un bucket privado de Supabase Storage (ARCHIVO_LECTURAS_BUCKET)"""
+    
+    def __init__(self, client, bucket: str):
+        self.bucket = client.storage.from_(bucket)
+    
+    def guardar(self, nombre: str, contenido: bytes):
+        self.bucket.upload(nombre, contenido, {'content-type': 'application/octet-stream', 'upsert': 'true'})
+    
+    def leer(self, nombre: str) -> Optional[bytes]:
+        try:
+            return self.bucket.download(nombre)
+        except Exception as e:
+            logger.debug(f"Archivo {nombre} no disponible en Storage: {str(e)}")
+            return None
+
+
+def get_almacen():
+    if settings.ARCHIVO_LECTURAS_BUCKET:
+        return ArchivoStorage(get_supabase_client(use_service_key=True), settings.ARCHIVO_LECTURAS_BUCKET)
+    return ArchivoLocal(settings.ARCHIVO_LECTURAS_DIR)
+
+
+# Meses decodificados que quedan en memoria del worker: un mes de 50 cámaras
+# son unos 2M de lecturas, cerca de 100 MB ya decodificado
+MESES_EN_MEMORIA = 1
+
+
+@lru_cache(maxsize=MESES_EN_MEMORIA)
+def cargar_archivo(mes: date) -> Optional[MesLecturas]:
+    """Mes archivado (None si no hay archivo); el último mes leído queda en memoria"""
+    contenido = get_almacen().leer(nombre_archivo(mes))
+    if contenido is None:
+        return None
+    return MesLecturas.desde_bytes(mes, contenido)
+
+
+def leer_archivo(desde: datetime, hasta: datetime,
+                 camara_ids: Optional[Iterable[int]] = None) -> Iterator[Dict]:
+    """
+    Lecturas archivadas con timestamp en [desde, hasta], mes a mes.
+    
+    Args:
+        desde / hasta: Rango (UTC)
+        camara_ids: Cámaras a incluir (None = todas)
+    
+    Yields:
+        Dict por lectura, ordenadas por mes, cámara y timestamp
+    """
+    camara_ids = None if camara_ids is None else list(camara_ids)
+    mes = desde.date().replace(day=1)
+    while mes <= hasta.date():
+        archivo = cargar_archivo(mes)
+        if archivo is not None:
+            yield from filas_lecturas(archivo.filtrar(desde, hasta, camara_ids))
+        mes = siguiente_mes(mes)
+
+
+# ============================================================================
+# Compactación
+# ============================================================================
+
+def _rango_utc(mes: date):
+    desde = datetime(mes.year, mes.month, 1, tzinfo=timezone.utc)
+    hasta = datetime(siguiente_mes(mes).year, siguiente_mes(mes).month, 1, tzinfo=timezone.utc)
+    return desde, hasta
+
+
+def leer_mes(mes: date, client=None) -> MesLecturas:
+    """Lecturas del mes desde lecturas_temperatura (keyset sobre el ORM o sobre Supabase)"""
+    desde, hasta = _rango_utc(mes)
+    if settings.SUPABASE_DIRECT_DB:
+        from apps.lecturas.models import LecturaTemperatura
+        filas = iterar_keyset_orm(
+            LecturaTemperatura.objects.filter(timestamp__gte=desde, timestamp__lt=hasta),
+            COLUMNAS_LECTURA,
+            orden='timestamp'
+        )
+    else:
+        filas = iterar_keyset(
+            'lecturas_temperatura',
+            ', '.join(COLUMNAS_LECTURA),
+            lambda query: query.gte('timestamp', desde.isoformat()).lt('timestamp', hasta.isoformat()),
+            client=client
+        )
+    return MesLecturas.desde_filas(mes, filas)
+
+
+def meses_pendientes(corte: date, client=None) -> List[date]:
+    """Meses con lecturas crudas anteriores al corte"""
+    client = client or get_supabase_client(use_service_key=True)
+    response = client.table('lecturas_temperatura')\
+        .select('timestamp')\
+        .lt('timestamp', corte.isoformat())\
+        .order('timestamp')\
+        .limit(1)\
+        .execute()
+    if not response.data:
+        return []
+    
+    mes = datetime.fromisoformat(response.data[0]['timestamp'][:10]).date().replace(day=1)
+    meses = []
+    while mes < corte:
+        meses.append(mes)
+        mes = siguiente_mes(mes)
+    return meses
+
+
+def guardar_resumenes(lecturas: MesLecturas, client) -> Dict[str, int]:
+    """Upsert del resumen horario y alta de los días sin resumen diario"""
+    from postgrest.types import ReturnMethod
+    
+    horario = lecturas.resumen_horario()
+    for inicio in range(0, len(horario), FILAS_POR_LOTE):
+        client.table('resumen_horario_camara')\
+            .upsert(horario[inicio:inicio + FILAS_POR_LOTE], on_conflict='camara_id,hora',
+                    returning=ReturnMethod.minimal)\
+            .execute()
+    
+    # Los días ya resumidos por el sync (con eventos y cumplimiento) no se tocan
+    desde, hasta = lecturas.mes, siguiente_mes(lecturas.mes)
+    existentes = {
+        (fila['camara_id'], fila['fecha'][:10])
+        for fila in iterar_keyset(
+            'resumen_diario_camara',
+            'id, camara_id, fecha',
+            lambda query: query.gte('fecha', desde.isoformat()).lt('fecha', hasta.isoformat()),
+            client=client
+        )
+    }
+    diario = [fila for fila in lecturas.resumen_diario() if (fila['camara_id'], fila['fecha']) not in existentes]
+    for inicio in range(0, len(diario), FILAS_POR_LOTE):
+        client.table('resumen_diario_camara')\
+            .insert(diario[inicio:inicio + FILAS_POR_LOTE], returning=ReturnMethod.minimal)\
+            .execute()
+    
+    return {'horas': len(horario), 'dias': len(diario)}
+
+
+def archivar(lecturas: MesLecturas, client) -> int:
+    """
+    Escribe el archivo del mes (unido al existente, si se archivó antes) y
+    lo verifica releyéndolo. Retorna el tamaño en bytes.
+    """
+    almacen = get_almacen()
+    nombre = nombre_archivo(lecturas.mes)
+    
+    anterior = almacen.leer(nombre)
+    if anterior is not None:
+        lecturas = MesLecturas.desde_bytes(lecturas.mes, anterior).unir(lecturas)
+    
+    contenido = lecturas.a_bytes()
+    almacen.guardar(nombre, contenido)
+    cargar_archivo.cache_clear()
+    
+    releido = cargar_archivo(lecturas.mes)
+    if releido is None or not np.array_equal(np.sort(releido.columnas['id']), np.sort(lecturas.columnas['id'])):
+        raise RuntimeError(f'El archivo {nombre} no coincide con las lecturas del mes')
+    
+    client.table('archivo_lecturas')\
+        .upsert({
+            'mes': lecturas.mes.isoformat(),
+            'archivo': nombre,
+            'total_lecturas': len(lecturas),
+            'bytes': len(contenido),
+        }, on_conflict='mes')\
+        .execute()
+    return len(contenido)
+
+
+def _soltar_particion(mes: date, total: int) -> bool:
+    """
+    Con la tabla particionada (particiones_lecturas.sql) soltar la partición
+    del mes es instantáneo; solo se hace si contiene exactamente lo archivado.
+    """
+    particion = f'lecturas_temperatura_p{mes:%Y_%m}'
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [f'public.{particion}'])
+        if cursor.fetchone()[0] is None:
+            return False
+        cursor.execute(f'SELECT count(*) FROM public."{particion}"')
+        if cursor.fetchone()[0] != total:
+            return False
+        cursor.execute(f'ALTER TABLE public.lecturas_temperatura DETACH PARTITION public."{particion}"')
+        cursor.execute(f'DROP TABLE public."{particion}"')
+    return True
+
+
+def borrar_mes(lecturas: MesLecturas, client) -> int:
+    """
+    Borra de lecturas_temperatura las filas archivadas, por bloques de ids
+    consecutivos acotados al mes. Retorna las filas borradas.
+    """
+    from postgrest.types import ReturnMethod
+    
+    desde, hasta = _rango_utc(lecturas.mes)
+    ids = np.sort(lecturas.columnas['id'])
+    
+    if settings.SUPABASE_DIRECT_DB and connection.vendor == 'postgresql':
+        if _soltar_particion(lecturas.mes, len(ids)):
+            return len(ids)
+    
+    borradas = 0
+    for inicio in range(0, len(ids), IDS_POR_BORRADO):
+        bloque = ids[inicio:inicio + IDS_POR_BORRADO]
+        primero, ultimo = int(bloque[0]), int(bloque[-1])
+        if settings.SUPABASE_DIRECT_DB:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM lecturas_temperatura '
+                    'WHERE id BETWEEN %s AND %s AND "timestamp" >= %s AND "timestamp" < %s',
+                    [primero, ultimo, desde, hasta]
+                )
+                borradas += cursor.rowcount
+        else:
+            response = client.table('lecturas_temperatura')\
+                .delete(count='exact', returning=ReturnMethod.minimal)\
+                .gte('id', primero)\
+                .lte('id', ultimo)\
+                .gte('timestamp', desde.isoformat())\
+                .lt('timestamp', hasta.isoformat())\
+                .execute()
+            borradas += response.count if response.count is not None else len(response.data or [])
+    return borradas
+
+
+def compactar_mes(mes: date, borrar: bool = True, client=None) -> Dict[str, int]:
+    """
+    Resume, archiva y (si borrar) elimina las lecturas crudas de un mes.
+    
+    Returns:
+        Dict con lecturas, horas, dias, bytes y borradas
+    """
+    client = client or get_supabase_client(use_service_key=True)
+    lecturas = leer_mes(mes, client)
+    resultado = {'lecturas': len(lecturas), 'horas': 0, 'dias': 0, 'bytes': 0, 'borradas': 0}
+    if not len(lecturas):
+        return resultado
+    
+    resultado.update(guardar_resumenes(lecturas, client))
+    resultado['bytes'] = archivar(lecturas, client)
+    
+    if borrar:
+        resultado['borradas'] = borrar_mes(lecturas, client)
+        client.table('archivo_lecturas')\
+            .update({'borrado_at': datetime.now(timezone.utc).isoformat()})\
+            .eq('mes', mes.isoformat())\
+            .execute()
+    
+    logger.info(
+        f"Retención {mes:%Y-%m}: {resultado['lecturas']} lecturas archivadas "
+        f"({resultado['bytes']} bytes), {resultado['borradas']} borradas"
+    )
+    return resultado
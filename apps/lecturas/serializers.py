@@ -1,6 +1,7 @@
 """Serializers de Lecturas"""
 
 from rest_framework import serializers
+from apps.camaras.models import CamaraFrio
 from .models import LecturaTemperatura, ResumenDiarioCamara
 
 
@@ -16,4 +17,71 @@ class ResumenDiarioCamaraSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ResumenDiarioCamara
-        fields = '__all__'
+        exclude = ['sketch_cumplimiento']
+
+
+def serializar_columnar(queryset, chunk_size=5000):
+    """
+    Serializa lecturas en formato columnar (arreglos paralelos).
+    
+    En lugar de un objeto por lectura, retorna una columna por campo y
+    una tabla de cámaras que se envía una sola vez:
+        
+        {
+            "formato": "columnar",
+            "total": 3,
+            "camaras": [{"id": 1, "nombre": "Cámara 1", ...}],
+            "timestamp": [1733702400, 1733702460, 1733702520],  # epoch en segundos
+            "temperatura_c": [-4.5, -4.4, -4.6],
+            "camara_idx": [0, 0, 0]  # índice en "camaras"
+        }
+    
+    Args:
+        queryset: QuerySet de LecturaTemperatura ya filtrado
+        chunk_size: Filas por lote al iterar el cursor
+    
+    Returns:
+        Dict con el payload columnar
+    """
+    timestamps = []
+    temperaturas = []
+    camara_idx = []
+    indices = {}
+    
+    filas = queryset.order_by('timestamp', 'id')\
+        .values_list('timestamp', 'temperatura_c', 'camara_id')\
+        .iterator(chunk_size=chunk_size)
+    
+    for timestamp, temperatura, camara_id in filas:
+        idx = indices.get(camara_id)
+        if idx is None:
+            idx = indices[camara_id] = len(indices)
+        timestamps.append(int(timestamp.timestamp()))
+        temperaturas.append(float(temperatura))
+        camara_idx.append(idx)
+    
+    # Tabla de cámaras en el orden de sus índices
+    camaras = [None] * len(indices)
+    if indices:
+        datos_camaras = CamaraFrio.objects.filter(id__in=indices.keys())\
+            .values('id', 'nombre', 'codigo', 'sucursal_id', 'sucursal__nombre')
+        for camara in datos_camaras:
+            camaras[indices[camara['id']]] = {
+                'id': camara['id'],
+                'nombre': camara['nombre'],
+                'codigo': camara['codigo'],
+                'sucursal_id': camara['sucursal_id'],
+                'sucursal_nombre': camara['sucursal__nombre'],
+            }
+        for camara_id, idx in indices.items():
+            if camaras[idx] is None:
+                camaras[idx] = {'id': camara_id}
+    
+    return {
+        'formato': 'columnar',
+        'total': len(timestamps),
+        'camaras': camaras,
+        'timestamp': timestamps,
+        'temperatura_c': temperaturas,
+        'camara_idx': camara_idx,
+    }
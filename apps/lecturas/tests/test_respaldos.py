@@ -0,0 +1,64 @@
+"""
+Tests del respaldo mensual de Firebase (services/backup_service.py)
+
+Corren sin red sobre los emuladores en memoria de Firebase
+(services/firebase_local.py) y Supabase (services/supabase_local.py):
+    python manage.py test apps.lecturas
+"""
+
+from datetime import datetime
+import gzip
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from services.backup_service import respaldar_mes
+from services.firebase_local import BaseDatosLocal, usar_firebase_local
+from services.supabase_local import ClienteLocal, usar_cliente_local
+
+CAMARA = {'id': 1, 'nombre': 'Cámara 1', 'firebase_path': 'DEVICE_001', 'activa': True}
+
+
+def _ts(dia: int, hora: int) -> str:
+    return str(int(datetime(2025, 3, dia, hora).timestamp()))
+
+
+class RespaldoMensualTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        
+        self.firebase = BaseDatosLocal({'status': {'DEVICE_001': {'2025': {'03': {
+            '01': {_ts(1, hora): {'temp': -18.0} for hora in range(3)},
+        }}}}})
+        usar_firebase_local(self.firebase)
+        self.addCleanup(usar_firebase_local, None)
+        usar_cliente_local(ClienteLocal({'camaras_frio': [CAMARA]}))
+        self.addCleanup(usar_cliente_local, None)
+    
+    def respaldar(self):
+        return respaldar_mes(2025, 3, directorio=self.directorio)
+    
+    def archivadas(self):
+        ruta = Path(self.directorio) / '2025_03' / 'lecturas_temperatura_DEVICE_001.ndjson.gz'
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            return [json.loads(linea) for linea in archivo]
+    
+    def test_nueva_corrida_del_mes_incluye_lecturas_posteriores(self):
+        self.assertEqual(self.respaldar()['lecturas_respaldadas'], 3)
+        
+        # Días siguientes a la primera corrida
+        self.firebase.reference('/status/DEVICE_001/2025/03/30').set({_ts(30, 8): {'temp': -17.5}})
+        self.firebase.reference('/status/DEVICE_001/2025/03/31').set({_ts(31, 8): {'temp': -17.0}})
+        
+        registro = self.respaldar()
+        
+        self.assertEqual(registro['estado'], 'COMPLETADO')
+        self.assertEqual(registro['lecturas_respaldadas'], 5)
+        timestamps = [fila['timestamp'] for fila in self.archivadas()]
+        self.assertIn(datetime(2025, 3, 30, 8).isoformat(), timestamps)
+        self.assertIn(datetime(2025, 3, 31, 8).isoformat(), timestamps)
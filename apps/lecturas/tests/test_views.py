@@ -0,0 +1,122 @@
+"""
+Tests de las vistas de lecturas (apps/lecturas/views.py)
+
+Las tablas de Supabase no son gestionadas por Django: se crean en la base
+de tests con el schema editor.
+    python manage.py test apps.lecturas
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import csv
+import io
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from apps.camaras.models import CamaraFrio
+from apps.lecturas.models import LecturaTemperatura
+from apps.lecturas.views import LecturaTemperaturaViewSet, exportar_lecturas
+from apps.sucursales.models import Sucursal
+from services.supabase_local import ClienteLocal, usar_cliente_local
+from services.supabase_service import iterar_keyset_orm
+
+MODELOS = (Sucursal, CamaraFrio, LecturaTemperatura)
+INICIO = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+class LecturasColumnarTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            for modelo in MODELOS:
+                editor.create_model(modelo)
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for modelo in reversed(MODELOS):
+                editor.delete_model(modelo)
+    
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Sucursal 1')
+        camara = CamaraFrio.objects.create(sucursal=sucursal, nombre='Cámara 1', firebase_path='DEVICE_001')
+        LecturaTemperatura.objects.bulk_create([
+            LecturaTemperatura(
+                camara=camara, timestamp=INICIO + timedelta(minutes=i),
+                temperatura_c=Decimal('-18.5'), origen='firebase:status'
+            )
+            for i in range(30)
+        ])
+    
+    def listar(self, **params):
+        request = APIRequestFactory().get('/api/lecturas/temperaturas/', {'format': 'columnar', **params})
+        return LecturaTemperaturaViewSet.as_view({'get': 'list'})(request)
+    
+    @override_settings(LECTURAS_COLUMNAR_MAX_FILAS=30)
+    def test_columnar_hasta_el_maximo(self):
+        response = self.listar()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 30)
+    
+    @override_settings(LECTURAS_COLUMNAR_MAX_FILAS=20)
+    def test_columnar_sobre_el_maximo_pide_acotar(self):
+        self.assertEqual(self.listar().status_code, 400)
+        
+        response = self.listar(fecha_hasta=(INICIO + timedelta(minutes=9)).isoformat())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 10)
+    
+    def test_keyset_orm_por_timestamp_e_id(self):
+        # Segunda lectura en cada minuto, con ids mayores: empates de timestamp
+        camara = CamaraFrio.objects.get()
+        LecturaTemperatura.objects.bulk_create([
+            LecturaTemperatura(camara=camara, timestamp=INICIO + timedelta(minutes=i), temperatura_c=Decimal('-18.0'))
+            for i in range(30)
+        ])
+        queryset = LecturaTemperatura.objects.filter(timestamp__gte=INICIO + timedelta(minutes=5))
+        
+        filas = list(iterar_keyset_orm(queryset, ['id', 'timestamp'], chunk_size=7, orden='timestamp'))
+        
+        esperadas = list(queryset.order_by('timestamp', 'id').values('id', 'timestamp'))
+        self.assertEqual(len(esperadas), 50)
+        self.assertEqual(filas, esperadas)
+
+
+@override_settings(SUPABASE_DIRECT_DB=False)
+class ExportacionKeysetTests(SimpleTestCase):
+
+    def setUp(self):
+        # Dos lecturas por minuto y los ids sin el orden del timestamp; el
+        # cliente responde de a 3 filas, así los bloques cortan entre empates
+        lecturas = [
+            {'id': 100 - i, 'camara_id': 1 + i % 2, 'timestamp': (INICIO + timedelta(minutes=i // 2)).isoformat(),
+             'temperatura_c': -18.0}
+            for i in range(20)
+        ]
+        usar_cliente_local(ClienteLocal({'lecturas_temperatura': lecturas}, max_filas=3))
+        self.addCleanup(usar_cliente_local, None)
+    
+    def exportar(self, **params):
+        request = APIRequestFactory().get('/api/lecturas/export/', params)
+        request.firebase_user = {'rol': 'ADMIN'}
+        response = exportar_lecturas(request)
+        contenido = b''.join(response.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(contenido)))
+    
+    def test_rango_paginado_por_timestamp_e_id(self):
+        filas = self.exportar(
+            fecha_desde=(INICIO + timedelta(minutes=2)).isoformat(),
+            fecha_hasta=(INICIO + timedelta(minutes=7)).isoformat()
+        )
+        
+        # Minutos 2 a 7: lecturas 4 a 15, cada una una vez
+        self.assertEqual(sorted(int(f['id']) for f in filas), list(range(85, 97)))
+        orden = [(f['timestamp'], int(f['id'])) for f in filas]
+        self.assertEqual(orden, sorted(orden))
@@ -9,5 +9,7 @@ router.register(r'temperaturas', views.LecturaTemperaturaViewSet, basename='lect
 router.register(r'resumen-diario', views.ResumenDiarioCamaraViewSet, basename='resumen')
 
 urlpatterns = [
+    path('export/', views.exportar_lecturas, name='lecturas-export'),
+    path('archivo/', views.exportar_archivo, name='lecturas-archivo'),
     path('', include(router.urls)),
 ]
@@ -1,19 +1,38 @@
 """Vistas de Lecturas - Consulta de histórico"""
 
+from datetime import datetime
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from django.conf import settings
 from django.db.models import Avg, Min, Max, Count
 from .models import LecturaTemperatura, ResumenDiarioCamara
-from .serializers import LecturaTemperaturaSerializer, ResumenDiarioCamaraSerializer
+from .serializers import LecturaTemperaturaSerializer, ResumenDiarioCamaraSerializer, serializar_columnar
+from .renderers import FORMATOS_COLUMNARES, get_renderers_lecturas
 from apps.auth.permissions import filter_by_sucursal
+from apps.camaras import alcance
+from services.export_service import build_export_response
+from services.supabase_service import iterar_keyset, iterar_keyset_orm
+from . import retencion
+
+
+COLUMNAS_EXPORTACION = ['id', 'camara_id', 'timestamp', 'temperatura_c']
 
 
 class LecturaTemperaturaViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet para consultar lecturas de temperatura"""
+    """
+    ViewSet para consultar lecturas de temperatura.
+    
+    Soporta `?format=columnar` (y `?format=msgpack` si está instalado) para
+    consultas masivas: retorna arreglos paralelos sin paginar en lugar de
+    un objeto por lectura, hasta LECTURAS_COLUMNAR_MAX_FILAS lecturas.
+    """
     
     queryset = LecturaTemperatura.objects.select_related('camara', 'camara__sucursal').all()
     serializer_class = LecturaTemperaturaSerializer
+    renderer_classes = get_renderers_lecturas()
     
     def get_queryset(self):
         """Filtra por sucursal y permite filtros adicionales"""
@@ -36,6 +55,22 @@ class LecturaTemperaturaViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(timestamp__lte=fecha_hasta)
         
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """Lista lecturas; en formato columnar omite serializer y paginación"""
+        if request.accepted_renderer.format not in FORMATOS_COLUMNARES:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        
+        # Sin paginación, el tope evita cargar una tabla entera en memoria
+        maximo = settings.LECTURAS_COLUMNAR_MAX_FILAS
+        if queryset.order_by()[:maximo + 1].count() > maximo:
+            return Response({
+                'error': f'La consulta supera {maximo} lecturas; acota fecha_desde/fecha_hasta o camara_id'
+            }, status=400)
+        
+        return Response(serializar_columnar(queryset))
 
 
 class ResumenDiarioCamaraViewSet(viewsets.ReadOnlyModelViewSet):
@@ -65,3 +100,108 @@ class ResumenDiarioCamaraViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(fecha__lte=fecha_hasta)
         
         return queryset
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def exportar_lecturas(request):
+    """
+    Exporta lecturas en streaming (CSV o NDJSON, opcionalmente gzip).
+    
+    GET /api/lecturas/export/
+    
+    Query params:
+        - formato: csv (default) o ndjson
+        - gzip: 1 para comprimir
+        - camara_id: Filtrar por cámara
+        - fecha_desde / fecha_hasta: Rango de timestamp (ISO)
+    
+    Las filas se leen con paginación keyset (ORM en conexión directa o
+    PostgREST), así la memoria es constante.
+    """
+    user = getattr(request, 'firebase_user', None)
+    if not user:
+        return Response({'error': 'Autenticación requerida'}, status=401)
+    
+    formato = request.GET.get('formato', 'csv')
+    comprimir = request.GET.get('gzip') in ('1', 'true')
+    camara_id = request.GET.get('camara_id')
+    fecha_desde = request.GET.get('fecha_desde')
+    fecha_hasta = request.GET.get('fecha_hasta')
+    camara_ids = alcance.camaras_de_usuario(user)
+    
+    if settings.SUPABASE_DIRECT_DB:
+        queryset = LecturaTemperatura.objects.all()
+        if camara_ids is not None:
+            queryset = queryset.filter(camara_id__in=camara_ids)
+        if camara_id:
+            queryset = queryset.filter(camara_id=camara_id)
+        if fecha_desde:
+            queryset = queryset.filter(timestamp__gte=fecha_desde)
+        if fecha_hasta:
+            queryset = queryset.filter(timestamp__lte=fecha_hasta)
+        
+        filas = iterar_keyset_orm(queryset, COLUMNAS_EXPORTACION, orden='timestamp')
+    else:
+        columnas = ', '.join(COLUMNAS_EXPORTACION)
+        
+        def aplicar_filtros(query):
+            if camara_ids is not None:
+                query = query.in_('camara_id', camara_ids)
+            if camara_id:
+                query = query.eq('camara_id', camara_id)
+            if fecha_desde:
+                query = query.gte('timestamp', fecha_desde)
+            if fecha_hasta:
+                query = query.lte('timestamp', fecha_hasta)
+            return query
+        
+        # Por (timestamp, id): un rango angosto no recorre la clave primaria entera
+        filas = iterar_keyset('lecturas_temperatura', columnas, aplicar_filtros, orden='timestamp')
+    
+    return build_export_response(filas, COLUMNAS_EXPORTACION, formato, 'lecturas', comprimir)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def exportar_archivo(request):
+    """
+    Exporta lecturas ya archivadas por la retención (ver retencion.py).
+    
+    GET /api/lecturas/archivo/
+    
+    Query params:
+        - fecha_desde / fecha_hasta: Rango de timestamp (ISO, UTC; requeridos)
+        - camara_id: Filtrar por cámara
+        - formato: csv (default) o ndjson
+        - gzip: 1 para comprimir
+    
+    Solo se leen los archivos de los meses del rango.
+    """
+    user = getattr(request, 'firebase_user', None)
+    if not user:
+        return Response({'error': 'Autenticación requerida'}, status=401)
+    
+    try:
+        fecha_desde = datetime.fromisoformat(request.GET['fecha_desde'][:19])
+        fecha_hasta = datetime.fromisoformat(request.GET['fecha_hasta'][:19])
+    except (KeyError, ValueError):
+        return Response({'error': 'fecha_desde y fecha_hasta (ISO) son requeridos'}, status=400)
+    
+    camara_ids = alcance.camaras_de_usuario(user)
+    camara_id = request.GET.get('camara_id')
+    if camara_id:
+        try:
+            camara_id = int(camara_id)
+        except ValueError:
+            return Response({'error': 'camara_id debe ser un número entero'}, status=400)
+        camara_ids = [camara_id] if camara_ids is None or camara_id in camara_ids else []
+    
+    filas = retencion.leer_archivo(fecha_desde, fecha_hasta, camara_ids)
+    return build_export_response(
+        filas,
+        COLUMNAS_EXPORTACION,
+        request.GET.get('formato', 'csv'),
+        'lecturas_archivo',
+        request.GET.get('gzip') in ('1', 'true')
+    )
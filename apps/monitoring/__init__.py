@@ -0,0 +1 @@
+"""Módulo de Monitoreo - Métricas de consultas y tiempos de respuesta"""
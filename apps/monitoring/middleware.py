@@ -0,0 +1,130 @@
+"""
+Middlewares de monitoreo
+
+ServerTimingMiddleware
+
+Abre un contexto de instrumentación por request (ver
+services/supabase_instrumentation.py) y al responder:
+1. Agrega el header `Server-Timing` con el tiempo total, el tiempo de base
+   de datos y el desglose por tabla (visible en la pestaña Network del navegador)
+2. Registra las consultas del request en las métricas del endpoint
+
+El endpoint se identifica por método y ruta de Django (ej:
+"GET api/dashboard/analisis-ejecutivo/"), no por el path concreto, para
+que los ids en la URL no multipliquen las series.
+
+ProfilerMiddleware
+Perfila el request (ver profiler.py) cuando un ADMIN envía el header
+`X-Profile: 1`, o al azar con probabilidad PROFILER_SAMPLE_RATE. La respuesta
+lleva `X-Profile-Id` para descargar el perfil desde /api/monitoring/profiles/.
+Se muestrean el hilo del request y los hilos de services/paralelo.py mientras
+ejecutan sus tareas.
+Sin perfilar, el costo es leer un header y un random().
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from django.conf import settings
+from services import paralelo
+from services.supabase_instrumentation import (
+    cerrar_contexto, contexto_actual, iniciar_contexto, metricas
+)
+from .profiler import Muestreador, Perfil, perfiles
+
+logger = logging.getLogger(__name__)
+
+# Máximo de tablas desglosadas en el header
+MAX_TABLAS_HEADER = 8
+
+
+class ServerTimingMiddleware:
+    """Mide el tiempo de base de datos de cada request"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not getattr(settings, 'SUPABASE_INSTRUMENTACION', False):
+            return self.get_response(request)
+        
+        inicio = time.perf_counter()
+        token = iniciar_contexto(f'{request.method} <sin ruta>')
+        try:
+            response = self.get_response(request)
+            contexto = contexto_actual()
+            total_ms = (time.perf_counter() - inicio) * 1000
+            
+            match = getattr(request, 'resolver_match', None)
+            if match is not None:
+                contexto.endpoint = f'{request.method} {match.route}'
+            
+            response['Server-Timing'] = self.server_timing(contexto, total_ms)
+            metricas.registrar_request(contexto)
+            return response
+        finally:
+            cerrar_contexto(token)
+    
+    @staticmethod
+    def server_timing(contexto, total_ms: float) -> str:
+        """Arma el valor del header (tiempos en milisegundos)"""
+        partes = [
+            f'total;dur={total_ms:.1f}',
+            f'db;dur={contexto.tiempo_total_ms():.1f};desc="{len(contexto.consultas)} consultas"',
+        ]
+        tablas = sorted(contexto.tiempo_por_tabla().items(), key=lambda t: t[1], reverse=True)
+        for tabla, ms in tablas[:MAX_TABLAS_HEADER]:
+            # Los nombres de métrica son tokens: sin ':' ni espacios
+            nombre = re.sub(r'[^A-Za-z0-9_-]', '-', tabla)
+            partes.append(f'db-{nombre};dur={ms:.1f}')
+        return ', '.join(partes)
+
+
+class ProfilerMiddleware:
+    """Perfila requests a pedido o por muestreo (va después de FirebaseAuthMiddleware)"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.tasa = float(getattr(settings, 'PROFILER_SAMPLE_RATE', 0.0))
+        self.intervalo_ms = float(getattr(settings, 'PROFILER_INTERVALO_MS', 5))
+    
+    def __call__(self, request):
+        motivo = self.motivo(request)
+        if motivo is None:
+            return self.get_response(request)
+        
+        hilos = {}
+        muestreador = Muestreador(threading.get_ident(), self.intervalo_ms, hilos)
+        contexto = contexto_actual()
+        consultas_previas = len(contexto.consultas) if contexto else 0
+        token = paralelo.registrar_hilos(hilos)
+        inicio = time.perf_counter()
+        muestreador.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            muestreador.detener()
+            paralelo.dejar_de_registrar_hilos(token)
+        fin = time.perf_counter()
+        
+        match = getattr(request, 'resolver_match', None)
+        endpoint = f'{request.method} {match.route if match else request.path}'
+        consultas = contexto.consultas[consultas_previas:] if contexto else []
+        perfil = Perfil(endpoint, inicio, fin, muestreador.muestras, consultas, motivo)
+        perfiles.agregar(perfil)
+        
+        response['X-Profile-Id'] = perfil.id
+        logger.info(f"🔬 Perfil {perfil.id}: {endpoint} {perfil.duracion_ms:.0f}ms, {len(perfil.muestras)} muestras")
+        return response
+    
+    def motivo(self, request):
+        """'header', 'muestreo' o None si el request no se perfila"""
+        if request.META.get('HTTP_X_PROFILE'):
+            usuario = getattr(request, 'firebase_user', None)
+            if usuario and usuario.get('rol') == 'ADMIN':
+                return 'header'
+        if self.tasa > 0 and random.random() < self.tasa:
+            return 'muestreo'
+        return None
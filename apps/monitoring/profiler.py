@@ -0,0 +1,224 @@
+"""
+Profiler por muestreo de requests
+
+Mientras un request se perfila, un hilo aparte toma cada PROFILER_INTERVALO_MS
+la pila del hilo que atiende el request (sys._current_frames), es decir
+muestras de tiempo de pared: también cuenta el tiempo esperando a Supabase.
+También muestrea los hilos del pool de services/paralelo.py mientras ejecutan
+tareas del request (las consultas del dashboard corren ahí): sus pilas van
+bajo el nombre del hilo (p. ej. "paralelo_0") en las pilas colapsadas y como
+un perfil aparte por hilo en speedscope. Otros hilos que lance el request
+(p. ej. la revalidación de services/cache_analitica.py) no se muestrean.
+
+Cada perfil guarda:
+- Las pilas muestreadas (raíz → hoja) con su peso en milisegundos
+- La línea de tiempo de consultas a Supabase del request
+  (services/supabase_instrumentation.py)
+
+Los últimos PROFILER_MAX_PERFILES perfiles quedan en un buffer circular en
+memoria y se exportan en formato speedscope (https://www.speedscope.app) o
+como pilas colapsadas ("a;b;c 12", el formato de flamegraph.pl).
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from django.conf import settings
+import os
+import sys
+import threading
+import time
+import uuid
+
+# Frame: (función, archivo, línea de definición)
+Frame = Tuple[str, str, int]
+
+# Muestra: (perf_counter, pila, hilo); hilo vacío para el hilo del request
+Muestra = Tuple[float, Tuple[Frame, ...], str]
+
+MAX_PROFUNDIDAD = 128
+
+
+class Muestreador(threading.Thread):
+    """Hilo que muestrea la pila de otro hilo (y de sus tareas paralelas) a intervalos fijos"""
+    
+    def __init__(self, thread_id: int, intervalo_ms: float, hilos: Optional[Dict[int, str]] = None):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo_ms / 1000
+        # Hilos del pool con tareas del request en este momento (id → nombre),
+        # los mantiene services/paralelo.py
+        self.hilos = hilos if hilos is not None else {}
+        self.muestras: List[Muestra] = []
+        self._detener = threading.Event()
+    
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            instante = time.perf_counter()
+            frames = sys._current_frames()
+            for hilo, nombre in [(self.thread_id, ''), *self.hilos.copy().items()]:
+                frame = frames.get(hilo)
+                if frame is not None:
+                    self.muestras.append((instante, _pila(frame), nombre))
+    
+    def detener(self):
+        self._detener.set()
+        self.join(timeout=1)
+
+
+def _pila(frame) -> Tuple[Frame, ...]:
+    """Pila de raíz a hoja, sin los frames del propio profiler"""
+    pila = []
+    while frame is not None and len(pila) < MAX_PROFUNDIDAD:
+        codigo = frame.f_code
+        if codigo.co_filename != __file__:
+            pila.append((codigo.co_name, codigo.co_filename, codigo.co_firstlineno))
+        frame = frame.f_back
+    pila.reverse()
+    return tuple(pila)
+
+
+class Perfil:
+    """Resultado de perfilar un request"""
+    
+    def __init__(self, endpoint: str, inicio: float, fin: float, muestras, consultas: List[Dict], motivo: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.fecha = datetime.now()
+        self.inicio = inicio
+        self.duracion_ms = (fin - inicio) * 1000
+        self.muestras = muestras
+        self.consultas = consultas
+        self.motivo = motivo
+    
+    def resumen(self) -> Dict:
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'fecha': self.fecha.isoformat(),
+            'duracion_ms': round(self.duracion_ms, 1),
+            'muestras': len(self.muestras),
+            'consultas': len(self.consultas),
+            'db_ms': round(sum(c['ms'] for c in self.consultas), 1),
+            'motivo': self.motivo
+        }
+    
+    def _pesos(self) -> List[Tuple[Tuple[Frame, ...], str, float]]:
+        """
+        Cada muestra pesa el tiempo transcurrido desde el muestreo anterior
+        (ms); las pilas de distintos hilos tomadas a la vez pesan lo mismo
+        """
+        pesos = []
+        anterior = actual = self.inicio
+        for instante, pila, hilo in self.muestras:
+            if instante != actual:
+                anterior, actual = actual, instante
+            pesos.append((pila, hilo, (instante - anterior) * 1000))
+        return pesos
+    
+    def colapsado(self) -> str:
+        """Pilas colapsadas: una línea por pila distinta con su peso en ms"""
+        totales: Dict[str, float] = {}
+        for pila, hilo, peso in self._pesos():
+            clave = ';'.join(([hilo] if hilo else []) + [_nombre(frame) for frame in pila])
+            totales[clave] = totales.get(clave, 0.0) + peso
+        return '\n'.join(f'{pila} {round(peso)}' for pila, peso in totales.items() if round(peso) > 0) + '\n'
+    
+    def speedscope(self) -> Dict:
+        """Archivo speedscope con el perfil de muestras y la línea de tiempo de Supabase"""
+        frames: List[Dict] = []
+        indices: Dict[Frame, int] = {}
+        
+        def indice(frame: Frame) -> int:
+            if frame not in indices:
+                indices[frame] = len(frames)
+                frames.append({'name': _nombre(frame), 'file': frame[1], 'line': frame[2]})
+            return indices[frame]
+        
+        # Un perfil por hilo: el del request primero, después los del pool
+        por_hilo: Dict[str, Tuple[List, List]] = {'': ([], [])}
+        for pila, hilo, peso in self._pesos():
+            muestras, pesos = por_hilo.setdefault(hilo, ([], []))
+            muestras.append([indice(frame) for frame in pila])
+            pesos.append(round(peso, 3))
+        
+        # Las consultas se ordenan y se recortan para que no se solapen
+        # (el formato "evented" exige eventos anidados)
+        eventos = []
+        cursor = 0.0
+        for consulta in sorted(self.consultas, key=lambda c: c.get('inicio', 0)):
+            abre = max((consulta.get('inicio', self.inicio) - self.inicio) * 1000, cursor)
+            cierra = max(abre + consulta['ms'], abre)
+            filtros = ','.join(consulta.get('filtros', []))
+            frame = indice((f"{consulta['operacion']} {consulta['tabla']} [{filtros}] {consulta['filas']} filas", '', 0))
+            eventos.append({'type': 'O', 'frame': frame, 'at': round(abre, 3)})
+            eventos.append({'type': 'C', 'frame': frame, 'at': round(cierra, 3)})
+            cursor = cierra
+        
+        duracion = round(max(self.duracion_ms, cursor), 3)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f'{self.endpoint} ({self.fecha:%Y-%m-%d %H:%M:%S})',
+            'exporter': 'coldtrack-backend',
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': f'{self.endpoint} [{hilo}]' if hilo else self.endpoint,
+                    'unit': 'milliseconds',
+                    'startValue': 0,
+                    'endValue': duracion,
+                    'samples': muestras,
+                    'weights': pesos
+                }
+                for hilo, (muestras, pesos) in por_hilo.items()
+            ] + [
+                {
+                    'type': 'evented',
+                    'name': 'Supabase',
+                    'unit': 'milliseconds',
+                    'startValue': 0,
+                    'endValue': duracion,
+                    'events': eventos
+                }
+            ],
+            'activeProfileIndex': 0
+        }
+
+
+def _nombre(frame: Frame) -> str:
+    funcion, archivo, linea = frame
+    if not archivo:
+        return funcion
+    return f'{funcion} ({os.path.basename(archivo)}:{linea})'
+
+
+class BufferPerfiles:
+    """Últimos N perfiles (buffer circular)"""
+    
+    def __init__(self, maximo: int):
+        self._perfiles = deque(maxlen=maximo)
+        self._lock = threading.Lock()
+    
+    def agregar(self, perfil: Perfil):
+        with self._lock:
+            self._perfiles.append(perfil)
+    
+    def listar(self) -> List[Dict]:
+        with self._lock:
+            return [perfil.resumen() for perfil in reversed(self._perfiles)]
+    
+    def obtener(self, perfil_id: str) -> Optional[Perfil]:
+        with self._lock:
+            for perfil in self._perfiles:
+                if perfil.id == perfil_id:
+                    return perfil
+        return None
+    
+    def reset(self):
+        with self._lock:
+            self._perfiles.clear()
+
+
+# Buffer compartido por el proceso
+perfiles = BufferPerfiles(getattr(settings, 'PROFILER_MAX_PERFILES', 20))
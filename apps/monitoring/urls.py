@@ -0,0 +1,12 @@
+"""
+URLs de monitoreo
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('metrics/', views.metricas_consultas, name='monitoring-metrics'),
+    path('clientes/', views.clientes_supabase, name='monitoring-clientes'),
+    path('profiles/', views.listar_perfiles, name='monitoring-profiles'),
+    path('profiles/<str:perfil_id>/', views.descargar_perfil, name='monitoring-profile-download'),
+]
@@ -0,0 +1,133 @@
+"""
+Vistas de monitoreo
+"""
+from django.http import HttpResponse
+from coldtrack.renderers import JsonResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework import status
+from apps.auth.permissions import IsAdmin
+from services.supabase_instrumentation import metricas
+from services.supabase_registro import registro
+from services.supabase_service import verificar_clientes
+from services.vuelo_unico import vuelo_unico
+from services.cache_analitica import cache_analitica
+from .profiler import perfiles
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdmin])
+def metricas_consultas(request):
+    """
+    Métricas de consultas a Supabase por endpoint.
+    
+    GET /api/monitoring/metrics/
+        Endpoints ordenados por tiempo total de base de datos, con histograma
+        de latencia por request y desglose por tabla (llamadas, latencia,
+        filas, bytes y filtros usados), y cálculos del dashboard ejecutados
+        y compartidos entre requests idénticos concurrentes, y uso del
+        caché del análisis ejecutivo
+    
+    DELETE /api/monitoring/metrics/
+        Reinicia los contadores
+    """
+    if request.method == 'DELETE':
+        metricas.reset()
+        vuelo_unico.reset()
+        cache_analitica.reset()
+        logger.info("Métricas de consultas reiniciadas")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    return Response({
+        'success': True,
+        'endpoints': metricas.snapshot(),
+        'vueloUnico': vuelo_unico.estadisticas(),
+        'cacheAnalitica': cache_analitica.estadisticas()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdmin])
+def listar_perfiles(request):
+    """
+    Perfiles de requests guardados (más reciente primero).
+    
+    GET /api/monitoring/profiles/
+    DELETE /api/monitoring/profiles/   Vacía el buffer
+    
+    Para perfilar un request enviar el header `X-Profile: 1` (solo ADMIN);
+    la respuesta trae `X-Profile-Id`.
+    """
+    if request.method == 'DELETE':
+        perfiles.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    return Response({
+        'success': True,
+        'perfiles': perfiles.listar()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def descargar_perfil(request, perfil_id):
+    """
+    Descarga un perfil.
+    
+    GET /api/monitoring/profiles/<id>/?formato=speedscope   (por defecto, abrir en speedscope.app)
+    GET /api/monitoring/profiles/<id>/?formato=collapsed    (pilas colapsadas para flamegraph.pl)
+    
+    Incluye las pilas de los hilos de services/paralelo.py mientras ejecutan
+    tareas del request (un perfil por hilo en speedscope; prefijo con el
+    nombre del hilo en las colapsadas). Otros hilos de segundo plano (p. ej.
+    la revalidación del caché de análisis) no se muestrean.
+    """
+    perfil = perfiles.obtener(perfil_id)
+    if perfil is None:
+        return Response({
+            'success': False,
+            'error': 'Perfil no encontrado (puede haber salido del buffer)'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    formato = request.query_params.get('formato', 'speedscope')
+    if formato == 'collapsed':
+        response = HttpResponse(perfil.colapsado(), content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="perfil_{perfil.id}.txt"'
+        return response
+    
+    response = JsonResponse(perfil.speedscope())
+    response['Content-Disposition'] = f'attachment; filename="perfil_{perfil.id}.speedscope.json"'
+    return response
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdmin])
+def clientes_supabase(request):
+    """
+    Clientes de Supabase reutilizados por el proceso.
+    
+    GET /api/monitoring/clientes/
+        Por tipo de key: clientes creados, reutilizados, recreados (por error
+        de conexión o por edad) y activos
+    
+    GET /api/monitoring/clientes/?verificar=1
+        Además hace el health check de los clientes del hilo que atiende
+        el request
+    
+    DELETE /api/monitoring/clientes/
+        Descarta los clientes y reinicia los contadores
+    """
+    if request.method == 'DELETE':
+        registro.reset()
+        logger.info("Clientes de Supabase descartados")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    data = {'success': True}
+    if request.query_params.get('verificar') in ('1', 'true'):
+        data['verificacion'] = verificar_clientes()
+    data['clientes'] = registro.estadisticas()
+    
+    return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,350 @@
+"""
+Detector de Anomalías en Línea
+
+Analiza cada lectura que entra por la sincronización y levanta alertas
+provisionales antes de que el firmware registre el evento de FALLA.
+
+Por cámara mantiene, en memoria y con costo O(1) por lectura:
+- Línea base EWMA (media y varianza exponenciales) → z-score
+- Ventana circular de las últimas lecturas con sumas acumuladas → pendiente
+  por mínimos cuadrados (°C/min) sin recorrer la ventana
+
+Reglas (se evalúan en cada lectura):
+- EXCURSION: temperatura fuera del rango de la cámara (umbral_min_c / umbral_max_c)
+- ANOMALIA: |z| >= Z_UMBRAL respecto de la línea base
+- SUBIDA_RAPIDA: pendiente >= PENDIENTE_UMBRAL con la ventana completa
+
+Las lecturas en estado DESHIELO se ignoran (ni alertan ni mueven la línea base),
+y las lecturas anómalas o fuera de rango no actualizan la línea base. Si la
+cámara cambia de nivel (nuevo setpoint, carga de producto) y acumula
+ANOMALIAS_PARA_REBASE lecturas anómalas seguidas dentro de rango, la línea
+base adopta el nivel nuevo y la ANOMALIA se cierra.
+
+Cada alerta se abre una sola vez por cámara y tipo. Para que una lectura que
+oscila alrededor de un umbral no abra y cierre la alerta en cada muestra, el
+estado cambia recién con LECTURAS_PARA_ABRIR lecturas seguidas que cumplen la
+condición o LECTURAS_PARA_CERRAR seguidas que no la cumplen; la alerta queda
+fechada desde la primera lectura de esa racha (la nueva línea base, en
+cambio, cierra la ANOMALIA en seguida). Se guardan en la tabla alertas_provisionales; en el
+primer uso del detector se cargan las que quedaron ABIERTAS (p. ej. antes de
+un reinicio) para poder cerrarlas. Una regla que todavía no se puede evaluar
+(línea base o ventana incompletas) no cierra su alerta.
+
+Uso:
+    >>> from apps.sync.anomalias import detector
+    >>> detector.procesar(camera, timestamp, -18.2, state='NORMAL')
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import threading
+
+from services.supabase_service import get_supabase_client
+from apps.lecturas.cumplimiento import umbrales_camara
+
+logger = logging.getLogger(__name__)
+
+ALFA_EWMA = 0.05           # Peso de la lectura nueva en la línea base
+Z_UMBRAL = 4.0             # Desviaciones estándar para ANOMALIA
+PENDIENTE_UMBRAL = 0.3     # °C por minuto para SUBIDA_RAPIDA
+TAM_VENTANA = 10           # Lecturas usadas para la pendiente
+MIN_LECTURAS = 30          # Lecturas antes de confiar en la línea base
+DESVIACION_MINIMA = 0.2    # °C, evita z enormes con sensores muy estables
+REBASE_MINUTOS = 24 * 60   # Cada cuánto se recentra el eje de tiempo
+ANOMALIAS_PARA_REBASE = 30 # Lecturas anómalas seguidas que fijan una nueva línea base
+LECTURAS_PARA_ABRIR = 3    # Lecturas seguidas con la condición para abrir una alerta
+LECTURAS_PARA_CERRAR = 3   # Lecturas seguidas sin la condición para cerrarla
+
+TIPOS_ALERTA = ('EXCURSION', 'ANOMALIA', 'SUBIDA_RAPIDA')
+
+
+class EstadoCamara:
+    """Estado incremental de una cámara (tamaño fijo)"""
+    
+    __slots__ = (
+        'media', 'varianza', 'n', 'ventana', 't0',
+        'suma_t', 'suma_y', 'suma_tt', 'suma_ty', 'alertas_abiertas',
+        'anomalas_seguidas', 'suma_anomalas', 'suma2_anomalas', 'rachas'
+    )
+    
+    def __init__(self, alertas_abiertas: Optional[Dict[str, Optional[int]]] = None):
+        self.media = None
+        self.varianza = 0.0
+        self.n = 0
+        self.ventana = deque(maxlen=TAM_VENTANA)  # (minutos desde t0, temp)
+        self.t0 = None
+        self.suma_t = 0.0
+        self.suma_y = 0.0
+        self.suma_tt = 0.0
+        self.suma_ty = 0.0
+        self.alertas_abiertas: Dict[str, Optional[int]] = dict(alertas_abiertas or {})  # tipo → id en Supabase
+        self.anomalas_seguidas = 0
+        self.suma_anomalas = 0.0
+        self.suma2_anomalas = 0.0
+        # tipo → (lecturas seguidas que contradicen el estado de la alerta, timestamp de la primera)
+        self.rachas: Dict[str, Tuple[int, datetime]] = {}
+    
+    def actualizar_base(self, temp: float):
+        """Actualiza media y varianza EWMA"""
+        self.n += 1
+        if self.media is None:
+            self.media = temp
+            return
+        diferencia = temp - self.media
+        incremento = ALFA_EWMA * diferencia
+        self.media += incremento
+        self.varianza = (1 - ALFA_EWMA) * (self.varianza + diferencia * incremento)
+    
+    def registrar_anomalia(self, temp: float) -> bool:
+        """
+        Cuenta una lectura anómala dentro de rango. Tras ANOMALIAS_PARA_REBASE
+        seguidas la línea base pasa a su media y varianza.
+        
+        Returns:
+            True si se fijó una nueva línea base
+        """
+        self.anomalas_seguidas += 1
+        self.suma_anomalas += temp
+        self.suma2_anomalas += temp * temp
+        if self.anomalas_seguidas < ANOMALIAS_PARA_REBASE:
+            return False
+        
+        n = self.anomalas_seguidas
+        self.media = self.suma_anomalas / n
+        self.varianza = max(self.suma2_anomalas / n - self.media * self.media, 0.0)
+        self.reiniciar_anomalias()
+        return True
+    
+    def reiniciar_anomalias(self):
+        self.anomalas_seguidas = 0
+        self.suma_anomalas = 0.0
+        self.suma2_anomalas = 0.0
+    
+    def z_score(self, temp: float) -> Optional[float]:
+        if self.n < MIN_LECTURAS or self.media is None:
+            return None
+        desviacion = max(math.sqrt(self.varianza), DESVIACION_MINIMA)
+        return (temp - self.media) / desviacion
+    
+    def agregar_a_ventana(self, ts: float, temp: float):
+        """Agrega (ts, temp) a la ventana manteniendo las sumas de la regresión"""
+        if self.t0 is None:
+            self.t0 = ts
+        t = (ts - self.t0) / 60.0
+        
+        if t > REBASE_MINUTOS:
+            # Recentrar para no perder precisión en las sumas
+            desplazamiento = t
+            self.t0 = ts
+            self.ventana = deque(
+                ((tv - desplazamiento, yv) for tv, yv in self.ventana), maxlen=TAM_VENTANA
+            )
+            self.suma_t = sum(tv for tv, _ in self.ventana)
+            self.suma_tt = sum(tv * tv for tv, _ in self.ventana)
+            self.suma_ty = sum(tv * yv for tv, yv in self.ventana)
+            t = 0.0
+        
+        if len(self.ventana) == TAM_VENTANA:
+            t_viejo, y_viejo = self.ventana[0]
+            self.suma_t -= t_viejo
+            self.suma_y -= y_viejo
+            self.suma_tt -= t_viejo * t_viejo
+            self.suma_ty -= t_viejo * y_viejo
+        
+        self.ventana.append((t, temp))
+        self.suma_t += t
+        self.suma_y += temp
+        self.suma_tt += t * t
+        self.suma_ty += t * temp
+    
+    def pendiente(self) -> Optional[float]:
+        """Pendiente (°C/min) de la ventana, solo con la ventana completa"""
+        n = len(self.ventana)
+        if n < TAM_VENTANA:
+            return None
+        denominador = n * self.suma_tt - self.suma_t * self.suma_t
+        if denominador <= 0:
+            return None
+        return (n * self.suma_ty - self.suma_t * self.suma_y) / denominador
+
+
+class DetectorAnomalias:
+    """Detector compartido por todas las cámaras"""
+    
+    def __init__(self):
+        self._estados: Dict[int, EstadoCamara] = {}
+        self._lock = threading.Lock()
+        self._abiertas_previas: Optional[Dict[int, Dict[str, int]]] = None
+    
+    def procesar(self, camera: Dict, timestamp: datetime, temperatura: float, state: Optional[str] = None) -> List[str]:
+        """
+        Procesa una lectura y abre/cierra alertas provisionales.
+        
+        Args:
+            camera: Dict de la cámara (id, nombre y umbrales)
+            timestamp: Fecha y hora de la lectura
+            temperatura: Temperatura en °C
+            state: Estado reportado por el dispositivo (NORMAL, DESHIELO, ...)
+        
+        Returns:
+            Lista de tipos de alerta cuya condición se cumple en esta lectura
+            (la alerta se abre o cierra según la racha, ver el módulo)
+        """
+        if state and str(state).upper().startswith('DESHIELO'):
+            return []
+        
+        temperatura = float(temperatura)
+        umbral_min, umbral_max = umbrales_camara(camera)
+        
+        if self._abiertas_previas is None:
+            # Fuera del lock: la consulta no debe frenar a las demás cámaras
+            abiertas = _cargar_alertas_abiertas()
+            with self._lock:
+                if self._abiertas_previas is None:
+                    self._abiertas_previas = abiertas
+        
+        with self._lock:
+            estado = self._estados.get(camera['id'])
+            if estado is None:
+                estado = self._estados[camera['id']] = EstadoCamara(
+                    self._abiertas_previas.pop(camera['id'], None)
+                )
+            
+            # Evaluar contra la línea base anterior a esta lectura
+            z = estado.z_score(temperatura)
+            estado.agregar_a_ventana(timestamp.timestamp(), temperatura)
+            pendiente = estado.pendiente()
+            
+            en_rango = umbral_min <= temperatura <= umbral_max
+            activas = {}
+            if not en_rango:
+                activas['EXCURSION'] = temperatura
+            if z is not None and abs(z) >= Z_UMBRAL:
+                activas['ANOMALIA'] = round(z, 2)
+            if pendiente is not None and pendiente >= PENDIENTE_UMBRAL:
+                activas['SUBIDA_RAPIDA'] = round(pendiente, 3)
+            
+            # Las excursiones y anomalías no entran a la línea base, salvo
+            # un cambio de nivel sostenido dentro de rango
+            nueva_base = False
+            if not en_rango:
+                estado.reiniciar_anomalias()
+            elif 'ANOMALIA' not in activas:
+                estado.reiniciar_anomalias()
+                estado.actualizar_base(temperatura)
+            elif estado.registrar_anomalia(temperatura):
+                logger.info(f"📐 Nueva línea base para {camera.get('nombre', camera['id'])}: {estado.media:.2f}°C")
+                del activas['ANOMALIA']
+                nueva_base = True
+            
+            sin_evaluar = set()
+            if z is None:
+                sin_evaluar.add('ANOMALIA')
+            if pendiente is None:
+                sin_evaluar.add('SUBIDA_RAPIDA')
+            
+            abrir = []
+            cerrar = []
+            for tipo in TIPOS_ALERTA:
+                if tipo in sin_evaluar:
+                    continue
+                abierta = tipo in estado.alertas_abiertas
+                if tipo == 'ANOMALIA' and nueva_base:
+                    # El nivel nuevo ya es normal: no hace falta esperar la racha
+                    estado.rachas.pop(tipo, None)
+                    if abierta:
+                        cerrar.append((tipo, timestamp))
+                    continue
+                if (tipo in activas) == abierta:
+                    estado.rachas.pop(tipo, None)
+                    continue
+                
+                seguidas, desde = estado.rachas.get(tipo, (0, timestamp))
+                seguidas += 1
+                if seguidas < (LECTURAS_PARA_CERRAR if abierta else LECTURAS_PARA_ABRIR):
+                    estado.rachas[tipo] = (seguidas, desde)
+                    continue
+                estado.rachas.pop(tipo, None)
+                (cerrar if abierta else abrir).append((tipo, desde))
+            
+            for tipo, _ in abrir:
+                estado.alertas_abiertas[tipo] = None
+            cerrar_ids = [(tipo, estado.alertas_abiertas.pop(tipo), desde) for tipo, desde in cerrar]
+        
+        for tipo, desde in abrir:
+            alerta_id = _insertar_alerta(camera, desde, temperatura, tipo, activas[tipo])
+            with self._lock:
+                if tipo in estado.alertas_abiertas:
+                    estado.alertas_abiertas[tipo] = alerta_id
+        
+        for tipo, alerta_id, desde in cerrar_ids:
+            _cerrar_alerta(alerta_id, desde)
+        
+        return list(activas)
+
+
+def _cargar_alertas_abiertas() -> Dict[int, Dict[str, int]]:
+    """Alertas ABIERTAS en Supabase por cámara y tipo (la más reciente de cada tipo)"""
+    abiertas: Dict[int, Dict[str, int]] = {}
+    try:
+        client = get_supabase_client(use_service_key=True)
+        response = client.table('alertas_provisionales')\
+            .select('id, camara_id, tipo')\
+            .eq('estado', 'ABIERTA')\
+            .order('fecha_inicio')\
+            .execute()
+        
+        for alerta in response.data or []:
+            abiertas.setdefault(alerta['camara_id'], {})[alerta['tipo']] = alerta['id']
+        if abiertas:
+            total = sum(len(tipos) for tipos in abiertas.values())
+            logger.info(f"🔁 {total} alertas provisionales abiertas recuperadas de Supabase")
+    
+    except Exception as e:
+        logger.error(f"Error al cargar alertas provisionales abiertas: {str(e)}")
+    
+    return abiertas
+
+
+def _insertar_alerta(camera: Dict, timestamp: datetime, temperatura: float, tipo: str, valor) -> Optional[int]:
+    """Inserta una alerta provisional y retorna su id"""
+    try:
+        client = get_supabase_client(use_service_key=True)
+        response = client.table('alertas_provisionales')\
+            .insert({
+                'camara_id': camera['id'],
+                'fecha_inicio': timestamp.isoformat(),
+                'tipo': tipo,
+                'temperatura_c': temperatura,
+                'valor': float(valor),
+                'estado': 'ABIERTA'
+            })\
+            .execute()
+        
+        logger.warning(f"🚨 Alerta provisional {tipo}: {camera.get('nombre', camera['id'])} - {temperatura}°C")
+        return response.data[0]['id'] if response.data else None
+    
+    except Exception as e:
+        logger.error(f"Error al insertar alerta provisional: {str(e)}")
+        return None
+
+
+def _cerrar_alerta(alerta_id: Optional[int], timestamp: datetime):
+    """Marca una alerta provisional como cerrada"""
+    if alerta_id is None:
+        return
+    try:
+        client = get_supabase_client(use_service_key=True)
+        client.table('alertas_provisionales')\
+            .update({'estado': 'CERRADA', 'fecha_fin': timestamp.isoformat()})\
+            .eq('id', alerta_id)\
+            .execute()
+    except Exception as e:
+        logger.error(f"Error al cerrar alerta provisional {alerta_id}: {str(e)}")
+
+
+# Instancia compartida por el servicio de sincronización
+detector = DetectorAnomalias()
@@ -1,7 +1,9 @@
 from django.apps import AppConfig
+from django.conf import settings
 import threading
 import logging
 import os
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,12 +11,19 @@ class SyncConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.sync'
     sync_started = False  # Variable de clase para evitar múltiples inicios
+    backend_local_started = False
     
     def ready(self):
         """
         Se ejecuta cuando Django está listo.
         Inicia el servicio de sincronización en segundo plano.
         """
+        # Backend Supabase local: servidor REST para las llamadas crudas
+        if not SyncConfig.backend_local_started:
+            from services.supabase_local import iniciar_backend_local
+            SyncConfig.backend_local_started = True
+            iniciar_backend_local()
+        
         # Solo iniciar una vez y en el proceso principal
         if SyncConfig.sync_started:
             return
@@ -33,13 +42,11 @@ class SyncConfig(AppConfig):
     def start_sync_service(self):
         """Inicia el servicio de sincronización en un hilo separado"""
         try:
-            from .sync_service import start_sync_service
-            
-            logger.info("🚀 Iniciando servicio de sincronización automática...")
+            logger.info(f"🚀 Servicio de sincronización automática en {settings.SYNC_INICIO_DIFERIDO_S}s...")
             
             # Crear hilo para el servicio de sincronización
             sync_thread = threading.Thread(
-                target=start_sync_service,
+                target=self.run_sync_service,
                 daemon=True,  # Se cierra cuando Django se cierra
                 name='firebase-sync-auto'
             )
@@ -50,4 +57,18 @@ class SyncConfig(AppConfig):
         except Exception as e:
             logger.error(f"❌ Error iniciando servicio de sincronización: {e}")
             import traceback
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+    
+    def run_sync_service(self):
+        """
+        Espera SYNC_INICIO_DIFERIDO_S antes de importar y arrancar la
+        sincronización, para no competir con el arranque del worker ni con
+        sus primeros requests.
+        """
+        time.sleep(settings.SYNC_INICIO_DIFERIDO_S)
+        
+        try:
+            from .sync_service import start_sync_service
+            start_sync_service()
+        except Exception as e:
+            logger.error(f"❌ Error en servicio de sincronización: {e}")
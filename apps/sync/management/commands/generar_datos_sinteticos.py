@@ -0,0 +1,99 @@
+"""
+Comando para generar datos sintéticos de lecturas, eventos y resúmenes diarios
+
+Genera N cámaras en cualquier rango de fechas (ver services/synthetic_data.py)
+y los escribe en Supabase por lotes o en archivos CSV/Parquet para COPY:
+
+    python manage.py generar_datos_sinteticos --camaras 50 --desde 2025-01-01 --hasta 2025-12-31 --destino csv --salida datos/
+    python manage.py generar_datos_sinteticos --camara-ids 3,4 --desde 2025-12-01 --hasta 2025-12-31 --destino supabase
+"""
+
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+import time
+import logging
+
+from services.supabase_service import get_supabase_client
+from services.synthetic_data import iterar_bloques, escribir_csv, escribir_parquet, cargar_supabase
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos (lecturas, eventos, resúmenes) en Supabase o en archivos CSV/Parquet'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--camaras', type=int, default=5,
+                            help='Cantidad de cámaras (ids 1..N; con --destino supabase, las primeras N activas)')
+        parser.add_argument('--camara-ids', default='', help='Ids de cámaras separados por coma (reemplaza --camaras)')
+        parser.add_argument('--desde', type=date.fromisoformat, default=None, help='Primer día (default: hace 30 días)')
+        parser.add_argument('--hasta', type=date.fromisoformat, default=None, help='Último día (default: ayer)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prob-pico', type=float, default=0.0, help='Probabilidad de pico de ruido por lectura')
+        parser.add_argument('--prob-perdida', type=float, default=0.0, help='Probabilidad de lectura perdida')
+        parser.add_argument('--destino', choices=['supabase', 'csv', 'parquet'], default='csv')
+        parser.add_argument('--salida', default='datos_sinteticos', help='Directorio para CSV/Parquet')
+        parser.add_argument('--lote', type=int, default=1000, help='Filas por request a Supabase')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Upsert en vez de insert (requiere índices únicos, ver cargar_supabase)')
+    
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or date.today() - timedelta(days=1)
+        desde = options['desde'] or hasta - timedelta(days=29)
+        if desde > hasta:
+            raise CommandError('--desde debe ser anterior o igual a --hasta')
+        
+        camaras = self._camaras(options)
+        self.stdout.write(f'🧪 Generando {len(camaras)} cámaras del {desde} al {hasta} (seed {options["seed"]})')
+        
+        bloques = iterar_bloques(
+            camaras, desde, hasta,
+            seed=options['seed'],
+            prob_pico=options['prob_pico'],
+            prob_perdida=options['prob_perdida']
+        )
+        inicio = time.perf_counter()
+        totales = {}
+        
+        if options['destino'] == 'parquet':
+            try:
+                totales = escribir_parquet(bloques, options['salida'])
+            except ImportError as e:
+                raise CommandError(str(e))
+        else:
+            client = get_supabase_client(use_service_key=True) if options['destino'] == 'supabase' else None
+            for bloque in bloques:
+                if client is not None:
+                    escritas = cargar_supabase(bloque, client, lote=options['lote'], upsert=options['upsert'])
+                else:
+                    escritas = escribir_csv(bloque, options['salida'])
+                for tabla, filas in escritas.items():
+                    totales[tabla] = totales.get(tabla, 0) + filas
+                self.stdout.write(f'   📅 {bloque.primer_dia:%Y-%m-%d} (+{bloque.dias} días): {escritas}')
+        
+        duracion = time.perf_counter() - inicio
+        destino = 'Supabase' if options['destino'] == 'supabase' else options['salida']
+        self.stdout.write(self.style.SUCCESS(f'✅ {totales} → {destino} en {duracion:.1f}s'))
+    
+    def _camaras(self, options):
+        if options['camara_ids']:
+            try:
+                return [int(camara_id) for camara_id in options['camara_ids'].split(',')]
+            except ValueError:
+                raise CommandError('--camara-ids debe ser una lista de enteros separados por coma')
+        
+        if options['destino'] != 'supabase':
+            return list(range(1, options['camaras'] + 1))
+        
+        # En Supabase las lecturas deben apuntar a cámaras existentes
+        client = get_supabase_client(use_service_key=True)
+        result = client.table('camaras_frio')\
+            .select('id')\
+            .eq('activa', True)\
+            .order('id')\
+            .limit(options['camaras'])\
+            .execute()
+        camaras = [camara['id'] for camara in result.data]
+        if not camaras:
+            raise CommandError('No hay cámaras activas en Supabase (usa --camara-ids)')
+        return camaras
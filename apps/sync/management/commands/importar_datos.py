@@ -0,0 +1,69 @@
+"""
+Management command para importar lecturas y eventos desde archivos
+
+Carga masiva con COPY + fusión deduplicada (conexión directa) o upserts por
+lotes vía PostgREST (ver services/import_service.py). Sirve para restaurar
+respaldos (backup_monthly_data.py), archivos de retención (.npz) o
+exportaciones CSV/NDJSON, y para poblar un entorno nuevo.
+
+Uso:
+    python manage.py importar_datos respaldos/2025_12/*.ndjson.gz
+    python manage.py importar_datos datos_sinteticos/lecturas_temperatura.csv --origen sintetico
+    python manage.py importar_datos eventos.csv --tabla eventos_temperatura
+"""
+
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from services.import_service import COLUMNAS, FILAS_POR_LOTE, importar_archivo, usa_copy
+
+
+class Command(BaseCommand):
+    help = 'Importa archivos CSV/NDJSON/Parquet/npz en lecturas_temperatura o eventos_temperatura'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('archivos', nargs='+', help='Archivos a importar (.csv, .ndjson, .parquet, .npz, con .gz)')
+        parser.add_argument('--tabla', choices=list(COLUMNAS),
+                            help='Tabla destino (por defecto según el nombre de cada archivo)')
+        parser.add_argument('--origen', default='importacion', help='Origen de las lecturas que no lo traen')
+        parser.add_argument('--lote', type=int, default=FILAS_POR_LOTE, help='Filas por upsert (solo PostgREST)')
+    
+    def handle(self, *args, **options):
+        rutas = [Path(archivo) for archivo in options['archivos']]
+        faltantes = [str(ruta) for ruta in rutas if not ruta.is_file()]
+        if faltantes:
+            raise CommandError(f'Archivos no encontrados: {", ".join(faltantes)}')
+        
+        modo = 'COPY (conexión directa)' if usa_copy() else 'upsert por lotes (PostgREST)'
+        self.stdout.write(f'📥 Importando {len(rutas)} archivos con {modo}')
+        
+        leidas = insertadas = 0
+        segundos = 0.0
+        for ruta in rutas:
+            def progreso(filas, transcurrido):
+                self.stdout.write(f'   ⏳ {ruta.name}: {filas:,} filas ({filas / transcurrido:,.0f} filas/s)')
+            
+            try:
+                resultado = importar_archivo(
+                    ruta,
+                    tabla=options['tabla'],
+                    origen=options['origen'],
+                    progreso=progreso,
+                    lote=options['lote']
+                )
+            except (ValueError, ImportError) as e:
+                raise CommandError(f'{ruta.name}: {str(e)}')
+            
+            leidas += resultado['leidas']
+            insertadas += resultado['insertadas'] or 0
+            segundos += resultado['segundos']
+            nuevas = '' if resultado['insertadas'] is None else f", {resultado['insertadas']:,} nuevas"
+            self.stdout.write(
+                f"   📦 {ruta.name} → {resultado['tabla']}: {resultado['leidas']:,} filas{nuevas} "
+                f"en {resultado['segundos']:.1f}s"
+            )
+        
+        velocidad = leidas / segundos if segundos else 0
+        resumen = f'{leidas:,} filas en {segundos:.1f}s ({velocidad:,.0f} filas/s)'
+        if usa_copy():
+            resumen += f', {insertadas:,} nuevas'
+        self.stdout.write(self.style.SUCCESS(f'✅ {resumen}'))
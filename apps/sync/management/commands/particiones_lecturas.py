@@ -0,0 +1,122 @@
+"""
+Management command para administrar las particiones de lecturas_temperatura
+
+Requiere haber ejecutado particiones_lecturas.sql. Sin opciones crea las
+particiones mensuales que falten hasta --meses adelante (programarlo una vez
+al mes, p. ej. como cron job de Render).
+
+Con conexión directa (DATABASE_URL, ver SUPABASE_DIRECT_DB) usa SQL; si no,
+llama a las mismas funciones por RPC con la service key.
+
+Uso:
+    python manage.py particiones_lecturas --meses 3
+    python manage.py particiones_lecturas --reporte
+    python manage.py particiones_lecturas --explicar 2025-12-01 2025-12-07
+    python manage.py particiones_lecturas --convertir   # solo con conexión directa
+"""
+
+from datetime import datetime, timezone
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.lecturas.models import LecturaTemperatura
+from services.supabase_service import get_supabase_client
+
+SCRIPT_SQL = Path(settings.BASE_DIR) / 'particiones_lecturas.sql'
+
+
+class Command(BaseCommand):
+    help = 'Crea particiones futuras de lecturas_temperatura y reporta el uso de índices'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, default=3, help='Meses futuros a asegurar (default: 3)')
+        parser.add_argument('--reporte', action='store_true', help='Mostrar particiones, tamaños y uso de índices')
+        parser.add_argument('--explicar', nargs=2, metavar=('DESDE', 'HASTA'),
+                            help='Mostrar el plan de una consulta por rango (qué particiones recorre)')
+        parser.add_argument('--convertir', action='store_true',
+                            help='Ejecutar particiones_lecturas.sql (conversión e índices)')
+    
+    def handle(self, *args, **options):
+        if options['convertir']:
+            self._convertir()
+        elif options['reporte']:
+            self._reporte()
+            return
+        elif options['explicar']:
+            self._explicar(*options['explicar'])
+            return
+        
+        creadas = self._crear_particiones(options['meses'])
+        for nombre in creadas:
+            self.stdout.write(f'   📦 {nombre}')
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(creadas)} particiones creadas'))
+    
+    def _crear_particiones(self, meses):
+        if settings.SUPABASE_DIRECT_DB:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT crear_particiones_lecturas(%s)', [meses])
+                return [fila[0] for fila in cursor.fetchall()]
+        
+        client = get_supabase_client(use_service_key=True)
+        try:
+            return client.rpc('crear_particiones_lecturas', {'p_meses_adelante': meses}).execute().data or []
+        except Exception as e:
+            raise CommandError(f'No se pudieron crear particiones (¿se ejecutó particiones_lecturas.sql?): {str(e)}')
+    
+    def _reporte(self):
+        if settings.SUPABASE_DIRECT_DB:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT * FROM reporte_particiones_lecturas()')
+                columnas = [c[0] for c in cursor.description]
+                filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        else:
+            client = get_supabase_client(use_service_key=True)
+            try:
+                filas = client.rpc('reporte_particiones_lecturas', {}).execute().data or []
+            except Exception as e:
+                raise CommandError(f'Reporte no disponible (¿se ejecutó particiones_lecturas.sql?): {str(e)}')
+        
+        if not filas:
+            self.stdout.write(self.style.WARNING('⚠️ lecturas_temperatura no está particionada'))
+            return
+        
+        particion_actual = None
+        sin_uso = []
+        for fila in filas:
+            if fila['particion'] != particion_actual:
+                particion_actual = fila['particion']
+                self.stdout.write(
+                    f"📦 {fila['particion']}: ~{fila['filas_estimadas']} filas, {fila['tamano_tabla']}"
+                )
+            if fila['indice']:
+                self.stdout.write(
+                    f"   🔎 {fila['indice']}: {fila['escaneos']} escaneos, "
+                    f"{fila['tuplas_leidas']} tuplas leídas, {fila['tamano_indice']}"
+                )
+                if not fila['escaneos'] and fila['filas_estimadas']:
+                    sin_uso.append(fila['indice'])
+        
+        if sin_uso:
+            self.stdout.write(self.style.WARNING(f'⚠️ Índices sin uso en particiones con datos: {len(sin_uso)}'))
+    
+    def _explicar(self, desde, hasta):
+        if not settings.SUPABASE_DIRECT_DB:
+            raise CommandError('--explicar requiere conexión directa (DATABASE_URL)')
+        
+        desde = datetime.fromisoformat(desde).replace(tzinfo=timezone.utc)
+        hasta = datetime.fromisoformat(hasta).replace(tzinfo=timezone.utc)
+        queryset = LecturaTemperatura.objects.filter(timestamp__gte=desde, timestamp__lte=hasta)
+        self.stdout.write(queryset.explain())
+    
+    def _convertir(self):
+        if not settings.SUPABASE_DIRECT_DB:
+            raise CommandError(
+                f'--convertir requiere conexión directa (DATABASE_URL); '
+                f'si no, ejecuta {SCRIPT_SQL.name} en el SQL Editor de Supabase'
+            )
+        
+        self.stdout.write(f'🔧 Ejecutando {SCRIPT_SQL.name}...')
+        with connection.cursor() as cursor:
+            cursor.execute(SCRIPT_SQL.read_text(encoding='utf-8'))
+        self.stdout.write(self.style.SUCCESS('✅ Conversión e índices aplicados'))
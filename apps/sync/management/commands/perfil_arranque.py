@@ -0,0 +1,105 @@
+"""
+Management command para medir el arranque de un worker
+
+Carga la aplicación WSGI en un proceso nuevo con `python -X importtime`
+y reporta:
+- Tiempo hasta tener la aplicación y sus URLs cargadas
+- Tiempo de importación por paquete y los módulos más lentos
+- Tiempo de cada paso de calentar() (SDKs, cliente de Firebase y módulos del
+  cliente de Supabase, ver services/arranque.py)
+
+Uso:
+    python manage.py perfil_arranque
+    python manage.py perfil_arranque --top 30 --sin-clientes
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import json
+import os
+import subprocess
+import sys
+
+# Se ejecuta en el proceso hijo. Incluye las URLs (y con ellas las vistas),
+# que Django carga recién en el primer request; la línea marcador separa los
+# imports del arranque de los que hace calentar()
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+from coldtrack.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+wsgi_ms = (time.perf_counter() - inicio) * 1000
+sys.stderr.write('-- calentar --\\n')
+pasos = {}
+if %(clientes)r:
+    from services.arranque import calentar
+    pasos = calentar()
+print(json.dumps({'wsgi_ms': wsgi_ms, 'pasos': pasos}))
+"""
+
+MARCADOR = '-- calentar --'
+
+
+def parsear_importtime(lineas):
+    """Líneas de `-X importtime` → lista de (módulo, propio_us, acumulado_us)"""
+    modulos = []
+    for linea in lineas:
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+    return modulos
+
+
+class Command(BaseCommand):
+    help = 'Mide la importación de módulos y la inicialización de clientes al arrancar un worker'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Paquetes y módulos a listar (default: 15)')
+        parser.add_argument('--sin-clientes', action='store_true',
+                            help='No inicializar Firebase ni cargar los módulos del cliente de Supabase')
+    
+    def handle(self, *args, **options):
+        # Sin RENDER/RUN_MAIN para que el proceso hijo no inicie la sincronización
+        env = {k: v for k, v in os.environ.items() if k not in ('RENDER', 'RUN_MAIN')}
+        env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'coldtrack.settings')
+        
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT % {'clientes': not options['sin_clientes']}],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f'El arranque falló:\n{proceso.stderr[-2000:]}')
+        
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        lineas = proceso.stderr.splitlines()
+        corte = lineas.index(MARCADOR) if MARCADOR in lineas else len(lineas)
+        modulos = parsear_importtime(lineas[:corte])
+        
+        total_us = sum(propio for _, propio, _ in modulos)
+        self.stdout.write(f"🚀 Aplicación WSGI lista en {resultado['wsgi_ms']:.0f} ms "
+                          f"({len(modulos)} módulos, {total_us / 1000:.0f} ms importando)")
+        
+        por_paquete = {}
+        for nombre, propio, _ in modulos:
+            paquete = nombre.split('.')[0]
+            por_paquete[paquete] = por_paquete.get(paquete, 0) + propio
+        
+        self.stdout.write(f"\n📦 Importación por paquete (top {options['top']}):")
+        for paquete, propio in sorted(por_paquete.items(), key=lambda p: -p[1])[:options['top']]:
+            self.stdout.write(f"   {propio / 1000:8.1f} ms  {paquete}")
+        
+        self.stdout.write(f"\n🐢 Módulos más lentos, tiempo acumulado (top {options['top']}):")
+        for nombre, _, acumulado in sorted(modulos, key=lambda m: -m[2])[:options['top']]:
+            self.stdout.write(f"   {acumulado / 1000:8.1f} ms  {nombre}")
+        
+        if resultado['pasos']:
+            self.stdout.write('\n🔥 Calentamiento de clientes:')
+            for nombre, paso in resultado['pasos'].items():
+                estado = f" ⚠️ {paso['error']}" if paso['error'] else ''
+                self.stdout.write(f"   {paso['ms']:8.1f} ms  {nombre}{estado}")
+            total = resultado['wsgi_ms'] + sum(paso['ms'] for paso in resultado['pasos'].values())
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Arranque + calentamiento: {total:.0f} ms'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Listo'))
@@ -0,0 +1,68 @@
+"""
+Management command para recalcular las métricas de cumplimiento
+
+Reconstruye el sketch diario (sketch_cumplimiento) de cada cámara a partir
+de las lecturas guardadas. Útil para días anteriores a la migración
+cumplimiento.sql o después de cambiar los umbrales de una cámara.
+
+Uso:
+    python manage.py recalcular_cumplimiento --desde 2025-12-01 --hasta 2025-12-31
+    python manage.py recalcular_cumplimiento --desde 2025-12-01 --camara 3
+"""
+
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand
+from apps.lecturas.cumplimiento import SketchDiario, guardar_sketch, umbrales_camara
+from services.supabase_service import get_supabase_client, iterar_keyset
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las métricas de cumplimiento diarias desde las lecturas'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', required=True, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD, por defecto hoy)')
+        parser.add_argument('--camara', type=int, help='ID de cámara (por defecto todas)')
+    
+    def handle(self, *args, **options):
+        desde = date.fromisoformat(options['desde'])
+        hasta = date.fromisoformat(options['hasta']) if options['hasta'] else date.today()
+        
+        client = get_supabase_client(use_service_key=True)
+        camaras_query = client.table('camaras_frio').select('id, nombre, umbral_min_c, umbral_max_c')
+        if options['camara']:
+            camaras_query = camaras_query.eq('id', options['camara'])
+        camaras = camaras_query.execute().data or []
+        
+        total = 0
+        for camara in camaras:
+            umbral_min, umbral_max = umbrales_camara(camara)
+            fecha = desde
+            
+            while fecha <= hasta:
+                lecturas = list(iterar_keyset(
+                    'lecturas_temperatura',
+                    'id, timestamp, temperatura_c',
+                    lambda q: q.eq('camara_id', camara['id'])
+                               .gte('timestamp', f'{fecha}T00:00:00')
+                               .lte('timestamp', f'{fecha}T23:59:59'),
+                    client=client
+                ))
+                
+                if lecturas:
+                    sketch = SketchDiario(umbral_min, umbral_max)
+                    lecturas.sort(key=lambda l: l['timestamp'])
+                    for lectura in lecturas:
+                        ts = datetime.fromisoformat(lectura['timestamp'][:19])
+                        sketch.agregar(int(ts.timestamp()), float(lectura['temperatura_c']))
+                    
+                    if guardar_sketch(camara['id'], fecha, sketch):
+                        total += 1
+                
+                fecha += timedelta(days=1)
+            
+            self.stdout.write(f"📈 {camara['nombre']}: cumplimiento recalculado")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {total} resúmenes diarios actualizados')
+        )
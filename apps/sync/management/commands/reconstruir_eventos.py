@@ -0,0 +1,94 @@
+"""
+Management command para reconstruir eventos desde las lecturas
+
+Detecta deshielos y fallas en lecturas_temperatura con la máquina de estados
+de apps.sync.reconstruccion y los inserta en eventos_temperatura. Es
+idempotente: los eventos ya reconstruidos se actualizan si cambiaron (p. ej.
+una falla en curso que ya terminó) y los idénticos o que coinciden con un
+evento de Firebase se omiten.
+
+Uso:
+    python manage.py reconstruir_eventos --desde 2025-12-01 --hasta 2025-12-31
+    python manage.py reconstruir_eventos --desde 2025-12-01 --camara 3 --dry-run
+    python manage.py reconstruir_eventos --desde 2025-12-01 --horas-programadas 6 18
+"""
+
+from datetime import date
+import time
+from django.core.management.base import BaseCommand
+from apps.sync.reconstruccion import ParametrosReconstruccion, reconstruir_camara
+from services.supabase_service import get_supabase_client
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye eventos de deshielo y falla desde las lecturas de temperatura'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', required=True, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha final (YYYY-MM-DD, por defecto hoy)')
+        parser.add_argument('--camara', type=int, help='ID de cámara (por defecto todas)')
+        parser.add_argument('--umbral-entrada', type=float, default=0.0, help='°C para abrir un evento')
+        parser.add_argument('--umbral-salida', type=float, default=-2.0, help='°C para cerrar un evento')
+        parser.add_argument('--umbral-falla', type=float, default=5.0, help='°C máximos para considerar FALLA')
+        parser.add_argument('--max-deshielo', type=int, default=60, help='Minutos máximos de un deshielo')
+        parser.add_argument('--min-duracion', type=int, default=5, help='Minutos mínimos de un evento')
+        parser.add_argument('--max-hueco', type=int, default=15, help='Minutos sin lecturas que cortan un evento')
+        parser.add_argument(
+            '--horas-programadas', type=int, nargs='*', default=[],
+            help='Horas de inicio de los deshielos programados (DESHIELO_P)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar, no insertar')
+    
+    def handle(self, *args, **options):
+        desde = options['desde']
+        hasta = options['hasta'] or date.today().isoformat()
+        parametros = ParametrosReconstruccion(
+            umbral_entrada=options['umbral_entrada'],
+            umbral_salida=options['umbral_salida'],
+            umbral_falla=options['umbral_falla'],
+            max_deshielo_min=options['max_deshielo'],
+            min_duracion_min=options['min_duracion'],
+            max_hueco_min=options['max_hueco'],
+            horas_programadas=options['horas_programadas']
+        )
+        
+        client = get_supabase_client(use_service_key=True)
+        camaras_query = client.table('camaras_frio').select('id, nombre')
+        if options['camara']:
+            camaras_query = camaras_query.eq('id', options['camara'])
+        camaras = camaras_query.execute().data or []
+        
+        total = 0
+        total_actualizados = 0
+        for camara in camaras:
+            inicio = time.perf_counter()
+            resultado = reconstruir_camara(
+                camara['id'],
+                f'{desde}T00:00:00',
+                f'{hasta}T23:59:59',
+                parametros=parametros,
+                guardar=not options['dry_run'],
+                client=client
+            )
+            
+            if options['dry_run']:
+                for evento in resultado['eventos']:
+                    self.stdout.write(
+                        f"   {evento['tipo']:<15} {evento['fecha_inicio']} "
+                        f"{evento['duracion_minutos']:>4} min  {evento['temp_max_c']}°C"
+                    )
+            
+            nuevos = len(resultado['eventos']) if options['dry_run'] else resultado['insertados']
+            actualizados = len(resultado['cambios']) if options['dry_run'] else resultado['actualizados']
+            total += nuevos
+            total_actualizados += actualizados
+            self.stdout.write(
+                f"🔁 {camara['nombre']}: {resultado['lecturas']} lecturas, "
+                f"{resultado['detectados']} eventos detectados, {resultado['omitidos']} sin cambios, "
+                f"{nuevos} nuevos, {actualizados} actualizados ({time.perf_counter() - inicio:.1f}s)"
+            )
+        
+        accion = 'por insertar (dry-run)' if options['dry_run'] else 'insertados'
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {total} eventos {accion}, {total_actualizados} actualizados')
+        )
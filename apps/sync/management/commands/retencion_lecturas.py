@@ -0,0 +1,70 @@
+"""
+Management command para aplicar la retención de lecturas_temperatura
+
+Resume, archiva y borra las lecturas crudas de los meses completos
+anteriores a la ventana de retención (ver apps/lecturas/retencion.py).
+Requiere haber ejecutado retencion_lecturas.sql. Programarlo una vez al
+mes, p. ej. como cron job de Render.
+
+Uso:
+    python manage.py retencion_lecturas
+    python manage.py retencion_lecturas --dias 180 --dry-run
+    python manage.py retencion_lecturas --mes 2025-01 --sin-borrar
+"""
+
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.lecturas import retencion
+
+
+class Command(BaseCommand):
+    help = 'Archiva y borra las lecturas crudas fuera de la ventana de retención'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.RETENCION_LECTURAS_DIAS,
+                            help=f'Días de lecturas crudas a conservar (default: {settings.RETENCION_LECTURAS_DIAS})')
+        parser.add_argument('--mes', help='Procesar solo este mes (YYYY-MM)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo listar los meses a procesar')
+        parser.add_argument('--sin-borrar', action='store_true',
+                            help='Resumir y archivar sin borrar las filas de lecturas_temperatura')
+    
+    def handle(self, *args, **options):
+        corte = retencion.corte_retencion(options['dias'])
+        
+        if options['mes']:
+            try:
+                mes = date.fromisoformat(f"{options['mes']}-01")
+            except ValueError:
+                raise CommandError('--mes debe tener formato YYYY-MM')
+            if mes >= corte:
+                raise CommandError(f'{options["mes"]} está dentro de la ventana de retención (corte: {corte})')
+            meses = [mes]
+        else:
+            meses = retencion.meses_pendientes(corte)
+        
+        self.stdout.write(f'🗄️ Retención de {options["dias"]} días: se archiva lo anterior a {corte}')
+        if not meses:
+            self.stdout.write(self.style.SUCCESS('✅ No hay meses por archivar'))
+            return
+        
+        if options['dry_run']:
+            for mes in meses:
+                self.stdout.write(f'   📅 {mes:%Y-%m}')
+            self.stdout.write(self.style.WARNING(f'⚠️ Dry run: {len(meses)} meses sin procesar'))
+            return
+        
+        total = 0
+        for mes in meses:
+            try:
+                resultado = retencion.compactar_mes(mes, borrar=not options['sin_borrar'])
+            except Exception as e:
+                raise CommandError(f'Error archivando {mes:%Y-%m}: {str(e)}')
+            
+            total += resultado['borradas']
+            self.stdout.write(
+                f"   📦 {mes:%Y-%m}: {resultado['lecturas']} lecturas → {resultado['bytes'] / 1e6:.1f} MB, "
+                f"{resultado['horas']} horas y {resultado['dias']} días resumidos, {resultado['borradas']} borradas"
+            )
+        
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(meses)} meses archivados, {total} lecturas borradas'))
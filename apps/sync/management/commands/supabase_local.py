@@ -0,0 +1,66 @@
+"""
+Comando para levantar un Supabase local (API REST compatible con PostgREST)
+
+Sirve /rest/v1/... desde memoria, opcionalmente persistido en SQLite y
+cargado con datos sintéticos, para medir performance sin red:
+
+    python manage.py supabase_local --db local.sqlite3 --sintetico --camaras 20 --dias 30
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_ANON_KEY=local python manage.py runserver
+"""
+
+from django.core.management.base import BaseCommand
+import logging
+
+from services.supabase_local import ClienteLocal, ServidorRest
+from services.synthetic_data import generar_dataset
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Levanta un servidor local compatible con la API REST de Supabase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--puerto', type=int, default=54321)
+        parser.add_argument('--db', default='', help='Archivo SQLite para persistir los datos (default: solo memoria)')
+        parser.add_argument('--sintetico', action='store_true',
+                            help='Cargar un dataset sintético si la base está vacía')
+        parser.add_argument('--camaras', type=int, default=5)
+        parser.add_argument('--sucursales', type=int, default=2)
+        parser.add_argument('--dias', type=int, default=14)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--solo-cargar', action='store_true',
+                            help='Cargar los datos en --db y salir sin levantar el servidor')
+
+    def handle(self, *args, **options):
+        cliente = ClienteLocal.desde_sqlite(options['db']) if options['db'] else ClienteLocal()
+
+        vacia = not any(tabla.filas for tabla in cliente.tablas.values())
+        if options['sintetico'] and vacia:
+            dataset = generar_dataset(
+                camaras=options['camaras'],
+                sucursales=options['sucursales'],
+                dias=options['dias'],
+                seed=options['seed']
+            )
+            cliente.cargar(dataset.tablas)
+            self.stdout.write(self.style.SUCCESS(f'📦 Dataset sintético cargado: {dataset.resumen()}'))
+        elif options['sintetico']:
+            self.stdout.write(self.style.WARNING('⚠️ La base ya tiene datos: no se carga el dataset sintético'))
+
+        resumen = {nombre: len(tabla.filas) for nombre, tabla in cliente.tablas.items()}
+        self.stdout.write(f'📊 Tablas: {resumen or "(vacías)"}')
+
+        if options['solo_cargar']:
+            return
+
+        servidor = ServidorRest(cliente, host=options['host'], puerto=options['puerto'])
+        self.stdout.write(self.style.SUCCESS(f'🚀 API REST local en {servidor.url}/rest/v1/'))
+        self.stdout.write(f'   SUPABASE_URL={servidor.url}  (cualquier SUPABASE_ANON_KEY)')
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('🛑 Servidor detenido'))
+        finally:
+            servidor.server_close()
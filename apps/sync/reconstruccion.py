@@ -0,0 +1,323 @@
+"""
+Reconstrucción de Eventos desde Lecturas
+
+Cuando faltan eventos de Firebase (o están corruptos) permite rehacer
+eventos_temperatura a partir de lecturas_temperatura.
+
+Las lecturas de una cámara se cargan como arreglos NumPy y se recorren con
+una máquina de estados con histéresis vectorizada:
+- Un intervalo comienza cuando la temperatura sube a `umbral_entrada` o más
+- Termina con la primera lectura en `umbral_salida` o menos
+- Entre ambos umbrales se mantiene el estado anterior (histéresis)
+- Un hueco de lecturas mayor a `max_hueco_min` corta el intervalo
+
+Cada intervalo se clasifica como FALLA (temperatura máxima >= umbral_falla o
+duración > max_deshielo_min) o DESHIELO_N / DESHIELO_P (programado si
+empieza en una de las horas programadas).
+
+Los eventos llevan firebase_event_id determinístico (recon_{camara}_{inicio}),
+así que volver a correr la reconstrucción no duplica eventos: uno ya
+reconstruido se actualiza si cambió (p. ej. un FALLA_EN_CURSO cuyo intervalo
+ya terminó) y se omite si es idéntico.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from apps.dashboard.analytics import a_epoch
+from services.supabase_service import get_supabase_client, iterar_keyset
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_ID = 'recon'
+LOTE_INSERCION = 500
+
+# Campos de un evento reconstruido que puede cambiar una nueva corrida
+CAMPOS_ACTUALIZABLES = ('fecha_fin', 'tipo', 'temp_max_c', 'duracion_minutos', 'estado')
+
+
+class ParametrosReconstruccion:
+    """Umbrales de la máquina de estados"""
+    
+    def __init__(
+        self,
+        umbral_entrada: float = 0.0,
+        umbral_salida: float = -2.0,
+        umbral_falla: float = 5.0,
+        max_deshielo_min: int = 60,
+        min_duracion_min: int = 5,
+        max_hueco_min: int = 15,
+        horas_programadas: Sequence[int] = ()
+    ):
+        self.umbral_entrada = umbral_entrada
+        self.umbral_salida = umbral_salida
+        self.umbral_falla = umbral_falla
+        self.max_deshielo_min = max_deshielo_min
+        self.min_duracion_min = min_duracion_min
+        self.max_hueco_min = max_hueco_min
+        self.horas_programadas = set(horas_programadas)
+
+
+def cargar_lecturas(client, camara_id: int, desde: str, hasta: str):
+    """
+    Carga las lecturas de una cámara ordenadas por timestamp.
+    
+    Returns:
+        (ts, temps): epoch en segundos (hora local del string) y temperaturas
+    """
+    timestamps = []
+    temperaturas = []
+    lecturas = iterar_keyset(
+        'lecturas_temperatura',
+        'id, timestamp, temperatura_c',
+        lambda q: q.eq('camara_id', camara_id)
+                   .gte('timestamp', desde)
+                   .lte('timestamp', hasta),
+        client=client
+    )
+    for lectura in lecturas:
+        timestamps.append(lectura['timestamp'])
+        temperaturas.append(float(lectura['temperatura_c']))
+    
+    ts = a_epoch(timestamps)
+    temps = np.array(temperaturas, dtype=np.float64)
+    orden = np.argsort(ts, kind='stable')
+    return ts[orden], temps[orden]
+
+
+def detectar_intervalos(ts: np.ndarray, temps: np.ndarray, parametros: ParametrosReconstruccion) -> Dict:
+    """
+    Encuentra los intervalos con temperatura elevada (vectorizado).
+    
+    Returns:
+        Dict de arreglos: inicio, fin (epoch), temp_max, abierto (sigue al final de los datos)
+    """
+    vacio = {
+        'inicio': np.empty(0, dtype=np.int64),
+        'fin': np.empty(0, dtype=np.int64),
+        'temp_max': np.empty(0),
+        'abierto': np.empty(0, dtype=bool),
+    }
+    n = ts.size
+    if n == 0:
+        return vacio
+    
+    # Histéresis: 1 = alto, 0 = normal, -1 = zona intermedia (hereda el anterior)
+    marca = np.full(n, -1, dtype=np.int8)
+    marca[temps >= parametros.umbral_entrada] = 1
+    marca[temps <= parametros.umbral_salida] = 0
+    
+    # Un hueco largo reinicia el estado
+    hueco = np.r_[False, np.diff(ts) > parametros.max_hueco_min * 60]
+    marca[hueco & (marca == -1)] = 0
+    
+    # Propagar hacia adelante el último estado definido
+    definidos = np.where(marca >= 0, np.arange(n), -1)
+    np.maximum.accumulate(definidos, out=definidos)
+    estado = np.where(definidos >= 0, marca[np.maximum(definidos, 0)], 0).astype(np.int8)
+    
+    # Bordes de cada corrida en estado alto (un hueco también corta la corrida)
+    anterior = np.r_[0, estado[:-1]]
+    anterior[hueco] = 0
+    inicios = np.flatnonzero((estado == 1) & (anterior == 0))
+    if inicios.size == 0:
+        return vacio
+    
+    siguiente_corte = np.r_[hueco[1:], True]
+    ultimos = np.flatnonzero((estado == 1) & ((np.r_[estado[1:], 0] == 0) | siguiente_corte))
+    
+    # El intervalo termina con la primera lectura normal (si no hay hueco)
+    indice_fin = ultimos + 1
+    cierra_con_lectura = (indice_fin < n) & ~np.r_[hueco, True][indice_fin]
+    fin = np.where(cierra_con_lectura, ts[np.minimum(indice_fin, n - 1)], ts[ultimos])
+    
+    # Máximo por corrida: reduceat sobre pares [inicio, último + 1) intercalados
+    # (se agrega un centinela para que último + 1 nunca quede fuera del arreglo)
+    limites = np.column_stack((inicios, ultimos + 1)).ravel()
+    temp_max = np.maximum.reduceat(np.r_[temps, -np.inf], limites)[::2]
+    
+    return {
+        'inicio': ts[inicios],
+        'fin': fin,
+        'temp_max': temp_max,
+        'abierto': ultimos == n - 1,
+    }
+
+
+def clasificar(intervalos: Dict, parametros: ParametrosReconstruccion) -> List[Dict]:
+    """Convierte los intervalos en eventos (filtra los muy cortos)"""
+    duracion_min = (intervalos['fin'] - intervalos['inicio']) // 60
+    validos = duracion_min >= parametros.min_duracion_min
+    es_falla = (intervalos['temp_max'] >= parametros.umbral_falla) | \
+        (duracion_min > parametros.max_deshielo_min)
+    
+    eventos = []
+    for i in np.flatnonzero(validos):
+        inicio = _a_datetime(intervalos['inicio'][i])
+        fin = _a_datetime(intervalos['fin'][i])
+        abierto = bool(intervalos['abierto'][i])
+        
+        if es_falla[i]:
+            tipo = 'FALLA_EN_CURSO' if abierto else 'FALLA'
+        elif inicio.hour in parametros.horas_programadas:
+            tipo = 'DESHIELO_P'
+        else:
+            tipo = 'DESHIELO_N'
+        
+        eventos.append({
+            'inicio_epoch': int(intervalos['inicio'][i]),
+            'fecha_inicio': inicio,
+            'fecha_fin': None if abierto else fin,
+            'duracion_minutos': int(duracion_min[i]),
+            'temp_max_c': round(float(intervalos['temp_max'][i]), 2),
+            'tipo': tipo,
+            'estado': 'EN_CURSO' if abierto else 'RESUELTO',
+        })
+    return eventos
+
+
+def _a_datetime(epoch) -> datetime:
+    """Epoch de a_epoch (hora local del string) → datetime naive"""
+    return datetime(1970, 1, 1) + timedelta(seconds=int(epoch))
+
+
+def firebase_event_id(camara_id: int, inicio_epoch: int) -> str:
+    return f'{PREFIJO_ID}_{camara_id}_{inicio_epoch}'
+
+
+def cambios_evento(existente: Dict, evento: Dict) -> Dict:
+    """Campos de CAMPOS_ACTUALIZABLES en que `evento` difiere del guardado"""
+    cambios = {}
+    for campo in CAMPOS_ACTUALIZABLES:
+        nuevo, actual = evento[campo], existente.get(campo)
+        if campo == 'fecha_fin':
+            # El guardado puede venir con zona horaria o microsegundos
+            distinto = (nuevo or '')[:19] != (actual or '')[:19]
+        elif campo == 'temp_max_c':
+            distinto = actual is None or round(float(actual), 2) != nuevo
+        else:
+            distinto = nuevo != actual
+        if distinto:
+            cambios[campo] = nuevo
+    return cambios
+
+
+def reconstruir_camara(
+    camara_id: int,
+    desde: str,
+    hasta: str,
+    parametros: Optional[ParametrosReconstruccion] = None,
+    guardar: bool = True,
+    client=None
+) -> Dict:
+    """
+    Reconstruye los eventos de una cámara en un rango.
+    
+    Un evento ya reconstruido (mismo firebase_event_id) se actualiza si
+    cambió su estado, fin, tipo, duración o temperatura máxima, y se omite si
+    es idéntico. Se omiten también los que se superponen con eventos
+    existentes de Firebase.
+    
+    Returns:
+        Dict con lecturas, detectados, omitidos, insertados, actualizados,
+        la lista de eventos nuevos y la de cambios ({'id', 'cambios'})
+    """
+    parametros = parametros or ParametrosReconstruccion()
+    client = client or get_supabase_client(use_service_key=True)
+    
+    ts, temps = cargar_lecturas(client, camara_id, desde, hasta)
+    eventos = clasificar(detectar_intervalos(ts, temps, parametros), parametros)
+    
+    existentes = list(iterar_keyset(
+        'eventos_temperatura',
+        'id, firebase_event_id, fecha_inicio, fecha_fin, duracion_minutos, tipo, temp_max_c, estado',
+        lambda q: q.eq('camara_id', camara_id)
+                   .gte('fecha_inicio', (datetime.fromisoformat(desde[:19]) - timedelta(days=1)).isoformat())
+                   .lte('fecha_inicio', hasta),
+        client=client
+    ))
+    por_id = {e['firebase_event_id']: e for e in existentes if e.get('firebase_event_id')}
+    
+    # Intervalos de eventos que no vienen de una reconstrucción
+    otros = [e for e in existentes if not (e.get('firebase_event_id') or '').startswith(f'{PREFIJO_ID}_')]
+    otros_inicio = a_epoch([e['fecha_inicio'] for e in otros])
+    otros_fin = np.array([
+        a_epoch([e['fecha_fin']])[0] if e.get('fecha_fin')
+        else otros_inicio[i] + 60 * (e.get('duracion_minutos') or 0)
+        for i, e in enumerate(otros)
+    ], dtype=np.int64)
+    
+    nuevos = []
+    cambios = []
+    omitidos = 0
+    for evento in eventos:
+        evento_id = firebase_event_id(camara_id, evento['inicio_epoch'])
+        fila = {
+            'camara_id': camara_id,
+            'firebase_event_id': evento_id,
+            'fecha_inicio': evento['fecha_inicio'].isoformat(),
+            'fecha_fin': evento['fecha_fin'].isoformat() if evento['fecha_fin'] else None,
+            'tipo': evento['tipo'],
+            'temp_max_c': evento['temp_max_c'],
+            'duracion_minutos': evento['duracion_minutos'],
+            'estado': evento['estado'],
+            'observaciones': 'Reconstruido desde lecturas',
+            'created_at': evento['fecha_inicio'].isoformat()
+        }
+        
+        # Ya reconstruido en una corrida anterior: actualizar solo si cambió
+        if evento_id in por_id:
+            diferencias = cambios_evento(por_id[evento_id], fila)
+            if diferencias:
+                cambios.append({'id': por_id[evento_id]['id'], 'cambios': diferencias})
+            else:
+                omitidos += 1
+            continue
+        
+        fin = evento['inicio_epoch'] + 60 * evento['duracion_minutos']
+        superpuesto = otros_inicio.size and np.any((otros_inicio <= fin) & (otros_fin >= evento['inicio_epoch']))
+        if superpuesto:
+            omitidos += 1
+            continue
+        
+        nuevos.append(fila)
+    
+    insertados = 0
+    if guardar:
+        for i in range(0, len(nuevos), LOTE_INSERCION):
+            lote = nuevos[i:i + LOTE_INSERCION]
+            try:
+                response = client.table('eventos_temperatura').insert(lote).execute()
+                insertados += len(response.data or [])
+            except Exception as e:
+                logger.error(f"Error al insertar eventos reconstruidos de cámara {camara_id}: {str(e)}")
+    
+    actualizados = 0
+    if guardar:
+        for cambio in cambios:
+            try:
+                client.table('eventos_temperatura')\
+                    .update(cambio['cambios'])\
+                    .eq('id', cambio['id'])\
+                    .execute()
+                actualizados += 1
+            except Exception as e:
+                logger.error(f"Error al actualizar evento reconstruido {cambio['id']}: {str(e)}")
+    
+    logger.info(
+        f"Reconstrucción cámara {camara_id}: {ts.size} lecturas, {len(eventos)} detectados, "
+        f"{omitidos} omitidos, {insertados} insertados, {actualizados} actualizados"
+    )
+    return {
+        'camara_id': camara_id,
+        'lecturas': int(ts.size),
+        'detectados': len(eventos),
+        'omitidos': omitidos,
+        'insertados': insertados,
+        'actualizados': actualizados,
+        'eventos': nuevos,
+        'cambios': cambios
+    }
@@ -29,6 +29,7 @@ from services.supabase_service import (
     insert_daily_summary,
     get_open_events_for_camera
 )
+from apps.lecturas.cumplimiento import acumulador
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +102,7 @@ def sync_device_readings(device_id: str, target_date: Optional[date] = None) ->
             
             if result:
                 lecturas_insertadas += 1
+                acumulador.agregar(camera, timestamp, reading['temp'])
             else:
                 errores += 1
                 
@@ -108,6 +110,9 @@ def sync_device_readings(device_id: str, target_date: Optional[date] = None) ->
             logger.error(f"Error al insertar lectura: {str(e)}")
             errores += 1
     
+    # Guardar métricas de cumplimiento de las lecturas nuevas
+    acumulador.volcar()
+    
     logger.info(f"Sincronización completada: {lecturas_insertadas} lecturas, {errores} errores")
     
     return {
@@ -9,14 +9,16 @@ import time
 import logging
 import os
 from datetime import datetime, date
-from firebase_admin import db
-from services.firebase_service import initialize_firebase
+from services.firebase_service import initialize_firebase, get_database
 from services.supabase_service import (
     get_camera_by_firebase_path,
     insert_temperature_reading,
     insert_event,
     get_supabase_client
 )
+from apps.lecturas.cumplimiento import acumulador
+from apps.sync.anomalias import detector
+from services.cache_analitica import cache_analitica
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +92,8 @@ def on_status_change(device_id, timestamp_key, data):
         )
         
         if result:
+            acumulador.agregar(camera, timestamp, data['temp'])
+            detector.procesar(camera, timestamp, data['temp'], data.get('state'))
             logger.info(f"📊 Lectura sincronizada: {camera['nombre']} - {data['temp']}°C")
             
     except Exception as e:
@@ -201,7 +205,7 @@ def sync_temperature_readings_periodic():
         client = get_supabase_client(use_service_key=True)
         
         # Obtener datos de status de Firebase
-        status_ref = db.reference('status')
+        status_ref = get_database().reference('status')
         status_data = status_ref.get()
         
         if not status_data:
@@ -256,6 +260,8 @@ def sync_temperature_readings_periodic():
                                 
                                 if result:
                                     lecturas_procesadas += 1
+                                    acumulador.agregar(camera, timestamp, float(reading_data.get('temp', 0)))
+                                    detector.procesar(camera, timestamp, float(reading_data.get('temp', 0)), reading_data.get('state'))
                                     logger.info(f"📊 Lectura sincronizada: {camera['nombre']} - {reading_data.get('temp')}°C - {timestamp.strftime('%H:%M:%S')}")
                                 
                             except Exception as e:
@@ -274,7 +280,7 @@ def sync_events_periodic():
         client = get_supabase_client(use_service_key=True)
         
         # Obtener datos de eventos de Firebase
-        events_ref = db.reference('eventos')
+        events_ref = get_database().reference('eventos')
         events_data = events_ref.get()
         
         if not events_data:
@@ -437,7 +443,7 @@ def start_sync_service():
         logger.info("✅ Firebase inicializado correctamente")
         
         # Obtener dispositivos
-        devices_ref = db.reference('/status')
+        devices_ref = get_database().reference('/status')
         devices = devices_ref.get()
         
         if not devices:
@@ -475,6 +481,13 @@ def start_sync_service():
                 # Ejecutar sincronización periódica de lecturas de temperatura
                 sync_temperature_readings_periodic()
                 
+                # Guardar métricas de cumplimiento de las lecturas nuevas
+                acumulador.volcar()
+                
+                # Recalcular en segundo plano los análisis más consultados
+                # con los datos recién sincronizados
+                cache_analitica.refrescar_populares()
+                
                 # Sincronizar usuarios cada 10 minutos (20 ciclos)
                 user_sync_counter += 1
                 if user_sync_counter >= 20:  # 20 * 30 segundos = 10 minutos
@@ -512,7 +525,7 @@ def setup_realtime_listeners(devices):
             day = str(today.day).zfill(2)
             
             events_path = f'/eventos/{device_id}/{year}/{month}/{day}'
-            events_ref = db.reference(events_path)
+            events_ref = get_database().reference(events_path)
             
             def make_event_callback(dev_id):
                 def callback(event):
@@ -526,7 +539,7 @@ def setup_realtime_listeners(devices):
             
             # Listener para status en tiempo real
             status_path = f'/status/{device_id}/{year}/{month}/{day}'
-            status_ref = db.reference(status_path)
+            status_ref = get_database().reference(status_path)
             
             def make_status_callback(dev_id):
                 def callback(event):
@@ -0,0 +1,127 @@
+"""
+Tests del detector de anomalías en línea (apps/sync/anomalias.py)
+
+Corren sin red sobre el cliente en memoria de services/supabase_local.py:
+    python manage.py test apps.sync
+"""
+
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase
+
+from apps.sync.anomalias import (
+    ANOMALIAS_PARA_REBASE, LECTURAS_PARA_ABRIR, LECTURAS_PARA_CERRAR, MIN_LECTURAS, DetectorAnomalias
+)
+from services.supabase_local import ClienteLocal, usar_cliente_local
+
+INICIO = datetime(2025, 3, 1, 8, 0)
+CAMARA = {'id': 1, 'nombre': 'Cámara 1', 'umbral_min_c': -25.0, 'umbral_max_c': -10.0}
+
+
+class DetectorAnomaliasTests(SimpleTestCase):
+
+    def setUp(self):
+        self.client = ClienteLocal({'alertas_provisionales': []})
+        usar_cliente_local(self.client)
+        self.addCleanup(usar_cliente_local, None)
+        self.detector = DetectorAnomalias()
+        self.minuto = 0
+    
+    def procesar(self, temperaturas):
+        activas = []
+        for temp in temperaturas:
+            activas = self.detector.procesar(CAMARA, INICIO + timedelta(minutes=self.minuto), temp, state='NORMAL')
+            self.minuto += 1
+        return activas
+    
+    def estables(self, n=MIN_LECTURAS + 10):
+        # Alterna ±0.2 °C alrededor de -18 °C
+        return [-18.0 + (0.2 if i % 2 else -0.2) for i in range(n)]
+    
+    def alertas(self, tipo=None):
+        filas = self.client.table('alertas_provisionales').select('*').execute().data
+        return [a for a in filas if tipo is None or a['tipo'] == tipo]
+    
+    def test_cambio_de_nivel_sostenido_fija_nueva_linea_base(self):
+        self.procesar(self.estables())
+        
+        # Nuevo setpoint: -13 °C, dentro de rango
+        self.assertEqual(self.procesar([-13.0]), ['ANOMALIA'])
+        activas = self.procesar([-13.0] * (ANOMALIAS_PARA_REBASE - 1))
+        self.assertNotIn('ANOMALIA', activas)
+        
+        [alerta] = self.alertas('ANOMALIA')
+        self.assertEqual(alerta['estado'], 'CERRADA')
+        
+        # El nivel nuevo ya es la línea base
+        self.assertEqual(self.procesar([-13.2, -12.8] * 5), [])
+        self.assertEqual(len(self.alertas('ANOMALIA')), 1)
+    
+    def test_anomalias_intermitentes_no_mueven_la_linea_base(self):
+        self.procesar(self.estables())
+        
+        for _ in range(ANOMALIAS_PARA_REBASE):
+            self.assertIn('ANOMALIA', self.procesar([-13.0]))
+            self.procesar([-18.0])
+        
+        self.assertIn('ANOMALIA', self.procesar([-13.0]))
+        # Ninguna racha alcanzó para abrir la alerta
+        self.assertEqual(self.alertas('ANOMALIA'), [])
+    
+    def test_lectura_que_oscila_en_el_umbral_no_abre_y_cierra_alertas(self):
+        self.procesar(self.estables())
+        
+        # Alterna a uno y otro lado del umbral máximo (-10 °C)
+        for _ in range(10):
+            self.procesar([-9.8, -10.2])
+        self.assertEqual(self.alertas('EXCURSION'), [])
+        
+        # Una excursión sostenida sí abre, fechada desde su primera lectura
+        desde = INICIO + timedelta(minutes=self.minuto)
+        self.procesar([-9.5] * LECTURAS_PARA_ABRIR)
+        [alerta] = self.alertas('EXCURSION')
+        self.assertEqual((alerta['estado'], alerta['fecha_inicio']), ('ABIERTA', desde.isoformat()))
+        
+        # Volver a rango por menos de LECTURAS_PARA_CERRAR lecturas no la cierra
+        self.procesar([-10.5] * (LECTURAS_PARA_CERRAR - 1) + [-9.5])
+        self.assertEqual(self.alertas('EXCURSION')[0]['estado'], 'ABIERTA')
+        
+        hasta = INICIO + timedelta(minutes=self.minuto)
+        self.procesar([-10.5] * LECTURAS_PARA_CERRAR)
+        [alerta] = self.alertas('EXCURSION')
+        self.assertEqual((alerta['estado'], alerta['fecha_fin']), ('CERRADA', hasta.isoformat()))
+    
+    def test_cierra_alertas_abiertas_antes_de_reiniciar(self):
+        self.client.table('alertas_provisionales').insert([
+            {
+                'camara_id': 1, 'fecha_inicio': '2025-03-01T07:00:00', 'tipo': 'EXCURSION',
+                'temperatura_c': -5.0, 'valor': -5.0, 'estado': 'ABIERTA'
+            },
+            {
+                'camara_id': 1, 'fecha_inicio': '2025-03-01T07:00:00', 'tipo': 'ANOMALIA',
+                'temperatura_c': -5.0, 'valor': 9.5, 'estado': 'ABIERTA'
+            },
+        ]).execute()
+        
+        self.assertEqual(self.procesar([-18.0] * LECTURAS_PARA_CERRAR), [])
+        
+        estados = {a['tipo']: (a['estado'], a.get('fecha_fin')) for a in self.alertas()}
+        self.assertEqual(estados['EXCURSION'], ('CERRADA', INICIO.isoformat()))
+        # Sin línea base todavía no se puede evaluar: la ANOMALIA sigue abierta
+        self.assertEqual(estados['ANOMALIA'], ('ABIERTA', None))
+        
+        self.procesar(self.estables(MIN_LECTURAS))
+        [anomalia] = self.alertas('ANOMALIA')
+        self.assertEqual(anomalia['estado'], 'CERRADA')
+    
+    def test_alerta_recuperada_sigue_abierta_si_persiste(self):
+        self.client.table('alertas_provisionales').insert({
+            'camara_id': 1, 'fecha_inicio': '2025-03-01T07:00:00', 'tipo': 'EXCURSION',
+            'temperatura_c': -5.0, 'valor': -5.0, 'estado': 'ABIERTA'
+        }).execute()
+        
+        self.assertEqual(self.procesar([-6.0]), ['EXCURSION'])
+        
+        # No se abre una segunda alerta
+        [alerta] = self.alertas('EXCURSION')
+        self.assertEqual(alerta['estado'], 'ABIERTA')
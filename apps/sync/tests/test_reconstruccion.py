@@ -0,0 +1,144 @@
+"""
+Tests de la reconstrucción de eventos desde lecturas (apps/sync/reconstruccion.py)
+
+Corren sin red sobre el cliente en memoria de services/supabase_local.py:
+    python manage.py test apps.sync
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.sync.reconstruccion import (
+    ParametrosReconstruccion, detectar_intervalos, firebase_event_id, reconstruir_camara
+)
+from services.supabase_local import ClienteLocal
+
+INICIO = datetime(2025, 3, 1, 8, 0)
+PARAMETROS = ParametrosReconstruccion(umbral_entrada=0.0, umbral_salida=-2.0, max_hueco_min=15)
+
+
+def serie(temperaturas, paso_min=1, desde=0):
+    """Arreglos (ts, temps) con una lectura cada `paso_min` minutos"""
+    ts = np.arange(len(temperaturas), dtype=np.int64) * paso_min * 60 + desde
+    return ts, np.array(temperaturas, dtype=np.float64)
+
+
+def lecturas(temperaturas, camara_id=1):
+    return [
+        {
+            'id': i + 1, 'camara_id': camara_id, 'temperatura_c': t,
+            'timestamp': (INICIO + timedelta(minutes=i)).isoformat()
+        }
+        for i, t in enumerate(temperaturas)
+    ]
+
+
+class DetectarIntervalosTests(SimpleTestCase):
+
+    def test_sin_lecturas(self):
+        intervalos = detectar_intervalos(*serie([]), PARAMETROS)
+        self.assertEqual(intervalos['inicio'].size, 0)
+    
+    def test_histeresis_mantiene_el_estado_entre_umbrales(self):
+        # -1 °C está entre la salida (-2) y la entrada (0): no abre ni cierra
+        ts, temps = serie([-5, -1, 1, 3, -1, -1, -3, -1, -5])
+        intervalos = detectar_intervalos(ts, temps, PARAMETROS)
+        
+        self.assertEqual(list(intervalos['inicio']), [ts[2]])
+        # Termina con la primera lectura en el umbral de salida o menos
+        self.assertEqual(list(intervalos['fin']), [ts[6]])
+        self.assertEqual(list(intervalos['temp_max']), [3])
+        self.assertEqual(list(intervalos['abierto']), [False])
+    
+    def test_dos_intervalos_separados(self):
+        ts, temps = serie([1, 2, -3, -5, 4, 4, -4])
+        intervalos = detectar_intervalos(ts, temps, PARAMETROS)
+        
+        self.assertEqual(list(intervalos['inicio']), [ts[0], ts[4]])
+        self.assertEqual(list(intervalos['fin']), [ts[2], ts[6]])
+        self.assertEqual(list(intervalos['temp_max']), [2, 4])
+    
+    def test_hueco_corta_el_intervalo(self):
+        # Dos tramos de lecturas separados por 30 minutos sin datos
+        ts1, t1 = serie([1, 2, 3])
+        ts2, t2 = serie([2, -5], desde=int(ts1[-1]) + 30 * 60)
+        intervalos = detectar_intervalos(np.r_[ts1, ts2], np.r_[t1, t2], PARAMETROS)
+        
+        self.assertEqual(list(intervalos['inicio']), [ts1[0], ts2[0]])
+        # Sin lectura normal antes del hueco, el primero termina en su última lectura
+        self.assertEqual(list(intervalos['fin']), [ts1[-1], ts2[1]])
+        self.assertEqual(list(intervalos['abierto']), [False, False])
+    
+    def test_hueco_reinicia_la_zona_intermedia(self):
+        # Tras el hueco, -1 °C no hereda el estado alto anterior
+        ts1, t1 = serie([1, 1])
+        ts2, t2 = serie([-1, -1], desde=int(ts1[-1]) + 30 * 60)
+        intervalos = detectar_intervalos(np.r_[ts1, ts2], np.r_[t1, t2], PARAMETROS)
+        
+        self.assertEqual(list(intervalos['inicio']), [ts1[0]])
+        self.assertEqual(list(intervalos['fin']), [ts1[-1]])
+    
+    def test_intervalo_abierto_al_final(self):
+        ts, temps = serie([-5, 1, 6, -1])
+        intervalos = detectar_intervalos(ts, temps, PARAMETROS)
+        
+        self.assertEqual(list(intervalos['inicio']), [ts[1]])
+        self.assertEqual(list(intervalos['fin']), [ts[3]])
+        self.assertEqual(list(intervalos['temp_max']), [6])
+        self.assertEqual(list(intervalos['abierto']), [True])
+
+
+class ReconstruirCamaraTests(SimpleTestCase):
+
+    def setUp(self):
+        # Normal 10 min, falla a 8 °C desde las 08:10
+        self.temperaturas = [-5] * 10 + [8] * 20
+        self.client = ClienteLocal({
+            'camaras_frio': [{'id': 1, 'nombre': 'Cámara 1', 'sucursal_id': 1}],
+            'lecturas_temperatura': lecturas(self.temperaturas),
+            'eventos_temperatura': [],
+        })
+        self.evento_id = firebase_event_id(1, int((INICIO + timedelta(minutes=10) - datetime(1970, 1, 1)).total_seconds()))
+    
+    def reconstruir(self):
+        return reconstruir_camara(1, '2025-03-01T00:00:00', '2025-03-01T23:59:59', PARAMETROS, client=self.client)
+    
+    def eventos(self):
+        return self.client.table('eventos_temperatura').select('*').execute().data
+    
+    def test_falla_en_curso_se_cierra_en_una_corrida_posterior(self):
+        resultado = self.reconstruir()
+        self.assertEqual(resultado['insertados'], 1)
+        [evento] = self.eventos()
+        self.assertEqual(evento['firebase_event_id'], self.evento_id)
+        self.assertEqual((evento['tipo'], evento['estado'], evento['fecha_fin']), ('FALLA_EN_CURSO', 'EN_CURSO', None))
+        
+        # Llegan las lecturas que cierran el intervalo
+        for lectura in lecturas(self.temperaturas + [-5] * 5)[len(self.temperaturas):]:
+            self.client.table('lecturas_temperatura').insert(lectura).execute()
+        
+        resultado = self.reconstruir()
+        self.assertEqual((resultado['insertados'], resultado['actualizados']), (0, 1))
+        [evento] = self.eventos()
+        self.assertEqual((evento['tipo'], evento['estado']), ('FALLA', 'RESUELTO'))
+        self.assertEqual(evento['fecha_fin'], '2025-03-01T08:30:00')
+        self.assertEqual(evento['duracion_minutos'], 20)
+    
+    def test_corrida_repetida_sin_cambios_no_escribe(self):
+        self.reconstruir()
+        resultado = self.reconstruir()
+        
+        self.assertEqual((resultado['insertados'], resultado['actualizados'], resultado['omitidos']), (0, 0, 1))
+        self.assertEqual(len(self.eventos()), 1)
+    
+    def test_omite_eventos_superpuestos_de_firebase(self):
+        self.client.table('eventos_temperatura').insert({
+            'camara_id': 1, 'firebase_event_id': 'fb_1', 'tipo': 'FALLA', 'estado': 'EN_CURSO',
+            'fecha_inicio': '2025-03-01T08:11:00', 'fecha_fin': None, 'duracion_minutos': 5
+        }).execute()
+        
+        resultado = self.reconstruir()
+        
+        self.assertEqual((resultado['insertados'], resultado['omitidos']), (0, 1))
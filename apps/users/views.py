@@ -7,8 +7,7 @@ from rest_framework.decorators import api_view
 from .serializers import UsuarioSerializer
 from apps.auth.permissions import IsAdmin
 from services.supabase_service import get_supabase_client
-from firebase_admin import auth as firebase_auth
-from services.firebase_service import initialize_firebase
+from services.firebase_service import firebase_auth, initialize_firebase
 import logging
 
 logger = logging.getLogger(__name__)
@@ -0,0 +1,95 @@
+"""
+Entorno local para benchmarks
+
+Reemplaza los servicios externos por equivalentes en memoria mientras dura
+el bloque `with entorno_local(...)`:
+- Supabase: services.supabase_local.ClienteLocal (cliente y llamadas REST crudas)
+- Firebase Realtime Database: services.firebase_local.BaseDatosLocal
+- Firebase Auth: lista fija de usuarios
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from unittest import mock
+
+from services.firebase_local import BaseDatosLocal, usar_firebase_local
+from services.supabase_local import ClienteLocal, responder_rest, usar_cliente_local
+
+
+class UsuarioFirebase:
+    def __init__(self, uid: str, email: str, display_name: Optional[str], disabled: bool = False):
+        self.uid = uid
+        self.email = email
+        self.display_name = display_name
+        self.disabled = disabled
+
+
+class PaginaUsuarios:
+    """Equivalente a firebase_admin.auth.ListUsersPage (una sola página)"""
+    
+    def __init__(self, usuarios: List[UsuarioFirebase]):
+        self.users = usuarios
+    
+    def get_next_page(self):
+        return None
+
+
+def usuarios_firebase(usuarios_supabase: List[Dict], nuevos: int = 20) -> List[UsuarioFirebase]:
+    """
+    Usuarios de Firebase Auth para la sincronización: los de Supabase (la
+    mitad con el nombre cambiado, para forzar actualizaciones) más `nuevos`.
+    """
+    usuarios = [
+        UsuarioFirebase(u['firebase_uid'], u['email'], u['nombre'] + (' (editado)' if i % 2 else ''))
+        for i, u in enumerate(usuarios_supabase)
+    ]
+    usuarios += [
+        UsuarioFirebase(f'uid_nuevo_{i}', f'nuevo{i}@coldtrack.test', None)
+        for i in range(nuevos)
+    ]
+    return usuarios
+
+
+class ContadorRest:
+    """Cuenta las llamadas REST crudas atendidas por el cliente local"""
+    
+    def __init__(self, cliente: ClienteLocal):
+        self.cliente = cliente
+        self.llamadas = 0
+    
+    def metodo(self, nombre: str):
+        def llamada(url, headers=None, json=None, params=None, **kwargs):
+            self.llamadas += 1
+            return responder_rest(self.cliente, nombre, url, headers=headers, json_body=json, params=params)
+        return llamada
+
+
+@contextmanager
+def entorno_local(cliente: ClienteLocal, firebase: Optional[BaseDatosLocal] = None,
+                  usuarios: Optional[List[UsuarioFirebase]] = None):
+    """
+    Activa el cliente local, el emulador de Firebase y los usuarios de Auth.
+    
+    Yields:
+        ContadorRest con la cantidad de llamadas REST crudas
+    """
+    contador = ContadorRest(cliente)
+    parches = [
+        mock.patch('firebase_admin.get_app', return_value=mock.Mock()),
+        mock.patch('firebase_admin.auth.list_users', return_value=PaginaUsuarios(usuarios or [])),
+    ] + [
+        mock.patch(f'requests.{metodo}', contador.metodo(metodo))
+        for metodo in ('get', 'head', 'post', 'patch', 'delete')
+    ]
+    
+    usar_cliente_local(cliente)
+    usar_firebase_local(firebase or BaseDatosLocal())
+    for parche in parches:
+        parche.start()
+    try:
+        yield contador
+    finally:
+        for parche in reversed(parches):
+            parche.stop()
+        usar_cliente_local(None)
+        usar_firebase_local(None)
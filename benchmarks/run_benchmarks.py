@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de ColdTrack
+
+Mide las rutas críticas del dashboard y de la sincronización sobre un
+dataset sintético (services/synthetic_data.py) y servicios en memoria
+(benchmarks/entorno.py), sin red ni credenciales:
+
+- kpis                 GET /api/dashboard/kpis/
+- analisis_ejecutivo   GET /api/dashboard/analisis-ejecutivo/ (30 días, sin caché)
+- resumen_semanal      GET /api/dashboard/resumen-semanal/
+- buscar_eventos       GET /api/eventos/ (30 días, REST crudo)
+- sync_inicial         Ciclo de sincronización con el último día sin cargar
+- sync_estable         Ciclo de sincronización sin datos nuevos
+- sync_usuarios        Sincronización Firebase Auth → Supabase
+- listeners            Listeners en tiempo real con el último día publicado minuto a minuto
+
+Firebase es el emulador de services/firebase_local.py; --latencia-firebase
+simula la latencia de red de cada operación.
+
+Por benchmark reporta latencia p50/p95, consultas a Supabase (query builder +
+REST crudo) y memoria máxima (tracemalloc, en una corrida aparte para no
+alterar los tiempos). Los resultados se comparan con benchmarks/baselines/.
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --camaras 20 --dias 60 --repeticiones 10
+    python benchmarks/run_benchmarks.py --solo kpis analisis_ejecutivo
+    python benchmarks/run_benchmarks.py --guardar-baseline
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coldtrack.settings')
+
+import django  # noqa: E402
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from benchmarks.entorno import entorno_local, usuarios_firebase  # noqa: E402
+from services.cache_analitica import cache_analitica  # noqa: E402
+from services.firebase_local import BaseDatosLocal, firebase_local_activo  # noqa: E402
+from services.supabase_local import ClienteLocal  # noqa: E402
+from services.synthetic_data import generar_dataset  # noqa: E402
+
+DIR_BASELINES = RAIZ / 'benchmarks' / 'baselines'
+ADMIN = {'uid': 'uid_admin', 'id': 1, 'email': 'admin@coldtrack.test', 'nombre': 'Admin', 'rol': 'ADMIN', 'sucursal_id': None}
+
+
+def _vista(vista, ruta: str, **params):
+    """Benchmark de una vista: GET como ADMIN, incluyendo el render de la respuesta"""
+    fabrica = RequestFactory()
+    
+    def llamada():
+        request = fabrica.get(ruta, params)
+        request.firebase_user = ADMIN
+        response = vista(request)
+        if hasattr(response, 'render'):
+            response.render()
+        cuerpo = json.loads(response.content or b'{}')
+        if response.status_code != 200 or (isinstance(cuerpo, dict) and cuerpo.get('error')):
+            raise RuntimeError(f"{ruta} respondió {response.status_code}: {cuerpo.get('error') if isinstance(cuerpo, dict) else ''}")
+    return llamada
+
+
+def _ciclo_sync():
+    from apps.lecturas.cumplimiento import acumulador
+    from apps.sync.anomalias import detector
+    from apps.sync.sync_service import sync_events_periodic, sync_temperature_readings_periodic
+    
+    # Estado en memoria limpio: cada repetición parte igual
+    acumulador.__init__()
+    detector.__init__()
+    sync_events_periodic()
+    sync_temperature_readings_periodic()
+    acumulador.volcar()
+
+
+def _sync_usuarios():
+    from apps.sync.sync_service import sync_users_periodic
+    sync_users_periodic()
+
+
+def _listeners(publicaciones):
+    """
+    Throughput de los listeners en tiempo real: cada dispositivo publica sus
+    lecturas minuto a minuto en el emulador y se espera a que los callbacks
+    las escriban en Supabase.
+    """
+    def llamada():
+        from apps.lecturas.cumplimiento import acumulador
+        from apps.sync import sync_service
+        from apps.sync.anomalias import detector
+        
+        bd = firebase_local_activo()
+        acumulador.__init__()
+        detector.__init__()
+        sync_service.processed_events.clear()
+        sync_service.setup_realtime_listeners(bd.reference('/status').get(shallow=True))
+        for ruta, datos in publicaciones:
+            bd.reference(ruta).update(datos)
+        bd.esperar_listeners()
+        bd.cerrar_listeners()
+        acumulador.volcar()
+    return llamada
+
+
+def definir_benchmarks(dataset):
+    """
+    Returns:
+        {nombre: (llamada, tablas, arbol)}: tablas es el estado inicial de
+        Supabase para cada repetición (None = compartido, la llamada no escribe)
+        y arbol el de Firebase (None = el del dataset, solo lectura)
+    """
+    from apps.dashboard import views as dashboard
+    from coldtrack.urls import buscar_eventos_historicos
+    
+    dias_firebase = {ruta for ruta in _dias_firebase(dataset)}
+    sin_ultimo_dia = dict(dataset.tablas)
+    sin_ultimo_dia['lecturas_temperatura'] = [
+        l for l in dataset.tablas['lecturas_temperatura'] if l['timestamp'][:10] not in dias_firebase
+    ]
+    sin_ultimo_dia['eventos_temperatura'] = [
+        e for e in dataset.tablas['eventos_temperatura'] if e['fecha_inicio'][:10] not in dias_firebase
+    ]
+    arbol_vacio, publicaciones = _publicaciones(dataset)
+    
+    return {
+        'kpis': (_vista(dashboard.get_kpis, '/api/dashboard/kpis/'), None, None),
+        'analisis_ejecutivo': (_vista(dashboard.get_analisis_ejecutivo, '/api/dashboard/analisis-ejecutivo/'), None, None),
+        'resumen_semanal': (_vista(dashboard.get_resumen_semanal, '/api/dashboard/resumen-semanal/'), None, None),
+        'buscar_eventos': (_vista(buscar_eventos_historicos, '/api/eventos/'), None, None),
+        'sync_inicial': (_ciclo_sync, sin_ultimo_dia, None),
+        'sync_estable': (_ciclo_sync, dataset.tablas, None),
+        'sync_usuarios': (_sync_usuarios, dataset.tablas, None),
+        'listeners': (_listeners(publicaciones), sin_ultimo_dia, arbol_vacio),
+    }
+
+
+def _dias_firebase(dataset):
+    for dispositivo in dataset.firebase['status'].values():
+        for y, meses in dispositivo.items():
+            if y == 'live':
+                continue
+            for m, dias in meses.items():
+                for d in dias:
+                    yield f'{y}-{m}-{d}'
+
+
+def _publicaciones(dataset):
+    """
+    Árbol de Firebase sin los días publicados (solo el nodo live de cada
+    dispositivo) y las escrituras que los reconstruyen: una lectura por
+    dispositivo y minuto, y cada evento al terminar.
+    """
+    arbol = {'status': {}, 'eventos': {}}
+    lecturas = []
+    for dispositivo, nodo in dataset.firebase['status'].items():
+        arbol['status'][dispositivo] = {'live': nodo['live']}
+        for y, meses in nodo.items():
+            if y == 'live':
+                continue
+            for m, dias in meses.items():
+                for d, dia in dias.items():
+                    ruta = f'/status/{dispositivo}/{y}/{m}/{d}'
+                    lecturas += [(int(ts), ruta, {ts: lectura}) for ts, lectura in dia.items()]
+    for dispositivo, nodo in dataset.firebase['eventos'].items():
+        for y, meses in nodo.items():
+            for m, dias in meses.items():
+                for d, dia in dias.items():
+                    ruta = f'/eventos/{dispositivo}/{y}/{m}/{d}'
+                    lecturas += [(evento['end_ts'], ruta, {evento_id: evento}) for evento_id, evento in dia.items()]
+    lecturas.sort(key=lambda publicacion: publicacion[0])
+    return arbol, [(ruta, datos) for _, ruta, datos in lecturas]
+
+
+def medir(llamada, tablas, arbol, dataset, repeticiones: int, compartido: ClienteLocal,
+          latencia_firebase: float = 0):
+    """Corre un benchmark: 1 calentamiento + N repeticiones cronometradas + 1 con tracemalloc"""
+    usuarios = usuarios_firebase(dataset.tablas['usuarios'])
+    tiempos = []
+    consultas = 0
+    
+    def una_corrida(medir_memoria=False):
+        # Sin resultados de la corrida anterior: se mide el cálculo, no el caché
+        # del análisis ejecutivo (services/cache_analitica.py)
+        cache_analitica.invalidar()
+        cliente = compartido if tablas is None else ClienteLocal(tablas)
+        # Los árboles que se escriben se copian para que cada repetición parta igual
+        firebase = BaseDatosLocal(
+            dataset.firebase if arbol is None else json.loads(json.dumps(arbol)),
+            latencia_ms=latencia_firebase
+        )
+        with entorno_local(cliente, firebase, usuarios):
+            antes = cliente.consultas
+            try:
+                # Sin pausas del GC a mitad de la medición (como timeit): con cientos
+                # de miles de filas en memoria dominan la varianza
+                gc.collect()
+                gc.disable()
+                if medir_memoria:
+                    tracemalloc.start()
+                inicio = time.perf_counter()
+                llamada()
+                duracion = (time.perf_counter() - inicio) * 1000
+                pico = tracemalloc.get_traced_memory()[1] if medir_memoria else None
+                return duracion, cliente.consultas - antes, pico
+            finally:
+                gc.enable()
+                if medir_memoria:
+                    tracemalloc.stop()
+                firebase.cerrar_listeners()
+    
+    una_corrida()
+    for _ in range(repeticiones):
+        duracion, consultas, _ = una_corrida()
+        tiempos.append(duracion)
+    _, _, pico = una_corrida(medir_memoria=True)
+    
+    return {
+        'p50_ms': round(float(np.percentile(tiempos, 50)), 2),
+        'p95_ms': round(float(np.percentile(tiempos, 95)), 2),
+        'consultas': consultas,
+        'memoria_max_mb': round(pico / 1024 / 1024, 2),
+    }
+
+
+def comparar(resultados, baseline, umbral: float):
+    """Imprime la tabla de resultados con la diferencia contra el baseline; retorna las regresiones"""
+    regresiones = []
+    print(f"\n{'benchmark':<20} {'p50 ms':>10} {'p95 ms':>10} {'consultas':>10} {'mem MB':>8}   vs baseline")
+    print('-' * 90)
+    for nombre, r in resultados.items():
+        b = (baseline or {}).get(nombre)
+        diferencia = ''
+        if b:
+            cambio = (r['p50_ms'] - b['p50_ms']) / b['p50_ms'] if b['p50_ms'] else 0
+            diferencia = f"p50 {cambio:+.0%}  consultas {r['consultas'] - b['consultas']:+d}  mem {r['memoria_max_mb'] - b['memoria_max_mb']:+.1f}MB"
+            if cambio > umbral or r['consultas'] > b['consultas']:
+                regresiones.append(nombre)
+                diferencia += '  ⚠️'
+        print(f"{nombre:<20} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['consultas']:>10d} {r['memoria_max_mb']:>8.1f}   {diferencia}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de dashboard y sincronización')
+    parser.add_argument('--camaras', type=int, default=5)
+    parser.add_argument('--sucursales', type=int, default=2)
+    parser.add_argument('--dias', type=int, default=31)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--latencia-firebase', type=float, default=0,
+                        help='Latencia inyectada por operación de Firebase (ms)')
+    parser.add_argument('--solo', nargs='*', help='Benchmarks a correr (por defecto todos)')
+    parser.add_argument('--baseline', default='default', help='Nombre del baseline (benchmarks/baselines/<nombre>.json)')
+    parser.add_argument('--guardar-baseline', action='store_true', help='Guardar los resultados como baseline')
+    parser.add_argument('--umbral', type=float, default=0.2, help='Aumento de p50 considerado regresión (0.2 = 20%%)')
+    parser.add_argument('--estricto', action='store_true', help='Salir con código 1 si hay regresiones')
+    args = parser.parse_args()
+    
+    # Los logs de cada lectura sincronizada ensucian la salida y cuestan tiempo
+    logging.disable(logging.WARNING)
+    
+    inicio = time.perf_counter()
+    dataset = generar_dataset(camaras=args.camaras, sucursales=args.sucursales, dias=args.dias, seed=args.seed)
+    compartido = ClienteLocal(dataset.tablas)
+    print(f"📦 Dataset: {dataset.resumen()} ({time.perf_counter() - inicio:.1f}s)")
+    
+    benchmarks = definir_benchmarks(dataset)
+    seleccion = args.solo or list(benchmarks)
+    resultados = {}
+    for nombre in seleccion:
+        llamada, tablas, arbol = benchmarks[nombre]
+        print(f"⏱️  {nombre}...", flush=True)
+        resultados[nombre] = medir(
+            llamada, tablas, arbol, dataset, args.repeticiones, compartido, args.latencia_firebase
+        )
+    
+    archivo = DIR_BASELINES / f'{args.baseline}.json'
+    baseline = None
+    if archivo.exists():
+        guardado = json.loads(archivo.read_text())
+        if guardado.get('parametros') == _parametros(args):
+            baseline = guardado['resultados']
+        else:
+            print(f"ℹ️  {archivo.name} se generó con otros parámetros: no se compara")
+    
+    regresiones = comparar(resultados, baseline, args.umbral)
+    
+    if args.guardar_baseline:
+        DIR_BASELINES.mkdir(parents=True, exist_ok=True)
+        archivo.write_text(json.dumps({
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'parametros': _parametros(args),
+            'resultados': {**(baseline or {}), **resultados}
+        }, indent=2, ensure_ascii=False) + '\n')
+        print(f"\n💾 Baseline guardado en {archivo.relative_to(RAIZ)}")
+    
+    if regresiones:
+        print(f"\n⚠️  Regresiones: {', '.join(regresiones)}")
+        if args.estricto:
+            sys.exit(1)
+
+
+def _parametros(args):
+    return {
+        'camaras': args.camaras, 'sucursales': args.sucursales, 'dias': args.dias, 'seed': args.seed,
+        'latencia_firebase': args.latencia_firebase
+    }
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compresión de respuestas
+
+CompresionMiddleware extiende GZipMiddleware de Django:
+- Solo comprime respuestas de al menos COMPRESION_MIN_BYTES; en las chicas
+  el ahorro no compensa el CPU
+- Usa brotli (Content-Encoding: br) si el cliente lo acepta y el paquete
+  brotli está instalado; si no, gzip
+- Las respuestas en streaming (exportaciones) se comprimen con gzip por
+  bloques, como en GZipMiddleware
+- No toca las que ya vienen comprimidas: exportaciones con `?gzip=1`
+  (application/gzip, ver services/export_service.py) u otros adjuntos
+  .gz/.zip/.br
+
+Se registra segundo en MIDDLEWARE, después de ServerTimingMiddleware, para
+comprimir la respuesta final de los demás middlewares.
+"""
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+# Calidad 5: cerca de la compresión de gzip -9 a una fracción del tiempo
+# (la calidad por defecto, 11, es para contenido estático)
+CALIDAD_BROTLI = 5
+
+re_acepta_brotli = re.compile(r'\bbr\b')
+
+# Contenido que ya viene comprimido: comprimirlo de nuevo solo gasta CPU
+TIPOS_COMPRIMIDOS = {'application/gzip', 'application/x-gzip', 'application/zip', 'application/x-brotli'}
+re_adjunto_comprimido = re.compile(r'\.(gz|zip|br)"?\s*$', re.IGNORECASE)
+
+
+def ya_comprimida(response) -> bool:
+    tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return tipo in TIPOS_COMPRIMIDOS or \
+        bool(re_adjunto_comprimido.search(response.get('Content-Disposition', '')))
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """Comprime con brotli o gzip las respuestas sobre COMPRESION_MIN_BYTES"""
+    
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESION_MIN_BYTES:
+            return response
+        
+        if ya_comprimida(response):
+            return response
+        
+        if brotli is None or response.streaming or response.has_header('Content-Encoding') or \
+                not re_acepta_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return super().process_response(request, response)
+        
+        patch_vary_headers(response, ('Accept-Encoding',))
+        
+        # Solo si realmente es más corto
+        comprimido = brotli.compress(response.content, quality=CALIDAD_BROTLI)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(comprimido))
+        
+        # ETag débil, igual que GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        
+        return response
@@ -0,0 +1,97 @@
+"""
+Serialización JSON rápida
+
+Las respuestas grandes (análisis ejecutivo, historial de eventos, perfiles)
+pasaban por el encoder json de la stdlib. Con orjson instalado se serializan
+en C y directo a bytes:
+
+- OrjsonRenderer: reemplazo de rest_framework.renderers.JSONRenderer
+  (DEFAULT_RENDERER_CLASSES en settings.py)
+- JsonResponse: reemplazo de django.http.JsonResponse para las vistas sin
+  DRF (coldtrack/urls.py, KPIs del dashboard)
+
+orjson serializa de forma nativa datetime, date, UUID, arreglos y escalares
+de NumPy, y dicts con claves no str. Lo que no conoce (Decimal, textos
+lazy, QuerySet) pasa por el `default` del encoder de siempre, así la salida
+es la misma que antes: Decimal como número en DRF y como texto en
+JsonResponse. JsonResponse además deja las fechas al DjangoJSONEncoder
+(milisegundos, no microsegundos). Los NaN salen como null en vez de fallar.
+
+Sin orjson, con JSON_RAPIDO=False o si orjson no puede serializar algo
+(p. ej. enteros de más de 64 bits) se usa el encoder estándar.
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse as DjangoJsonResponse
+from rest_framework.renderers import JSONRenderer
+import logging
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def usa_orjson() -> bool:
+    return orjson is not None and getattr(settings, 'JSON_RAPIDO', True)
+
+
+def dumps(data, default, opciones: int = 0) -> bytes:
+    """
+    Serializa con orjson; `default` recibe los objetos que orjson no conoce.
+    
+    Raises:
+        orjson.JSONEncodeError: Si algún valor no se puede serializar
+    """
+    contenido = orjson.dumps(
+        data, default=default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | opciones
+    )
+    # Igual que DRF: \u2028 y \u2029 escapados para que sea JavaScript válido
+    if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+        contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return contenido
+
+
+class OrjsonRenderer(JSONRenderer):
+    """JSONRenderer de DRF serializado con orjson"""
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Sin orjson, o con indentación pedida ('application/json; indent=4'): encoder estándar
+        if data is None or not usa_orjson() or \
+                self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        try:
+            return dumps(data, self.encoder_class().default, orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError as e:
+            logger.warning(f"orjson no pudo serializar la respuesta, usando json: {str(e)}")
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class JsonResponse(DjangoJsonResponse):
+    """django.http.JsonResponse serializado con orjson (mismos argumentos)"""
+    
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if json_dumps_params or not usa_orjson():
+            super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        
+        try:
+            contenido = dumps(data, encoder().default, orjson.OPT_PASSTHROUGH_DATETIME)
+        except orjson.JSONEncodeError as e:
+            logger.warning(f"orjson no pudo serializar la respuesta, usando json: {str(e)}")
+            super().__init__(data, encoder, safe, json_dumps_params, **kwargs)
+            return
+        
+        kwargs.setdefault('content_type', 'application/json')
+        HttpResponse.__init__(self, content=contenido, **kwargs)
@@ -11,6 +11,7 @@ from pathlib import Path
 from decouple import config
 import json
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -56,9 +57,12 @@ INSTALLED_APPS = [
     'apps.eventos',
     'apps.dashboard',
     'apps.sync',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.ServerTimingMiddleware',  # Primero: mide el request completo
+    'coldtrack.middleware.CompresionMiddleware',  # Comprime la respuesta final (brotli/gzip)
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -69,6 +73,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.auth.middleware.FirebaseAuthMiddleware',  # Habilitado para autenticación
+    'apps.monitoring.middleware.ProfilerMiddleware',  # Después de auth: el header requiere ADMIN
 ]
 
 ROOT_URLCONF = 'coldtrack.urls'
@@ -98,9 +103,18 @@ WSGI_APPLICATION = 'coldtrack.wsgi.application'
 DATABASE_URL = config('DATABASE_URL', default=None)
 
 if DATABASE_URL:
-    # Usar PostgreSQL en producción (Render)
+    # Usar PostgreSQL en producción (Render). Conexiones persistentes: cada
+    # worker/hilo reutiliza su conexión por DB_CONN_MAX_AGE segundos en vez de
+    # abrir una por request (verificada antes de reutilizarla).
+    # Con el pooler de Supabase en modo transacción (puerto 6543) los cursores
+    # del servidor no sobreviven entre transacciones y se desactivan.
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=config('DB_CONN_MAX_AGE', default=600, cast=int),
+            conn_health_checks=True,
+            disable_server_side_cursors=':6543' in DATABASE_URL
+        )
     }
 else:
     # Usar SQLite en desarrollo local
@@ -111,6 +125,81 @@ else:
     }
 }
 
+# Indica si las tablas de ColdTrack (lecturas, eventos, etc.) son accesibles
+# directamente por DATABASE_URL (Postgres de Supabase). Se activa
+# explícitamente: DATABASE_URL puede ser otra base. Si es False, las
+# consultas pesadas usan PostgREST.
+SUPABASE_DIRECT_DB = config('SUPABASE_DIRECT_DB', default=False, cast=bool)
+
+# Backend de datos: 'supabase' (proyecto real) o 'local' (en memoria, sin red;
+# ver services/supabase_local.py). SUPABASE_LOCAL_DB persiste el backend local
+# en un archivo SQLite ('' = solo memoria).
+SUPABASE_BACKEND = config('SUPABASE_BACKEND', default='supabase')
+SUPABASE_LOCAL_DB = config('SUPABASE_LOCAL_DB', default='')
+SUPABASE_LOCAL_PUERTO = config('SUPABASE_LOCAL_PUERTO', default=0, cast=int)
+
+# Retención de lecturas (ver apps/lecturas/retencion.py): días de lecturas
+# crudas en lecturas_temperatura; los meses anteriores se resumen y se
+# archivan en ARCHIVO_LECTURAS_BUCKET (Supabase Storage) o, si está vacío,
+# en el directorio ARCHIVO_LECTURAS_DIR
+RETENCION_LECTURAS_DIAS = config('RETENCION_LECTURAS_DIAS', default=90, cast=int)
+ARCHIVO_LECTURAS_BUCKET = config('ARCHIVO_LECTURAS_BUCKET', default='')
+ARCHIVO_LECTURAS_DIR = config('ARCHIVO_LECTURAS_DIR', default=str(BASE_DIR / 'archivo_lecturas'))
+
+# Máximo de lecturas de una respuesta ?format=columnar (sin paginación)
+LECTURAS_COLUMNAR_MAX_FILAS = config('LECTURAS_COLUMNAR_MAX_FILAS', default=200_000, cast=int)
+
+# Segundos que se reutiliza el mapa sucursal → cámaras (ver apps/camaras/alcance.py)
+ALCANCE_CAMARAS_TTL = config('ALCANCE_CAMARAS_TTL', default=300, cast=int)
+
+# Arranque de workers (ver services/arranque.py y gunicorn.conf.py): calentar
+# los clientes de Firebase y Supabase en segundo plano tras iniciar cada
+# worker, y segundos de espera antes de iniciar la sincronización automática
+ARRANQUE_CALENTAR = config('ARRANQUE_CALENTAR', default=True, cast=bool)
+SYNC_INICIO_DIFERIDO_S = config('SYNC_INICIO_DIFERIDO_S', default=10, cast=float)
+
+# Consultas concurrentes de las vistas del dashboard (ver services/paralelo.py):
+# hilos del pool del proceso, tareas en curso por request y timeout (segundos)
+PARALELO_MAX_HILOS = config('PARALELO_MAX_HILOS', default=16, cast=int)
+PARALELO_MAX_POR_REQUEST = config('PARALELO_MAX_POR_REQUEST', default=4, cast=int)
+PARALELO_TIMEOUT_S = config('PARALELO_TIMEOUT_S', default=20, cast=float)
+
+# Segundos que un request espera el cálculo idéntico en curso de otro antes
+# de calcular por su cuenta (ver services/vuelo_unico.py)
+VUELO_UNICO_TIMEOUT_S = config('VUELO_UNICO_TIMEOUT_S', default=30, cast=float)
+
+# Caché stale-while-revalidate del análisis ejecutivo (ver services/cache_analitica.py):
+# segundos fresco, segundos extra en que se sirve obsoleto mientras se recalcula,
+# entradas por proceso, y claves populares que se recalculan tras cada ciclo de
+# sincronización si tienen más de CACHE_ANALITICA_REFRESCO_S segundos
+CACHE_ANALITICA_ACTIVA = config('CACHE_ANALITICA_ACTIVA', default=True, cast=bool)
+CACHE_ANALITICA_TTL = config('CACHE_ANALITICA_TTL', default=300, cast=int)
+CACHE_ANALITICA_GRACIA_S = config('CACHE_ANALITICA_GRACIA_S', default=3600, cast=int)
+CACHE_ANALITICA_MAX_ENTRADAS = config('CACHE_ANALITICA_MAX_ENTRADAS', default=200, cast=int)
+CACHE_ANALITICA_POPULARES = config('CACHE_ANALITICA_POPULARES', default=10, cast=int)
+CACHE_ANALITICA_REFRESCO_S = config('CACHE_ANALITICA_REFRESCO_S', default=120, cast=int)
+
+# Snapshots del respaldo mensual de Firebase (ver services/backup_service.py)
+RESPALDOS_DIR = config('RESPALDOS_DIR', default=str(BASE_DIR / 'respaldos'))
+
+# Segundos que se reutiliza un cliente de Supabase antes de recrearlo
+# (ver services/supabase_registro.py)
+SUPABASE_CLIENTE_MAX_EDAD_S = config('SUPABASE_CLIENTE_MAX_EDAD_S', default=1800, cast=int)
+
+# Serializar JSON con orjson si está instalado (ver coldtrack/renderers.py)
+JSON_RAPIDO = config('JSON_RAPIDO', default=True, cast=bool)
+
+# Tamaño mínimo (bytes) de una respuesta para comprimirla (ver coldtrack/middleware.py)
+COMPRESION_MIN_BYTES = config('COMPRESION_MIN_BYTES', default=1024, cast=int)
+
+# Medir cada consulta a Supabase (ver services/supabase_instrumentation.py)
+SUPABASE_INSTRUMENTACION = config('SUPABASE_INSTRUMENTACION', default=True, cast=bool)
+
+# Profiler de requests (ver apps/monitoring/profiler.py)
+PROFILER_SAMPLE_RATE = config('PROFILER_SAMPLE_RATE', default=0.0, cast=float)
+PROFILER_INTERVALO_MS = config('PROFILER_INTERVALO_MS', default=5, cast=float)
+PROFILER_MAX_PERFILES = config('PROFILER_MAX_PERFILES', default=20, cast=int)
+
 # Si se proporciona DATABASE_URL, usarla (para Supabase)
 # DATABASE_URL = config('DATABASE_URL', default=None)
 # if DATABASE_URL:
@@ -156,7 +245,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'coldtrack.renderers.OrjsonRenderer',  # JSONRenderer con orjson (ver renderers.py)
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -173,16 +262,15 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Additional CORS settings for better compatibility
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Allow all origins in development
-CORS_ALLOWED_HEADERS = [
-    'accept',
-    'accept-encoding',
-    'authorization',
-    'content-type',
-    'dnt',
-    'origin',
-    'user-agent',
-    'x-csrftoken',
-    'x-requested-with',
+
+# Headers de request aceptados por corsheaders (los por defecto + X-Profile del profiler)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile')
+
+# Headers de respuesta visibles para el frontend
+CORS_EXPOSE_HEADERS = [
+    'server-timing',
+    'x-profile-id',
+    'x-cache',
 ]
 
 CORS_ALLOW_METHODS = [
@@ -212,6 +300,12 @@ FIREBASE_CONFIG = {
     'database_url': FIREBASE_DATABASE_URL,
 }
 
+# Realtime Database: 'firebase' (proyecto real) o 'local' (emulador en memoria,
+# ver services/firebase_local.py), cargado desde un export JSON de RTDB
+FIREBASE_BACKEND = config('FIREBASE_BACKEND', default='firebase')
+FIREBASE_LOCAL_ARCHIVO = config('FIREBASE_LOCAL_ARCHIVO', default='')
+FIREBASE_LOCAL_LATENCIA_MS = config('FIREBASE_LOCAL_LATENCIA_MS', default=0, cast=float)
+
 # Supabase Configuration
 SUPABASE_CONFIG = {
     'url': config('SUPABASE_URL', default=''),
@@ -7,10 +7,11 @@ Cada app tiene su propio archivo urls.py que se incluye aquí.
 
 from django.contrib import admin
 from django.urls import path, include
-from django.http import JsonResponse
+from coldtrack.renderers import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import requests
 from datetime import date, datetime, timedelta
+from apps.eventos.views import exportar_eventos
 
 def api_root(request):
     """Vista raíz de la API"""
@@ -26,10 +27,25 @@ def api_root(request):
             'dashboard': '/api/dashboard/',
             'eventos': '/api/eventos/',
             'test': '/api/test/',
-            'sync': '/api/sync/'
+            'sync': '/api/sync/',
+            'monitoring': '/api/monitoring/'
         }
     })
 
+def contar_filas_rest(url, headers):
+    """
+    Cuenta las filas de una consulta PostgREST sin descargarlas.
+    
+    Usa HEAD con `Prefer: count=exact` y lee el total del header
+    Content-Range (ej: "0-24/25" o "*/0").
+    """
+    response = requests.head(url, headers={**headers, 'Prefer': 'count=exact'})
+    if response.status_code not in (200, 206):
+        return 0
+    content_range = response.headers.get('Content-Range', '')
+    total = content_range.rsplit('/', 1)[-1]
+    return int(total) if total.isdigit() else 0
+
 @csrf_exempt
 def test_kpis_direct(request):
     """Vista de KPIs directa para testing"""
@@ -43,43 +59,53 @@ def test_kpis_direct(request):
             'Content-Type': 'application/json'
         }
         
-        # 1. Cámaras activas
-        camaras_response = requests.get(
-            f'{config["url"]}/rest/v1/camaras_frio?select=id&activa=eq.true',
-            headers=headers
-        )
-        camaras_activas = len(camaras_response.json()) if camaras_response.status_code == 200 else 0
-        
-        # 2. Sucursales activas
-        sucursales_response = requests.get(
-            f'{config["url"]}/rest/v1/sucursales?select=id&activa=eq.true',
-            headers=headers
-        )
-        sucursales_activas = len(sucursales_response.json()) if sucursales_response.status_code == 200 else 0
-        
-        # 3. Eventos de hoy
         hoy = date.today()
-        eventos_response = requests.get(
-            f'{config["url"]}/rest/v1/eventos_temperatura?select=id&fecha_inicio=gte.{hoy}T00:00:00&fecha_inicio=lt.{hoy}T23:59:59',
-            headers=headers
-        )
-        eventos_hoy = len(eventos_response.json()) if eventos_response.status_code == 200 else 0
-        
-        # 4. Cámaras con eventos en las últimas 24h
         hace_24h = (datetime.now() - timedelta(hours=24)).isoformat()
-        eventos_24h_response = requests.get(
-            f'{config["url"]}/rest/v1/eventos_temperatura?select=camara_id&fecha_inicio=gte.{hace_24h}',
-            headers=headers
-        )
         
-        # Contar cámaras únicas con eventos
-        camaras_con_eventos = set()
-        if eventos_24h_response.status_code == 200:
-            eventos_24h = eventos_24h_response.json()
-            for evento in eventos_24h:
-                camaras_con_eventos.add(evento['camara_id'])
+        # Todos los KPIs en una sola llamada (ver kpis_dashboard.sql)
+        rpc_response = requests.post(
+            f'{config["url"]}/rest/v1/rpc/kpis_dashboard',
+            headers=headers,
+            json={
+                'p_hoy_inicio': f'{hoy}T00:00:00',
+                'p_hoy_fin': f'{hoy}T23:59:59',
+                'p_hace_24h': hace_24h
+            }
+        )
         
-        camaras_con_eventos_24h = len(camaras_con_eventos)
+        if rpc_response.status_code == 200:
+            kpis = rpc_response.json()
+            camaras_activas = kpis['camaras_activas']
+            sucursales_activas = kpis['sucursales_activas']
+            eventos_hoy = kpis['eventos_hoy']
+            camaras_con_eventos_24h = kpis['camaras_con_eventos_24h']
+        else:
+            # Sin la función SQL: consultas de solo conteo (no traen filas)
+            
+            # 1. Cámaras activas
+            camaras_activas = contar_filas_rest(
+                f'{config["url"]}/rest/v1/camaras_frio?select=id&activa=eq.true',
+                headers
+            )
+            
+            # 2. Sucursales activas
+            sucursales_activas = contar_filas_rest(
+                f'{config["url"]}/rest/v1/sucursales?select=id&activa=eq.true',
+                headers
+            )
+            
+            # 3. Eventos de hoy
+            eventos_hoy = contar_filas_rest(
+                f'{config["url"]}/rest/v1/eventos_temperatura?select=id&fecha_inicio=gte.{hoy}T00:00:00&fecha_inicio=lt.{hoy}T23:59:59',
+                headers
+            )
+            
+            # 4. Cámaras con eventos en las últimas 24h (cámaras con al menos
+            # un evento en la ventana = cámaras únicas)
+            camaras_con_eventos_24h = contar_filas_rest(
+                f'{config["url"]}/rest/v1/camaras_frio?select=id,eventos_temperatura!inner(id)&eventos_temperatura.fecha_inicio=gte.{hace_24h}',
+                headers
+            )
         
         return JsonResponse({
             'camaras_activas': camaras_activas,
@@ -825,6 +851,7 @@ urlpatterns = [
     # path('api/users/', usuarios_simple, name='users-simple'),  # Comentado para usar ViewSet
     path('api/dashboard/eventos-recientes/', eventos_recientes_simple, name='eventos-recientes-working'),
     path('api/dashboard/eventos-por-dia/', eventos_por_dia_simple, name='eventos-por-dia-working'),
+    path('api/eventos/export/', exportar_eventos, name='eventos-export'),
     path('api/eventos/buscar/', buscar_eventos_historicos, name='buscar-eventos-historicos'),
     path('api/eventos/', buscar_eventos_historicos, name='eventos-list'),  # Endpoint principal para el frontend
     
@@ -836,4 +863,5 @@ urlpatterns = [
     path('api/lecturas/', include('apps.lecturas.urls')),
     path('api/dashboard/', include('apps.dashboard.urls')),
     path('api/sync/', include('apps.sync.urls')),
+    path('api/monitoring/', include('apps.monitoring.urls')),
 ]
@@ -0,0 +1,34 @@
+-- ============================================================================
+-- MÉTRICAS DE CUMPLIMIENTO PARA COLDTRACK
+-- ============================================================================
+-- Agrega los umbrales por cámara y las columnas de cumplimiento del resumen
+-- diario (tiempo en rango, percentiles y excursión más larga).
+--
+-- sketch_cumplimiento guarda el resumen combinable del día (histograma de
+-- 0.1°C + resumen de excursiones) que actualiza el servicio de
+-- sincronización. Ver apps/lecturas/cumplimiento.py
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+-- ============================================================================
+-- TABLA: camaras_frio
+-- ============================================================================
+ALTER TABLE camaras_frio
+    ADD COLUMN IF NOT EXISTS umbral_min_c NUMERIC(5, 2) NOT NULL DEFAULT -30.0,
+    ADD COLUMN IF NOT EXISTS umbral_max_c NUMERIC(5, 2) NOT NULL DEFAULT 4.0;
+
+-- ============================================================================
+-- TABLA: resumen_diario_camara
+-- ============================================================================
+ALTER TABLE resumen_diario_camara
+    ADD COLUMN IF NOT EXISTS pct_en_rango NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS temp_p50 NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS temp_p95 NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS temp_p99 NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS excursion_max_min BIGINT,
+    ADD COLUMN IF NOT EXISTS sketch_cumplimiento JSONB;
+
+-- Consultas por cámara y rango de fechas
+CREATE INDEX IF NOT EXISTS idx_resumen_diario_camara_camara_fecha
+    ON resumen_diario_camara (camara_id, fecha);
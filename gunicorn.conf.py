@@ -0,0 +1,20 @@
+"""
+Configuración de gunicorn
+
+gunicorn la lee automáticamente desde el directorio de trabajo (ver
+Procfile). Solo agrega hooks; bind, workers y timeout siguen tomando sus
+valores por defecto o de la variable GUNICORN_CMD_ARGS.
+"""
+
+
+def post_worker_init(worker):
+    """
+    Calienta los clientes de Firebase y Supabase en segundo plano: el worker
+    empieza a aceptar requests sin esperar a que se importen los SDKs (ver
+    services/arranque.py).
+    """
+    from django.conf import settings
+    
+    if settings.ARRANQUE_CALENTAR:
+        from services.arranque import calentar_en_segundo_plano
+        calentar_en_segundo_plano()
@@ -0,0 +1,66 @@
+-- ============================================================================
+-- FUNCIÓN kpis_dashboard PARA COLDTRACK
+-- ============================================================================
+-- Calcula los KPIs del dashboard en una sola llamada (client.rpc), usando
+-- count(*) y count(DISTINCT ...) en lugar de traer filas al backend.
+--
+-- El backend pasa los límites de tiempo para conservar exactamente la
+-- misma ventana que usaba antes (hora local del servidor).
+--
+-- Si la función no existe, el backend usa consultas count=exact como
+-- alternativa, con el mismo resultado.
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION kpis_dashboard(
+    p_hoy_inicio TIMESTAMP,
+    p_hoy_fin TIMESTAMP,
+    p_hace_24h TIMESTAMP,
+    p_sucursal_id BIGINT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        -- 1. Cámaras activas
+        'camaras_activas', (
+            SELECT count(*)
+            FROM camaras_frio c
+            WHERE c.activa = true
+              AND (p_sucursal_id IS NULL OR c.sucursal_id = p_sucursal_id)
+        ),
+        -- 2. Sucursales activas
+        'sucursales_activas', (
+            SELECT count(*)
+            FROM sucursales s
+            WHERE s.activa = true
+        ),
+        -- 3. Eventos de hoy
+        'eventos_hoy', (
+            SELECT count(*)
+            FROM eventos_temperatura e
+            JOIN camaras_frio c ON c.id = e.camara_id
+            WHERE e.fecha_inicio >= p_hoy_inicio
+              AND e.fecha_inicio < p_hoy_fin
+              AND (p_sucursal_id IS NULL OR c.sucursal_id = p_sucursal_id)
+        ),
+        -- 4. Cámaras con eventos en las últimas 24h
+        'camaras_con_eventos_24h', (
+            SELECT count(DISTINCT e.camara_id)
+            FROM eventos_temperatura e
+            JOIN camaras_frio c ON c.id = e.camara_id
+            WHERE e.fecha_inicio >= p_hace_24h
+              AND (p_sucursal_id IS NULL OR c.sucursal_id = p_sucursal_id)
+        )
+    );
+$$;
+
+-- Índice que usan los conteos por rango de fecha
+CREATE INDEX IF NOT EXISTS idx_eventos_temperatura_fecha_inicio
+    ON eventos_temperatura (fecha_inicio, camara_id);
+
+-- Permitir la llamada vía PostgREST
+GRANT EXECUTE ON FUNCTION kpis_dashboard(TIMESTAMP, TIMESTAMP, TIMESTAMP, BIGINT)
+    TO anon, authenticated, service_role;
@@ -0,0 +1,55 @@
+-- ============================================================================
+-- FUNCIÓN lecturas_por_dia_camara PARA COLDTRACK
+-- ============================================================================
+-- Agrupa en la base las lecturas de un rango por día y cámara (suma,
+-- cantidad y máximo de temperatura) para la vista ejecutiva del dashboard
+-- sin conexión directa a Postgres (apps/dashboard/analytics.py). Así no se
+-- recorren por PostgREST todas las lecturas del rango.
+--
+-- Retorna un solo JSON (no queda limitado a las 1000 filas de PostgREST):
+--     [[epoch_min_timestamp, camara_id, suma, cantidad, maximo], ...]
+-- Las lecturas de exactamente p_corte (fecha_fin a las 00:00:00) van en un
+-- grupo aparte, igual que repositorio.cargar_periodo_sql.
+--
+-- Si la función no existe, el backend usa resumen_diario_camara.
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION lecturas_por_dia_camara(
+    p_desde TIMESTAMP,
+    p_hasta TIMESTAMP,
+    p_corte TIMESTAMP,
+    p_camara_ids BIGINT[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT coalesce(
+        json_agg(
+            json_build_array(extract(epoch FROM g.ts)::BIGINT, g.camara_id, g.suma, g.n, g.maximo)
+            ORDER BY g.dia, g.camara_id
+        ),
+        '[]'::json
+    )
+    FROM (
+        SELECT
+            date_trunc('day', l.timestamp) AS dia,
+            l.camara_id,
+            l.timestamp = p_corte AS en_corte,
+            min(l.timestamp) AS ts,
+            sum(l.temperatura_c) AS suma,
+            count(*) AS n,
+            max(l.temperatura_c) AS maximo
+        FROM lecturas_temperatura l
+        WHERE l.timestamp >= p_desde
+          AND l.timestamp <= p_hasta
+          AND (p_camara_ids IS NULL OR l.camara_id = ANY(p_camara_ids))
+        GROUP BY 1, 2, 3
+    ) g;
+$$;
+
+-- Permitir la llamada vía PostgREST
+GRANT EXECUTE ON FUNCTION lecturas_por_dia_camara(TIMESTAMP, TIMESTAMP, TIMESTAMP, BIGINT[])
+    TO anon, authenticated, service_role;
@@ -0,0 +1,273 @@
+-- ============================================================================
+-- PARTICIONES MENSUALES DE lecturas_temperatura PARA COLDTRACK
+-- ============================================================================
+-- Convierte lecturas_temperatura en una tabla particionada por rango de
+-- "timestamp" (una partición por mes, en UTC), para que las consultas por
+-- rango solo recorran los meses involucrados.
+--
+-- 1. Funciones para crear particiones (crear_particion_lecturas,
+--    crear_particiones_lecturas) y reportar uso de índices
+--    (reporte_particiones_lecturas)
+-- 2. Conversión: la tabla actual se renombra a lecturas_temperatura_legacy,
+--    se crea la tabla particionada con los meses existentes + 3 meses
+--    futuros + una partición default, y se copian las filas
+-- 3. Índices en la tabla padre (se propagan a cada partición):
+--    - BRIN ("timestamp"): rangos de tiempo (las filas llegan en orden)
+--    - (camara_id, "timestamp"): es el índice único
+--      lecturas_temperatura_camara_ts_key de respaldos_mensuales.sql (consultas
+--      por cámara y deduplicación del sync). Si ya existía, la conversión lo
+--      recrea en la tabla particionada; si no, ejecutar respaldos_mensuales.sql
+--
+-- La conversión es idempotente (no hace nada si la tabla ya está
+-- particionada). Copia todas las filas en una transacción: ejecutar en una
+-- ventana de mantenimiento y con el sync detenido. lecturas_temperatura_legacy
+-- queda como respaldo; eliminarla a mano después de verificar.
+--
+-- Las particiones futuras se crean con:
+--     python manage.py particiones_lecturas --meses 3
+-- (o con pg_cron, ver el final del script)
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+-- ============================================================================
+-- FUNCIÓN: crear_particion_lecturas(mes)
+-- ============================================================================
+-- Crea la partición del mes de p_mes si no existe. Las filas de ese mes que
+-- hayan caído en la partición default se mueven a la nueva partición antes
+-- de adjuntarla. Retorna el nombre de la partición creada o NULL.
+CREATE OR REPLACE FUNCTION crear_particion_lecturas(p_mes DATE)
+RETURNS TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_inicio DATE := date_trunc('month', p_mes)::date;
+    v_nombre TEXT := 'lecturas_temperatura_p' || to_char(p_mes, 'YYYY_MM');
+    v_desde TEXT := v_inicio::text || ' 00:00:00+00';
+    v_hasta TEXT := (v_inicio + INTERVAL '1 month')::date::text || ' 00:00:00+00';
+BEGIN
+    IF to_regclass('public.' || v_nombre) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE public.%I (LIKE public.lecturas_temperatura INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        v_nombre
+    );
+
+    IF to_regclass('public.lecturas_temperatura_default') IS NOT NULL THEN
+        EXECUTE format(
+            'WITH movidas AS ('
+            '    DELETE FROM public.lecturas_temperatura_default'
+            '    WHERE "timestamp" >= %L AND "timestamp" < %L RETURNING *'
+            ') INSERT INTO public.%I SELECT * FROM movidas',
+            v_desde, v_hasta, v_nombre
+        );
+    END IF;
+
+    -- El CHECK evita que ATTACH recorra la partición para validar el rango
+    EXECUTE format(
+        'ALTER TABLE public.%I ADD CONSTRAINT %I CHECK ("timestamp" >= %L AND "timestamp" < %L)',
+        v_nombre, v_nombre || '_rango', v_desde, v_hasta
+    );
+    EXECUTE format(
+        'ALTER TABLE public.lecturas_temperatura ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+        v_nombre, v_desde, v_hasta
+    );
+    EXECUTE format('ALTER TABLE public.%I DROP CONSTRAINT %I', v_nombre, v_nombre || '_rango');
+
+    -- PostgREST expone cada partición como tabla: sin políticas solo service_role accede
+    EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', v_nombre);
+
+    RETURN v_nombre;
+END;
+$$;
+
+-- ============================================================================
+-- FUNCIÓN: crear_particiones_lecturas(meses_adelante)
+-- ============================================================================
+-- Asegura las particiones del mes actual y de los próximos meses.
+-- Retorna las particiones creadas.
+CREATE OR REPLACE FUNCTION crear_particiones_lecturas(p_meses_adelante INTEGER DEFAULT 3)
+RETURNS SETOF TEXT
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_mes DATE;
+    v_nombre TEXT;
+BEGIN
+    FOR i IN 0..p_meses_adelante LOOP
+        v_mes := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => i))::date;
+        v_nombre := crear_particion_lecturas(v_mes);
+        IF v_nombre IS NOT NULL THEN
+            RETURN NEXT v_nombre;
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- ============================================================================
+-- FUNCIÓN: reporte_particiones_lecturas()
+-- ============================================================================
+-- Una fila por (partición, índice) con filas estimadas, tamaños y cuántas
+-- veces se usó el índice desde el último reset de estadísticas.
+CREATE OR REPLACE FUNCTION reporte_particiones_lecturas()
+RETURNS TABLE (
+    particion TEXT,
+    filas_estimadas BIGINT,
+    tamano_tabla TEXT,
+    indice TEXT,
+    escaneos BIGINT,
+    tuplas_leidas BIGINT,
+    tamano_indice TEXT
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT
+        c.relname::text,
+        greatest(c.reltuples, 0)::bigint,
+        pg_size_pretty(pg_relation_size(c.oid)),
+        i.indexrelname::text,
+        i.idx_scan,
+        i.idx_tup_read,
+        pg_size_pretty(pg_relation_size(i.indexrelid))
+    FROM pg_inherits h
+    JOIN pg_class c ON c.oid = h.inhrelid
+    LEFT JOIN pg_stat_user_indexes i ON i.relid = c.oid
+    WHERE h.inhparent = to_regclass('public.lecturas_temperatura')
+    ORDER BY c.relname, i.indexrelname;
+$$;
+
+-- Solo el backend (service_role) administra particiones
+REVOKE EXECUTE ON FUNCTION crear_particion_lecturas(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION crear_particiones_lecturas(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION reporte_particiones_lecturas() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION crear_particion_lecturas(DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION crear_particiones_lecturas(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION reporte_particiones_lecturas() TO service_role;
+
+-- ============================================================================
+-- CONVERSIÓN
+-- ============================================================================
+DO $$
+DECLARE
+    v_mes DATE;
+    v_ultimo DATE;
+    v_secuencia TEXT;
+    v_identidad BOOLEAN;
+    v_indice_unico TEXT;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass('public.lecturas_temperatura')
+    ) THEN
+        RAISE NOTICE 'lecturas_temperatura ya está particionada';
+        RETURN;
+    END IF;
+
+    ALTER TABLE public.lecturas_temperatura RENAME TO lecturas_temperatura_legacy;
+    -- Los nombres de índices son únicos por schema: liberar el de la PK y el
+    -- único (camara_id, "timestamp") de respaldos_mensuales.sql
+    ALTER INDEX IF EXISTS public.lecturas_temperatura_pkey RENAME TO lecturas_temperatura_legacy_pkey;
+    ALTER INDEX IF EXISTS public.lecturas_temperatura_camara_ts_key RENAME TO lecturas_temperatura_legacy_camara_ts_key;
+
+    CREATE TABLE public.lecturas_temperatura (
+        LIKE public.lecturas_temperatura_legacy
+        INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED INCLUDING COMMENTS
+    ) PARTITION BY RANGE ("timestamp");
+
+    -- La PK de una tabla particionada debe incluir la clave de partición
+    ALTER TABLE public.lecturas_temperatura ADD PRIMARY KEY (id, "timestamp");
+    ALTER TABLE public.lecturas_temperatura
+        ADD CONSTRAINT lecturas_temperatura_camara_id_fkey
+        FOREIGN KEY (camara_id) REFERENCES public.camaras_frio(id) ON DELETE CASCADE;
+
+    -- Meses con datos hasta 3 meses en el futuro, y default para lo que quede fuera
+    SELECT date_trunc('month', min("timestamp"))::date INTO v_mes FROM public.lecturas_temperatura_legacy;
+    v_ultimo := (date_trunc('month', now() AT TIME ZONE 'UTC') + INTERVAL '3 months')::date;
+    v_mes := least(coalesce(v_mes, v_ultimo), date_trunc('month', now() AT TIME ZONE 'UTC')::date);
+    WHILE v_mes <= v_ultimo LOOP
+        PERFORM crear_particion_lecturas(v_mes);
+        v_mes := (v_mes + INTERVAL '1 month')::date;
+    END LOOP;
+    CREATE TABLE public.lecturas_temperatura_default PARTITION OF public.lecturas_temperatura DEFAULT;
+    ALTER TABLE public.lecturas_temperatura_default ENABLE ROW LEVEL SECURITY;
+
+    INSERT INTO public.lecturas_temperatura OVERRIDING SYSTEM VALUE
+    SELECT * FROM public.lecturas_temperatura_legacy;
+
+    -- El índice único de respaldos_mensuales.sql, con la misma definición
+    -- (incluye "timestamp", así que vale en la tabla particionada)
+    v_indice_unico := pg_get_indexdef(to_regclass('public.lecturas_temperatura_legacy_camara_ts_key'));
+    IF v_indice_unico IS NOT NULL THEN
+        EXECUTE replace(v_indice_unico, 'lecturas_temperatura_legacy', 'lecturas_temperatura');
+    END IF;
+
+    -- Ids: continuar la misma secuencia (serial) o adelantar la nueva (identity)
+    SELECT a.attidentity <> '' INTO v_identidad
+    FROM pg_attribute a
+    WHERE a.attrelid = 'public.lecturas_temperatura'::regclass AND a.attname = 'id';
+    IF v_identidad THEN
+        PERFORM setval(
+            pg_get_serial_sequence('public.lecturas_temperatura', 'id'),
+            (SELECT coalesce(max(id), 0) + 1 FROM public.lecturas_temperatura),
+            false
+        );
+    ELSE
+        v_secuencia := pg_get_serial_sequence('public.lecturas_temperatura_legacy', 'id');
+        IF v_secuencia IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY public.lecturas_temperatura.id', v_secuencia);
+        END IF;
+    END IF;
+
+    -- Mismas políticas que setup_rls_policies.sql
+    ALTER TABLE public.lecturas_temperatura ENABLE ROW LEVEL SECURITY;
+    CREATE POLICY "Permitir lectura de lecturas"
+    ON public.lecturas_temperatura
+    FOR SELECT
+    USING (true);
+    CREATE POLICY "Permitir inserción de lecturas"
+    ON public.lecturas_temperatura
+    FOR INSERT
+    WITH CHECK (true);
+
+    RAISE NOTICE 'lecturas_temperatura convertida a particiones mensuales';
+END;
+$$;
+
+-- ============================================================================
+-- ÍNDICES (en la tabla padre; se crean en cada partición, incluso futuras)
+-- ============================================================================
+-- (camara_id, "timestamp") lo cubre lecturas_temperatura_camara_ts_key
+-- (respaldos_mensuales.sql); el índice no único de versiones anteriores de
+-- este script era un segundo btree sobre las mismas columnas
+DO $$
+BEGIN
+    IF to_regclass('public.lecturas_temperatura_camara_ts_key') IS NULL THEN
+        RAISE NOTICE 'Falta el índice único (camara_id, "timestamp"): ejecutar respaldos_mensuales.sql';
+    ELSE
+        DROP INDEX IF EXISTS public.lecturas_temperatura_camara_ts_idx;
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS lecturas_temperatura_ts_brin
+    ON lecturas_temperatura USING brin ("timestamp") WITH (pages_per_range = 32);
+
+ANALYZE lecturas_temperatura;
+
+-- ============================================================================
+-- OPCIONAL: particiones futuras con pg_cron (Database → Extensions → pg_cron)
+-- ============================================================================
+-- SELECT cron.schedule(
+--     'particiones-lecturas',
+--     '0 3 1 * *',
+--     $$SELECT crear_particiones_lecturas(3)$$
+-- );
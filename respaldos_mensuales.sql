@@ -0,0 +1,70 @@
+-- ============================================================================
+-- RESPALDOS MENSUALES PARA COLDTRACK
+-- ============================================================================
+-- Tabla de registro que usa backup_monthly_data.py (services/backup_service.py)
+-- y los índices únicos que necesitan sus upserts:
+--
+-- 1. respaldos_mensuales: un registro por mes con estado, totales, formato
+--    del snapshot, SHA-256 combinado y el detalle por archivo (partes)
+-- 2. Índices únicos lecturas_temperatura (camara_id, "timestamp") y
+--    eventos_temperatura (firebase_event_id). Antes de crearlos se eliminan
+--    los duplicados que hayan dejado respaldos anteriores (queda la fila de
+--    menor id)
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+-- ============================================================================
+-- TABLA: respaldos_mensuales
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS respaldos_mensuales (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    fecha_respaldo TIMESTAMP NOT NULL,
+    eventos_respaldados INTEGER NOT NULL DEFAULT 0,
+    lecturas_respaldadas INTEGER NOT NULL DEFAULT 0,
+    estado TEXT NOT NULL
+);
+
+-- Columnas nuevas (la tabla puede existir de la versión anterior del respaldo)
+ALTER TABLE respaldos_mensuales ADD COLUMN IF NOT EXISTS formato TEXT;
+ALTER TABLE respaldos_mensuales ADD COLUMN IF NOT EXISTS sha256 TEXT;
+ALTER TABLE respaldos_mensuales ADD COLUMN IF NOT EXISTS partes JSONB;
+
+COMMENT ON COLUMN respaldos_mensuales.sha256 IS 'SHA-256 de la lista "parte:sha256" ordenada (identifica el snapshot completo)';
+COMMENT ON COLUMN respaldos_mensuales.partes IS 'Por tabla/dispositivo: archivo, filas, bytes y sha256';
+
+-- Un registro por mes (la versión anterior insertaba uno por ejecución)
+DELETE FROM respaldos_mensuales a
+USING respaldos_mensuales b
+WHERE a.year = b.year AND a.month = b.month AND a.id < b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS respaldos_mensuales_year_month_key
+    ON respaldos_mensuales (year, month);
+
+ALTER TABLE respaldos_mensuales ENABLE ROW LEVEL SECURITY;
+-- Solo el backend (service_role, que omite RLS) lee y escribe respaldos
+
+-- ============================================================================
+-- ÍNDICES ÚNICOS PARA UPSERT
+-- ============================================================================
+DELETE FROM eventos_temperatura a
+USING eventos_temperatura b
+WHERE a.firebase_event_id = b.firebase_event_id AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS eventos_temperatura_firebase_event_id_key
+    ON eventos_temperatura (firebase_event_id);
+
+DELETE FROM lecturas_temperatura a
+USING lecturas_temperatura b
+WHERE a.camara_id = b.camara_id AND a."timestamp" = b."timestamp" AND a.id > b.id;
+
+-- Incluye "timestamp", así que también es válido si la tabla está particionada.
+-- Es también el índice por cámara de particiones_lecturas.sql: el no único
+-- que creaban versiones anteriores de ese script sobra
+CREATE UNIQUE INDEX IF NOT EXISTS lecturas_temperatura_camara_ts_key
+    ON lecturas_temperatura (camara_id, "timestamp");
+
+DROP INDEX IF EXISTS lecturas_temperatura_camara_ts_idx;
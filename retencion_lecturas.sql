@@ -0,0 +1,66 @@
+-- ============================================================================
+-- RETENCIÓN DE LECTURAS PARA COLDTRACK
+-- ============================================================================
+-- Tablas que usa apps/lecturas/retencion.py al compactar los meses que
+-- quedan fuera de la ventana de retención (RETENCION_LECTURAS_DIAS):
+--
+-- 1. resumen_horario_camara: min / max / promedio / cantidad por cámara y
+--    hora, calculados a partir de las lecturas crudas antes de borrarlas
+-- 2. archivo_lecturas: un registro por mes archivado (archivo .npz con las
+--    lecturas crudas, en disco o en Supabase Storage)
+--
+-- Los días que no tengan fila en resumen_diario_camara se completan en el
+-- mismo proceso.
+--
+-- Uso:
+--     python manage.py retencion_lecturas --dias 90
+--
+-- IMPORTANTE: Ejecuta este script en el SQL Editor de Supabase
+-- ============================================================================
+
+-- ============================================================================
+-- TABLA: resumen_horario_camara
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS resumen_horario_camara (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    camara_id BIGINT NOT NULL REFERENCES camaras_frio(id) ON DELETE CASCADE,
+    hora TIMESTAMPTZ NOT NULL,
+    temp_min NUMERIC(5,2) NOT NULL,
+    temp_max NUMERIC(5,2) NOT NULL,
+    temp_promedio NUMERIC(5,2) NOT NULL,
+    total_lecturas INTEGER NOT NULL,
+    CONSTRAINT resumen_horario_camara_camara_hora_key UNIQUE (camara_id, hora)
+);
+
+COMMENT ON TABLE resumen_horario_camara IS 'Resumen por hora de lecturas_temperatura (se conserva al archivar las lecturas crudas)';
+
+-- ============================================================================
+-- TABLA: archivo_lecturas
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS archivo_lecturas (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    mes DATE NOT NULL UNIQUE,
+    archivo TEXT NOT NULL,
+    total_lecturas BIGINT NOT NULL,
+    bytes BIGINT NOT NULL,
+    borrado_at TIMESTAMPTZ
+);
+
+COMMENT ON TABLE archivo_lecturas IS 'Meses de lecturas_temperatura archivados en archivos columnares (.npz)';
+COMMENT ON COLUMN archivo_lecturas.borrado_at IS 'Cuándo se borraron las filas del mes de lecturas_temperatura (NULL = aún no)';
+
+-- ============================================================================
+-- POLÍTICAS RLS (mismo criterio que setup_rls_policies.sql)
+-- ============================================================================
+ALTER TABLE resumen_horario_camara ENABLE ROW LEVEL SECURITY;
+ALTER TABLE archivo_lecturas ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Permitir lectura de resumen horario" ON resumen_horario_camara;
+CREATE POLICY "Permitir lectura de resumen horario"
+ON resumen_horario_camara
+FOR SELECT
+USING (true);
+
+-- archivo_lecturas solo la usa el backend (service_role, que omite RLS)
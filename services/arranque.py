@@ -0,0 +1,125 @@
+"""
+Arranque de los workers
+
+Los SDKs de Firebase y Supabase tardan cientos de milisegundos en importarse
+y sus clientes en inicializarse. Para que un worker nuevo (deploy o
+escalamiento en Render) atienda antes su primer request, no se cargan al
+importar los módulos de la app:
+
+- modulo_diferido(): proxy que importa el módulo al primer acceso a un
+  atributo (p. ej. firebase_auth.verify_id_token)
+- calentar(): importa los SDKs, inicializa Firebase y carga los módulos que
+  el cliente de Supabase importa al crearse, midiendo cada paso
+- calentar_en_segundo_plano(): lo mismo en un hilo daemon; gunicorn.conf.py
+  lo llama al iniciar cada worker, así los SDKs se cargan mientras el
+  worker ya acepta requests
+
+Los clientes de Supabase son de cada hilo (services/supabase_registro.py):
+uno creado en el hilo de calentamiento nunca lo usaría un request, así que
+no se registra ninguno. Solo se calienta lo que comparten todos los hilos.
+
+El último resultado de calentar() queda en `tiempos_arranque` y el comando
+`python manage.py perfil_arranque` lo reporta junto al tiempo de importación
+por módulo.
+"""
+
+from typing import Dict
+import importlib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Último resultado de calentar(): paso → {'ms': float, 'error': str o None}
+tiempos_arranque: Dict[str, Dict] = {}
+
+
+class ModuloDiferido:
+    """Módulo que se importa recién cuando se usa uno de sus atributos"""
+    
+    def __init__(self, nombre: str):
+        self._nombre = nombre
+    
+    def __getattr__(self, atributo):
+        return getattr(importlib.import_module(self._nombre), atributo)
+    
+    def __repr__(self):
+        return f'<módulo diferido {self._nombre}>'
+
+
+def modulo_diferido(nombre: str) -> ModuloDiferido:
+    """
+    Example:
+        >>> firebase_auth = modulo_diferido('firebase_admin.auth')
+        >>> firebase_auth.verify_id_token(token)  # importa firebase_admin.auth aquí
+    """
+    return ModuloDiferido(nombre)
+
+
+def _inicializar_firebase():
+    from services.firebase_service import initialize_firebase
+    if not initialize_firebase():
+        raise RuntimeError('Firebase no configurado')
+
+
+def _cargar_modulos_supabase():
+    """
+    Crea y descarta un cliente fuera del registro: create_client importa al
+    primer uso httpcore, h2, anyio, etc., que después comparten todos los hilos
+    """
+    from services.supabase_service import _crear_cliente
+    _crear_cliente('service')
+
+
+# Pasos en orden: primero los imports (los más lentos), luego los clientes
+PASOS = (
+    ('import firebase_admin.auth', lambda: importlib.import_module('firebase_admin.auth')),
+    ('import firebase_admin.db', lambda: importlib.import_module('firebase_admin.db')),
+    ('import supabase', lambda: importlib.import_module('supabase')),
+    ('cliente firebase', _inicializar_firebase),
+    ('módulos cliente supabase', _cargar_modulos_supabase),
+)
+
+
+def calentar() -> Dict[str, Dict]:
+    """
+    Importa los SDKs, inicializa Firebase y carga los módulos del cliente de
+    Supabase (sin registrar un cliente, ver arriba).
+    
+    Un paso que falla (p. ej. sin credenciales) se registra y no detiene
+    los siguientes.
+    
+    Returns:
+        Paso → {'ms': duración, 'error': mensaje o None}
+    """
+    resultado = {}
+    for nombre, paso in PASOS:
+        inicio = time.perf_counter()
+        error = None
+        try:
+            paso()
+        except Exception as e:
+            error = str(e)
+        resultado[nombre] = {'ms': round((time.perf_counter() - inicio) * 1000, 1), 'error': error}
+    
+    tiempos_arranque.clear()
+    tiempos_arranque.update(resultado)
+    detalle = ', '.join(f"{nombre}: {paso['ms']:.0f} ms" for nombre, paso in resultado.items())
+    logger.info(f"Clientes calentados en {sum(paso['ms'] for paso in resultado.values()):.0f} ms ({detalle})")
+    return resultado
+
+
+def calentar_en_segundo_plano(espera: float = 0.0) -> threading.Thread:
+    """Ejecuta calentar() en un hilo daemon tras `espera` segundos"""
+    def ejecutar():
+        if espera:
+            time.sleep(espera)
+        try:
+            calentar()
+        except Exception as e:
+            logger.error(f"Error calentando clientes: {str(e)}")
+    
+    hilo = threading.Thread(target=ejecutar, daemon=True, name='calentar-clientes')
+    hilo.start()
+    return hilo
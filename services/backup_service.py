@@ -0,0 +1,353 @@
+"""
+Backup Service
+
+Respaldo mensual de Firebase (status y eventos) acotado al mes pedido:
+
+- Dispositivos y días se listan con lecturas shallow (solo claves), sin
+  descargar el árbol completo
+- Cada nodo /{status|eventos}/{device_id}/{año}/{mes}/{día} se lee por
+  páginas de claves ordenadas (order_by_key + start_at + limit_to_first),
+  así la memoria usada es la de una página
+- Las filas se escriben en streaming a un archivo por dispositivo y tabla
+  (NDJSON gzip o Parquet) en RESPALDOS_DIR/{año}_{mes}/, y opcionalmente
+  se hace upsert de cada página en Supabase
+- manifiesto.json guarda filas y SHA-256 de cada archivo terminado; al
+  reanudar un respaldo interrumpido (estado EN_CURSO) se saltan los archivos
+  que coinciden. Un mes ya COMPLETADO se vuelve a exportar entero, así una
+  nueva corrida en el mismo mes incluye las lecturas posteriores a la
+  anterior. El mismo resumen se guarda en respaldos_mensuales
+  (respaldos_mensuales.sql)
+
+Uso:
+    >>> from services.backup_service import respaldar_mes
+    >>> respaldo = respaldar_mes(2025, 12, formato='ndjson', supabase=True)
+    >>> respaldo['lecturas_respaldadas'], respaldo['sha256']
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from django.conf import settings
+
+from services.firebase_service import initialize_firebase, get_database
+from services.supabase_service import get_supabase_client
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow es opcional (solo para Parquet)
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Claves leídas por consulta a Firebase y filas por upsert en Supabase
+CLAVES_POR_PAGINA = 1000
+
+TABLAS = {
+    # tabla de Supabase: (nodo de Firebase, clave de conflicto para upsert)
+    'lecturas_temperatura': ('status', 'camara_id,timestamp'),
+    'eventos_temperatura': ('eventos', 'firebase_event_id'),
+}
+
+COLUMNAS = {
+    'lecturas_temperatura': ['camara_id', 'timestamp', 'temperatura_c', 'origen'],
+    'eventos_temperatura': ['camara_id', 'firebase_event_id', 'fecha_inicio', 'fecha_fin', 'tipo', 'temp_max_c',
+                            'duracion_minutos', 'estado', 'observaciones'],
+}
+
+EXTENSIONES = {'ndjson': '.ndjson.gz', 'parquet': '.parquet'}
+
+
+def _claves(ruta: str) -> List[str]:
+    """Claves hijas de un nodo sin descargar su contenido"""
+    nodo = get_database().reference(ruta).get(shallow=True)
+    return sorted(nodo) if isinstance(nodo, dict) else []
+
+
+def iterar_nodo(ruta: str, por_pagina: int = CLAVES_POR_PAGINA) -> Iterator[List[Tuple[str, object]]]:
+    """
+    Recorre los hijos de un nodo por páginas de claves ordenadas.
+    
+    Cada página pide `por_pagina + 1` claves desde la última leída
+    (start_at es inclusivo) y descarta la repetida.
+    
+    Yields:
+        Lista de (clave, valor) por página
+    """
+    ultima = None
+    while True:
+        consulta = get_database().reference(ruta).order_by_key()
+        pedidas = por_pagina
+        if ultima is not None:
+            consulta = consulta.start_at(ultima)
+            pedidas += 1
+        datos = consulta.limit_to_first(pedidas).get() or {}
+        
+        pagina = [(clave, valor) for clave, valor in datos.items() if clave != ultima]
+        if not pagina:
+            break
+        yield pagina
+        
+        if len(datos) < pedidas:
+            break
+        ultima = pagina[-1][0]
+
+
+def fila_lectura(camera: Dict, clave: str, datos) -> Optional[Dict]:
+    """Fila de lecturas_temperatura desde /status/{device}/{año}/{mes}/{día}/{ts}"""
+    if not clave.isdigit():
+        return None
+    temperatura = datos.get('temp', 0) if isinstance(datos, dict) else datos
+    return {
+        'camara_id': camera['id'],
+        'timestamp': datetime.fromtimestamp(int(clave)).isoformat(),
+        'temperatura_c': float(temperatura),
+        'origen': 'backup_monthly'
+    }
+
+
+def fila_evento(camera: Dict, clave: str, datos) -> Optional[Dict]:
+    """Fila de eventos_temperatura desde /eventos/{device}/{año}/{mes}/{día}/{event_id}"""
+    if not isinstance(datos, dict) or not datos.get('start_ts'):
+        return None
+    end_ts = datos.get('end_ts')
+    duration_ms = datos.get('duration_ms', 0)
+    return {
+        'camara_id': camera['id'],
+        'firebase_event_id': clave,
+        'fecha_inicio': datetime.fromtimestamp(datos['start_ts']).isoformat(),
+        'fecha_fin': datetime.fromtimestamp(end_ts).isoformat() if end_ts else None,
+        'tipo': datos.get('type', 'UNKNOWN'),
+        'temp_max_c': float(datos.get('max_temp', 0)),
+        'duracion_minutos': duration_ms // 60000 if duration_ms else 0,
+        'estado': 'RESUELTO' if end_ts else 'EN_CURSO',
+        'observaciones': f'Respaldo automático - Firebase ID: {clave}'
+    }
+
+
+CONVERSORES = {
+    'lecturas_temperatura': fila_lectura,
+    'eventos_temperatura': fila_evento,
+}
+
+
+# ============================================================================
+# Escritura de snapshots
+# ============================================================================
+
+class EscritorNdjson:
+    """Una fila JSON por línea, comprimido con gzip"""
+    
+    def __init__(self, ruta: Path, tabla: str):
+        self.archivo = gzip.open(ruta, 'wt', encoding='utf-8')
+    
+    def escribir(self, filas: List[Dict]):
+        self.archivo.writelines(json.dumps(fila, ensure_ascii=False) + '\n' for fila in filas)
+    
+    def cerrar(self):
+        self.archivo.close()
+
+
+class EscritorParquet:
+    """Un row group por página, con esquema fijo por tabla (requiere pyarrow)"""
+    
+    def __init__(self, ruta: Path, tabla: str):
+        if pyarrow is None:
+            raise ImportError("El respaldo en Parquet requiere pyarrow (pip install pyarrow)")
+        tipos = {
+            'camara_id': pyarrow.int64(),
+            'temperatura_c': pyarrow.float64(),
+            'temp_max_c': pyarrow.float64(),
+            'duracion_minutos': pyarrow.int64(),
+        }
+        self.esquema = pyarrow.schema([
+            (columna, tipos.get(columna, pyarrow.string())) for columna in COLUMNAS[tabla]
+        ])
+        self.escritor = pyarrow.parquet.ParquetWriter(ruta, self.esquema, compression='zstd')
+    
+    def escribir(self, filas: List[Dict]):
+        self.escritor.write_table(pyarrow.Table.from_pylist(filas, schema=self.esquema))
+    
+    def cerrar(self):
+        self.escritor.close()
+
+
+ESCRITORES = {'ndjson': EscritorNdjson, 'parquet': EscritorParquet}
+
+
+def sha256_archivo(ruta: Path) -> str:
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+# ============================================================================
+# Respaldo
+# ============================================================================
+
+def respaldar_parte(tabla: str, device_id: str, camera: Dict, year: int, month: int,
+                    ruta: Path, formato: str, client=None) -> Dict:
+    """
+    Respalda los días del mes de un dispositivo en `ruta` (y en Supabase si
+    se pasa `client`). El archivo se escribe como .tmp y se renombra al
+    terminar, así un respaldo interrumpido nunca deja un archivo a medias.
+    
+    Returns:
+        Dict con archivo, filas, bytes y sha256
+    """
+    nodo, conflicto = TABLAS[tabla]
+    convertir = CONVERSORES[tabla]
+    base = f'/{nodo}/{device_id}/{year}/{month:02d}'
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    
+    filas_escritas = 0
+    escritor = ESCRITORES[formato](temporal, tabla)
+    try:
+        for dia in _claves(base):
+            for pagina in iterar_nodo(f'{base}/{dia}'):
+                filas = [fila for fila in (convertir(camera, clave, datos) for clave, datos in pagina) if fila]
+                if not filas:
+                    continue
+                escritor.escribir(filas)
+                if client is not None:
+                    # Solo se agregan las filas que faltan: lo que ya escribió la sincronización no se pisa
+                    client.table(tabla)\
+                        .upsert(filas, on_conflict=conflicto, ignore_duplicates=True)\
+                        .execute()
+                filas_escritas += len(filas)
+    finally:
+        escritor.cerrar()
+    
+    os.replace(temporal, ruta)
+    return {
+        'archivo': ruta.name,
+        'filas': filas_escritas,
+        'bytes': ruta.stat().st_size,
+        'sha256': sha256_archivo(ruta),
+    }
+
+
+def _parte_completa(directorio: Path, parte: Optional[Dict]) -> bool:
+    """La parte ya está respaldada si su archivo existe y coincide el checksum"""
+    if not parte:
+        return False
+    ruta = directorio / parte['archivo']
+    return ruta.exists() and sha256_archivo(ruta) == parte['sha256']
+
+
+def _leer_manifiesto(ruta: Path) -> Dict:
+    if ruta.exists():
+        return json.loads(ruta.read_text(encoding='utf-8'))
+    return {}
+
+
+def _guardar_manifiesto(ruta: Path, manifiesto: Dict):
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    temporal.write_text(json.dumps(manifiesto, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(temporal, ruta)
+
+
+def _registro(year: int, month: int, manifiesto: Dict, estado: str) -> Dict:
+    """Fila de respaldos_mensuales con totales y checksum del respaldo"""
+    partes = manifiesto['partes']
+    
+    def total(tabla):
+        return sum(parte['filas'] for clave, parte in partes.items() if clave.startswith(f'{tabla}/'))
+    
+    combinado = hashlib.sha256(''.join(f"{clave}:{partes[clave]['sha256']}\n" for clave in sorted(partes)).encode())
+    return {
+        'year': year,
+        'month': month,
+        'fecha_respaldo': datetime.now().isoformat(),
+        'eventos_respaldados': total('eventos_temperatura'),
+        'lecturas_respaldadas': total('lecturas_temperatura'),
+        'estado': estado,
+        'formato': manifiesto['formato'],
+        'sha256': combinado.hexdigest(),
+        'partes': partes,
+    }
+
+
+def _guardar_registro(client, registro: Dict):
+    try:
+        client.table('respaldos_mensuales')\
+            .upsert(registro, on_conflict='year,month')\
+            .execute()
+    except Exception as e:
+        logger.warning(f"⚠️  No se pudo guardar el registro de respaldo (¿se ejecutó respaldos_mensuales.sql?): {str(e)}")
+
+
+def respaldar_mes(year: int, month: int, formato: str = 'ndjson', supabase: bool = False,
+                  directorio: Optional[str] = None) -> Dict:
+    """
+    Respalda un mes de Firebase, reanudando si hay un respaldo previo incompleto.
+    Si el respaldo previo terminó, se exporta de nuevo todo el mes.
+    
+    Args:
+        year / month: Mes a respaldar (según las rutas de Firebase)
+        formato: 'ndjson' (gzip) o 'parquet'
+        supabase: Si True, también hace upsert de las filas en Supabase
+        directorio: Carpeta base (por defecto RESPALDOS_DIR)
+    
+    Returns:
+        Dict con el registro guardado en respaldos_mensuales
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato no soportado: {formato}")
+    
+    initialize_firebase()
+    client = get_supabase_client(use_service_key=True)
+    
+    carpeta = Path(directorio or settings.RESPALDOS_DIR) / f'{year}_{month:02d}'
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta_manifiesto = carpeta / 'manifiesto.json'
+    manifiesto = _leer_manifiesto(ruta_manifiesto)
+    if manifiesto.get('formato') != formato or manifiesto.get('estado') != 'EN_CURSO':
+        # Solo se reanuda un respaldo interrumpido: los archivos de uno
+        # terminado no tienen lo que llegó a Firebase después
+        manifiesto = {'formato': formato, 'estado': 'EN_CURSO', 'partes': {}}
+    
+    camaras = client.table('camaras_frio')\
+        .select('id, nombre, firebase_path')\
+        .eq('activa', True)\
+        .execute()
+    camaras = {camara['firebase_path']: camara for camara in camaras.data or [] if camara.get('firebase_path')}
+    
+    logger.info(f"🗄️  Respaldo de {month:02d}/{year} en {carpeta}")
+    for tabla, (nodo, _) in TABLAS.items():
+        for device_id in _claves(f'/{nodo}'):
+            camera = camaras.get(device_id)
+            if not camera:
+                logger.warning(f"Cámara no encontrada: {device_id}")
+                continue
+            
+            clave = f'{tabla}/{device_id}'
+            if _parte_completa(carpeta, manifiesto['partes'].get(clave)):
+                logger.info(f"  ⏭️  {clave} ya respaldado")
+                continue
+            
+            ruta = carpeta / f'{tabla}_{device_id}{EXTENSIONES[formato]}'
+            parte = respaldar_parte(tabla, device_id, camera, year, month, ruta, formato,
+                                    client if supabase else None)
+            manifiesto['partes'][clave] = parte
+            _guardar_manifiesto(ruta_manifiesto, manifiesto)
+            _guardar_registro(client, _registro(year, month, manifiesto, 'EN_CURSO'))
+            logger.info(f"  📦 {clave}: {parte['filas']} filas ({parte['bytes']} bytes)")
+    
+    manifiesto['estado'] = 'COMPLETADO'
+    _guardar_manifiesto(ruta_manifiesto, manifiesto)
+    registro = _registro(year, month, manifiesto, 'COMPLETADO')
+    _guardar_registro(client, registro)
+    logger.info(
+        f"🎉 Respaldo completado para {month:02d}/{year}: {registro['eventos_respaldados']} eventos, "
+        f"{registro['lecturas_respaldadas']} lecturas"
+    )
+    return registro
@@ -0,0 +1,205 @@
+"""
+Caché stale-while-revalidate de análisis pesados
+
+get_analisis_ejecutivo puede tardar segundos en rangos largos. Sus
+resultados quedan en memoria del proceso por clave (rango, cámara y alcance
+del usuario, ver services/vuelo_unico.py):
+
+- Fresco (edad < CACHE_ANALITICA_TTL): se responde desde el caché
+- Obsoleto (dentro de CACHE_ANALITICA_GRACIA_S más): se responde de
+  inmediato con el valor anterior y un hilo en segundo plano lo recalcula
+- Sin entrada o más viejo: se calcula en el request (coalescido con
+  vuelo_unico si hay requests idénticos en curso)
+
+Además, tras cada ciclo de la sincronización (apps/sync/sync_service.py)
+refrescar_populares() recalcula en segundo plano las
+CACHE_ANALITICA_POPULARES claves más consultadas que tengan más de
+CACHE_ANALITICA_REFRESCO_S segundos, así los análisis de uso frecuente no
+llegan a quedar fríos. La popularidad se reduce a la mitad en cada
+refresco para favorecer las consultas recientes.
+
+La función de cada entrada se guarda para recalcularla desde otro hilo: no
+debe capturar el cliente de Supabase del request (cada hilo usa el suyo,
+ver services/supabase_registro.py). Los valores se comparten entre
+requests y no deben modificarse. Un valor que no pasa `valido` (p. ej. una
+respuesta parcial) se entrega pero no se guarda.
+
+Uso:
+    >>> valor, estado = cache_analitica.obtener(clave, lambda: calcular(...))
+    >>> estado  # 'fresco', 'obsoleto' o 'calculado'
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from django.conf import settings
+from django.db import close_old_connections
+from services.vuelo_unico import vuelo_unico
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Hilos que recalculan entradas en segundo plano
+HILOS_REVALIDACION = 2
+
+
+class EntradaCache:
+    __slots__ = ('valor', 'calculado_en', 'funcion', 'valido', 'consultas')
+    
+    def __init__(self, valor, funcion: Callable[[], Any], valido: Optional[Callable[[Any], bool]]):
+        self.valor = valor
+        self.calculado_en = time.monotonic()
+        self.funcion = funcion
+        self.valido = valido
+        self.consultas = 0
+
+
+class CacheRevalidacion:
+    """Caché en memoria con revalidación en segundo plano"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: Dict[Hashable, EntradaCache] = {}
+        self._revalidando = set()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._contadores = {'frescos': 0, 'obsoletos': 0, 'calculados': 0, 'revalidados': 0, 'errores': 0}
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Con el lock tomado
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=HILOS_REVALIDACION, thread_name_prefix='revalidar')
+        return self._pool
+    
+    def obtener(self, clave: Hashable, funcion: Callable[[], Any],
+                valido: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, str]:
+        """
+        Valor de la clave desde el caché o calculado con funcion().
+        
+        Args:
+            clave: Consulta normalizada + alcance del usuario (hashable)
+            funcion: Cálculo sin argumentos, ejecutable desde cualquier hilo
+            valido: Si retorna False para un valor calculado, no se guarda
+        
+        Returns:
+            (valor, estado) con estado 'fresco', 'obsoleto' (se está
+            recalculando en segundo plano) o 'calculado'
+        """
+        if not settings.CACHE_ANALITICA_ACTIVA:
+            return vuelo_unico.ejecutar(clave, funcion), 'calculado'
+        
+        ttl = settings.CACHE_ANALITICA_TTL
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                edad = time.monotonic() - entrada.calculado_en
+                if edad < ttl + settings.CACHE_ANALITICA_GRACIA_S:
+                    entrada.consultas += 1
+                    if edad < ttl:
+                        self._contadores['frescos'] += 1
+                        return entrada.valor, 'fresco'
+                    self._contadores['obsoletos'] += 1
+                    self._programar(clave, entrada)
+                    return entrada.valor, 'obsoleto'
+        
+        valor = vuelo_unico.ejecutar(clave, funcion)
+        with self._lock:
+            self._contadores['calculados'] += 1
+            if valido is None or valido(valor):
+                nueva = EntradaCache(valor, funcion, valido)
+                nueva.consultas = (entrada.consultas + 1) if entrada else 1
+                self._guardar(clave, nueva)
+        return valor, 'calculado'
+    
+    def _guardar(self, clave: Hashable, nueva: EntradaCache):
+        """Guarda la entrada y descarta lo vencido o lo menos consultado (con el lock tomado)"""
+        self._entradas[clave] = nueva
+        
+        limite = settings.CACHE_ANALITICA_TTL + settings.CACHE_ANALITICA_GRACIA_S
+        ahora = time.monotonic()
+        for otra in [c for c, e in self._entradas.items() if ahora - e.calculado_en >= limite]:
+            del self._entradas[otra]
+        
+        sobrantes = len(self._entradas) - settings.CACHE_ANALITICA_MAX_ENTRADAS
+        if sobrantes > 0:
+            por_uso = sorted(self._entradas, key=lambda c: (self._entradas[c].consultas, self._entradas[c].calculado_en))
+            for otra in por_uso[:sobrantes]:
+                del self._entradas[otra]
+    
+    def _programar(self, clave: Hashable, entrada: EntradaCache):
+        """Encola el recálculo de la clave si no hay uno pendiente (con el lock tomado)"""
+        if clave in self._revalidando:
+            return
+        self._revalidando.add(clave)
+        self._get_pool().submit(self._revalidar, clave, entrada.funcion, entrada.valido)
+    
+    def _revalidar(self, clave: Hashable, funcion: Callable[[], Any], valido: Optional[Callable[[Any], bool]]):
+        try:
+            valor = vuelo_unico.ejecutar(clave, funcion)
+            if valido is not None and not valido(valor):
+                # Se mantiene el valor anterior hasta el próximo intento
+                raise ValueError('resultado no válido para el caché')
+            with self._lock:
+                anterior = self._entradas.get(clave)
+                nueva = EntradaCache(valor, funcion, valido)
+                nueva.consultas = anterior.consultas if anterior else 0
+                self._guardar(clave, nueva)
+                self._contadores['revalidados'] += 1
+        except Exception as e:
+            with self._lock:
+                self._contadores['errores'] += 1
+            logger.error(f"Error recalculando {clave!r} en segundo plano: {str(e)}")
+        finally:
+            with self._lock:
+                self._revalidando.discard(clave)
+            close_old_connections()
+    
+    def refrescar_populares(self, cantidad: Optional[int] = None) -> int:
+        """
+        Encola el recálculo de las claves más consultadas con más de
+        CACHE_ANALITICA_REFRESCO_S segundos.
+        
+        Returns:
+            Cantidad de claves encoladas
+        """
+        if not settings.CACHE_ANALITICA_ACTIVA:
+            return 0
+        
+        cantidad = settings.CACHE_ANALITICA_POPULARES if cantidad is None else cantidad
+        ahora = time.monotonic()
+        with self._lock:
+            populares = sorted(
+                (c for c, e in self._entradas.items() if e.consultas > 0),
+                key=lambda c: -self._entradas[c].consultas
+            )[:cantidad]
+            encoladas = 0
+            for clave in populares:
+                entrada = self._entradas[clave]
+                if ahora - entrada.calculado_en >= settings.CACHE_ANALITICA_REFRESCO_S and clave not in self._revalidando:
+                    self._programar(clave, entrada)
+                    encoladas += 1
+            for entrada in self._entradas.values():
+                entrada.consultas //= 2
+        
+        if encoladas:
+            logger.info(f"Recalculando {encoladas} análisis populares en segundo plano")
+        return encoladas
+    
+    def invalidar(self):
+        """Descarta todas las entradas"""
+        with self._lock:
+            self._entradas.clear()
+    
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._contadores, 'entradas': len(self._entradas), 'revalidando': len(self._revalidando)}
+    
+    def reset(self):
+        """Reinicia los contadores"""
+        with self._lock:
+            for evento in self._contadores:
+                self._contadores[evento] = 0
+
+
+# Caché compartido por el proceso
+cache_analitica = CacheRevalidacion()
@@ -0,0 +1,164 @@
+"""
+Export Service
+
+Este módulo genera exportaciones CSV / NDJSON en streaming.
+Las filas se consumen de un iterador (cursor del ORM o bucle keyset sobre
+Supabase) y se escriben por bloques, por lo que la memoria usada es
+constante sin importar el tamaño del rango exportado.
+
+Funciones principales:
+- iter_csv(): Convierte filas en bloques CSV
+- iter_ndjson(): Convierte filas en bloques NDJSON
+- iter_gzip(): Comprime un stream de bloques con gzip
+- build_export_response(): Arma la StreamingHttpResponse de descarga
+"""
+
+from django.http import StreamingHttpResponse
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List
+import csv
+import io
+import json
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Cantidad de filas que se acumulan antes de emitir un bloque
+FILAS_POR_BLOQUE = 1000
+
+FORMATOS_EXPORTACION = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _valor_exportable(valor):
+    """Normaliza un valor para CSV/JSON (fechas ISO, Decimal a float)"""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def iter_csv(filas: Iterable[Dict], columnas: List[str]) -> Iterator[bytes]:
+    """
+    Convierte un iterador de filas (dicts) en bloques CSV codificados en UTF-8.
+    
+    Args:
+        filas: Iterador de diccionarios
+        columnas: Columnas a exportar (define el encabezado y el orden)
+    
+    Yields:
+        bytes con varias filas CSV
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    
+    pendientes = 0
+    for fila in filas:
+        writer.writerow([_valor_exportable(fila.get(columna)) for columna in columnas])
+        pendientes += 1
+        
+        if pendientes >= FILAS_POR_BLOQUE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            pendientes = 0
+    
+    resto = buffer.getvalue()
+    if resto:
+        yield resto.encode('utf-8')
+
+
+def iter_ndjson(filas: Iterable[Dict], columnas: List[str]) -> Iterator[bytes]:
+    """
+    Convierte un iterador de filas (dicts) en bloques NDJSON (un objeto por línea).
+    
+    Args:
+        filas: Iterador de diccionarios
+        columnas: Columnas a exportar
+    
+    Yields:
+        bytes con varias líneas JSON
+    """
+    lineas = []
+    for fila in filas:
+        objeto = {columna: _valor_exportable(fila.get(columna)) for columna in columnas}
+        lineas.append(json.dumps(objeto, ensure_ascii=False))
+        
+        if len(lineas) >= FILAS_POR_BLOQUE:
+            yield ('\n'.join(lineas) + '\n').encode('utf-8')
+            lineas = []
+    
+    if lineas:
+        yield ('\n'.join(lineas) + '\n').encode('utf-8')
+
+
+def iter_gzip(bloques: Iterable[bytes], nivel: int = 6) -> Iterator[bytes]:
+    """
+    Comprime un stream de bloques en formato gzip sin acumularlo en memoria.
+    
+    Args:
+        bloques: Iterador de bytes
+        nivel: Nivel de compresión zlib (1-9)
+    
+    Yields:
+        bytes comprimidos
+    """
+    # wbits=31 genera encabezado y checksum gzip
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 31)
+    for bloque in bloques:
+        comprimido = compresor.compress(bloque)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+def build_export_response(
+    filas: Iterable[Dict],
+    columnas: List[str],
+    formato: str,
+    nombre_archivo: str,
+    comprimir: bool = False
+) -> StreamingHttpResponse:
+    """
+    Arma la respuesta de descarga en streaming.
+    
+    Args:
+        filas: Iterador de filas (dicts)
+        columnas: Columnas a exportar
+        formato: 'csv' o 'ndjson'
+        nombre_archivo: Nombre base del archivo (sin extensión)
+        comprimir: Si True, comprime con gzip y agrega la extensión .gz
+    
+    Returns:
+        StreamingHttpResponse con el archivo
+    
+    Example:
+        >>> filas = iterar_keyset('lecturas_temperatura', 'id, camara_id, timestamp')
+        >>> return build_export_response(filas, ['id', 'camara_id', 'timestamp'], 'csv', 'lecturas')
+    """
+    if formato == 'ndjson':
+        bloques = iter_ndjson(filas, columnas)
+    else:
+        formato = 'csv'
+        bloques = iter_csv(filas, columnas)
+    
+    content_type = FORMATOS_EXPORTACION[formato]
+    extension = formato
+    
+    if comprimir:
+        bloques = iter_gzip(bloques)
+        content_type = 'application/gzip'
+        extension = f'{formato}.gz'
+    
+    response = StreamingHttpResponse(bloques, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.{extension}"'
+    response['X-Accel-Buffering'] = 'no'  # Evitar buffering en proxies
+    
+    logger.info(f"Exportación iniciada: {nombre_archivo}.{extension}")
+    return response
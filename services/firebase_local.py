@@ -0,0 +1,430 @@
+"""
+Firebase Local (Realtime Database en memoria)
+
+Reemplazo en proceso de firebase_admin.db para benchmarks de sincronización
+sin un proyecto de Firebase. Implementa la parte de la API de Reference que
+usan la sincronización y los scripts de respaldo:
+
+- get(shallow=True) y child(), con la respuesta copiada vía JSON como la
+  deserializaría el SDK real
+- set, update (con rutas multi-nivel), push, delete
+- listen(callback): evento 'put' inicial con el valor completo y luego
+  'put'/'patch' con la ruta relativa, entregados en un hilo por listener
+  (igual que firebase_admin); close() para dejar de escuchar
+- Consultas ordenadas: order_by_key/child/value con start_at, end_at,
+  equal_to, limit_to_first y limit_to_last (orden de claves de RTDB: enteros
+  de 32 bits primero, en orden numérico)
+- Latencia inyectada por operación (fija + jitter) y ancho de banda opcional
+
+Formas de usarlo:
+- FIREBASE_BACKEND='local' en settings: get_database() (services/firebase_service.py)
+  retorna el emulador, cargado desde FIREBASE_LOCAL_ARCHIVO (export JSON de RTDB)
+- En código (benchmarks):
+    >>> from services.firebase_local import BaseDatosLocal, usar_firebase_local
+    >>> bd = BaseDatosLocal(dataset.firebase, latencia_ms=40)
+    >>> usar_firebase_local(bd)
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """Equivalente a firebase_admin.db.Event"""
+    
+    def __init__(self, event_type: str, path: str, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class _Suscripcion:
+    """Listener: cola de eventos consumida por un hilo propio"""
+    
+    def __init__(self, bd: 'BaseDatosLocal', ruta: str, callback: Callable[[Event], None]):
+        self.bd = bd
+        self.ruta = ruta
+        self.callback = callback
+        self.cola: queue.Queue = queue.Queue()
+        self.activa = True
+        self.hilo = threading.Thread(target=self._consumir, daemon=True, name=f'firebase-local-listen:{ruta}')
+        self.hilo.start()
+    
+    def _consumir(self):
+        while True:
+            evento = self.cola.get()
+            try:
+                if evento is None:
+                    return
+                if self.activa:
+                    self.callback(evento)
+            except Exception as e:
+                logger.error(f"Error en listener de {self.ruta}: {str(e)}")
+            finally:
+                self.cola.task_done()
+    
+    def close(self):
+        """Equivalente a ListenerRegistration.close()"""
+        self.activa = False
+        self.bd._quitar_suscripcion(self)
+        self.cola.put(None)
+
+
+def _partes(ruta: str) -> List[str]:
+    return [parte for parte in ruta.split('/') if parte]
+
+
+def _orden_clave(clave: str):
+    """Orden de claves de RTDB: enteros de 32 bits (numérico) y luego strings"""
+    try:
+        numero = int(clave)
+        if -2 ** 31 <= numero < 2 ** 31 and str(numero) == clave:
+            return (0, numero, '')
+    except ValueError:
+        pass
+    return (1, 0, clave)
+
+
+def _orden_valor(valor):
+    """Orden de valores de RTDB: null < false < true < números < strings < objetos"""
+    if valor is None:
+        return (0, 0, '')
+    if isinstance(valor, bool):
+        return (1, int(valor), '')
+    if isinstance(valor, (int, float)):
+        return (2, valor, '')
+    if isinstance(valor, str):
+        return (3, 0, valor)
+    return (4, 0, '')
+
+
+class BaseDatosLocal:
+    """Árbol en memoria con la interfaz del módulo firebase_admin.db"""
+    
+    def __init__(self, arbol: Optional[Dict] = None, latencia_ms: float = 0, jitter_ms: float = 0,
+                 mb_por_segundo: float = 0, copiar: bool = True, seed: Optional[int] = None):
+        """
+        Args:
+            arbol: Datos iniciales (mismo formato que un export JSON de RTDB)
+            latencia_ms: Latencia fija por operación
+            jitter_ms: Latencia adicional aleatoria (0 a jitter_ms)
+            mb_por_segundo: Ancho de banda simulado para lecturas (0 = ilimitado)
+            copiar: Entregar copias vía JSON (como el SDK real); False para
+                    retornar el árbol interno sin costo de serialización
+        """
+        self.arbol = arbol if arbol is not None else {}
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.mb_por_segundo = mb_por_segundo
+        self.copiar = copiar
+        self.lock = threading.RLock()
+        self.suscripciones: List[_Suscripcion] = []
+        self.estadisticas = {'lecturas': 0, 'escrituras': 0, 'bytes_leidos': 0, 'eventos': 0}
+        self._random = random.Random(seed)
+        self._push = itertools.count()
+    
+    def reference(self, path: str = '/') -> 'Referencia':
+        return Referencia(self, path)
+    
+    # Acceso al árbol
+    def _nodo(self, partes: List[str]):
+        nodo = self.arbol
+        for parte in partes:
+            if not isinstance(nodo, dict) or parte not in nodo:
+                return None
+            nodo = nodo[parte]
+        return nodo
+    
+    def _escribir(self, partes: List[str], valor):
+        """Reemplaza el nodo (None borra y limpia los padres vacíos, como RTDB)"""
+        if not partes:
+            self.arbol = valor if isinstance(valor, dict) else {}
+            return
+        if valor is None:
+            camino = [self.arbol]
+            for parte in partes[:-1]:
+                siguiente = camino[-1].get(parte) if isinstance(camino[-1], dict) else None
+                if not isinstance(siguiente, dict):
+                    return
+                camino.append(siguiente)
+            camino[-1].pop(partes[-1], None)
+            # camino[i] es el nodo de partes[:i]
+            for i in range(len(camino) - 1, 0, -1):
+                if camino[i]:
+                    break
+                camino[i - 1].pop(partes[i - 1], None)
+            return
+        nodo = self.arbol
+        for parte in partes[:-1]:
+            if not isinstance(nodo.get(parte), dict):
+                nodo[parte] = {}
+            nodo = nodo[parte]
+        nodo[partes[-1]] = valor
+    
+    def _instantanea(self, valor) -> Optional[str]:
+        """Serializa el valor (bajo el lock) si se va a copiar o medir"""
+        self.estadisticas['lecturas'] += 1
+        if not (self.copiar or self.mb_por_segundo):
+            return None
+        texto = json.dumps(valor)
+        self.estadisticas['bytes_leidos'] += len(texto)
+        return texto
+    
+    def _entregar(self, valor, texto: Optional[str]) -> Any:
+        """Latencia simulada (fuera del lock) + el valor como lo deserializaría el SDK"""
+        self._esperar(len(texto) if texto else 0)
+        return json.loads(texto) if self.copiar and texto is not None else valor
+    
+    def _esperar(self, bytes_transferidos: int = 0):
+        demora = self.latencia_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        segundos = demora / 1000
+        if self.mb_por_segundo:
+            segundos += bytes_transferidos / (self.mb_por_segundo * 1024 * 1024)
+        if segundos > 0:
+            time.sleep(segundos)
+    
+    # Listeners
+    def _suscribir(self, ruta: str, callback) -> _Suscripcion:
+        with self.lock:
+            suscripcion = _Suscripcion(self, ruta, callback)
+            self.suscripciones.append(suscripcion)
+            valor = self._nodo(_partes(ruta))
+            suscripcion.cola.put(Event('put', '/', json.loads(json.dumps(valor)) if self.copiar else valor))
+        return suscripcion
+    
+    def _quitar_suscripcion(self, suscripcion: _Suscripcion):
+        with self.lock:
+            if suscripcion in self.suscripciones:
+                self.suscripciones.remove(suscripcion)
+    
+    def _eventos(self, escuchada: List[str], partes: List[str], tipo: str, datos) -> List[Event]:
+        """Eventos que recibe un listener en `escuchada` por una escritura en `partes`"""
+        if partes[:len(escuchada)] == escuchada:
+            # Escritura dentro del nodo escuchado: ruta relativa
+            return [Event(tipo, '/' + '/'.join(partes[len(escuchada):]), datos)]
+        if escuchada[:len(partes)] != partes:
+            return []
+        if tipo == 'patch':
+            # update() sobre un ancestro: cada clave se ve como un put propio
+            eventos = []
+            for clave, valor in datos.items():
+                eventos += self._eventos(escuchada, partes + _partes(clave), 'put', valor)
+            completos = [evento for evento in eventos if evento.path == '/']
+            return completos[-1:] or eventos
+        # set() sobre un ancestro: el listener recibe su nodo completo
+        return [Event('put', '/', self._nodo(escuchada))]
+    
+    def _notificar(self, partes: List[str], tipo: str, datos):
+        """Encola los eventos de cada listener afectado por una escritura en `partes`"""
+        for suscripcion in self.suscripciones:
+            for evento in self._eventos(_partes(suscripcion.ruta), partes, tipo, datos):
+                if self.copiar:
+                    evento.data = json.loads(json.dumps(evento.data))
+                self.estadisticas['eventos'] += 1
+                suscripcion.cola.put(evento)
+    
+    def esperar_listeners(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que todos los listeners procesaron sus eventos pendientes"""
+        limite = time.monotonic() + timeout if timeout else None
+        for suscripcion in list(self.suscripciones):
+            while suscripcion.cola.unfinished_tasks:
+                if limite and time.monotonic() > limite:
+                    return False
+                time.sleep(0.001)
+        return True
+    
+    def cerrar_listeners(self):
+        for suscripcion in list(self.suscripciones):
+            suscripcion.close()
+    
+    def generar_clave_push(self) -> str:
+        """Claves ordenadas por tiempo, como las de push() de Firebase"""
+        return f'-{int(time.time() * 1000):012x}{next(self._push):08x}'
+
+
+class Consulta:
+    """Equivalente a firebase_admin.db.Query"""
+    
+    def __init__(self, referencia: 'Referencia', orden: str, hijo: Optional[str] = None):
+        self.referencia = referencia
+        self.orden = orden
+        self.hijo = hijo
+        self.desde = None
+        self.hasta = None
+        self.primeros = None
+        self.ultimos = None
+    
+    def start_at(self, valor):
+        self.desde = valor
+        return self
+    
+    def end_at(self, valor):
+        self.hasta = valor
+        return self
+    
+    def equal_to(self, valor):
+        self.desde = self.hasta = valor
+        return self
+    
+    def limit_to_first(self, cantidad: int):
+        self.primeros = cantidad
+        return self
+    
+    def limit_to_last(self, cantidad: int):
+        self.ultimos = cantidad
+        return self
+    
+    def _criterio(self, clave: str, valor):
+        if self.orden == 'key':
+            return _orden_clave(clave)
+        if self.orden == 'value':
+            return _orden_valor(valor)
+        actual = valor
+        for parte in _partes(self.hijo):
+            actual = actual.get(parte) if isinstance(actual, dict) else None
+        return _orden_valor(actual)
+    
+    def _limite(self, valor):
+        return _orden_clave(str(valor)) if self.orden == 'key' else _orden_valor(valor)
+    
+    def get(self):
+        bd = self.referencia.bd
+        with bd.lock:
+            nodo = bd._nodo(_partes(self.referencia.path))
+            filas = sorted(
+                ((self._criterio(clave, valor), _orden_clave(clave), clave, valor)
+                 for clave, valor in (nodo.items() if isinstance(nodo, dict) else ())),
+                key=lambda fila: (fila[0], fila[1])
+            )
+            if self.desde is not None:
+                filas = [fila for fila in filas if fila[0] >= self._limite(self.desde)]
+            if self.hasta is not None:
+                filas = [fila for fila in filas if fila[0] <= self._limite(self.hasta)]
+            if self.primeros is not None:
+                filas = filas[:self.primeros]
+            if self.ultimos is not None:
+                filas = filas[-self.ultimos:] if self.ultimos else []
+            
+            seleccion = {clave: valor for _, _, clave, valor in filas}
+            texto = bd._instantanea(seleccion)
+        datos = bd._entregar(seleccion, texto)
+        if not isinstance(nodo, dict):
+            return nodo
+        return OrderedDict((clave, datos[clave]) for _, _, clave, _ in filas)
+
+
+class Referencia:
+    """Equivalente a firebase_admin.db.Reference"""
+    
+    def __init__(self, bd: BaseDatosLocal, path: str):
+        self.bd = bd
+        self.path = '/' + '/'.join(_partes(path))
+    
+    @property
+    def key(self) -> Optional[str]:
+        partes = _partes(self.path)
+        return partes[-1] if partes else None
+    
+    @property
+    def parent(self) -> Optional['Referencia']:
+        partes = _partes(self.path)
+        return Referencia(self.bd, '/'.join(partes[:-1])) if partes else None
+    
+    def child(self, path: str) -> 'Referencia':
+        return Referencia(self.bd, f'{self.path}/{path}')
+    
+    def get(self, etag: bool = False, shallow: bool = False):
+        with self.bd.lock:
+            nodo = self.bd._nodo(_partes(self.path))
+            if shallow and isinstance(nodo, dict):
+                # Solo las claves del primer nivel: objetos truncados a True
+                nodo = {clave: True if isinstance(valor, dict) else valor for clave, valor in nodo.items()}
+            texto = self.bd._instantanea(nodo)
+        valor = self.bd._entregar(nodo, texto)
+        return (valor, str(hash(json.dumps(valor, sort_keys=True)))) if etag else valor
+    
+    def set(self, value):
+        partes = _partes(self.path)
+        with self.bd.lock:
+            self.bd.estadisticas['escrituras'] += 1
+            self.bd._escribir(partes, json.loads(json.dumps(value)) if self.bd.copiar else value)
+            self.bd._notificar(partes, 'put', value)
+        self.bd._esperar()
+    
+    def update(self, value: Dict):
+        partes = _partes(self.path)
+        with self.bd.lock:
+            self.bd.estadisticas['escrituras'] += 1
+            for clave, valor in value.items():
+                self.bd._escribir(partes + _partes(clave), json.loads(json.dumps(valor)) if self.bd.copiar else valor)
+            self.bd._notificar(partes, 'patch', value)
+        self.bd._esperar()
+    
+    def push(self, value='') -> 'Referencia':
+        hijo = self.child(self.bd.generar_clave_push())
+        if value != '':
+            hijo.set(value)
+        return hijo
+    
+    def delete(self):
+        self.set(None)
+    
+    def listen(self, callback: Callable[[Event], None]) -> _Suscripcion:
+        return self.bd._suscribir(self.path, callback)
+    
+    def order_by_key(self) -> Consulta:
+        return Consulta(self, 'key')
+    
+    def order_by_value(self) -> Consulta:
+        return Consulta(self, 'value')
+    
+    def order_by_child(self, path: str) -> Consulta:
+        return Consulta(self, 'child', path)
+
+
+# Base de datos que retorna get_database() cuando está definida
+_bd_local: Optional[BaseDatosLocal] = None
+_bd_configurada: Optional[BaseDatosLocal] = None
+_lock_configuracion = threading.Lock()
+
+
+def usar_firebase_local(bd: Optional[BaseDatosLocal]):
+    """Activa (o con None desactiva) el emulador para todo el proceso"""
+    global _bd_local
+    _bd_local = bd
+
+
+def bd_configurada() -> BaseDatosLocal:
+    """Emulador según settings (FIREBASE_LOCAL_ARCHIVO, FIREBASE_LOCAL_LATENCIA_MS), creado una vez por proceso"""
+    global _bd_configurada
+    if _bd_configurada is None:
+        from django.conf import settings
+        with _lock_configuracion:
+            if _bd_configurada is None:
+                archivo = getattr(settings, 'FIREBASE_LOCAL_ARCHIVO', '')
+                arbol = {}
+                if archivo:
+                    with open(archivo, encoding='utf-8') as f:
+                        arbol = json.load(f)
+                _bd_configurada = BaseDatosLocal(arbol, latencia_ms=getattr(settings, 'FIREBASE_LOCAL_LATENCIA_MS', 0))
+                logger.info(f"🧪 Firebase local ({archivo or 'vacío'})")
+    return _bd_configurada
+
+
+def firebase_local_activo() -> Optional[BaseDatosLocal]:
+    """Emulador activado con usar_firebase_local() o, con FIREBASE_BACKEND='local', el configurado"""
+    if _bd_local is not None:
+        return _bd_local
+    from django.conf import settings
+    if getattr(settings, 'FIREBASE_BACKEND', 'firebase') == 'local':
+        return bd_configurada()
+    return None
@@ -10,17 +10,24 @@ Funciones principales:
 - get_daily_controls(device_id, date): Obtiene los controles del día
 - get_firebase_events(device_id, date): Obtiene eventos de un día específico
 - get_all_devices(): Lista todos los dispositivos registrados
+- get_database(): Módulo db de Firebase o el emulador local (services/firebase_local.py)
+
+firebase_admin se importa recién al usarlo (ver services/arranque.py);
+`firebase_auth` es firebase_admin.auth diferido.
 """
 
-import firebase_admin
-from firebase_admin import credentials, db
 from django.conf import settings
 import logging
 from datetime import datetime, date
 from typing import Dict, List, Optional
+from services.arranque import modulo_diferido
+from services.firebase_local import firebase_local_activo
 
 logger = logging.getLogger(__name__)
 
+firebase_auth = modulo_diferido('firebase_admin.auth')
+db = modulo_diferido('firebase_admin.db')
+
 # Variable global para mantener la instancia de Firebase
 _firebase_initialized = False
 
@@ -40,10 +47,13 @@ def initialize_firebase():
     """
     global _firebase_initialized
     
-    if _firebase_initialized:
+    if _firebase_initialized or firebase_local_activo() is not None:
         return True
     
     try:
+        import firebase_admin
+        from firebase_admin import credentials
+        
         # Intentar usar archivo de credenciales si existe
         creds_path = getattr(settings, 'FIREBASE_CREDENTIALS_PATH', None)
         if creds_path:
@@ -94,6 +104,17 @@ def initialize_firebase():
         return False
 
 
+def get_database():
+    """
+    Retorna el módulo firebase_admin.db o, si está activo (FIREBASE_BACKEND='local'
+    o benchmarks), el emulador en memoria con la misma interfaz.
+    
+    Example:
+        >>> ref = get_database().reference('/status')
+    """
+    return firebase_local_activo() or db
+
+
 def get_live_status(device_id: str) -> Optional[Dict]:
     """
     Obtiene el estado en vivo de un dispositivo desde Firebase.
@@ -118,7 +139,7 @@ def get_live_status(device_id: str) -> Optional[Dict]:
         initialize_firebase()
     
     try:
-        ref = db.reference(f'/status/{device_id}/live')
+        ref = get_database().reference(f'/status/{device_id}/live')
         data = ref.get()
         
         if data:
@@ -164,7 +185,7 @@ def get_daily_controls(device_id: str, target_date: date) -> List[Dict]:
         month = str(target_date.month).zfill(2)
         day = str(target_date.day).zfill(2)
         
-        ref = db.reference(f'/controles/{device_id}/{year}/{month}/{day}')
+        ref = get_database().reference(f'/controles/{device_id}/{year}/{month}/{day}')
         data = ref.get()
         
         if not data:
@@ -223,7 +244,7 @@ def get_firebase_events(device_id: str, target_date: date) -> List[Dict]:
         month = str(target_date.month).zfill(2)
         day = str(target_date.day).zfill(2)
         
-        ref = db.reference(f'/eventos/{device_id}/{year}/{month}/{day}')
+        ref = get_database().reference(f'/eventos/{device_id}/{year}/{month}/{day}')
         data = ref.get()
         
         if not data:
@@ -266,7 +287,7 @@ def get_all_devices() -> List[str]:
         initialize_firebase()
     
     try:
-        ref = db.reference('/status')
+        ref = get_database().reference('/status')
         data = ref.get()
         
         if not data:
@@ -311,7 +332,7 @@ def get_device_status_readings(device_id: str, target_date: date) -> List[Dict]:
         month = str(target_date.month).zfill(2)
         day = str(target_date.day).zfill(2)
         
-        ref = db.reference(f'/status/{device_id}/{year}/{month}/{day}')
+        ref = get_database().reference(f'/status/{device_id}/{year}/{month}/{day}')
         data = ref.get()
         
         if not data:
@@ -0,0 +1,378 @@
+"""
+Import Service
+
+Importación masiva de lecturas_temperatura y eventos_temperatura desde
+archivos de exportación, respaldo o archivo:
+
+- CSV (.csv, .csv.gz): exportar_lecturas, generar_datos_sinteticos
+- NDJSON (.ndjson, .ndjson.gz): exportar_lecturas, backup_monthly_data.py
+- Parquet (.parquet, requiere pyarrow): generar_datos_sinteticos, respaldos
+- Archivo de retención (.npz, solo lecturas): apps/lecturas/retencion.py
+
+Con conexión directa (SUPABASE_DIRECT_DB) cada archivo se carga con COPY a
+una tabla temporal y se fusiona con un único INSERT ... SELECT que descarta
+duplicados (dentro del archivo y contra la tabla). Sin conexión directa se
+hacen upserts por lotes grandes vía PostgREST.
+
+En los dos modos las filas se deduplican por (camara_id, timestamp) en
+lecturas y por firebase_event_id o (camara_id, fecha_inicio, tipo) en
+eventos; el id del archivo no se conserva. Vía PostgREST la segunda clave
+de eventos no tiene índice único: antes de cada upsert se descartan los
+eventos que ya existen con esa clave (ver _sin_eventos_existentes).
+
+Uso:
+    >>> from services.import_service import importar_archivo
+    >>> importar_archivo('respaldos/2025_12/lecturas_temperatura_DEVICE_001.ndjson.gz')
+    {'tabla': 'lecturas_temperatura', 'modo': 'copy', 'leidas': 44640, 'insertadas': 44640, 'segundos': 0.9}
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import csv
+import gzip
+import io
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from services.supabase_service import get_supabase_client, iterar_keyset
+
+try:
+    import pyarrow.parquet
+except ImportError:  # pyarrow es opcional (solo para Parquet)
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Columnas que se leen de los archivos (las demás se ignoran)
+COLUMNAS = {
+    'lecturas_temperatura': ['id', 'camara_id', 'timestamp', 'temperatura_c', 'origen', 'created_at'],
+    'eventos_temperatura': ['id', 'camara_id', 'firebase_event_id', 'fecha_inicio', 'fecha_fin', 'tipo', 'estado',
+                            'temp_max_c', 'duracion_minutos', 'observaciones', 'created_at'],
+}
+
+# Conversión de tipos para PostgREST (CSV trae todo como texto)
+TIPOS = {
+    'id': int,
+    'camara_id': int,
+    'temperatura_c': float,
+    'temp_max_c': float,
+    'duracion_minutos': int,
+}
+
+# Fusión desde la tabla temporal: un INSERT ... SELECT por archivo
+FUSION = {
+    'lecturas_temperatura': '''
+        INSERT INTO lecturas_temperatura (camara_id, "timestamp", temperatura_c, origen, created_at)
+        SELECT DISTINCT ON (s.camara_id, s."timestamp")
+            s.camara_id, s."timestamp", s.temperatura_c, coalesce(s.origen, %(origen)s), coalesce(s.created_at, now())
+        FROM importacion_staging s
+        WHERE s.camara_id IS NOT NULL AND s."timestamp" IS NOT NULL AND s.temperatura_c IS NOT NULL
+          AND EXISTS (SELECT 1 FROM camaras_frio c WHERE c.id = s.camara_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM lecturas_temperatura l
+              WHERE l.camara_id = s.camara_id AND l."timestamp" = s."timestamp"
+          )
+        ORDER BY s.camara_id, s."timestamp"
+    ''',
+    'eventos_temperatura': '''
+        INSERT INTO eventos_temperatura (camara_id, firebase_event_id, fecha_inicio, fecha_fin, tipo, estado,
+                                         temp_max_c, duracion_minutos, observaciones, created_at)
+        SELECT DISTINCT ON (s.camara_id, s.fecha_inicio, s.tipo)
+            s.camara_id, s.firebase_event_id, s.fecha_inicio, s.fecha_fin, s.tipo,
+            coalesce(s.estado, 'RESUELTO'), coalesce(s.temp_max_c, 0), s.duracion_minutos, s.observaciones,
+            coalesce(s.created_at, now())
+        FROM importacion_staging s
+        WHERE s.camara_id IS NOT NULL AND s.fecha_inicio IS NOT NULL AND s.tipo IS NOT NULL
+          AND EXISTS (SELECT 1 FROM camaras_frio c WHERE c.id = s.camara_id)
+          AND NOT EXISTS (
+              SELECT 1 FROM eventos_temperatura e
+              WHERE s.firebase_event_id IS NOT NULL AND e.firebase_event_id = s.firebase_event_id
+          )
+          AND NOT EXISTS (
+              SELECT 1 FROM eventos_temperatura e
+              WHERE e.camara_id = s.camara_id AND e.fecha_inicio = s.fecha_inicio AND e.tipo = s.tipo
+          )
+        ORDER BY s.camara_id, s.fecha_inicio, s.tipo
+    ''',
+}
+
+CONFLICTOS = {
+    'lecturas_temperatura': 'camara_id,timestamp',
+    'eventos_temperatura': 'firebase_event_id',
+}
+
+# Filas por upsert en el modo PostgREST
+FILAS_POR_LOTE = 5000
+
+# Cada cuántas filas se reporta el avance
+FILAS_POR_REPORTE = 100_000
+
+
+def tabla_de_archivo(ruta: Path) -> str:
+    """lecturas_temperatura salvo que el nombre del archivo mencione eventos"""
+    return 'eventos_temperatura' if 'evento' in ruta.name.lower() else 'lecturas_temperatura'
+
+
+def _abrir_texto(ruta: Path):
+    if ruta.name.endswith('.gz'):
+        return gzip.open(ruta, 'rt', encoding='utf-8', newline='')
+    return open(ruta, 'r', encoding='utf-8', newline='')
+
+
+def leer_filas(ruta: Path) -> Iterator[Dict]:
+    """Filas (dicts) de un archivo, según su extensión"""
+    nombre = ruta.name.lower()
+    if nombre.endswith(('.csv', '.csv.gz')):
+        with _abrir_texto(ruta) as archivo:
+            yield from csv.DictReader(archivo)
+    elif nombre.endswith(('.ndjson', '.ndjson.gz', '.jsonl', '.jsonl.gz')):
+        with _abrir_texto(ruta) as archivo:
+            for linea in archivo:
+                if linea.strip():
+                    yield json.loads(linea)
+    elif nombre.endswith('.parquet'):
+        if pyarrow is None:
+            raise ImportError("La importación de Parquet requiere pyarrow (pip install pyarrow)")
+        for lote in pyarrow.parquet.ParquetFile(ruta).iter_batches(batch_size=FILAS_POR_REPORTE):
+            yield from lote.to_pylist()
+    elif nombre.endswith('.npz'):
+        from apps.lecturas.retencion import MesLecturas, filas_lecturas
+        archivo = MesLecturas.desde_bytes(None, ruta.read_bytes())
+        yield from filas_lecturas(archivo.columnas)
+    else:
+        raise ValueError(f"Formato no soportado: {ruta.name}")
+
+
+def _valor_texto(valor):
+    """Valor para COPY (CSV): None → vacío (NULL), fechas en ISO"""
+    if valor is None:
+        return None
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _normalizar(fila: Dict, columnas: List[str]) -> Dict:
+    """Fila para PostgREST: solo columnas conocidas, tipos convertidos, sin id"""
+    normalizada = {}
+    for columna in columnas:
+        if columna == 'id' or columna not in fila:
+            continue
+        valor = fila[columna]
+        if valor == '':
+            valor = None
+        elif isinstance(valor, (datetime, date)):
+            valor = valor.isoformat()
+        elif isinstance(valor, Decimal):
+            valor = float(valor)
+        elif valor is not None and columna in TIPOS:
+            # int(float()) acepta '12' y '12.0'
+            valor = TIPOS[columna](float(valor))
+        normalizada[columna] = valor
+    return normalizada
+
+
+class _Avance:
+    """Cuenta filas y llama al callback cada FILAS_POR_REPORTE"""
+    
+    def __init__(self, progreso: Optional[Callable[[int, float], None]]):
+        self.progreso = progreso
+        self.filas = 0
+        self.siguiente = FILAS_POR_REPORTE
+        self.inicio = time.perf_counter()
+    
+    def sumar(self, filas: int):
+        self.filas += filas
+        if self.progreso and self.filas >= self.siguiente:
+            self.siguiente = self.filas + FILAS_POR_REPORTE
+            self.progreso(self.filas, time.perf_counter() - self.inicio)
+
+
+class _FlujoCsv:
+    """
+    Archivo de solo lectura que genera CSV a partir de filas, para COPY
+    FROM STDIN sin armar todo el texto en memoria.
+    """
+    
+    def __init__(self, filas: Iterable[Dict], columnas: List[str], avance: _Avance):
+        self.filas = iter(filas)
+        self.columnas = columnas
+        self.avance = avance
+        self.pendiente = b''
+        self.buffer = io.StringIO()
+        self.escritor = csv.writer(self.buffer, lineterminator='\n')
+    
+    def _bloque(self) -> bytes:
+        filas = 0
+        for fila in self.filas:
+            self.escritor.writerow([_valor_texto(fila.get(columna)) for columna in self.columnas])
+            filas += 1
+            if filas >= 10_000:
+                break
+        self.avance.sumar(filas)
+        texto = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate(0)
+        return texto.encode('utf-8')
+    
+    def read(self, tamano: int = -1) -> bytes:
+        while tamano < 0 or len(self.pendiente) < tamano:
+            bloque = self._bloque()
+            if not bloque:
+                break
+            self.pendiente += bloque
+        if tamano < 0:
+            tamano = len(self.pendiente)
+        datos, self.pendiente = self.pendiente[:tamano], self.pendiente[tamano:]
+        return datos
+
+
+def _importar_copy(filas: Iterator[Dict], tabla: str, origen: str, avance: _Avance) -> int:
+    """COPY a una tabla temporal y fusión deduplicada; retorna las filas insertadas"""
+    primera = next(filas, None)
+    if primera is None:
+        return 0
+    columnas = [columna for columna in COLUMNAS[tabla] if columna in primera]
+    
+    def todas():
+        yield primera
+        yield from filas
+    
+    lista = ', '.join(f'"{columna}"' for columna in COLUMNAS[tabla])
+    copiadas = ', '.join(f'"{columna}"' for columna in columnas)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Sin restricciones NOT NULL ni defaults: la fusión decide qué se descarta
+        cursor.execute(
+            f'CREATE TEMP TABLE importacion_staging ON COMMIT DROP AS '
+            f'SELECT {lista} FROM {tabla} WITH NO DATA'
+        )
+        cursor.copy_expert(
+            f'COPY importacion_staging ({copiadas}) FROM STDIN WITH (FORMAT csv)',
+            _FlujoCsv(todas(), columnas, avance),
+            size=1 << 20
+        )
+        cursor.execute('ANALYZE importacion_staging')
+        cursor.execute(FUSION[tabla], {'origen': origen})
+        return cursor.rowcount
+
+
+def _clave_evento(evento: Dict) -> tuple:
+    """(camara_id, fecha_inicio, tipo), con la fecha como 'YYYY-MM-DDTHH:MM:SS'"""
+    return (int(evento['camara_id']), str(evento['fecha_inicio'])[:19].replace(' ', 'T'), evento['tipo'])
+
+
+def _sin_eventos_existentes(client, eventos: List[Dict], vistas: set) -> List[Dict]:
+    """
+    Descarta los eventos cuya (camara_id, fecha_inicio, tipo) ya está en la
+    tabla o apareció antes en el archivo (`vistas`, se actualiza). Es la
+    deduplicación de la fusión COPY que no cubre el upsert por
+    firebase_event_id (p. ej. eventos con firebase_event_id NULL).
+    """
+    validos = [e for e in eventos if e.get('camara_id') is not None and e.get('fecha_inicio') and e.get('tipo')]
+    if not validos:
+        return []
+    
+    claves = [_clave_evento(evento) for evento in validos]
+    camaras = sorted({clave[0] for clave in claves})
+    desde = min(clave[1] for clave in claves)
+    hasta = max(clave[1] for clave in claves)
+    existentes = iterar_keyset(
+        'eventos_temperatura',
+        'id, camara_id, fecha_inicio, tipo',
+        lambda q: q.in_('camara_id', camaras).gte('fecha_inicio', desde).lte('fecha_inicio', hasta),
+        client=client
+    )
+    vistas.update(_clave_evento(evento) for evento in existentes)
+    
+    nuevos = []
+    for evento, clave in zip(validos, claves):
+        if clave not in vistas:
+            vistas.add(clave)
+            nuevos.append(evento)
+    return nuevos
+
+
+def _importar_postgrest(filas: Iterator[Dict], tabla: str, origen: str, avance: _Avance,
+                        lote: int = FILAS_POR_LOTE) -> int:
+    """Upserts por lotes; los duplicados se ignoran (requiere respaldos_mensuales.sql)"""
+    client = get_supabase_client(use_service_key=True)
+    enviadas = 0
+    pendientes = []
+    eventos_vistos = set()
+    
+    def enviar():
+        filas_lote = pendientes
+        if tabla == 'eventos_temperatura':
+            filas_lote = _sin_eventos_existentes(client, pendientes, eventos_vistos)
+        if filas_lote:
+            client.table(tabla)\
+                .upsert(filas_lote, on_conflict=CONFLICTOS[tabla], ignore_duplicates=True)\
+                .execute()
+        avance.sumar(len(pendientes))
+    
+    for fila in filas:
+        normalizada = _normalizar(fila, COLUMNAS[tabla])
+        if tabla == 'lecturas_temperatura':
+            normalizada.setdefault('origen', origen)
+        pendientes.append(normalizada)
+        if len(pendientes) >= lote:
+            enviar()
+            enviadas += len(pendientes)
+            pendientes = []
+    if pendientes:
+        enviar()
+        enviadas += len(pendientes)
+    return enviadas
+
+
+def usa_copy() -> bool:
+    return settings.SUPABASE_DIRECT_DB and connection.vendor == 'postgresql'
+
+
+def importar_archivo(ruta, tabla: Optional[str] = None, origen: str = 'importacion',
+                     progreso: Optional[Callable[[int, float], None]] = None,
+                     lote: int = FILAS_POR_LOTE) -> Dict:
+    """
+    Importa un archivo en lecturas_temperatura o eventos_temperatura.
+    
+    Args:
+        ruta: Archivo CSV / NDJSON / Parquet / npz
+        tabla: Tabla destino (por defecto según el nombre del archivo)
+        origen: Valor de `origen` para lecturas que no lo traen
+        progreso: Callback (filas leídas, segundos) cada FILAS_POR_REPORTE filas
+        lote: Filas por upsert en el modo PostgREST
+    
+    Returns:
+        Dict con tabla, modo, leidas, insertadas (None en PostgREST: el
+        upsert no informa cuántas eran nuevas) y segundos
+    """
+    ruta = Path(ruta)
+    tabla = tabla or tabla_de_archivo(ruta)
+    if tabla not in COLUMNAS:
+        raise ValueError(f"Tabla no soportada: {tabla}")
+    
+    avance = _Avance(progreso)
+    filas = leer_filas(ruta)
+    if usa_copy():
+        modo = 'copy'
+        insertadas = _importar_copy(filas, tabla, origen, avance)
+    else:
+        modo = 'postgrest'
+        _importar_postgrest(filas, tabla, origen, avance, lote)
+        insertadas = None
+    
+    segundos = time.perf_counter() - avance.inicio
+    logger.info(f"Importación {ruta.name} → {tabla} ({modo}): {avance.filas} filas en {segundos:.1f}s")
+    return {
+        'tabla': tabla,
+        'modo': modo,
+        'leidas': avance.filas,
+        'insertadas': insertadas,
+        'segundos': segundos,
+    }
@@ -0,0 +1,172 @@
+"""
+Ejecución concurrente de consultas independientes
+
+Las vistas del dashboard hacen varias consultas que no dependen entre sí
+(p. ej. el período actual, el período anterior y el cumplimiento del
+análisis ejecutivo). Ejecutarlas en serie suma todas las latencias; aquí se
+lanzan en un pool de hilos compartido por el proceso, así la vista tarda
+aproximadamente lo que la consulta más lenta.
+
+- Límite por request: a lo más PARALELO_MAX_POR_REQUEST tareas de un mismo
+  request en curso a la vez (el resto espera su turno)
+- Timeout: las tareas que no terminan en PARALELO_TIMEOUT_S segundos se
+  reportan como error y su resultado se descarta. Las que no alcanzaron a
+  empezar se cancelan, y las que siguen corriendo ven el plazo vencido en
+  tiempo_restante(): el registro de Supabase lo usa para acotar el timeout
+  HTTP de cada consulta y para no lanzar consultas nuevas, así el hilo del
+  pool se libera poco después del plazo
+- Resultados parciales: el error de una tarea no afecta a las demás; la
+  vista decide qué responder para las que fallaron
+
+Cada tarea corre con una copia del contexto del request (contextvars), así
+las consultas se siguen atribuyendo al endpoint en la instrumentación de
+Supabase, y al terminar libera su conexión de Django si ya caducó. Si el
+request se está perfilando (apps/monitoring/profiler.py), la tarea anota su
+hilo mientras corre para que el profiler también lo muestree.
+
+No anidar: una tarea no debe llamar a ejecutar_en_paralelo (podría esperar
+hilos del mismo pool).
+
+Uso:
+    >>> resultado = ejecutar_en_paralelo({
+    ...     'camaras': lambda: client.table('camaras_frio').select('id').execute(),
+    ...     'eventos': lambda: client.table('eventos_temperatura').select('id').execute(),
+    ... })
+    >>> resultado.valores['camaras'], resultado.errores
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Optional
+from django.conf import settings
+from django.db import close_old_connections
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Hilos del pool que ejecutan tareas del request en curso (id → nombre)
+_hilos_del_request: ContextVar[Optional[Dict[int, str]]] = ContextVar('paralelo_hilos', default=None)
+
+# Instante (time.monotonic) en que vence el plazo de la tarea en curso
+_fin_tarea: ContextVar[Optional[float]] = ContextVar('paralelo_fin', default=None)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.PARALELO_MAX_HILOS,
+                thread_name_prefix='paralelo'
+            )
+        return _pool
+
+
+def registrar_hilos(hilos: Dict[int, str]):
+    """
+    Las tareas lanzadas desde el contexto actual anotan su hilo en `hilos`
+    mientras corren (lo usa el profiler). Retorna el token para
+    dejar_de_registrar_hilos.
+    """
+    return _hilos_del_request.set(hilos)
+
+
+def dejar_de_registrar_hilos(token):
+    _hilos_del_request.reset(token)
+
+
+def tiempo_restante() -> Optional[float]:
+    """
+    Segundos que le quedan a la tarea paralela en curso (negativo si ya
+    venció), o None fuera de ejecutar_en_paralelo.
+    """
+    fin = _fin_tarea.get()
+    return None if fin is None else fin - time.monotonic()
+
+
+def _ejecutar(tarea: Callable[[], Any], fin: float) -> Any:
+    _fin_tarea.set(fin)
+    hilos = _hilos_del_request.get()
+    hilo = threading.get_ident()
+    if hilos is not None:
+        hilos[hilo] = threading.current_thread().name
+    try:
+        return tarea()
+    finally:
+        if hilos is not None:
+            hilos.pop(hilo, None)
+        close_old_connections()
+
+
+class ResultadoParalelo:
+    """Valores de las tareas que terminaron y errores de las que no"""
+    
+    __slots__ = ('valores', 'errores')
+    
+    def __init__(self):
+        self.valores: Dict[str, Any] = {}
+        self.errores: Dict[str, Exception] = {}
+    
+    @property
+    def parcial(self) -> bool:
+        return bool(self.errores)
+
+
+def ejecutar_en_paralelo(tareas: Dict[str, Callable[[], Any]], timeout: Optional[float] = None,
+                         max_concurrencia: Optional[int] = None) -> ResultadoParalelo:
+    """
+    Ejecuta las tareas concurrentemente y espera a que terminen.
+    
+    Args:
+        tareas: Nombre → función sin argumentos
+        timeout: Segundos para el conjunto (default: PARALELO_TIMEOUT_S)
+        max_concurrencia: Tareas en curso a la vez (default: PARALELO_MAX_POR_REQUEST)
+    
+    Returns:
+        ResultadoParalelo; una tarea que lanzó una excepción o no terminó a
+        tiempo queda en `errores` (TimeoutError en el segundo caso)
+    """
+    timeout = settings.PARALELO_TIMEOUT_S if timeout is None else timeout
+    limite = max(1, max_concurrencia or settings.PARALELO_MAX_POR_REQUEST)
+    resultado = ResultadoParalelo()
+    
+    pool = _get_pool()
+    pendientes = list(tareas.items())
+    en_curso = {}
+    fin = time.monotonic() + timeout
+    
+    while pendientes or en_curso:
+        while pendientes and len(en_curso) < limite:
+            nombre, tarea = pendientes.pop(0)
+            en_curso[pool.submit(copy_context().run, _ejecutar, tarea, fin)] = nombre
+        
+        terminadas, _ = wait(en_curso, timeout=max(fin - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not terminadas:
+            break
+        
+        for futuro in terminadas:
+            nombre = en_curso.pop(futuro)
+            try:
+                resultado.valores[nombre] = futuro.result()
+            except Exception as e:
+                logger.error(f"Error en tarea paralela '{nombre}': {str(e)}")
+                resultado.errores[nombre] = e
+    
+    # Tiempo agotado: se descartan las que siguen en curso o sin lanzar. cancel()
+    # solo evita que arranquen las que aún esperan un hilo; las que ya corren
+    # terminan en su siguiente consulta a Supabase (ver tiempo_restante)
+    for futuro, nombre in en_curso.items():
+        futuro.cancel()
+        resultado.errores[nombre] = TimeoutError(f'{nombre} excedió {timeout}s')
+    for nombre, _ in pendientes:
+        resultado.errores[nombre] = TimeoutError(f'{nombre} no alcanzó a ejecutarse en {timeout}s')
+    if en_curso or pendientes:
+        logger.warning(f"Tareas paralelas sin terminar tras {timeout}s: {', '.join(n for n in tareas if n in resultado.errores)}")
+    
+    return resultado
@@ -0,0 +1,329 @@
+"""
+Instrumentación de consultas a Supabase
+
+Envuelve el cliente de Supabase para medir cada `.execute()`:
+- Tabla (o función RPC) y operación (select, insert, update, ...)
+- Filtros aplicados (solo columna y operador, sin valores)
+- Latencia, filas retornadas y bytes aproximados de la respuesta (estimados
+  desde la primera fila)
+- Vista (o función, fuera de un request) que originó la consulta
+
+Las mediciones se acumulan en dos lugares:
+- El contexto del request actual (contextvars), que el middleware de
+  apps.monitoring usa para el header `Server-Timing`
+- El registro global `metricas`, con histogramas de latencia por endpoint
+  y por tabla, expuesto en /api/monitoring/metrics/
+
+Uso:
+    >>> client = instrumentar(create_client(url, key))
+    >>> client.table('camaras_frio').select('id').eq('activa', True).execute()
+"""
+
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import json
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores de los buckets del histograma de latencia (ms)
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+# Métodos del query builder que se registran como filtros
+METODOS_FILTRO = {
+    'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'is_', 'in_',
+    'contains', 'contained_by', 'match', 'or_', 'not_', 'filter',
+    'order', 'limit', 'range', 'single', 'maybe_single'
+}
+METODOS_OPERACION = {'select', 'insert', 'update', 'upsert', 'delete'}
+
+# Origen de las consultas cuyo llamador no se puede determinar
+SIN_REQUEST = '<background>'
+
+
+class ContextoRequest:
+    """Consultas hechas durante un request"""
+    
+    __slots__ = ('endpoint', 'consultas')
+    
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.consultas: List[Dict] = []
+    
+    def tiempo_total_ms(self) -> float:
+        return sum(c['ms'] for c in self.consultas)
+    
+    def tiempo_por_tabla(self) -> Dict[str, float]:
+        tiempos: Dict[str, float] = {}
+        for consulta in self.consultas:
+            tiempos[consulta['tabla']] = tiempos.get(consulta['tabla'], 0.0) + consulta['ms']
+        return tiempos
+
+
+_contexto: ContextVar[Optional[ContextoRequest]] = ContextVar('supabase_contexto', default=None)
+
+
+def iniciar_contexto(endpoint: str):
+    """Abre el contexto de un request; retorna el token para cerrarlo"""
+    return _contexto.set(ContextoRequest(endpoint))
+
+
+def contexto_actual() -> Optional[ContextoRequest]:
+    return _contexto.get()
+
+
+def cerrar_contexto(token):
+    _contexto.reset(token)
+
+
+class Histograma:
+    """Histograma acumulado con buckets fijos"""
+    
+    __slots__ = ('conteos', 'n', 'suma_ms', 'max_ms', 'filas', 'bytes')
+    
+    def __init__(self):
+        self.conteos = [0] * len(BUCKETS_MS)
+        self.n = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+        self.filas = 0
+        self.bytes = 0
+    
+    def agregar(self, ms: float, filas: int = 0, tamano: int = 0):
+        for i, limite in enumerate(BUCKETS_MS):
+            if ms <= limite:
+                self.conteos[i] += 1
+                break
+        self.n += 1
+        self.suma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.filas += filas
+        self.bytes += tamano
+    
+    def percentil(self, p: float) -> Optional[float]:
+        """Percentil aproximado (límite superior del bucket)"""
+        if not self.n:
+            return None
+        objetivo = p / 100 * self.n
+        acumulado = 0
+        for limite, conteo in zip(BUCKETS_MS, self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return self.max_ms if limite == float('inf') else limite
+        return self.max_ms
+    
+    def to_dict(self) -> Dict:
+        return {
+            'llamadas': self.n,
+            'total_ms': round(self.suma_ms, 1),
+            'promedio_ms': round(self.suma_ms / self.n, 1) if self.n else None,
+            'p50_ms': self.percentil(50),
+            'p95_ms': self.percentil(95),
+            'max_ms': round(self.max_ms, 1),
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'buckets': {
+                ('+Inf' if limite == float('inf') else str(limite)): conteo
+                for limite, conteo in zip(BUCKETS_MS, self.conteos)
+            }
+        }
+
+
+class RegistroMetricas:
+    """
+    Agregados por endpoint:
+    - `requests`: tiempo total de base de datos por request
+    - `consultas`: latencia de cada consulta, separada por tabla
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[str, Histograma] = {}
+        self._consultas: Dict[tuple, Histograma] = {}
+        self._filtros: Dict[tuple, set] = {}
+    
+    def registrar_consulta(self, endpoint: str, consulta: Dict):
+        clave = (endpoint, consulta['tabla'], consulta['operacion'])
+        with self._lock:
+            self._registrar_consulta(clave, consulta)
+    
+    def registrar_request(self, contexto: ContextoRequest):
+        """Registra el tiempo de base de datos de un request y cada una de sus consultas"""
+        with self._lock:
+            histograma = self._requests.get(contexto.endpoint)
+            if histograma is None:
+                histograma = self._requests[contexto.endpoint] = Histograma()
+            histograma.agregar(contexto.tiempo_total_ms(), len(contexto.consultas))
+            
+            for consulta in contexto.consultas:
+                clave = (contexto.endpoint, consulta['tabla'], consulta['operacion'])
+                self._registrar_consulta(clave, consulta)
+    
+    def _registrar_consulta(self, clave: tuple, consulta: Dict):
+        histograma = self._consultas.get(clave)
+        if histograma is None:
+            histograma = self._consultas[clave] = Histograma()
+            self._filtros[clave] = set()
+        histograma.agregar(consulta['ms'], consulta['filas'], consulta['bytes'])
+        if len(self._filtros[clave]) < 20:
+            self._filtros[clave].add(','.join(consulta['filtros']))
+    
+    def snapshot(self) -> Dict:
+        """Métricas ordenadas por tiempo total de base de datos"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, histograma in self._requests.items():
+                datos = histograma.to_dict()
+                datos['consultas_por_request'] = round(histograma.filas / histograma.n, 1) if histograma.n else 0
+                del datos['filas'], datos['bytes']
+                datos['tablas'] = []
+                endpoints[endpoint] = datos
+            
+            for (endpoint, tabla, operacion), histograma in self._consultas.items():
+                destino = endpoints.setdefault(endpoint, {'tablas': []})
+                destino['tablas'].append({
+                    'tabla': tabla,
+                    'operacion': operacion,
+                    'filtros': sorted(self._filtros[(endpoint, tabla, operacion)]),
+                    **histograma.to_dict()
+                })
+        
+        for datos in endpoints.values():
+            datos['tablas'].sort(key=lambda t: t['total_ms'], reverse=True)
+            datos['db_total_ms'] = round(sum(t['total_ms'] for t in datos['tablas']), 1)
+        
+        return dict(sorted(endpoints.items(), key=lambda e: e[1]['db_total_ms'], reverse=True))
+    
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._consultas.clear()
+            self._filtros.clear()
+
+
+# Registro compartido por el proceso
+metricas = RegistroMetricas()
+
+
+def _llamador() -> str:
+    """Función fuera de las librerías de Supabase que hizo la consulta"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        modulo = frame.f_globals.get('__name__', '')
+        if not modulo.startswith(('postgrest', 'supabase', 'httpx', 'services.supabase_service', __name__)):
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return SIN_REQUEST
+
+
+def _tamano_respuesta(data, filas: int) -> int:
+    """
+    Bytes aproximados del JSON de la respuesta: tamaño de la primera fila por
+    la cantidad de filas. No serializa la respuesta completa, que en páginas
+    grandes costaba casi tanto CPU como decodificarla.
+    """
+    if not data:
+        return 0
+    muestra = data[0] if isinstance(data, list) else data
+    try:
+        return (len(json.dumps(muestra, separators=(',', ':'), default=str)) + 1) * filas + 1
+    except (TypeError, ValueError):
+        return 0
+
+
+class QueryInstrumentada:
+    """Proxy de un query builder de postgrest que mide `.execute()`"""
+    
+    def __init__(self, builder, tabla: str, operacion: str = 'select', filtros: Optional[List[str]] = None):
+        self._builder = builder
+        self._tabla = tabla
+        self._operacion = operacion
+        self._filtros = filtros or []
+    
+    def __getattr__(self, nombre):
+        atributo = getattr(self._builder, nombre)
+        if not callable(atributo):
+            return atributo
+        
+        def llamada(*args, **kwargs):
+            resultado = atributo(*args, **kwargs)
+            if not hasattr(resultado, 'execute'):
+                return resultado
+            
+            operacion = nombre if nombre in METODOS_OPERACION else self._operacion
+            filtros = self._filtros
+            if nombre in METODOS_FILTRO:
+                columna = args[0] if args and isinstance(args[0], str) and nombre not in ('limit', 'range') else ''
+                filtros = filtros + [f"{nombre.rstrip('_')}:{columna}" if columna else nombre.rstrip('_')]
+            return QueryInstrumentada(resultado, self._tabla, operacion, filtros)
+        
+        return llamada
+    
+    def execute(self):
+        inicio = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+        
+        data = getattr(response, 'data', None)
+        filas = len(data) if isinstance(data, list) else (1 if data else 0)
+        _registrar(self._tabla, self._operacion, self._filtros, inicio, ms, filas, _tamano_respuesta(data, filas))
+        return response
+
+
+def _registrar(tabla: str, operacion: str, filtros: List[str], inicio: float, ms: float,
+               filas: int, tamano: int):
+    """
+    Dentro de un request la consulta se guarda en el contexto (el middleware
+    la registra al final, con el endpoint ya resuelto). Fuera de un request
+    se registra de inmediato bajo la función que la hizo.
+    """
+    consulta = {
+        'tabla': tabla,
+        'operacion': operacion,
+        'filtros': filtros,
+        'inicio': inicio,  # time.perf_counter() al empezar (línea de tiempo del profiler)
+        'ms': ms,
+        'filas': filas,
+        'bytes': tamano
+    }
+    contexto = _contexto.get()
+    if contexto is not None:
+        contexto.consultas.append(consulta)
+        return
+    
+    try:
+        metricas.registrar_consulta(_llamador(), consulta)
+    except Exception as e:
+        logger.debug(f"No se pudo registrar métrica de {tabla}: {str(e)}")
+
+
+class ClienteInstrumentado:
+    """Proxy del Client de Supabase: instrumenta table(), from_() y rpc()"""
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def table(self, nombre: str) -> QueryInstrumentada:
+        return QueryInstrumentada(self._client.table(nombre), nombre)
+    
+    def from_(self, nombre: str) -> QueryInstrumentada:
+        return QueryInstrumentada(self._client.from_(nombre), nombre)
+    
+    def rpc(self, funcion: str, params: Optional[Dict] = None, *args, **kwargs) -> QueryInstrumentada:
+        builder = self._client.rpc(funcion, params or {}, *args, **kwargs)
+        return QueryInstrumentada(builder, f'rpc:{funcion}', 'rpc')
+    
+    def __getattr__(self, nombre):
+        return getattr(self._client, nombre)
+
+
+def instrumentar(client):
+    """Envuelve un cliente de Supabase (no vuelve a envolver uno ya instrumentado)"""
+    if isinstance(client, ClienteInstrumentado):
+        return client
+    return ClienteInstrumentado(client)
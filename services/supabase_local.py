@@ -0,0 +1,946 @@
+"""
+Supabase Local (en memoria)
+
+Reemplazo en proceso del cliente de Supabase para benchmarks y pruebas de
+carga sin red. Implementa el subconjunto del query builder de postgrest que
+usa este repo, con la misma semántica que PostgREST:
+
+- select('a, b', count='exact', head=True), con recursos embebidos
+  (`camaras_frio(id, nombre)`, `camaras_frio!inner(sucursal_id)`,
+  `sucursal:sucursales(id, nombre)`) y filtros sobre ellos
+  (`.eq('camaras_frio.sucursal_id', 1)`)
+- eq, neq, gt, gte, lt, lte, in_, is_, like, ilike, not_, or_, filter, match
+- order, limit, range
+- insert, update, upsert, delete
+- Límite de 1000 filas por respuesta (max_rows por defecto de Supabase)
+
+Las relaciones se resuelven por convención de claves foráneas
+(eventos_temperatura.camara_id → camaras_frio.id, etc., ver CLAVES_FORANEAS).
+
+También traduce las llamadas REST crudas (`requests.get(f'{url}/rest/v1/...')`)
+con `responder_rest`, y las sirve por HTTP con `ServidorRest`.
+
+Formas de usarlo:
+- SUPABASE_BACKEND='local' en settings: get_supabase_client() retorna el
+  cliente local (persistido en SUPABASE_LOCAL_DB si está definido) y el
+  proceso levanta un ServidorRest para las llamadas REST crudas
+- `python manage.py supabase_local`: servidor independiente; con
+  SUPABASE_URL=http://127.0.0.1:54321 el cliente real de supabase-py lo usa
+  sin cambios (sirve para varios workers de gunicorn)
+- En código (benchmarks):
+    >>> from services.supabase_local import ClienteLocal, usar_cliente_local
+    >>> cliente = ClienteLocal({'camaras_frio': [{'id': 1, 'nombre': 'C1', 'activa': True}]})
+    >>> usar_cliente_local(cliente)   # get_supabase_client() retorna este cliente
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import json
+import logging
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_FILAS = 1000
+
+# Columnas con índice ordenado para filtros de rango (gt, gte, lt, lte)
+COLUMNAS_RANGO = ('timestamp', 'fecha_inicio', 'fecha')
+
+# Tabla → columna con la que otras tablas la referencian
+CLAVES_FORANEAS = {
+    'sucursales': 'sucursal_id',
+    'camaras_frio': 'camara_id',
+    'usuarios': 'usuario_id',
+    'eventos_temperatura': 'evento_id',
+}
+
+
+class ErrorLocal(Exception):
+    """Error con el formato de postgrest.APIError (message, code)"""
+    
+    def __init__(self, message: str, code: str = 'PGRST000'):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class RespuestaLocal:
+    """Equivalente a postgrest.APIResponse"""
+    
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class Tabla:
+    """
+    Filas ordenadas por id, con índices hash por columna que se construyen
+    la primera vez que se filtra por igualdad sobre esa columna, e índices
+    ordenados (para bisect) la primera vez que se filtra por rango sobre una
+    columna de COLUMNAS_RANGO.
+    """
+    
+    def __init__(self, nombre: str, filas: Iterable[Dict] = ()):
+        self.nombre = nombre
+        self.filas: List[Dict] = []
+        self.ids: List[int] = []
+        self.columnas = set()
+        self.siguiente_id = 1
+        self._indices: Dict[str, Dict[Any, List[int]]] = {}
+        # Columna → (valores comparables ordenados, posición de cada uno)
+        self._ordenados: Dict[str, Tuple[List, List[int]]] = {}
+        for fila in filas:
+            self.insertar(dict(fila))
+    
+    def insertar(self, fila: Dict) -> Dict:
+        if fila.get('id') is None:
+            fila['id'] = self.siguiente_id
+        fila.setdefault('created_at', datetime.now().isoformat())
+        self.siguiente_id = max(self.siguiente_id, fila['id'] + 1)
+        self.columnas.update(fila)
+        
+        if self.ids and fila['id'] <= self.ids[-1]:
+            # Id explícito fuera de orden: insertar en su lugar y descartar índices
+            posicion = bisect_left(self.ids, fila['id'])
+            if posicion < len(self.ids) and self.ids[posicion] == fila['id']:
+                raise ErrorLocal(f'duplicate key value violates unique constraint "{self.nombre}_pkey"', '23505')
+            self.ids.insert(posicion, fila['id'])
+            self.filas.insert(posicion, fila)
+            self._indices.clear()
+            self._ordenados.clear()
+        else:
+            posicion = len(self.filas)
+            self.ids.append(fila['id'])
+            self.filas.append(fila)
+            for columna, indice in self._indices.items():
+                indice.setdefault(_clave(fila.get(columna)), []).append(posicion)
+            for columna, (valores, posiciones) in list(self._ordenados.items()):
+                valor = fila.get(columna)
+                if valor is None:
+                    continue
+                try:
+                    lugar = bisect_right(valores, _comparable(valor))
+                except TypeError:
+                    del self._ordenados[columna]
+                    continue
+                valores.insert(lugar, _comparable(valor))
+                posiciones.insert(lugar, posicion)
+        return fila
+    
+    def invalidar(self):
+        """Llamar después de modificar o borrar filas"""
+        self._indices.clear()
+        self._ordenados.clear()
+        self.ids = [fila['id'] for fila in self.filas]
+    
+    def indice(self, columna: str) -> Dict[Any, List[int]]:
+        if columna not in self._indices:
+            indice: Dict[Any, List[int]] = {}
+            for posicion, fila in enumerate(self.filas):
+                indice.setdefault(_clave(fila.get(columna)), []).append(posicion)
+            self._indices[columna] = indice
+        return self._indices[columna]
+    
+    def ordenado(self, columna: str) -> Optional[Tuple[List, List[int]]]:
+        """Valores no nulos de la columna ordenados y sus posiciones; None si no son comparables"""
+        if columna not in self._ordenados:
+            pares = [(_comparable(fila[columna]), posicion)
+                     for posicion, fila in enumerate(self.filas) if fila.get(columna) is not None]
+            try:
+                pares.sort()
+            except TypeError:
+                return None
+            self._ordenados[columna] = ([valor for valor, _ in pares], [posicion for _, posicion in pares])
+        return self._ordenados[columna]
+    
+    def por_id(self, fila_id) -> Optional[Dict]:
+        posicion = bisect_left(self.ids, fila_id)
+        if posicion < len(self.ids) and self.ids[posicion] == fila_id:
+            return self.filas[posicion]
+        return None
+
+
+class AlmacenSqlite:
+    """
+    Persistencia opcional del cliente local en un archivo SQLite: una tabla
+    por tabla de Supabase con (id, fila JSON). Se escribe en cada operación
+    y se lee completo al iniciar.
+    """
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+    
+    def _crear(self, tabla: str):
+        self.conexion.execute(f'CREATE TABLE IF NOT EXISTS "{tabla}" (id INTEGER PRIMARY KEY, fila TEXT NOT NULL)')
+    
+    def cargar(self) -> Dict[str, List[Dict]]:
+        tablas = {}
+        nombres = self.conexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        for (nombre,) in nombres:
+            filas = self.conexion.execute(f'SELECT fila FROM "{nombre}" ORDER BY id').fetchall()
+            tablas[nombre] = [json.loads(fila) for (fila,) in filas]
+        return tablas
+    
+    def guardar(self, tabla: str, filas: List[Dict]):
+        if not filas:
+            return
+        self._crear(tabla)
+        self.conexion.executemany(
+            f'INSERT OR REPLACE INTO "{tabla}" (id, fila) VALUES (?, ?)',
+            [(fila['id'], json.dumps(fila, default=str)) for fila in filas]
+        )
+        self.conexion.commit()
+    
+    def borrar(self, tabla: str, ids: List[int]):
+        if not ids:
+            return
+        self._crear(tabla)
+        self.conexion.executemany(f'DELETE FROM "{tabla}" WHERE id = ?', [(i,) for i in ids])
+        self.conexion.commit()
+
+
+def _clave(valor):
+    """Clave de índice: normaliza números y booleanos"""
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    return valor
+
+
+def _coercionar(valor_fila, valor_filtro):
+    """Convierte el valor del filtro al tipo de la columna (como hace Postgres)"""
+    if valor_fila is None or valor_filtro is None:
+        return valor_filtro
+    if isinstance(valor_fila, bool):
+        if isinstance(valor_filtro, str):
+            return valor_filtro.lower() == 'true'
+        return bool(valor_filtro)
+    if isinstance(valor_fila, (int, float)) and not isinstance(valor_filtro, (int, float)):
+        try:
+            return float(valor_filtro)
+        except (TypeError, ValueError):
+            return valor_filtro
+    if isinstance(valor_fila, str) and not isinstance(valor_filtro, str):
+        return valor_filtro.isoformat() if hasattr(valor_filtro, 'isoformat') else str(valor_filtro)
+    return valor_filtro
+
+
+def _comparable(valor):
+    """Timestamps ISO: se comparan sin zona horaria ni microsegundos sobrantes"""
+    if isinstance(valor, str) and len(valor) >= 19 and valor[10:11] in ('T', ' '):
+        return valor[:10] + 'T' + valor[11:26].rstrip('Z').split('+')[0]
+    return valor
+
+
+OPERADORES = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a is not None and a > b,
+    'gte': lambda a, b: a is not None and a >= b,
+    'lt': lambda a, b: a is not None and a < b,
+    'lte': lambda a, b: a is not None and a <= b,
+}
+
+
+def _evaluar(fila: Dict, operador: str, columna: str, valor) -> bool:
+    if operador.startswith('not.'):
+        return not _evaluar(fila, operador[4:], columna, valor)
+    if operador in ('or', 'and'):
+        combinar = any if operador == 'or' else all
+        return combinar(_evaluar(fila, op, col, val) for op, col, val in valor)
+    actual = fila.get(columna)
+    if operador == 'is':
+        if valor in (None, 'null'):
+            return actual is None
+        return actual is (str(valor).lower() == 'true')
+    if operador == 'in':
+        return any(_clave(actual) == _clave(_coercionar(actual, v)) for v in valor)
+    if operador in ('like', 'ilike'):
+        if actual is None:
+            return False
+        patron = '^' + re.escape(str(valor)).replace('%', '.*').replace(r'\*', '.*') + '$'
+        return re.match(patron, str(actual), re.IGNORECASE if operador == 'ilike' else 0) is not None
+    valor = _coercionar(actual, valor)
+    try:
+        return OPERADORES[operador](_comparable(actual), _comparable(valor))
+    except TypeError:
+        return False
+
+
+def _cotas(filtros: List[tuple]) -> Iterable[tuple]:
+    """
+    (operador, columna, valor) de rango sobre COLUMNAS_RANGO que cumplen
+    todas las filas filtradas. De un `or` cuyas ramas acotan la misma columna
+    por abajo (el keyset `t.gt.v,and(t.eq.v,id.gt.i)`) sale `gte` del menor valor.
+    """
+    for _, operador, columna, valor in filtros:
+        if columna in COLUMNAS_RANGO and operador in ('gt', 'gte', 'lt', 'lte'):
+            yield operador, columna, valor
+        elif operador == 'or':
+            cotas = []
+            for rama in valor:
+                condiciones = rama[2] if rama[0] == 'and' else [rama]
+                cota = next(((col, val) for op, col, val in condiciones
+                             if col in COLUMNAS_RANGO and op in ('gt', 'gte', 'eq')), None)
+                if cota is None:
+                    break
+                cotas.append(cota)
+            else:
+                if cotas and len({col for col, _ in cotas}) == 1:
+                    columna = cotas[0][0]
+                    try:
+                        yield 'gte', columna, min((val for _, val in cotas), key=_comparable)
+                    except TypeError:
+                        pass
+
+def _dividir(texto: str) -> List[str]:
+    """Separa por comas de primer nivel (respetando paréntesis)"""
+    partes, nivel, actual = [], 0, ''
+    for caracter in texto:
+        if caracter == '(':
+            nivel += 1
+        elif caracter == ')':
+            nivel -= 1
+        if caracter == ',' and nivel == 0:
+            partes.append(actual.strip())
+            actual = ''
+        else:
+            actual += caracter
+    if actual.strip():
+        partes.append(actual.strip())
+    return partes
+
+
+def parsear_condiciones(texto: str) -> List[tuple]:
+    """
+    'timestamp.gt."2025-01-01T00:00:00",and(timestamp.eq."2025-01-01T00:00:00",id.gt.5)' →
+    [('gt', 'timestamp', '2025-01-01T00:00:00'), ('and', None, [('eq', ...), ('gt', 'id', '5')])]
+    """
+    condiciones = []
+    for parte in _dividir(texto):
+        negado = parte.startswith('not.')
+        parte = parte[4:] if negado else parte
+        if parte.startswith(('or(', 'and(')):
+            operador, _, resto = parte.partition('(')
+            condicion = (operador, None, parsear_condiciones(resto[:-1]))
+        else:
+            columna, _, resto = parte.partition('.')
+            if resto.startswith('not.'):
+                negado, resto = not negado, resto[4:]
+            operador, _, valor = resto.partition('.')
+            condicion = (operador, columna, _valor_rest(valor.strip('"')))
+        if negado:
+            condicion = (f'not.{condicion[0]}',) + condicion[1:]
+        condiciones.append(condicion)
+    return condiciones
+
+
+def parsear_select(texto: str) -> List[Dict]:
+    """
+    'id, sucursal:sucursales(id, nombre), camaras_frio!inner(sucursal_id)' →
+    [{'columna': 'id'}, {'alias': 'sucursal', 'tabla': 'sucursales', 'inner': False, 'hijos': [...]}, ...]
+    """
+    campos = []
+    for parte in _dividir(texto or '*'):
+        if '(' in parte:
+            cabeza, resto = parte.split('(', 1)
+            alias = None
+            if ':' in cabeza:
+                alias, cabeza = cabeza.split(':', 1)
+            tabla, _, modificador = cabeza.strip().partition('!')
+            campos.append({
+                'alias': (alias or tabla).strip(),
+                'tabla': tabla.strip(),
+                'inner': modificador.strip() == 'inner',
+                'hijos': parsear_select(resto.rsplit(')', 1)[0])
+            })
+        else:
+            alias, _, columna = parte.rpartition(':')
+            campos.append({'columna': columna.strip(), 'alias': (alias or columna).strip()})
+    return campos
+
+
+class ClienteLocal:
+    """Cliente en memoria con la interfaz de supabase.Client usada en el repo"""
+    
+    def __init__(self, tablas: Optional[Dict[str, Iterable[Dict]]] = None, max_filas: int = MAX_FILAS,
+                 almacen: Optional[AlmacenSqlite] = None):
+        self.tablas: Dict[str, Tabla] = {}
+        self.max_filas = max_filas
+        self.lock = threading.RLock()
+        self.almacen = almacen
+        # Consultas ejecutadas (query builder y REST), para benchmarks
+        self.consultas = 0
+        for nombre, filas in (tablas or {}).items():
+            self.tablas[nombre] = Tabla(nombre, filas)
+    
+    @classmethod
+    def desde_sqlite(cls, ruta: str, **kwargs) -> 'ClienteLocal':
+        """Carga las tablas del archivo y persiste ahí cada escritura"""
+        almacen = AlmacenSqlite(ruta)
+        return cls(almacen.cargar(), almacen=almacen, **kwargs)
+    
+    def cargar(self, tablas: Dict[str, Iterable[Dict]]):
+        """Agrega filas en bloque (p. ej. un dataset sintético), persistiéndolas si hay almacén"""
+        with self.lock:
+            for nombre, filas in tablas.items():
+                tabla = self.tabla(nombre)
+                nuevas = [tabla.insertar(dict(fila)) for fila in filas]
+                if self.almacen:
+                    self.almacen.guardar(nombre, nuevas)
+    
+    def tabla(self, nombre: str) -> Tabla:
+        if nombre not in self.tablas:
+            self.tablas[nombre] = Tabla(nombre)
+        return self.tablas[nombre]
+    
+    def table(self, nombre: str) -> 'ConsultaLocal':
+        return ConsultaLocal(self, nombre)
+    
+    from_ = table
+    
+    def rpc(self, funcion: str, params: Optional[Dict] = None, *args, **kwargs):
+        return ConsultaRpc(self, funcion)
+
+
+class ConsultaRpc:
+    """Las funciones SQL no existen en memoria: se comporta como una función faltante"""
+    
+    def __init__(self, cliente: ClienteLocal, funcion: str):
+        self.cliente = cliente
+        self.funcion = funcion
+    
+    def execute(self):
+        self.cliente.consultas += 1
+        raise ErrorLocal(f'Could not find the function public.{self.funcion}', 'PGRST202')
+
+
+class ConsultaLocal:
+    """Query builder encadenable (cada método retorna self, como en postgrest)"""
+    
+    def __init__(self, cliente: ClienteLocal, tabla: str):
+        self.cliente = cliente
+        self.nombre = tabla
+        self.operacion = 'select'
+        self.campos = parsear_select('*')
+        self.filtros: List[tuple] = []  # (ruta, operador, columna, valor)
+        self.ordenes: List[tuple] = []
+        self.limite: Optional[int] = None
+        self.desplazamiento = 0
+        self.contar = False
+        self.solo_conteo = False
+        self.datos = None
+        self.on_conflict = 'id'
+        self._negar = False
+    
+    # Operaciones
+    def select(self, columnas: str = '*', count: Optional[str] = None, head: bool = False, **kwargs):
+        if self.operacion == 'select':
+            self.campos = parsear_select(columnas)
+        self.contar = count is not None
+        self.solo_conteo = head
+        return self
+    
+    def insert(self, datos, **kwargs):
+        self.operacion, self.datos = 'insert', datos
+        return self
+    
+    def upsert(self, datos, on_conflict: str = 'id', **kwargs):
+        self.operacion, self.datos, self.on_conflict = 'upsert', datos, on_conflict or 'id'
+        return self
+    
+    def update(self, datos, **kwargs):
+        self.operacion, self.datos = 'update', datos
+        return self
+    
+    def delete(self, **kwargs):
+        self.operacion = 'delete'
+        return self
+    
+    # Filtros
+    def _filtro(self, operador: str, columna: str, valor):
+        ruta, _, columna = columna.rpartition('.')
+        if self._negar:
+            operador, self._negar = f'not.{operador}', False
+        self.filtros.append((ruta, operador, columna, valor))
+        return self
+    
+    @property
+    def not_(self):
+        """Niega el filtro siguiente: .not_.is_('fecha_fin', 'null')"""
+        self._negar = True
+        return self
+    
+    def filter(self, columna: str, operador: str, criterio):
+        """Filtro genérico con la sintaxis de PostgREST: .filter('id', 'in', '(1,2)')"""
+        negado = operador.startswith('not.')
+        operador = operador[4:] if negado else operador
+        self._negar = self._negar or negado
+        return self._filtro(operador, columna, _valor_rest(criterio) if isinstance(criterio, str) else criterio)
+    
+    def match(self, condiciones: Dict):
+        for columna, valor in condiciones.items():
+            self.eq(columna, valor)
+        return self
+    
+    def eq(self, columna, valor): return self._filtro('eq', columna, valor)
+    def neq(self, columna, valor): return self._filtro('neq', columna, valor)
+    def gt(self, columna, valor): return self._filtro('gt', columna, valor)
+    def gte(self, columna, valor): return self._filtro('gte', columna, valor)
+    def lt(self, columna, valor): return self._filtro('lt', columna, valor)
+    def lte(self, columna, valor): return self._filtro('lte', columna, valor)
+    def like(self, columna, patron): return self._filtro('like', columna, patron)
+    def ilike(self, columna, patron): return self._filtro('ilike', columna, patron)
+    def in_(self, columna, valores): return self._filtro('in', columna, list(valores))
+    def is_(self, columna, valor): return self._filtro('is', columna, valor)
+    
+    def or_(self, filtros: str, **kwargs):
+        """Alguna de las condiciones: .or_('estado.eq.ABIERTA,and(id.gt.5,id.lt.9)')"""
+        return self._filtro('or', '', parsear_condiciones(filtros))
+    
+    def order(self, columna: str, desc: bool = False, **kwargs):
+        self.ordenes.append((columna, desc))
+        return self
+    
+    def limit(self, cantidad: int, **kwargs):
+        self.limite = cantidad
+        return self
+    
+    def range(self, inicio: int, fin: int, **kwargs):
+        self.desplazamiento, self.limite = inicio, fin - inicio + 1
+        return self
+    
+    # Ejecución
+    def execute(self) -> RespuestaLocal:
+        with self.cliente.lock:
+            self.cliente.consultas += 1
+            if self.operacion == 'select':
+                return self._seleccionar()
+            
+            if self.operacion == 'insert':
+                filas = self._insertar(self.datos)
+            elif self.operacion == 'upsert':
+                filas = self._upsert(self.datos)
+            elif self.operacion == 'update':
+                filas = self._actualizar()
+            else:
+                filas = self._borrar()
+            
+            almacen = self.cliente.almacen
+            if almacen and self.operacion == 'delete':
+                almacen.borrar(self.nombre, [fila['id'] for fila in filas])
+            elif almacen:
+                almacen.guardar(self.nombre, filas)
+            return RespuestaLocal(filas)
+    
+    def _seleccionar(self) -> RespuestaLocal:
+        tabla = self.cliente.tabla(self.nombre)
+        filtros_base = [f for f in self.filtros if not f[0]]
+        filtros_embebidos = [f for f in self.filtros if f[0]]
+        
+        limite = min(self.limite, self.cliente.max_filas) if self.limite is not None else self.cliente.max_filas
+        por_id = not self.ordenes or self.ordenes == [('id', False)]
+        # Orden por (timestamp, id) o similar: las candidatas pueden venir en ese orden
+        orden = None
+        if self.ordenes and self.ordenes[1:] in ([], [('id', False)]) and \
+                self.ordenes[0][0] in COLUMNAS_RANGO and not self.ordenes[0][1]:
+            orden = self.ordenes[0][0]
+        candidatas, ordenadas = self._candidatas(tabla, filtros_base, orden)
+        # Corte anticipado: las filas ya vienen en el orden pedido
+        cortar = (por_id or ordenadas) and not self.contar
+        necesarias = self.desplazamiento + limite
+        
+        resultado = []
+        total = 0
+        for fila in candidatas:
+            if not all(_evaluar(fila, op, col, val) for _, op, col, val in filtros_base):
+                continue
+            proyectada = self._proyectar(fila, self.campos, self.nombre, filtros_embebidos, '')
+            if proyectada is None:
+                continue
+            total += 1
+            if not self.solo_conteo:
+                resultado.append(proyectada)
+            if cortar and len(resultado) >= necesarias:
+                break
+        
+        for columna, desc in reversed(self.ordenes):
+            resultado.sort(
+                key=lambda f: (f.get(columna) is None, _comparable(f.get(columna)) if f.get(columna) is not None else 0),
+                reverse=desc
+            )
+        
+        datos = [] if self.solo_conteo else resultado[self.desplazamiento:necesarias]
+        return RespuestaLocal(datos, total if self.contar else None)
+    
+    def _candidatas(self, tabla: Tabla, filtros: List[tuple], orden: Optional[str] = None) -> Tuple[Iterable[Dict], bool]:
+        """
+        Usa un índice de igualdad, de rango (COLUMNAS_RANGO) y/o el rango de
+        ids para no recorrer toda la tabla.
+        
+        Returns:
+            (filas candidatas, True si vienen ordenadas por `orden` y id en
+            vez de por id)
+        """
+        mejor = None
+        for _, operador, columna, valor in filtros:
+            if operador == 'eq' and not isinstance(valor, (list, dict)):
+                muestra = next((f.get(columna) for f in tabla.filas if f.get(columna) is not None), None)
+                posiciones = tabla.indice(columna).get(_clave(_coercionar(muestra, valor)), [])
+                if mejor is None or len(posiciones) < len(mejor):
+                    mejor = posiciones
+        if mejor is None:
+            mejor = range(len(tabla.filas))
+        
+        # Rangos sobre timestamp/fecha: bisect en el índice ordenado
+        limites = {}
+        for operador, columna, valor in _cotas(filtros):
+            orden_columna = tabla.ordenado(columna)
+            if orden_columna is None:
+                continue
+            valores = orden_columna[0]
+            muestra = next((f.get(columna) for f in tabla.filas if f.get(columna) is not None), None)
+            try:
+                clave = _comparable(_coercionar(muestra, valor))
+                inicio, fin = limites.get(columna, (0, len(valores)))
+                if operador == 'gt':
+                    inicio = max(inicio, bisect_right(valores, clave))
+                elif operador == 'gte':
+                    inicio = max(inicio, bisect_left(valores, clave))
+                elif operador == 'lt':
+                    fin = min(fin, bisect_left(valores, clave))
+                else:
+                    fin = min(fin, bisect_right(valores, clave))
+            except TypeError:
+                continue
+            limites[columna] = (inicio, fin)
+        
+        if orden in limites:
+            # Ordenadas por (orden, id): permite cortar apenas se juntan las filas pedidas
+            inicio, fin = limites[orden]
+            return (tabla.filas[p] for p in tabla.ordenado(orden)[1][inicio:fin]), True
+        for columna, (inicio, fin) in limites.items():
+            if max(fin - inicio, 0) < len(mejor):
+                # Las posiciones vuelven al orden de id
+                mejor = sorted(tabla.ordenado(columna)[1][inicio:fin])
+        
+        # Paginación keyset (id > último): las posiciones están en orden de id
+        for _, operador, columna, valor in filtros:
+            if columna == 'id' and operador in ('gt', 'gte'):
+                buscar = bisect_right if operador == 'gt' else bisect_left
+                mejor = mejor[buscar(mejor, int(valor), key=lambda p: tabla.ids[p]):]
+        return (tabla.filas[p] for p in mejor), False
+    
+    def _proyectar(self, fila: Dict, campos: List[Dict], nombre: str, filtros: List[tuple], ruta: str) -> Optional[Dict]:
+        """Arma la fila con las columnas pedidas; None si un embebido !inner no tiene match"""
+        salida = {}
+        for campo in campos:
+            if 'tabla' not in campo:
+                if campo['columna'] == '*':
+                    salida.update(fila)
+                else:
+                    salida[campo['alias']] = fila.get(campo['columna'])
+                continue
+            
+            ruta_hijo = f"{ruta}.{campo['alias']}" if ruta else campo['alias']
+            filtros_hijo = [f for f in filtros if f[0] == ruta_hijo or f[0] == f"{ruta}.{campo['tabla']}".lstrip('.')]
+            embebido = self._embebido(fila, nombre, campo, filtros, filtros_hijo, ruta_hijo)
+            if campo['inner'] and not embebido:
+                return None
+            salida[campo['alias']] = embebido
+        return salida
+    
+    def _embebido(self, fila: Dict, nombre: str, campo: Dict, filtros: List[tuple], filtros_hijo: List[tuple], ruta: str):
+        destino = self.cliente.tabla(campo['tabla'])
+        clave_destino = CLAVES_FORANEAS.get(campo['tabla'])
+        clave_origen = CLAVES_FORANEAS.get(nombre)
+        
+        def aceptar(hija):
+            if not all(_evaluar(hija, op, col, val) for _, op, col, val in filtros_hijo):
+                return None
+            return self._proyectar(hija, campo['hijos'], campo['tabla'], filtros, ruta)
+        
+        if clave_destino and clave_destino in fila:
+            # Muchos a uno: la fila referencia al destino
+            hija = destino.por_id(fila[clave_destino]) if fila[clave_destino] is not None else None
+            return aceptar(hija) if hija is not None else None
+        
+        if clave_origen and clave_origen in destino.columnas:
+            # Uno a muchos: el destino referencia a esta fila
+            hijas = (destino.filas[p] for p in destino.indice(clave_origen).get(_clave(fila['id']), []))
+            return [h for h in (aceptar(hija) for hija in hijas) if h is not None]
+        
+        raise ErrorLocal(
+            f"Could not find a relationship between '{nombre}' and '{campo['tabla']}'", 'PGRST200'
+        )
+    
+    def _insertar(self, datos) -> List[Dict]:
+        tabla = self.cliente.tabla(self.nombre)
+        filas = datos if isinstance(datos, list) else [datos]
+        return [dict(tabla.insertar(dict(fila))) for fila in filas]
+    
+    def _upsert(self, datos) -> List[Dict]:
+        tabla = self.cliente.tabla(self.nombre)
+        columnas = [c.strip() for c in self.on_conflict.split(',')]
+        resultado = []
+        for fila in (datos if isinstance(datos, list) else [datos]):
+            existentes = None
+            if all(c in fila for c in columnas):
+                # La columna más selectiva acota la búsqueda (camara_id solo no acota nada)
+                posiciones = min(
+                    (tabla.indice(c).get(_clave(fila[c]), []) for c in columnas), key=len
+                )
+                existentes = [
+                    tabla.filas[p] for p in posiciones
+                    if all(_clave(tabla.filas[p].get(c)) == _clave(fila[c]) for c in columnas)
+                ]
+            if existentes:
+                existentes[0].update(fila)
+                tabla.invalidar()
+                resultado.append(dict(existentes[0]))
+            else:
+                resultado.append(dict(tabla.insertar(dict(fila))))
+        return resultado
+    
+    def _actualizar(self) -> List[Dict]:
+        tabla = self.cliente.tabla(self.nombre)
+        coincidentes = [
+            fila for fila in self._candidatas(tabla, self.filtros)[0]
+            if all(_evaluar(fila, op, col, val) for _, op, col, val in self.filtros)
+        ]
+        for fila in coincidentes:
+            fila.update(self.datos)
+        if coincidentes:
+            tabla.columnas.update(self.datos)
+            tabla.invalidar()
+        return [dict(fila) for fila in coincidentes]
+    
+    def _borrar(self) -> List[Dict]:
+        tabla = self.cliente.tabla(self.nombre)
+        borradas = []
+        conservadas = []
+        for fila in tabla.filas:
+            if all(_evaluar(fila, op, col, val) for _, op, col, val in self.filtros):
+                borradas.append(fila)
+            else:
+                conservadas.append(fila)
+        tabla.filas = conservadas
+        tabla.invalidar()
+        return borradas
+
+
+def _es_numero(texto: str) -> bool:
+    try:
+        float(texto)
+        return True
+    except ValueError:
+        return False
+
+
+def _valor_rest(texto: str):
+    """Valor de un filtro en la URL (todo llega como string)"""
+    if texto.startswith('(') and texto.endswith(')'):
+        return [v.strip().strip('"') for v in texto[1:-1].split(',') if v.strip()]
+    return texto
+
+
+def responder_rest(cliente: ClienteLocal, metodo: str, url: str, headers: Optional[Dict] = None,
+                   json_body=None, params: Optional[Dict] = None):
+    """
+    Atiende una llamada REST de PostgREST (`/rest/v1/<tabla>?col=op.valor&select=...`)
+    con el cliente local.
+    
+    Returns:
+        requests.Response con status, JSON y Content-Range (si se pidió count)
+    """
+    import requests
+    
+    partes = urlsplit(url)
+    ruta = partes.path.split('/rest/v1/', 1)[-1].strip('/')
+    argumentos = parse_qsl(partes.query, keep_blank_values=True) + list((params or {}).items())
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    metodo = metodo.upper()
+    
+    response = requests.Response()
+    response.url = url
+    response.headers['Content-Type'] = 'application/json'
+    
+    try:
+        if ruta.startswith('rpc/'):
+            ConsultaRpc(cliente, ruta[4:]).execute()
+        
+        consulta = cliente.table(ruta)
+        prefer = headers.get('prefer', '')
+        for clave, valor in argumentos:
+            if clave == 'select':
+                consulta.campos = parsear_select(valor)
+            elif clave == 'order':
+                for orden in valor.split(','):
+                    columna, _, direccion = orden.partition('.')
+                    consulta.order(columna, desc=direccion.startswith('desc'))
+            elif clave == 'limit':
+                consulta.limite = int(valor)
+            elif clave == 'offset':
+                consulta.desplazamiento = int(valor)
+            elif clave == 'on_conflict':
+                consulta.on_conflict = valor
+            elif clave in ('or', 'and', 'not.or', 'not.and'):
+                consulta._filtro(clave, '', parsear_condiciones(valor[1:-1]))
+            elif clave == 'columns' or clave.endswith(('.limit', '.offset', '.order')):
+                # Opciones de PostgREST sin efecto en memoria
+                continue
+            else:
+                operador, _, valor = valor.partition('.')
+                if operador == 'not':
+                    consulta._negar = True
+                    operador, _, valor = valor.partition('.')
+                consulta._filtro(operador, clave, _valor_rest(valor))
+        
+        if metodo in ('GET', 'HEAD'):
+            consulta.contar = 'count=' in prefer
+            consulta.solo_conteo = metodo == 'HEAD'
+        elif metodo == 'POST':
+            if 'resolution=merge-duplicates' in prefer:
+                consulta.upsert(json_body, on_conflict=consulta.on_conflict)
+            else:
+                consulta.insert(json_body)
+        elif metodo == 'PATCH':
+            consulta.update(json_body)
+        elif metodo == 'DELETE':
+            consulta.delete()
+        
+        resultado = consulta.execute()
+        datos = resultado.data
+        response.status_code = 201 if metodo == 'POST' else 200
+        if metodo in ('POST', 'PATCH', 'DELETE') and 'return=representation' not in prefer:
+            response.status_code = 201 if metodo == 'POST' else 204
+            datos = None
+        if resultado.count is not None:
+            fin = max(len(datos or []) - 1, 0)
+            response.headers['Content-Range'] = f'0-{fin}/{resultado.count}' if datos else f'*/{resultado.count}'
+        response._content = b'' if datos is None or metodo == 'HEAD' else json.dumps(datos, default=str).encode()
+    
+    except ErrorLocal as e:
+        response.status_code = 404 if e.code in ('PGRST202', 'PGRST200') else 400
+        response._content = json.dumps({'message': e.message, 'code': e.code, 'details': None, 'hint': None}).encode()
+    
+    return response
+
+
+class _ManejadorRest(BaseHTTPRequestHandler):
+    """Traduce cada request HTTP a responder_rest sobre el cliente del servidor"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def _atender(self):
+        largo = int(self.headers.get('Content-Length') or 0)
+        cuerpo = json.loads(self.rfile.read(largo)) if largo else None
+        response = responder_rest(
+            self.server.cliente, self.command, self.path, headers=dict(self.headers), json_body=cuerpo
+        )
+        contenido = response.content or b''
+        self.send_response(response.status_code)
+        for clave, valor in response.headers.items():
+            self.send_header(clave, valor)
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(contenido)
+    
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _atender
+    
+    def log_message(self, formato, *args):
+        logger.debug('supabase_local %s', formato % args)
+
+
+class ServidorRest(ThreadingHTTPServer):
+    """
+    Servidor HTTP compatible con PostgREST (/rest/v1/...) sobre un ClienteLocal.
+    
+    Con SUPABASE_URL apuntando a él funcionan sin cambios tanto el cliente
+    real de supabase-py como las llamadas REST crudas.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, cliente: ClienteLocal, host: str = '127.0.0.1', puerto: int = 0):
+        super().__init__((host, puerto), _ManejadorRest)
+        self.cliente = cliente
+    
+    @property
+    def url(self) -> str:
+        host, puerto = self.server_address[:2]
+        return f'http://{host}:{puerto}'
+    
+    def iniciar_en_hilo(self) -> threading.Thread:
+        hilo = threading.Thread(target=self.serve_forever, daemon=True, name='supabase-local')
+        hilo.start()
+        return hilo
+
+
+# Cliente que retorna get_supabase_client() cuando está definido
+_cliente_local: Optional[ClienteLocal] = None
+_cliente_configurado: Optional[ClienteLocal] = None
+_lock_configuracion = threading.Lock()
+
+
+def usar_cliente_local(cliente: Optional[ClienteLocal]):
+    """Activa (o con None desactiva) el cliente local para todo el proceso"""
+    global _cliente_local
+    _cliente_local = cliente
+
+
+def backend_local_configurado() -> bool:
+    from django.conf import settings
+    return getattr(settings, 'SUPABASE_BACKEND', 'supabase') == 'local'
+
+
+def cliente_configurado() -> ClienteLocal:
+    """Cliente del backend local según settings (SUPABASE_LOCAL_DB), creado una vez por proceso"""
+    global _cliente_configurado
+    if _cliente_configurado is None:
+        from django.conf import settings
+        with _lock_configuracion:
+            if _cliente_configurado is None:
+                ruta = getattr(settings, 'SUPABASE_LOCAL_DB', '')
+                _cliente_configurado = ClienteLocal.desde_sqlite(ruta) if ruta else ClienteLocal()
+                logger.info(f"🧪 Backend Supabase local ({ruta or 'en memoria'})")
+    return _cliente_configurado
+
+
+def cliente_local_activo() -> Optional[ClienteLocal]:
+    """Cliente activado con usar_cliente_local() o, con SUPABASE_BACKEND='local', el configurado"""
+    if _cliente_local is not None:
+        return _cliente_local
+    if backend_local_configurado():
+        return cliente_configurado()
+    return None
+
+
+def iniciar_backend_local() -> Optional[ServidorRest]:
+    """
+    Con SUPABASE_BACKEND='local', levanta el servidor REST del proceso en un
+    puerto libre y apunta SUPABASE_CONFIG['url'] a él, para que las llamadas
+    REST crudas (coldtrack/urls.py, sync_users_periodic) usen los mismos datos
+    que get_supabase_client().
+    """
+    if not backend_local_configurado():
+        return None
+    from django.conf import settings
+    
+    servidor = ServidorRest(cliente_configurado(), puerto=getattr(settings, 'SUPABASE_LOCAL_PUERTO', 0))
+    servidor.iniciar_en_hilo()
+    settings.SUPABASE_CONFIG['url'] = servidor.url
+    settings.SUPABASE_CONFIG['anon_key'] = settings.SUPABASE_CONFIG.get('anon_key') or 'local'
+    settings.SUPABASE_CONFIG['service_key'] = settings.SUPABASE_CONFIG.get('service_key') or 'local'
+    logger.info(f"🧪 API REST local en {servidor.url}")
+    return servidor
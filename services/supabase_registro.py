@@ -0,0 +1,284 @@
+"""
+Registro de clientes de Supabase
+
+Antes cada get_supabase_client(use_service_key=True) creaba un cliente nuevo
+(y con él un pool de conexiones HTTP nuevo). El registro mantiene un cliente
+de larga vida por (tipo de key, hilo o event loop), así cada hilo reutiliza
+su cliente y sus conexiones sin compartir estado entre hilos:
+
+- Un hilo de gunicorn, del pool de services/paralelo.py o de la
+  sincronización tiene su propio cliente service y anon
+- Código async usa un cliente por event loop
+- Un error de conexión (httpx.TransportError) en `.execute()` descarta el
+  cliente; la siguiente llamada crea uno nuevo
+- Los clientes se renuevan pasados SUPABASE_CLIENTE_MAX_EDAD_S segundos
+- verificar() hace una consulta mínima con los clientes del contexto actual
+  y recrea los que fallan
+- Los clientes de hilos que ya terminaron se descartan al crear otros
+- Un cliente reemplazado o descartado cierra su sesión HTTP de postgrest
+  (y sus sockets) apenas nadie lo usa: en seguida, salvo que el código que
+  lo obtuvo todavía tenga una referencia (p. ej. un iterar_keyset en curso)
+- Dentro de una tarea de ejecutar_en_paralelo, `.execute()` respeta el plazo
+  de la tarea: acota el timeout HTTP al tiempo restante, sin reintentos, y
+  lanza TimeoutError si ya venció
+
+estadisticas() (expuesto en /api/monitoring/clientes/) reporta clientes
+creados, reutilizados y recreados por tipo.
+
+Uso:
+    >>> client = registro.obtener('service', fabrica)
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from django.conf import settings
+from services.paralelo import tiempo_restante
+import sys
+import threading
+import time
+import weakref
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _contexto() -> Tuple:
+    """('loop', id) dentro de un event loop de asyncio; si no, ('hilo', ident)"""
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is not None:
+        try:
+            return ('loop', id(asyncio.get_running_loop()))
+        except RuntimeError:
+            pass
+    return ('hilo', threading.get_ident())
+
+
+def _cerrar_sesion(client):
+    """Cierra el pool de conexiones HTTP de postgrest del cliente, si llegó a crearlo"""
+    postgrest = getattr(client, '_postgrest', None)
+    if postgrest is None:
+        return
+    try:
+        resultado = postgrest.aclose()
+        if hasattr(resultado, 'close'):
+            # Cliente async: no hay loop en el que esperar el cierre
+            resultado.close()
+    except Exception as e:
+        logger.debug(f"No se pudo cerrar la sesión de un cliente de Supabase: {str(e)}")
+
+
+def _es_error_conexion(error: Exception) -> bool:
+    httpx = sys.modules.get('httpx')
+    return httpx is not None and isinstance(error, httpx.TransportError)
+
+
+def _es_timeout(error: Exception) -> bool:
+    httpx = sys.modules.get('httpx')
+    return httpx is not None and isinstance(error, httpx.TimeoutException)
+
+
+class ConsultaVigilada:
+    """Proxy de un query builder: avisa al registro si `.execute()` pierde la conexión"""
+    
+    def __init__(self, builder, alerta: Callable[[Exception], None]):
+        self._builder = builder
+        self._alerta = alerta
+    
+    def __getattr__(self, nombre):
+        atributo = getattr(self._builder, nombre)
+        if not callable(atributo):
+            # p. ej. .not_, que retorna el builder para el filtro siguiente
+            return ConsultaVigilada(atributo, self._alerta) if hasattr(atributo, 'execute') else atributo
+        
+        def llamada(*args, **kwargs):
+            resultado = atributo(*args, **kwargs)
+            if hasattr(resultado, 'execute'):
+                return ConsultaVigilada(resultado, self._alerta)
+            return resultado
+        
+        return llamada
+    
+    def execute(self):
+        restante = tiempo_restante()
+        if restante is not None and restante <= 0:
+            raise TimeoutError('Plazo de la tarea paralela vencido antes de consultar Supabase')
+        try:
+            if restante is None:
+                return self._builder.execute()
+            return self._execute_con_plazo(restante)
+        except Exception as e:
+            if restante is not None and _es_timeout(e) and tiempo_restante() <= 0:
+                # Lo cortó el plazo de la tarea, no una conexión caída
+                raise TimeoutError('Plazo de la tarea paralela vencido durante la consulta a Supabase') from e
+            if _es_error_conexion(e):
+                self._alerta(e)
+            raise
+    
+    def _execute_con_plazo(self, restante: float):
+        """
+        Acota el timeout de la sesión HTTP al plazo restante durante esta
+        consulta. La sesión es del cliente del hilo actual, así que el cambio
+        no afecta a otros hilos.
+        """
+        request = getattr(self._builder, 'request', None)
+        session = getattr(request, 'session', None)
+        httpx = sys.modules.get('httpx')
+        if httpx is None or not isinstance(session, httpx.Client):
+            return self._builder.execute()
+        
+        anterior = session.timeout
+        limites = anterior.as_dict()
+        session.timeout = httpx.Timeout(**{
+            fase: restante if t is None else min(t, restante) for fase, t in limites.items()
+        })
+        reintentos = request.retry_enabled
+        request.retry_enabled = False
+        try:
+            return self._builder.execute()
+        finally:
+            session.timeout = anterior
+            request.retry_enabled = reintentos
+
+
+class ClienteVigilado:
+    """Proxy del Client de Supabase con table(), from_() y rpc() vigilados"""
+    
+    def __init__(self, client, alerta: Callable[[Exception], None]):
+        self._client = client
+        self._alerta = alerta
+    
+    def table(self, nombre: str) -> ConsultaVigilada:
+        return ConsultaVigilada(self._client.table(nombre), self._alerta)
+    
+    def from_(self, nombre: str) -> ConsultaVigilada:
+        return ConsultaVigilada(self._client.from_(nombre), self._alerta)
+    
+    def rpc(self, funcion: str, params: Optional[Dict] = None, *args, **kwargs) -> ConsultaVigilada:
+        return ConsultaVigilada(self._client.rpc(funcion, params or {}, *args, **kwargs), self._alerta)
+    
+    def __getattr__(self, nombre):
+        return getattr(self._client, nombre)
+
+
+class EntradaCliente:
+    __slots__ = ('client', 'creado', 'sano', 'loop')
+    
+    def __init__(self, client, loop=None):
+        self.client = client
+        self.creado = time.monotonic()
+        self.sano = True
+        self.loop = loop
+
+
+class RegistroClientes:
+    """Clientes de Supabase por (tipo, contexto), con contadores de reutilización"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entradas: Dict[Tuple, EntradaCliente] = {}
+        self._contadores: Dict[str, Dict[str, int]] = {}
+    
+    def _contar(self, tipo: str, evento: str):
+        contadores = self._contadores.setdefault(tipo, {
+            'creados': 0, 'reutilizados': 0, 'recreados_por_error': 0,
+            'recreados_por_edad': 0, 'errores_conexion': 0
+        })
+        contadores[evento] += 1
+    
+    def obtener(self, tipo: str, fabrica: Callable[[], Any]):
+        """
+        Cliente de `tipo` para el hilo (o event loop) actual; lo crea con
+        fabrica() si no existe, perdió la conexión o superó la edad máxima.
+        """
+        contexto = _contexto()
+        clave = (tipo,) + contexto
+        
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if not entrada.sano:
+                    self._contar(tipo, 'recreados_por_error')
+                elif time.monotonic() - entrada.creado > settings.SUPABASE_CLIENTE_MAX_EDAD_S:
+                    self._contar(tipo, 'recreados_por_edad')
+                else:
+                    self._contar(tipo, 'reutilizados')
+                    return entrada.client
+        
+        # Crear fuera del lock: create_client puede tardar
+        def alerta(error, clave=clave):
+            self.marcar_error(clave, error)
+        
+        original = fabrica()
+        client = ClienteVigilado(original, alerta)
+        # Al soltar el registro (reemplazo, huérfano o reset) y el código que
+        # lo usaba su última referencia, se cierran sus conexiones
+        weakref.finalize(client, _cerrar_sesion, original)
+        loop = None
+        if contexto[0] == 'loop':
+            loop = weakref.ref(sys.modules['asyncio'].get_running_loop())
+        
+        with self._lock:
+            self._descartar_huerfanos()
+            self._entradas[clave] = EntradaCliente(client, loop)
+            self._contar(tipo, 'creados')
+        logger.debug(f"Cliente de Supabase '{tipo}' creado para {contexto[0]} {contexto[1]}")
+        return client
+    
+    def _descartar_huerfanos(self):
+        """Quita los clientes de hilos terminados o event loops cerrados (con el lock tomado)"""
+        hilos = {hilo.ident for hilo in threading.enumerate()}
+        for clave in list(self._entradas):
+            entrada = self._entradas[clave]
+            if clave[1] == 'hilo':
+                vivo = clave[2] in hilos
+            else:
+                loop = entrada.loop() if entrada.loop else None
+                vivo = loop is not None and not loop.is_closed()
+            if not vivo:
+                del self._entradas[clave]
+    
+    def marcar_error(self, clave: Tuple, error: Exception):
+        """Marca el cliente para recrearlo en la próxima llamada"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.sano:
+                entrada.sano = False
+                self._contar(clave[0], 'errores_conexion')
+        logger.warning(f"Error de conexión con Supabase ({clave[0]}), se recreará el cliente: {str(error)}")
+    
+    def verificar(self, tipo: str, fabrica: Callable[[], Any], ping: Callable[[Any], Any]) -> bool:
+        """
+        Health check del cliente `tipo` del contexto actual: ejecuta ping(client)
+        y, si falla, lo recrea y lo vuelve a probar.
+        
+        Returns:
+            True si el cliente (original o recreado) respondió
+        """
+        for _ in range(2):
+            client = self.obtener(tipo, fabrica)
+            try:
+                ping(client)
+                return True
+            except Exception as e:
+                logger.warning(f"Health check de Supabase ({tipo}) falló: {str(e)}")
+                self.marcar_error((tipo,) + _contexto(), e)
+        return False
+    
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            activos: Dict[str, int] = {}
+            for clave, entrada in self._entradas.items():
+                activos[clave[0]] = activos.get(clave[0], 0) + 1
+            return {
+                tipo: {**contadores, 'activos': activos.get(tipo, 0)}
+                for tipo, contadores in self._contadores.items()
+            }
+    
+    def reset(self):
+        """Descarta todos los clientes y contadores"""
+        with self._lock:
+            self._entradas.clear()
+            self._contadores.clear()
+
+
+# Registro compartido por el proceso
+registro = RegistroClientes()
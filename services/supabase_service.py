@@ -5,33 +5,56 @@ Este módulo centraliza todas las interacciones con Supabase PostgreSQL.
 Proporciona funciones para insertar y consultar datos históricos.
 
 Funciones principales:
-- get_supabase_client(): Obtiene cliente de Supabase
+- get_supabase_client(): Obtiene cliente de Supabase (uno por hilo, ver supabase_registro.py)
+- verificar_clientes(): Health check de los clientes del hilo actual
 - insert_temperature_reading(): Inserta una lectura de temperatura
 - insert_event(): Inserta un evento de temperatura
 - update_event_end(): Actualiza el fin de un evento
 - insert_daily_summary(): Inserta o actualiza resumen diario
 - get_camera_by_firebase_path(): Busca cámara por su firebase_path
+- iterar_keyset(): Recorre una tabla completa por bloques (paginación keyset)
 """
 
-from supabase import create_client, Client
 from django.conf import settings
+from django.db.models import Q
 import logging
 from datetime import datetime, date
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
 from decimal import Decimal
+from services.supabase_instrumentation import instrumentar
+from services.supabase_registro import registro
+from services.supabase_local import cliente_local_activo
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
-# Variable global para mantener el cliente de Supabase
-_supabase_client: Optional[Client] = None
+
+def _crear_cliente(tipo: str) -> 'Client':
+    """Crea un cliente de Supabase con la service_key o la anon_key"""
+    # El SDK se importa aquí y no al cargar el módulo (ver services/arranque.py)
+    from supabase import create_client
+    
+    config = settings.SUPABASE_CONFIG
+    key = config.get('service_key' if tipo == 'service' else 'anon_key')
+    if not config.get('url') or not key:
+        if tipo == 'service':
+            raise ValueError("Service key de Supabase no configurada")
+        raise ValueError("Credenciales de Supabase no configuradas")
+    
+    client = create_client(supabase_url=config['url'], supabase_key=key)
+    logger.info(f"Cliente de Supabase ({tipo}) inicializado correctamente")
+    return client
 
 
-def get_supabase_client(use_service_key: bool = False) -> Client:
+def get_supabase_client(use_service_key: bool = False) -> 'Client':
     """
-    Obtiene o crea el cliente de Supabase.
+    Obtiene el cliente de Supabase del hilo actual.
     
-    Esta función mantiene una única instancia del cliente para reutilizar
-    la conexión en múltiples llamadas.
+    Cada hilo (o event loop) reutiliza un cliente de larga vida por tipo de
+    key, con su pool de conexiones HTTP; se recrea tras un error de conexión
+    (ver services/supabase_registro.py).
     
     Args:
         use_service_key: Si True, usa la service_key en lugar de anon_key
@@ -43,51 +66,40 @@ def get_supabase_client(use_service_key: bool = False) -> Client:
     Raises:
         ValueError: Si faltan credenciales de Supabase
     """
-    global _supabase_client
+    # Cliente en memoria (SUPABASE_BACKEND='local' o benchmarks, ver services/supabase_local.py)
+    client = cliente_local_activo()
     
-    # Si se solicita service_key, crear un nuevo cliente cada vez
-    # (no cachear porque puede alternarse entre anon y service)
-    if use_service_key:
+    if client is None:
+        tipo = 'service' if use_service_key else 'anon'
         try:
-            config = settings.SUPABASE_CONFIG
-            
-            if not config.get('url') or not config.get('service_key'):
-                raise ValueError("Service key de Supabase no configurada")
-            
-            service_client = create_client(
-                supabase_url=config['url'],
-                supabase_key=config['service_key']
-            )
-            
-            logger.debug("Cliente de Supabase con service_key creado")
-            return service_client
-            
+            client = registro.obtener(tipo, lambda: _crear_cliente(tipo))
         except Exception as e:
-            logger.error(f"Error al crear cliente con service_key: {str(e)}")
+            logger.error(f"Error al crear cliente de Supabase ({tipo}): {str(e)}")
             raise
     
-    # Cliente normal con anon_key (cacheado)
-    if _supabase_client is not None:
-        return _supabase_client
+    if getattr(settings, 'SUPABASE_INSTRUMENTACION', False):
+        return instrumentar(client)
+    return client
+
+
+def verificar_clientes() -> Dict[str, bool]:
+    """
+    Health check de los clientes service y anon del hilo actual: una
+    consulta mínima a camaras_frio; el que falla se recrea.
     
-    try:
-        config = settings.SUPABASE_CONFIG
-        
-        if not config.get('url') or not config.get('anon_key'):
-            raise ValueError("Credenciales de Supabase no configuradas")
-        
-        # Crear cliente sin opciones adicionales para compatibilidad
-        _supabase_client = create_client(
-            supabase_url=config['url'],
-            supabase_key=config['anon_key']
-        )
-        
-        logger.info("Cliente de Supabase inicializado correctamente")
-        return _supabase_client
-        
-    except Exception as e:
-        logger.error(f"Error al inicializar cliente de Supabase: {str(e)}")
-        raise
+    Returns:
+        {'service': bool, 'anon': bool} (sin credenciales cuenta como False)
+    """
+    def ping(client):
+        client.table('camaras_frio').select('id').limit(1).execute()
+    
+    resultado = {}
+    for tipo in ('service', 'anon'):
+        try:
+            resultado[tipo] = registro.verificar(tipo, lambda: _crear_cliente(tipo), ping)
+        except ValueError:
+            resultado[tipo] = False
+    return resultado
 
 
 def get_camera_by_firebase_path(firebase_path: str) -> Optional[Dict]:
@@ -419,3 +431,113 @@ def get_open_events_for_camera(camara_id: int) -> List[Dict]:
     except Exception as e:
         logger.error(f"Error al obtener eventos abiertos: {str(e)}")
         return []
+
+
+def iterar_keyset(
+    tabla: str,
+    columnas: str,
+    aplicar_filtros: Optional[Callable] = None,
+    chunk_size: int = 1000,
+    client: Optional['Client'] = None,
+    orden: str = 'id'
+) -> Iterator[Dict]:
+    """
+    Recorre todas las filas de una consulta por bloques usando paginación keyset.
+    
+    En lugar de OFFSET (que se vuelve más lento con cada página) filtra por
+    `id > último_id` y ordena por `id`, por lo que cada bloque es un range scan
+    sobre la clave primaria y la memoria usada es la de un solo bloque.
+    
+    Si la consulta filtra por un rango de otra columna (p. ej. `timestamp`),
+    paginar por `id` recorre la clave primaria de toda la tabla buscando las
+    filas del rango. Con `orden='timestamp'` se pagina por (timestamp, id):
+    cada bloque sigue al último con `timestamp > t OR (timestamp = t AND id > i)`
+    y usa el índice de esa columna.
+    
+    Args:
+        tabla: Nombre de la tabla en Supabase
+        columnas: Columnas del select (debe incluir `id`)
+        aplicar_filtros: Función que recibe el query y retorna el query filtrado
+        chunk_size: Filas por bloque (Supabase limita a 1000 por defecto)
+        client: Cliente a usar (por defecto, uno con service key)
+        orden: Columna de paginación, sin nulos e incluida en `columnas`;
+            el id desempata las filas con el mismo valor
+    
+    Yields:
+        Dict por cada fila
+    
+    Example:
+        >>> filas = iterar_keyset(
+        >>>     'lecturas_temperatura',
+        >>>     'id, camara_id, timestamp, temperatura_c',
+        >>>     lambda q: q.eq('camara_id', 1)
+        >>> )
+        >>> for fila in filas:
+        >>>     print(fila['timestamp'])
+    """
+    if client is None:
+        client = get_supabase_client(use_service_key=True)
+    ultima = None
+    
+    while True:
+        query = client.table(tabla).select(columnas)
+        if aplicar_filtros:
+            query = aplicar_filtros(query)
+        if ultima is not None and orden == 'id':
+            query = query.gt('id', ultima['id'])
+        elif ultima is not None:
+            valor = ultima[orden]
+            query = query.or_(f'{orden}.gt."{valor}",and({orden}.eq."{valor}",id.gt.{ultima["id"]})')
+        if orden != 'id':
+            query = query.order(orden)
+        
+        response = query.order('id').limit(chunk_size).execute()
+        filas = response.data or []
+        
+        # Se corta solo con un bloque vacío: PostgREST puede limitar el
+        # tamaño de respuesta por debajo de chunk_size
+        if not filas:
+            break
+        
+        for fila in filas:
+            yield fila
+        
+        ultima = filas[-1]
+
+
+def iterar_keyset_orm(queryset, columnas: List[str], chunk_size: int = 2000, orden: str = 'id') -> Iterator[Dict]:
+    """
+    Equivalente de iterar_keyset para la conexión directa (ORM de Django).
+    
+    `.iterator()` no sirve para esto: con el pooler de Supabase en modo
+    transacción (puerto 6543) los cursores del servidor están desactivados
+    y el resultado completo se carga en memoria. Aquí cada bloque es una
+    consulta `WHERE (orden, id) > (último) ORDER BY orden, id LIMIT chunk_size`.
+    
+    Args:
+        queryset: QuerySet ya filtrado
+        columnas: Columnas de .values() (deben incluir `id` y `orden`)
+        chunk_size: Filas por bloque
+        orden: Columna de paginación, sin nulos; el id desempata
+    
+    Yields:
+        Dict por cada fila
+    """
+    queryset = queryset.order_by(orden, 'id') if orden != 'id' else queryset.order_by('id')
+    ultima = None
+    
+    while True:
+        bloque = queryset
+        if ultima is not None and orden == 'id':
+            bloque = bloque.filter(id__gt=ultima['id'])
+        elif ultima is not None:
+            bloque = bloque.filter(
+                Q(**{f'{orden}__gt': ultima[orden]}) | Q(**{orden: ultima[orden], 'id__gt': ultima['id']})
+            )
+        
+        filas = list(bloque.values(*columnas)[:chunk_size])
+        yield from filas
+        
+        if len(filas) < chunk_size:
+            break
+        ultima = filas[-1]
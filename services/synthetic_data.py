@@ -0,0 +1,580 @@
+"""
+Datos sintéticos
+
+Genera datos reproducibles (misma semilla → mismos datos) con el patrón de
+generate_december_data.py, vectorizado con NumPy para N cámaras y cualquier
+rango de fechas:
+
+- Lecturas cada minuto entre -8 y -2 °C con variación de ±0.5 °C
+- Deshielo matutino (DESHIELO_N, 6:00-6:30, 25-45 min) y vespertino
+  (DESHIELO_P, 18:00-19:00, 30-50 min); 40% de los días uno a medianoche
+- Fallas el 10% de los días (8:00-16:59, 45-120 min, 6-12 °C)
+- Durante cada evento la temperatura sube y baja linealmente hasta temp_max
+- Ruido de sensor opcional: picos aislados y lecturas perdidas
+
+El núcleo es `iterar_bloques`, que produce los datos por bloques de días en
+arreglos columnares (un año de 50 cámaras, 26 millones de lecturas, se genera
+en segundos sin pasar por dicts). Sobre él:
+
+- `generar_dataset`: filas de todas las tablas de Supabase y árbol de
+  Firebase, para benchmarks y el backend local
+- `escribir_csv` / `escribir_parquet`: archivos para carga masiva
+- `cargar_supabase`: inserción o upsert por lotes
+
+Uso:
+    >>> dataset = generar_dataset(camaras=5, sucursales=2, dias=14, seed=42)
+    >>> len(dataset.tablas['lecturas_temperatura'])
+    100800
+    >>> for bloque in iterar_bloques(range(1, 51), date(2025, 1, 1), date(2025, 12, 31)):
+    ...     escribir_csv(bloque, 'datos/')
+"""
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+import logging
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow es opcional (solo para Parquet)
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+TEMP_NORMAL_MIN = -8.0
+TEMP_NORMAL_MAX = -2.0
+TEMP_DESHIELO_MIN = 1.0
+TEMP_DESHIELO_MAX = 4.0
+TEMP_FALLA_MIN = 6.0
+TEMP_FALLA_MAX = 12.0
+
+MINUTOS_DIA = 1440
+
+ESTADOS = np.array(['NORMAL', 'DESHIELO', 'FALLA'], dtype=object)
+TIPOS = np.array(['DESHIELO_N', 'DESHIELO_P', 'DESHIELO_N', 'FALLA'], dtype=object)
+SUFIJOS = np.array(['deshielo1', 'deshielo2', 'deshielo3', 'falla'], dtype=object)
+ORIGEN = 'sintetico'  # lecturas_temperatura.origen (NOT NULL)
+
+
+class Bloque:
+    """
+    Datos de un rango de días en arreglos columnares.
+    
+    - lecturas: camara_id, timestamp (datetime64[s], hora local), temperatura_c,
+      estado (índice en ESTADOS); en orden de tiempo y, por minuto, de cámara
+    - eventos: camara_id, clase (índice en TIPOS/SUFIJOS), inicio, duracion (min),
+      temp_max; en orden de día, cámara e inicio
+    - resumen: fecha, camara_id, temp_min, temp_max, temp_promedio,
+      total_lecturas, alertas_descongelamiento, fallas_detectadas
+    """
+    
+    def __init__(self, primer_dia: datetime, dias: int, lecturas: Dict[str, np.ndarray],
+                 eventos: Dict[str, np.ndarray], resumen: Dict[str, np.ndarray]):
+        self.primer_dia = primer_dia
+        self.dias = dias
+        self.lecturas = lecturas
+        self.eventos = eventos
+        self.resumen = resumen
+    
+    def __len__(self):
+        return len(self.lecturas['camara_id'])
+    
+    def firebase_event_ids(self) -> List[str]:
+        inicios = np.datetime_as_string(self.eventos['inicio'], unit='s')
+        return [
+            f"syn_{camara}_{inicio[:10].replace('-', '')}_{inicio[11:].replace(':', '')}_{SUFIJOS[clase]}"
+            for camara, inicio, clase in zip(self.eventos['camara_id'].tolist(), inicios, self.eventos['clase'])
+        ]
+    
+    def filas_lecturas(self) -> List[Dict]:
+        """Filas de lecturas_temperatura (sin id)"""
+        timestamps = np.datetime_as_string(self.lecturas['timestamp'], unit='s').tolist()
+        return [
+            {
+                'camara_id': camara_id,
+                'timestamp': timestamp,
+                'temperatura_c': temperatura,
+                'origen': ORIGEN,
+                'created_at': timestamp
+            }
+            for camara_id, timestamp, temperatura in zip(
+                self.lecturas['camara_id'].tolist(), timestamps, self.lecturas['temperatura_c'].tolist()
+            )
+        ]
+    
+    def filas_eventos(self) -> List[Dict]:
+        """Filas de eventos_temperatura (sin id)"""
+        inicios = self.eventos['inicio']
+        fines = inicios + self.eventos['duracion'].astype('timedelta64[m]')
+        return [
+            {
+                'camara_id': camara_id,
+                'firebase_event_id': firebase_event_id,
+                'tipo': TIPOS[clase],
+                'estado': 'RESUELTO',
+                'fecha_inicio': inicio,
+                'fecha_fin': fin,
+                'temp_max_c': temp_max,
+                'duracion_minutos': duracion,
+                'observaciones': None,
+                'created_at': inicio
+            }
+            for camara_id, firebase_event_id, clase, inicio, fin, temp_max, duracion in zip(
+                self.eventos['camara_id'].tolist(),
+                self.firebase_event_ids(),
+                self.eventos['clase'].tolist(),
+                np.datetime_as_string(inicios, unit='s').tolist(),
+                np.datetime_as_string(fines, unit='s').tolist(),
+                self.eventos['temp_max'].tolist(),
+                self.eventos['duracion'].tolist()
+            )
+        ]
+    
+    def filas_resumen(self) -> List[Dict]:
+        """Filas de resumen_diario_camara (sin id)"""
+        columnas = {clave: valores.tolist() for clave, valores in self.resumen.items() if clave != 'fecha'}
+        fechas = np.datetime_as_string(self.resumen['fecha'], unit='D').tolist()
+        return [
+            {
+                'fecha': fecha,
+                **{clave: valores[i] for clave, valores in columnas.items()},
+                'created_at': f'{np.datetime64(fecha) + 1}T00:00:00'
+            }
+            for i, fecha in enumerate(fechas)
+        ]
+
+
+def _eventos(rng: np.random.Generator, dias: int, camaras: int) -> Dict[str, np.ndarray]:
+    """
+    Calendario de eventos de cada (día, cámara), mismo que generate_december_data.py:
+    (clase, minuto de inicio, duración, temp_max) por evento, en arreglos planos.
+    """
+    forma = (dias, camaras)
+    clases = [
+        # (minuto de inicio, duración, temp_max, ocurre)
+        (6 * 60 + rng.integers(0, 31, forma), rng.integers(25, 46, forma),
+         rng.uniform(TEMP_DESHIELO_MIN, TEMP_DESHIELO_MAX, forma), np.ones(forma, dtype=bool)),
+        (18 * 60 + rng.integers(0, 61, forma), rng.integers(30, 51, forma),
+         rng.uniform(TEMP_DESHIELO_MIN, TEMP_DESHIELO_MAX, forma), np.ones(forma, dtype=bool)),
+        (rng.integers(0, 31, forma), rng.integers(20, 36, forma),
+         rng.uniform(TEMP_DESHIELO_MIN, TEMP_DESHIELO_MAX, forma), rng.random(forma) < 0.4),
+        (rng.integers(8, 17, forma) * 60 + rng.integers(0, 60, forma), rng.integers(45, 121, forma),
+         rng.uniform(TEMP_FALLA_MIN, TEMP_FALLA_MAX, forma), rng.random(forma) < 0.1),
+    ]
+    dia, camara = np.indices(forma)
+    partes = []
+    for clase, (inicio, duracion, temp_max, ocurre) in enumerate(clases):
+        partes.append({
+            'dia': dia[ocurre],
+            'camara': camara[ocurre],
+            'clase': np.full(ocurre.sum(), clase, dtype=np.int8),
+            'minuto': inicio[ocurre],
+            'duracion': duracion[ocurre],
+            'temp_max': np.round(temp_max[ocurre], 1)
+        })
+    # Orden de aplicación = orden de clase (una falla pisa a un deshielo superpuesto)
+    return {clave: np.concatenate([parte[clave] for parte in partes]) for clave in partes[0]}
+
+
+def _aplicar_eventos(rng: np.random.Generator, temps: np.ndarray, estados: np.ndarray, eventos: Dict[str, np.ndarray]):
+    """Rampa triangular TEMP_NORMAL_MAX → temp_max → TEMP_NORMAL_MAX sobre los minutos de cada evento"""
+    hasta = np.minimum(eventos['minuto'] + eventos['duracion'], MINUTOS_DIA - 1)
+    largos = hasta - eventos['minuto'] + 1
+    evento = np.repeat(np.arange(len(largos)), largos)
+    desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+    
+    dia = eventos['dia'][evento]
+    minuto = eventos['minuto'][evento] + desplazamiento
+    camara = eventos['camara'][evento]
+    progreso = desplazamiento / eventos['duracion'][evento]
+    subida = np.minimum(progreso, 1 - progreso) * 2
+    rampa = TEMP_NORMAL_MAX + (eventos['temp_max'][evento] - TEMP_NORMAL_MAX) * subida
+    
+    temps[dia, minuto, camara] = rampa + rng.uniform(-0.3, 0.3, rampa.size)
+    estados[dia, minuto, camara] = np.where(eventos['clase'][evento] == 3, 2, 1)
+
+
+def _camaras(camaras: Union[int, Sequence[int]]) -> np.ndarray:
+    return np.arange(1, camaras + 1) if isinstance(camaras, int) else np.asarray(list(camaras))
+
+
+def iterar_bloques(
+    camaras: Union[int, Sequence[int]],
+    desde: date,
+    hasta: date,
+    seed: int = 42,
+    dias_por_bloque: int = 31,
+    prob_pico: float = 0.0,
+    prob_perdida: float = 0.0
+) -> Iterator[Bloque]:
+    """
+    Genera los datos por bloques de días.
+    
+    Args:
+        camaras: Cantidad (ids 1..N) o ids de las cámaras
+        desde / hasta: Primer y último día (incluidos)
+        seed: Semilla; con los mismos parámetros los bloques son idénticos
+        dias_por_bloque: Días por bloque (acota la memoria: ~1 MB por cámara y mes)
+        prob_pico: Probabilidad de que una lectura sea un pico de ±3 a 8 °C
+        prob_perdida: Probabilidad de que una lectura falte
+    """
+    ids = _camaras(camaras)
+    rng = np.random.default_rng(seed)
+    primer_dia = datetime.combine(desde, datetime.min.time())
+    total_dias = (hasta - desde).days + 1
+    
+    for inicio in range(0, total_dias, dias_por_bloque):
+        dias = min(dias_por_bloque, total_dias - inicio)
+        dia_bloque = primer_dia + timedelta(days=inicio)
+        forma = (dias, MINUTOS_DIA, len(ids))
+        
+        temps = rng.uniform(TEMP_NORMAL_MIN, TEMP_NORMAL_MAX, forma) + rng.uniform(-0.5, 0.5, forma)
+        estados = np.zeros(forma, dtype=np.int8)
+        eventos = _eventos(rng, dias, len(ids))
+        _aplicar_eventos(rng, temps, estados, eventos)
+        
+        if prob_pico:
+            picos = rng.random(forma) < prob_pico
+            temps[picos] += rng.choice([-1, 1], picos.sum()) * rng.uniform(3, 8, picos.sum())
+        temps = np.round(temps, 1)
+        presentes = rng.random(forma) >= prob_perdida if prob_perdida else None
+        
+        # Lecturas en orden (día, minuto, cámara): los ids crecen con el tiempo, como en producción
+        minutos = np.datetime64(dia_bloque, 's') + np.arange(dias * MINUTOS_DIA) * np.timedelta64(60, 's')
+        lecturas = {
+            'camara_id': np.broadcast_to(ids, forma).reshape(-1),
+            'timestamp': np.repeat(minutos, len(ids)),
+            'temperatura_c': temps.reshape(-1),
+            'estado': estados.reshape(-1),
+        }
+        if presentes is not None:
+            mascara = presentes.reshape(-1)
+            lecturas = {clave: valores[mascara] for clave, valores in lecturas.items()}
+        
+        orden = np.lexsort((eventos['minuto'], eventos['camara'], eventos['dia']))
+        eventos = {clave: valores[orden] for clave, valores in eventos.items()}
+        
+        yield Bloque(
+            dia_bloque, dias, lecturas,
+            {
+                'camara_id': ids[eventos['camara']],
+                'clase': eventos['clase'],
+                'inicio': (np.datetime64(dia_bloque, 's')
+                           + eventos['dia'] * np.timedelta64(1, 'D')
+                           + eventos['minuto'] * np.timedelta64(60, 's')),
+                'duracion': eventos['duracion'],
+                'temp_max': eventos['temp_max'],
+            },
+            _resumen(dia_bloque, ids, temps, presentes, eventos)
+        )
+
+
+def _resumen(dia_bloque: datetime, ids: np.ndarray, temps: np.ndarray, presentes: Optional[np.ndarray],
+             eventos: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Resumen diario por cámara (filas en orden de día y cámara)"""
+    dias, _, camaras = temps.shape
+    if presentes is not None:
+        validas = np.where(presentes, temps, np.nan)
+        temp_min, temp_max, promedio = np.nanmin(validas, axis=1), np.nanmax(validas, axis=1), np.nanmean(validas, axis=1)
+        total = presentes.sum(axis=1)
+    else:
+        temp_min, temp_max, promedio = temps.min(axis=1), temps.max(axis=1), temps.mean(axis=1)
+        total = np.full((dias, camaras), MINUTOS_DIA)
+    
+    conteos = np.zeros((2, dias, camaras), dtype=np.int64)
+    np.add.at(conteos, ((eventos['clase'] == 3).astype(int), eventos['dia'], eventos['camara']), 1)
+    
+    return {
+        'fecha': np.repeat(np.datetime64(dia_bloque.date(), 'D') + np.arange(dias), camaras),
+        'camara_id': np.tile(ids, dias),
+        'temp_min': temp_min.reshape(-1),
+        'temp_max': temp_max.reshape(-1),
+        'temp_promedio': np.round(promedio, 2).reshape(-1),
+        'total_lecturas': total.reshape(-1),
+        'alertas_descongelamiento': conteos[0].reshape(-1),
+        'fallas_detectadas': conteos[1].reshape(-1),
+    }
+
+
+class DatasetSintetico:
+    """Filas por tabla de Supabase y árbol de Firebase"""
+    
+    def __init__(self):
+        self.tablas: Dict[str, List[Dict]] = {
+            'sucursales': [],
+            'camaras_frio': [],
+            'usuarios': [],
+            'lecturas_temperatura': [],
+            'eventos_temperatura': [],
+            'resumen_diario_camara': [],
+        }
+        self.firebase: Dict = {'status': {}, 'eventos': {}}
+    
+    def resumen(self) -> Dict[str, int]:
+        return {tabla: len(filas) for tabla, filas in self.tablas.items()}
+
+
+def generar_dataset(
+    camaras: int = 5,
+    sucursales: int = 2,
+    dias: int = 14,
+    fin: Optional[date] = None,
+    seed: int = 42,
+    dias_firebase: int = 1,
+    usuarios_por_sucursal: int = 2
+) -> DatasetSintetico:
+    """
+    Genera el dataset completo en filas (dicts), con sucursales, cámaras y usuarios.
+    
+    Args:
+        camaras: Cantidad total de cámaras (se reparten entre las sucursales)
+        sucursales: Cantidad de sucursales
+        dias: Días de historia, terminando en `fin` (incluido)
+        fin: Último día (por defecto hoy)
+        seed: Semilla del generador
+        dias_firebase: Últimos días que además se publican en el árbol de Firebase
+        usuarios_por_sucursal: Encargados por sucursal (además de un ADMIN)
+    """
+    fin = fin or date.today()
+    desde = fin - timedelta(days=dias - 1)
+    primer_dia = datetime.combine(desde, datetime.min.time())
+    dataset = DatasetSintetico()
+    tablas = dataset.tablas
+    
+    for s in range(1, sucursales + 1):
+        tablas['sucursales'].append({
+            'id': s,
+            'nombre': f'Sucursal {s}',
+            'direccion': f'Calle {s} #{100 * s}',
+            'descripcion': None,
+            'activa': True,
+            'created_at': primer_dia.isoformat()
+        })
+    
+    tablas['usuarios'].append({
+        'id': 1, 'firebase_uid': 'uid_admin', 'email': 'admin@coldtrack.test', 'nombre': 'Admin',
+        'rol': 'ADMIN', 'sucursal_id': None, 'activo': True, 'created_at': primer_dia.isoformat()
+    })
+    for s in range(1, sucursales + 1):
+        for u in range(usuarios_por_sucursal):
+            usuario_id = len(tablas['usuarios']) + 1
+            tablas['usuarios'].append({
+                'id': usuario_id, 'firebase_uid': f'uid_{usuario_id}', 'email': f'encargado{usuario_id}@coldtrack.test',
+                'nombre': f'Encargado {usuario_id}', 'rol': 'ENCARGADO', 'sucursal_id': s, 'activo': True,
+                'created_at': primer_dia.isoformat()
+            })
+    
+    for c in range(1, camaras + 1):
+        tablas['camaras_frio'].append({
+            'id': c,
+            'nombre': f'Cámara {c}',
+            'codigo': f'CAM-{c:03d}',
+            'firebase_path': f'DEVICE_{c:03d}',
+            'sucursal_id': (c - 1) % sucursales + 1,
+            'tipo': 'CAMARA',
+            'activa': True,
+            'umbral_min_c': -30.0,
+            'umbral_max_c': 4.0,
+            'created_at': primer_dia.isoformat()
+        })
+    
+    rutas = {camara['id']: camara['firebase_path'] for camara in tablas['camaras_frio']}
+    desde_firebase = np.datetime64(fin - timedelta(days=dias_firebase - 1), 'D')
+    
+    for bloque in iterar_bloques(camaras, desde, fin, seed=seed):
+        tablas['lecturas_temperatura'] += bloque.filas_lecturas()
+        tablas['eventos_temperatura'] += bloque.filas_eventos()
+        tablas['resumen_diario_camara'] += bloque.filas_resumen()
+        if dias_firebase:
+            _publicar_firebase(dataset.firebase, bloque, rutas, desde_firebase)
+    
+    for filas in tablas.values():
+        for i, fila in enumerate(filas, start=1):
+            fila.setdefault('id', i)
+    
+    return dataset
+
+
+def _publicar_firebase(arbol: Dict, bloque: Bloque, rutas: Dict[int, str], desde: np.datetime64):
+    """
+    Agrega los días del bloque desde `desde` al árbol de Firebase
+    (timestamps en segundos, hora local).
+    
+    Los ids de evento son los mismos firebase_event_id de eventos_temperatura,
+    así un ciclo de sincronización sobre datos ya cargados no crea duplicados.
+    """
+    lecturas = bloque.lecturas
+    dias = lecturas['timestamp'].astype('datetime64[D]')
+    for dia in np.unique(dias[dias >= desde]):
+        fecha = dia.astype(datetime)
+        y, m, d = f'{fecha.year}', f'{fecha.month:02d}', f'{fecha.day:02d}'
+        # Epoch de la hora local (como datetime.timestamp() en la sincronización)
+        base_ts = int(datetime.combine(fecha, datetime.min.time()).timestamp())
+        del_dia = dias == dia
+        segundos = (lecturas['timestamp'][del_dia] - np.datetime64(fecha, 's')).astype(np.int64) + base_ts
+        
+        for camara_id, ruta in rutas.items():
+            propias = lecturas['camara_id'][del_dia] == camara_id
+            temps = lecturas['temperatura_c'][del_dia][propias].tolist()
+            estados = ESTADOS[lecturas['estado'][del_dia][propias]]
+            ts = segundos[propias].tolist()
+            dispositivo = arbol['status'].setdefault(ruta, {})
+            dispositivo.setdefault(y, {}).setdefault(m, {})[d] = {
+                str(t): {'temp': temp, 'state': estado} for t, temp, estado in zip(ts, temps, estados)
+            }
+            if ts:
+                dispositivo['live'] = {'temp': temps[-1], 'state': estados[-1], 'ts': ts[-1]}
+        
+        eventos = bloque.eventos
+        del_dia = eventos['inicio'].astype('datetime64[D]') == dia
+        ids = np.array(bloque.firebase_event_ids(), dtype=object)[del_dia]
+        inicios = (eventos['inicio'][del_dia] - np.datetime64(fecha, 's')).astype(np.int64) + base_ts
+        for camara_id, evento_id, clase, inicio, duracion, temp_max in zip(
+            eventos['camara_id'][del_dia].tolist(), ids, eventos['clase'][del_dia].tolist(), inicios.tolist(),
+            eventos['duracion'][del_dia].tolist(), eventos['temp_max'][del_dia].tolist()
+        ):
+            arbol['eventos'].setdefault(rutas[camara_id], {}).setdefault(y, {}).setdefault(m, {}) \
+                .setdefault(d, {})[evento_id] = {
+                    'start_ts': inicio,
+                    'end_ts': inicio + 60 * duracion,
+                    'duration_ms': 60000 * duracion,
+                    'max_temp': temp_max,
+                    'type': TIPOS[clase]
+                }
+
+
+# Escritura
+COLUMNAS_CSV = {
+    'lecturas_temperatura': ['camara_id', 'timestamp', 'temperatura_c', 'origen'],
+    'eventos_temperatura': ['camara_id', 'firebase_event_id', 'tipo', 'estado', 'fecha_inicio', 'fecha_fin',
+                            'temp_max_c', 'duracion_minutos'],
+    'resumen_diario_camara': ['fecha', 'camara_id', 'temp_min', 'temp_max', 'temp_promedio', 'total_lecturas',
+                              'alertas_descongelamiento', 'fallas_detectadas'],
+}
+
+
+def _decimas(valores: np.ndarray) -> np.ndarray:
+    """Formatea temperaturas con un decimal usando una tabla (mucho más rápido que '%.1f' por valor)"""
+    enteros = np.round(valores * 10).astype(np.int64)
+    minimo = int(enteros.min()) if enteros.size else 0
+    tabla = np.array([f'{v / 10:.1f}' for v in range(minimo, int(enteros.max()) + 1 if enteros.size else 1)], dtype=object)
+    return tabla[enteros - minimo]
+
+
+def _como_texto(valores: np.ndarray) -> np.ndarray:
+    """Convierte a texto solo los valores distintos (ids y timestamps se repiten mucho)"""
+    unicos, indices = np.unique(valores, return_inverse=True)
+    if np.issubdtype(unicos.dtype, np.datetime64):
+        return np.datetime_as_string(unicos, unit='s').astype(object)[indices]
+    return unicos.astype(str).astype(object)[indices]
+
+
+def _columnas_texto(bloque: Bloque, tabla: str) -> List[np.ndarray]:
+    if tabla == 'lecturas_temperatura':
+        lecturas = bloque.lecturas
+        return [
+            _como_texto(lecturas['camara_id']),
+            _como_texto(lecturas['timestamp']),
+            _decimas(lecturas['temperatura_c']),
+            np.full(lecturas['camara_id'].size, ORIGEN, dtype=object),
+        ]
+    filas = bloque.filas_eventos() if tabla == 'eventos_temperatura' else bloque.filas_resumen()
+    return [np.array([str(fila[columna]) for fila in filas], dtype=object) for columna in COLUMNAS_CSV[tabla]]
+
+
+def escribir_csv(bloque: Bloque, directorio: Union[str, Path]) -> Dict[str, int]:
+    """
+    Agrega el bloque a <directorio>/<tabla>.csv (con encabezado la primera vez),
+    en el formato de COPY ... FROM ... WITH (FORMAT csv, HEADER).
+    
+    Returns:
+        Filas escritas por tabla
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    escritas = {}
+    for tabla, columnas in COLUMNAS_CSV.items():
+        archivo = directorio / f'{tabla}.csv'
+        partes = _columnas_texto(bloque, tabla)
+        lineas = partes[0]
+        for parte in partes[1:]:
+            lineas = lineas + ',' + parte
+        nuevo = not archivo.exists()
+        with open(archivo, 'a', encoding='utf-8', newline='') as f:
+            if nuevo:
+                f.write(','.join(columnas) + '\n')
+            if len(lineas):
+                f.write('\n'.join(lineas.tolist()) + '\n')
+        escritas[tabla] = len(lineas)
+    return escritas
+
+
+def escribir_parquet(bloques: Iterable[Bloque], directorio: Union[str, Path]) -> Dict[str, int]:
+    """
+    Escribe todos los bloques en <directorio>/<tabla>.parquet (un row group por bloque).
+    Requiere pyarrow.
+    """
+    if pyarrow is None:
+        raise ImportError("La salida Parquet requiere pyarrow (pip install pyarrow)")
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    escritores = {}
+    escritas = {tabla: 0 for tabla in COLUMNAS_CSV}
+    try:
+        for bloque in bloques:
+            eventos = bloque.filas_eventos()
+            datos = {
+                'lecturas_temperatura': pyarrow.table({
+                    'camara_id': bloque.lecturas['camara_id'].astype(np.int32),
+                    'timestamp': bloque.lecturas['timestamp'],
+                    'temperatura_c': bloque.lecturas['temperatura_c'],
+                    'origen': pyarrow.repeat(ORIGEN, bloque.lecturas['camara_id'].size),
+                }),
+                'eventos_temperatura': pyarrow.table({
+                    columna: [fila[columna] for fila in eventos]
+                    for columna in COLUMNAS_CSV['eventos_temperatura']
+                }),
+                'resumen_diario_camara': pyarrow.table(bloque.resumen),
+            }
+            for tabla, tabla_arrow in datos.items():
+                if tabla not in escritores:
+                    escritores[tabla] = pyarrow.parquet.ParquetWriter(directorio / f'{tabla}.parquet', tabla_arrow.schema)
+                escritores[tabla].write_table(tabla_arrow)
+                escritas[tabla] += tabla_arrow.num_rows
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return escritas
+
+
+def cargar_supabase(bloque: Bloque, client, lote: int = 1000, upsert: bool = False) -> Dict[str, int]:
+    """
+    Inserta el bloque en Supabase por lotes.
+    
+    Con upsert=True re-ejecutar la carga no duplica filas, pero requiere
+    índices únicos en lecturas_temperatura (camara_id, timestamp),
+    eventos_temperatura (firebase_event_id) y resumen_diario_camara (camara_id, fecha).
+    """
+    conflictos = {
+        'lecturas_temperatura': 'camara_id,timestamp',
+        'eventos_temperatura': 'firebase_event_id',
+        'resumen_diario_camara': 'camara_id,fecha',
+    }
+    filas = {
+        'lecturas_temperatura': bloque.filas_lecturas(),
+        'eventos_temperatura': bloque.filas_eventos(),
+        'resumen_diario_camara': bloque.filas_resumen(),
+    }
+    cargadas = {}
+    for tabla, registros in filas.items():
+        for i in range(0, len(registros), lote):
+            parte = registros[i:i + lote]
+            if upsert:
+                client.table(tabla).upsert(parte, on_conflict=conflictos[tabla]).execute()
+            else:
+                client.table(tabla).insert(parte).execute()
+        cargadas[tabla] = len(registros)
+    return cargadas
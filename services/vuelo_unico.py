@@ -0,0 +1,122 @@
+"""
+Coalescencia de cálculos idénticos concurrentes (single-flight)
+
+Cuando una sucursal abre el dashboard en varias pantallas a la vez, o muchos
+usuarios lo cargan en el cambio de turno, llegan juntos requests idénticos
+de get_analisis_ejecutivo o get_kpis, y cada uno repetía las mismas
+consultas a Supabase. Con ejecutar(clave, funcion):
+
+- El primer request con una clave (el líder) ejecuta la función
+- Los que llegan con la misma clave mientras tanto esperan y reciben el
+  mismo resultado (o la misma excepción), sin consultar Supabase
+- Al terminar, la clave se libera: no es un caché, el request siguiente
+  vuelve a calcular
+
+La clave debe incluir la consulta normalizada y el alcance del usuario
+(cámaras visibles), para no compartir datos entre sucursales. El resultado
+se comparte entre requests: no debe modificarse después de retornarlo.
+
+Un seguidor espera a lo más VUELO_UNICO_TIMEOUT_S segundos; si el líder no
+terminó, calcula por su cuenta. La coalescencia es por proceso (cada worker
+de gunicorn tiene la suya).
+
+Uso:
+    >>> clave = ('analisis_ejecutivo', fecha_inicio, fecha_fin, camara_ids)
+    >>> data = vuelo_unico.ejecutar(clave, lambda: calcular(client, ...))
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+from django.conf import settings
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Vuelo:
+    """Cálculo en curso para una clave"""
+    
+    __slots__ = ('terminado', 'resultado', 'error', 'seguidores')
+    
+    def __init__(self):
+        self.terminado = threading.Event()
+        self.resultado = None
+        self.error: Optional[BaseException] = None
+        self.seguidores = 0
+
+
+class VueloUnico:
+    """Agrupa las llamadas concurrentes con la misma clave en una sola ejecución"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso: Dict[Hashable, Vuelo] = {}
+        self._contadores = {'ejecutados': 0, 'compartidos': 0, 'timeouts': 0, 'errores': 0}
+    
+    def ejecutar(self, clave: Hashable, funcion: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Ejecuta funcion() o espera el resultado de la ejecución en curso con la misma clave.
+        
+        Args:
+            clave: Consulta normalizada + alcance del usuario (hashable)
+            funcion: Cálculo sin argumentos
+            timeout: Segundos que espera un seguidor (default: VUELO_UNICO_TIMEOUT_S)
+        
+        Returns:
+            El resultado de funcion(), propio o compartido
+        """
+        with self._lock:
+            vuelo = self._en_curso.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._en_curso[clave] = Vuelo()
+                self._contadores['ejecutados'] += 1
+            else:
+                vuelo.seguidores += 1
+        
+        if lider:
+            return self._liderar(clave, vuelo, funcion)
+        
+        timeout = settings.VUELO_UNICO_TIMEOUT_S if timeout is None else timeout
+        if not vuelo.terminado.wait(timeout):
+            with self._lock:
+                self._contadores['timeouts'] += 1
+            logger.warning(f"Cálculo compartido {clave!r} sin terminar tras {timeout}s, se calcula aparte")
+            return funcion()
+        
+        with self._lock:
+            self._contadores['compartidos'] += 1
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+    
+    def _liderar(self, clave: Hashable, vuelo: Vuelo, funcion: Callable[[], Any]) -> Any:
+        try:
+            vuelo.resultado = funcion()
+            return vuelo.resultado
+        except BaseException as e:
+            vuelo.error = e
+            with self._lock:
+                self._contadores['errores'] += 1
+            raise
+        finally:
+            # Liberar la clave antes de avisar: quien llegue después calcula de nuevo
+            with self._lock:
+                del self._en_curso[clave]
+            vuelo.terminado.set()
+            if vuelo.seguidores:
+                logger.debug(f"Cálculo {clave!r} compartido con {vuelo.seguidores} request(s)")
+    
+    def estadisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._contadores, 'en_curso': len(self._en_curso)}
+    
+    def reset(self):
+        """Reinicia los contadores (los cálculos en curso siguen)"""
+        with self._lock:
+            for evento in self._contadores:
+                self._contadores[evento] = 0
+
+
+# Coalescencia compartida por el proceso
+vuelo_unico = VueloUnico()